@@ -0,0 +1,298 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+Schéma tel que créé jusqu'ici par Base.metadata.create_all au démarrage.
+Base existante (créée par create_all) : ne pas rejouer cette migration, la marquer
+comme appliquée avec « alembic stamp 0001 ».
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('app_config',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('data', sa.JSON().with_variant(postgresql.JSONB(astext_type=sa.Text()), 'postgresql'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('app_settings',
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.Column('value', sa.JSON(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_table('competences',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('code', sa.String(length=20), nullable=False),
+    sa.Column('libelle', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_competences_code'), 'competences', ['code'], unique=True)
+    op.create_table('dispos_agatt',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('nom', sa.String(length=100), nullable=False),
+    sa.Column('prenom', sa.String(length=100), nullable=False),
+    sa.Column('type_occ', sa.String(length=5), nullable=False),
+    sa.Column('imported_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('date', 'nom', 'prenom', 'type_occ', name='uq_dispo_agatt')
+    )
+    op.create_index(op.f('ix_dispos_agatt_date'), 'dispos_agatt', ['date'], unique=False)
+    op.create_table('equipes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('code', sa.String(length=10), nullable=False),
+    sa.Column('libelle', sa.String(length=50), nullable=False),
+    sa.Column('couleur', sa.String(length=10), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_equipes_code'), 'equipes', ['code'], unique=True)
+    op.create_table('holidays',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('label', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_holidays_date'), 'holidays', ['date'], unique=True)
+    op.create_table('piquets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('code', sa.String(length=20), nullable=False),
+    sa.Column('libelle', sa.String(length=120), nullable=False),
+    sa.Column('is_astreinte', sa.Boolean(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_piquets_code'), 'piquets', ['code'], unique=True)
+    op.create_index(op.f('ix_piquets_position'), 'piquets', ['position'], unique=False)
+    op.create_table('reminder_batches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('annee', sa.Integer(), nullable=False),
+    sa.Column('mois', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('annee', 'mois', name='uq_reminder_batch')
+    )
+    op.create_index(op.f('ix_reminder_batches_status'), 'reminder_batches', ['status'], unique=False)
+    op.create_table('scheduler_jobs',
+    sa.Column('id', sa.String(length=50), nullable=False),
+    sa.Column('trigger', sa.String(length=100), nullable=True),
+    sa.Column('next_run_at', sa.DateTime(), nullable=True),
+    sa.Column('last_started_at', sa.DateTime(), nullable=True),
+    sa.Column('last_finished_at', sa.DateTime(), nullable=True),
+    sa.Column('last_duration_ms', sa.Integer(), nullable=True),
+    sa.Column('last_status', sa.String(length=10), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('last_holder', sa.String(length=100), nullable=True),
+    sa.Column('last_origin', sa.String(length=10), nullable=True),
+    sa.Column('running_since', sa.DateTime(), nullable=True),
+    sa.Column('running_holder', sa.String(length=100), nullable=True),
+    sa.Column('run_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('gardes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('slot', sa.Enum('JOUR', 'NUIT', name='slot'), nullable=False),
+    sa.Column('is_weekend', sa.Boolean(), nullable=False),
+    sa.Column('is_holiday', sa.Boolean(), nullable=False),
+    sa.Column('equipe_id', sa.Integer(), nullable=True),
+    sa.Column('validated', sa.Boolean(), nullable=False),
+    sa.Column('validated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['equipe_id'], ['equipes.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('date', 'slot', name='uq_date_slot_team')
+    )
+    op.create_index(op.f('ix_gardes_date'), 'gardes', ['date'], unique=False)
+    op.create_table('personnels',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nom', sa.String(), nullable=False),
+    sa.Column('prenom', sa.String(), nullable=False),
+    sa.Column('grade', sa.String(), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=True),
+    sa.Column('statut', sa.Enum('pro', 'volontaire', 'double', name='statut'), nullable=False),
+    sa.Column('hashed_password', sa.String(length=255), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('equipe_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['equipe_id'], ['equipes.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_personnels_email'), 'personnels', ['email'], unique=True)
+    op.create_index(op.f('ix_personnels_equipe_id'), 'personnels', ['equipe_id'], unique=False)
+    op.create_index(op.f('ix_personnels_id'), 'personnels', ['id'], unique=False)
+    op.create_table('piquet_competences',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('piquet_id', sa.Integer(), nullable=False),
+    sa.Column('competence_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['competence_id'], ['competences.id'], ),
+    sa.ForeignKeyConstraint(['piquet_id'], ['piquets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('piquet_id', 'competence_id', name='uq_piquet_comp')
+    )
+    op.create_index(op.f('ix_piquet_competences_competence_id'), 'piquet_competences', ['competence_id'], unique=False)
+    op.create_index(op.f('ix_piquet_competences_piquet_id'), 'piquet_competences', ['piquet_id'], unique=False)
+    op.create_table('validation_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('annee', sa.Integer(), nullable=False),
+    sa.Column('mois', sa.Integer(), nullable=False),
+    sa.Column('equipe_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('validateur', sa.String(length=255), nullable=True),
+    sa.Column('mails_total', sa.Integer(), nullable=False),
+    sa.Column('pdf_size', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['equipe_id'], ['equipes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('annee', 'mois', 'equipe_id', 'seq', name='uq_validation_job')
+    )
+    op.create_index(op.f('ix_validation_jobs_equipe_id'), 'validation_jobs', ['equipe_id'], unique=False)
+    op.create_index(op.f('ix_validation_jobs_status'), 'validation_jobs', ['status'], unique=False)
+    op.create_table('affectations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('garde_id', sa.Integer(), nullable=False),
+    sa.Column('piquet_id', sa.Integer(), nullable=False),
+    sa.Column('personnel_id', sa.Integer(), nullable=False),
+    sa.Column('statut_service', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('ope_checked', sa.Boolean(), server_default='false', nullable=False),
+    sa.Column('ope_checked_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['garde_id'], ['gardes.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['personnel_id'], ['personnels.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['piquet_id'], ['piquets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('garde_id', 'personnel_id', name='uq_garde_personnel'),
+    sa.UniqueConstraint('garde_id', 'piquet_id', name='uq_garde_piquet')
+    )
+    op.create_index(op.f('ix_affectations_garde_id'), 'affectations', ['garde_id'], unique=False)
+    op.create_index(op.f('ix_affectations_personnel_id'), 'affectations', ['personnel_id'], unique=False)
+    op.create_index(op.f('ix_affectations_piquet_id'), 'affectations', ['piquet_id'], unique=False)
+    op.create_table('indisponibilites',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('garde_id', sa.Integer(), nullable=False),
+    sa.Column('personnel_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['garde_id'], ['gardes.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['personnel_id'], ['personnels.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('garde_id', 'personnel_id', name='uq_indi_garde_pers')
+    )
+    op.create_index(op.f('ix_indisponibilites_garde_id'), 'indisponibilites', ['garde_id'], unique=False)
+    op.create_index(op.f('ix_indisponibilites_personnel_id'), 'indisponibilites', ['personnel_id'], unique=False)
+    op.create_table('personnel_competences',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('personnel_id', sa.Integer(), nullable=False),
+    sa.Column('competence_id', sa.Integer(), nullable=False),
+    sa.Column('date_obtention', sa.Date(), nullable=True),
+    sa.Column('date_expiration', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['competence_id'], ['competences.id'], ),
+    sa.ForeignKeyConstraint(['personnel_id'], ['personnels.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('personnel_id', 'competence_id', name='uq_person_comp')
+    )
+    op.create_index(op.f('ix_personnel_competences_competence_id'), 'personnel_competences', ['competence_id'], unique=False)
+    op.create_index(op.f('ix_personnel_competences_personnel_id'), 'personnel_competences', ['personnel_id'], unique=False)
+    op.create_table('personnel_roles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('personnel_id', sa.Integer(), nullable=False),
+    sa.Column('role', sa.Enum('ADMIN', 'OFFICIER', 'OPE', 'CHEF_EQUIPE', 'ADJ_CHEF_EQUIPE', 'AGENT', name='roleenum'), nullable=False),
+    sa.ForeignKeyConstraint(['personnel_id'], ['personnels.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('personnel_id', 'role', name='uq_personnel_role')
+    )
+    op.create_table('reminder_tasks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('batch_id', sa.Integer(), nullable=False),
+    sa.Column('personnel_id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['batch_id'], ['reminder_batches.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['personnel_id'], ['personnels.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('batch_id', 'personnel_id', name='uq_reminder_task')
+    )
+    op.create_index(op.f('ix_reminder_tasks_batch_id'), 'reminder_tasks', ['batch_id'], unique=False)
+    op.create_index(op.f('ix_reminder_tasks_personnel_id'), 'reminder_tasks', ['personnel_id'], unique=False)
+    op.create_index(op.f('ix_reminder_tasks_status'), 'reminder_tasks', ['status'], unique=False)
+    op.create_table('validation_mails',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('recipient', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['job_id'], ['validation_jobs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job_id', 'kind', 'recipient', name='uq_validation_mail')
+    )
+    op.create_index(op.f('ix_validation_mails_job_id'), 'validation_mails', ['job_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_validation_mails_job_id'), table_name='validation_mails')
+    op.drop_table('validation_mails')
+    op.drop_index(op.f('ix_reminder_tasks_status'), table_name='reminder_tasks')
+    op.drop_index(op.f('ix_reminder_tasks_personnel_id'), table_name='reminder_tasks')
+    op.drop_index(op.f('ix_reminder_tasks_batch_id'), table_name='reminder_tasks')
+    op.drop_table('reminder_tasks')
+    op.drop_table('personnel_roles')
+    op.drop_index(op.f('ix_personnel_competences_personnel_id'), table_name='personnel_competences')
+    op.drop_index(op.f('ix_personnel_competences_competence_id'), table_name='personnel_competences')
+    op.drop_table('personnel_competences')
+    op.drop_index(op.f('ix_indisponibilites_personnel_id'), table_name='indisponibilites')
+    op.drop_index(op.f('ix_indisponibilites_garde_id'), table_name='indisponibilites')
+    op.drop_table('indisponibilites')
+    op.drop_index(op.f('ix_affectations_piquet_id'), table_name='affectations')
+    op.drop_index(op.f('ix_affectations_personnel_id'), table_name='affectations')
+    op.drop_index(op.f('ix_affectations_garde_id'), table_name='affectations')
+    op.drop_table('affectations')
+    op.drop_index(op.f('ix_validation_jobs_status'), table_name='validation_jobs')
+    op.drop_index(op.f('ix_validation_jobs_equipe_id'), table_name='validation_jobs')
+    op.drop_table('validation_jobs')
+    op.drop_index(op.f('ix_piquet_competences_piquet_id'), table_name='piquet_competences')
+    op.drop_index(op.f('ix_piquet_competences_competence_id'), table_name='piquet_competences')
+    op.drop_table('piquet_competences')
+    op.drop_index(op.f('ix_personnels_id'), table_name='personnels')
+    op.drop_index(op.f('ix_personnels_equipe_id'), table_name='personnels')
+    op.drop_index(op.f('ix_personnels_email'), table_name='personnels')
+    op.drop_table('personnels')
+    op.drop_index(op.f('ix_gardes_date'), table_name='gardes')
+    op.drop_table('gardes')
+    op.drop_table('scheduler_jobs')
+    op.drop_index(op.f('ix_reminder_batches_status'), table_name='reminder_batches')
+    op.drop_table('reminder_batches')
+    op.drop_index(op.f('ix_piquets_position'), table_name='piquets')
+    op.drop_index(op.f('ix_piquets_code'), table_name='piquets')
+    op.drop_table('piquets')
+    op.drop_index(op.f('ix_holidays_date'), table_name='holidays')
+    op.drop_table('holidays')
+    op.drop_index(op.f('ix_equipes_code'), table_name='equipes')
+    op.drop_table('equipes')
+    op.drop_index(op.f('ix_dispos_agatt_date'), table_name='dispos_agatt')
+    op.drop_table('dispos_agatt')
+    op.drop_index(op.f('ix_competences_code'), table_name='competences')
+    op.drop_table('competences')
+    op.drop_table('app_settings')
+    op.drop_table('app_config')
+    # types ENUM Postgres créés avec les tables
+    bind = op.get_bind()
+    for name in ("roleenum", "statut", "slot"):
+        sa.Enum(name=name).drop(bind, checkfirst=True)
@@ -0,0 +1,30 @@
+"""list filter indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+Index des filtres + pagination keyset des listes (affectations, indisponibilités,
+personnels, gardes par équipe).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_affectations_personnel_id_id', 'affectations', ['personnel_id', 'id'], unique=False)
+    op.create_index('ix_gardes_equipe_id_date', 'gardes', ['equipe_id', 'date'], unique=False)
+    op.create_index('ix_indisponibilites_personnel_id_id', 'indisponibilites', ['personnel_id', 'id'], unique=False)
+    op.create_index('ix_personnels_nom_prenom_id', 'personnels', ['nom', 'prenom', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_personnels_nom_prenom_id', table_name='personnels')
+    op.drop_index('ix_indisponibilites_personnel_id_id', table_name='indisponibilites')
+    op.drop_index('ix_gardes_equipe_id_date', table_name='gardes')
+    op.drop_index('ix_affectations_personnel_id_id', table_name='affectations')
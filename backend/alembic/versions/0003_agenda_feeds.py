@@ -0,0 +1,33 @@
+"""agenda feeds
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+Abonnements iCalendar des agents (token + version du flux pour l'ETag).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('agenda_feeds',
+    sa.Column('personnel_id', sa.Integer(), nullable=False),
+    sa.Column('token', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['personnel_id'], ['personnels.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('personnel_id')
+    )
+    op.create_index(op.f('ix_agenda_feeds_token'), 'agenda_feeds', ['token'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_agenda_feeds_token'), table_name='agenda_feeds')
+    op.drop_table('agenda_feeds')
@@ -0,0 +1,29 @@
+"""ref versions
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+Compteurs de version des données de référence (ETag des listes piquets / équipes /
+compétences).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('ref_versions',
+    sa.Column('name', sa.String(length=30), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ref_versions')
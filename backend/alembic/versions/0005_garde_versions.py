@@ -0,0 +1,38 @@
+"""garde versions
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+
+Version de chaque garde (gardes.version) et journal de ses changements (garde_changes),
+pour les réponses delta des mutations et GET /gardes/{id}/changes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('garde_changes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('garde_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('action', sa.String(length=10), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['garde_id'], ['gardes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_garde_changes_garde_id_version', 'garde_changes', ['garde_id', 'version'], unique=False)
+    op.add_column('gardes', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('gardes', 'version')
+    op.drop_index('ix_garde_changes_garde_id_version', table_name='garde_changes')
+    op.drop_table('garde_changes')
@@ -0,0 +1,24 @@
+"""affectation versions
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+Verrou optimiste des affectations (version_id_col) ; gardes.version (0005) sert de
+version_id_col aux gardes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('affectations', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('affectations', 'version')
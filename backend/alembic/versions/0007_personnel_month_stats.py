@@ -0,0 +1,74 @@
+"""personnel month stats
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+Compteurs mensuels par agent (app/services/month_stats.py), remplis depuis les affectations
+existantes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('personnel_month_stats',
+    sa.Column('personnel_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('gardes', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('nuits', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('weekend', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('holiday', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('pro', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('volontaire', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('astreinte', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['personnel_id'], ['personnels.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('personnel_id', 'year', 'month')
+    )
+    op.create_index('ix_personnel_month_stats_year_month', 'personnel_month_stats', ['year', 'month'], unique=False)
+
+    # remplissage initial (même agrégat que month_stats.rebuild, tables décrites ici)
+    aff = sa.table('affectations', sa.column('id'), sa.column('garde_id'), sa.column('piquet_id'),
+                   sa.column('personnel_id'), sa.column('statut_service'))
+    garde = sa.table('gardes', sa.column('id'), sa.column('date', sa.Date()), sa.column('slot'),
+                     sa.column('is_weekend', sa.Boolean()), sa.column('is_holiday', sa.Boolean()))
+    piquet = sa.table('piquets', sa.column('id'), sa.column('is_astreinte', sa.Boolean()))
+    stats = sa.table('personnel_month_stats', *(sa.column(c) for c in (
+        'personnel_id', 'year', 'month', 'gardes', 'nuits', 'weekend', 'holiday', 'pro',
+        'volontaire', 'astreinte', 'updated_at')))
+    year = sa.cast(sa.extract('year', garde.c.date), sa.Integer)
+    month = sa.cast(sa.extract('month', garde.c.date), sa.Integer)
+    statut = sa.func.lower(aff.c.statut_service)
+
+    def count_if(cond):
+        return sa.func.sum(sa.case((cond, 1), else_=0))
+
+    op.execute(stats.insert().from_select(
+        [c.name for c in stats.c],
+        sa.select(
+            aff.c.personnel_id, year, month,
+            sa.func.count(aff.c.id),
+            count_if(sa.cast(garde.c.slot, sa.String) == 'NUIT'),
+            count_if(garde.c.is_weekend.is_(True)),
+            count_if(garde.c.is_holiday.is_(True)),
+            count_if(statut == 'pro'),
+            count_if(statut == 'volontaire'),
+            count_if(piquet.c.is_astreinte.is_(True)),
+            sa.func.current_timestamp(),
+        )
+        .join(garde, garde.c.id == aff.c.garde_id)
+        .join(piquet, piquet.c.id == aff.c.piquet_id)
+        .group_by(aff.c.personnel_id, year, month)
+    ))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_personnel_month_stats_year_month', table_name='personnel_month_stats')
+    op.drop_table('personnel_month_stats')
@@ -0,0 +1,37 @@
+"""affectation conflicts
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+
+Affectations futures plus couvertes par une compétence exigée (balayage quotidien
+app/services/competence_sweep.py).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('affectation_conflicts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('affectation_id', sa.Integer(), nullable=False),
+    sa.Column('competence_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('expired_on', sa.Date(), nullable=True),
+    sa.Column('detected_at', sa.DateTime(), nullable=False),
+    sa.Column('notified_at', sa.DateTime(), nullable=True),
+    sa.Column('resolved_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['affectation_id'], ['affectations.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['competence_id'], ['competences.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('affectation_id', 'competence_id', name='uq_conflict_affectation_competence')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('affectation_conflicts')
@@ -0,0 +1,35 @@
+"""seed ref versions
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+
+Une ligne par liste de référence dans ref_versions (app/services/ref_versions.py) : l'ETag
+porte dès le départ la date de création propre à la base, plus de "<liste>-0" commun à toutes.
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+NAMES = ('piquets', 'equipes', 'competences')
+
+
+def upgrade() -> None:
+    versions = sa.table('ref_versions', sa.column('name', sa.String()),
+                        sa.column('version', sa.Integer()), sa.column('changed_at', sa.DateTime()))
+    existing = {name for (name,) in op.get_bind().execute(sa.select(versions.c.name))}
+    now = datetime.utcnow()
+    rows = [{'name': n, 'version': 0, 'changed_at': now} for n in NAMES if n not in existing]
+    if rows:
+        op.bulk_insert(versions, rows)
+
+
+def downgrade() -> None:
+    # seules les lignes jamais incrémentées viennent de cette migration
+    op.execute(sa.text("DELETE FROM ref_versions WHERE version = 0"))
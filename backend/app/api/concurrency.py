@@ -0,0 +1,77 @@
+# app/api/concurrency.py
+# Contrôle de concurrence optimiste des gardes et affectations (If-Match, 409 / 412 structurés)
+#
+# Garde et Affectation ont une colonne version (version_id_col SQLAlchemy) : tout UPDATE /
+# DELETE ORM vérifie la version lue, sans verrou pessimiste. Les routes de mutation :
+#   - acceptent If-Match avec l'ETag de la garde (ou de l'affectation) tel que le client l'a vu ;
+#     s'il ne correspond plus → 412, rien n'est écrit ;
+#   - transforment une course perdue à l'écriture (contrainte unique uq_garde_piquet /
+#     uq_garde_personnel / uq_date_slot_team, version changée entre lecture et écriture) en 409
+#     au lieu d'une 500.
+# Dans les deux cas le corps contient l'état courant complet de la garde (GardeDelta full) :
+# le client se resynchronise sans autre requête.
+#   {"detail": {"code": "conflict" | "precondition_failed", "message": "...", "current": {...}}}
+from __future__ import annotations
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.db.models import Garde
+from app.services.garde_versions import garde_delta
+
+
+def garde_etag(garde: Garde) -> str:
+    return f'"garde-{garde.id}-{garde.version}"'
+
+
+def affectation_etag(aff) -> str:
+    return f'"affectation-{aff.id}-{aff.version}"'
+
+
+def if_match_ok(request: Request, *etags: str) -> bool:
+    """Comparaison forte (RFC 9110 §13.1.1) ; sans en-tête If-Match : pas de condition."""
+    header = request.headers.get("if-match")
+    if header is None or header.strip() == "*":
+        return True
+    tags = {t.strip() for t in header.split(",")}
+    return any(e in tags for e in etags)
+
+
+def conflict(
+    db: Session,
+    garde_id: int | None,
+    message: str,
+    status_code: int = 409,
+    code: str = "conflict",
+) -> HTTPException:
+    """Exception 409/412 avec l'état courant de la garde (transaction en cours annulée)."""
+    db.rollback()
+    garde = db.get(Garde, garde_id) if garde_id is not None else None
+    current = garde_delta(db, garde, None).model_dump(mode="json") if garde is not None else None
+    headers = {"ETag": garde_etag(garde)} if garde is not None else None
+    return HTTPException(
+        status_code,
+        {"code": code, "message": message, "current": current},
+        headers=headers,
+    )
+
+
+def require_if_match(request: Request, db: Session, garde: Garde, *etags: str) -> None:
+    """412 si If-Match ne désigne plus l'état courant (ETag de la garde accepté par défaut)."""
+    if not if_match_ok(request, garde_etag(garde), *etags):
+        raise conflict(db, garde.id, "Modifié par quelqu'un d'autre depuis votre lecture",
+                       status_code=412, code="precondition_failed")
+
+
+def commit_or_conflict(db: Session, garde_id: int | None, message: str) -> None:
+    """Commit ; une course perdue (contrainte unique, version changée) devient un 409."""
+    try:
+        db.commit()
+    except (IntegrityError, StaleDataError):
+        raise conflict(db, garde_id, message) from None
+
+
+def set_garde_etag(response: Response, garde: Garde) -> None:
+    response.headers["ETag"] = garde_etag(garde)
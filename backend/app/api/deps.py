@@ -1,5 +1,6 @@
-from typing import Generator
-from app.db.session import SessionLocal
+from typing import AsyncGenerator, Generator
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import SessionLocal, AsyncSessionLocal
 
 def get_session() -> Generator:
     db = SessionLocal()
@@ -7,3 +8,9 @@ def get_session() -> Generator:
         yield db
     finally:
         db.close()
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session async : pour les routes `async def` (ne consomme pas de thread du pool Starlette)."""
+    async with AsyncSessionLocal() as db:
+        yield db
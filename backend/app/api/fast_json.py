@@ -0,0 +1,76 @@
+# app/api/fast_json.py
+# Chemin de réponse rapide pour les grosses listes (gardes du mois, affectations, suggestions)
+#
+# Les routes concernées sélectionnent des tuples de colonnes (pas d'entités ORM) et les
+# encodent directement avec orjson : ni validation Pydantic du response_model, ni
+# jsonable_encoder, ni json stdlib. Le response_model reste déclaré sur la route pour la doc
+# OpenAPI ; la sortie est identique (dates ISO, enums par valeur, UTC en « Z »).
+# Sans orjson installé, repli sur le json stdlib (même format, plus lent).
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Sequence
+
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle
+    orjson = None
+
+
+def _default(v: Any):
+    if isinstance(v, datetime):
+        s = v.isoformat()
+        return s[:-6] + "Z" if s.endswith("+00:00") else s
+    if isinstance(v, date):
+        return v.isoformat()
+    if isinstance(v, Enum):
+        return v.value
+    raise TypeError(f"Type non sérialisable : {type(v).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def schema_columns(model: type, schema: type[BaseModel]) -> tuple:
+    """
+    Colonnes de `model` à sélectionner pour servir `schema`, dans l'ordre de ses champs :
+    un champ ajouté au schéma l'est aussi à la liste ; sans colonne du même nom sur le
+    modèle, AttributeError dès l'import du module de routes.
+    """
+    return tuple(getattr(model, name) for name in schema.model_fields)
+
+
+def rows_to_dicts(rows: Sequence) -> list[dict]:
+    """Lignes SQLAlchemy (Row) → dicts, clés = noms des colonnes sélectionnées."""
+    if not rows:
+        return []
+    fields = rows[0]._fields
+    return [dict(zip(fields, r)) for r in rows]
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def rows_response(rows: Sequence, response: Response | None = None) -> FastJSONResponse:
+    """
+    Réponse JSON des lignes ; `response` : l'objet Response injecté par FastAPI dans la route,
+    dont les headers déjà posés (X-Next-Cursor…) sont recopiés.
+    """
+    out = FastJSONResponse(rows_to_dicts(rows))
+    if response is not None:
+        for k, v in response.headers.items():
+            if k.lower() not in ("content-length", "content-type"):
+                out.headers[k] = v
+    return out
@@ -0,0 +1,84 @@
+# app/api/http_cache.py
+# Requêtes conditionnelles (ETag / If-None-Match, Last-Modified / If-Modified-Since)
+#
+# Les listes de référence et les flux agenda sont servis avec un validateur : le client
+# (navigateur, app calendrier) renvoie ce validateur et reçoit un 304 sans corps tant que
+# rien n'a changé. « private, no-cache » : le navigateur garde la réponse mais revalide
+# à chaque fois — une modification faite par un admin est visible immédiatement.
+from __future__ import annotations
+
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.services import ref_versions
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Comparaison faible (RFC 9110 §13.1.2) : le préfixe W/ est ignoré."""
+    if header.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(t.strip().removeprefix("W/") == wanted for t in header.split(","))
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    """If-None-Match prime sur If-Modified-Since (RFC 9110 §13.2.2)."""
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        return etag_matches(inm, etag)
+    ims = request.headers.get("if-modified-since")
+    if ims and last_modified is not None:
+        try:
+            return last_modified <= parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
+def json_bytes(body: bytes, etag: str) -> Response:
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+# =========================
+# 📚 Listes de référence versionnées
+# =========================
+
+def serve_ref(request: Request, db: Session, name: str, adapter: TypeAdapter,
+              load: Callable[[], list]) -> Response:
+    """304 si la version n'a pas bougé ; sinon JSON en cache ou rechargé via load()."""
+    etag = ref_versions.current_etag(db, name, adapter)
+    if is_not_modified(request, etag):
+        return not_modified({"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    body = ref_versions.cached_body(name, etag)
+    if body is None:
+        rows = adapter.validate_python(load(), from_attributes=True)
+        body = ref_versions.store_body(name, etag, adapter.dump_json(rows))
+    return json_bytes(body, etag)
+
+
+async def serve_ref_async(request: Request, db: AsyncSession, name: str, adapter: TypeAdapter,
+                          load: Callable[[], Awaitable[list]]) -> Response:
+    etag = await ref_versions.current_etag_async(db, name, adapter)
+    if is_not_modified(request, etag):
+        return not_modified({"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    body = ref_versions.cached_body(name, etag)
+    if body is None:
+        rows = adapter.validate_python(await load(), from_attributes=True)
+        body = ref_versions.store_body(name, etag, adapter.dump_json(rows))
+    return json_bytes(body, etag)
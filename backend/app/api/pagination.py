@@ -0,0 +1,85 @@
+# app/api/pagination.py
+# Pagination par curseur (keyset) des routes de liste
+#
+# ?limit=N&cursor=… : la réponse reste une liste JSON (compatible avec les appels existants) ;
+# s'il reste des lignes, le curseur de la page suivante est renvoyé dans le header X-Next-Cursor.
+# Le curseur encode les valeurs de la clé de tri de la dernière ligne : la page suivante est un
+# simple « WHERE (clé) > (valeurs) ORDER BY clé LIMIT N », servi par l'index correspondant,
+# quelle que soit la profondeur (contrairement à OFFSET).
+# Sans ?limit, une page fait DEFAULT_LIMIT lignes : un client qui veut toute la liste DOIT suivre
+# X-Next-Cursor (getAllPages côté front). Couvert par tests/test_pagination.py.
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import Session
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(400, "Curseur de pagination invalide")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(400, "Curseur de pagination invalide")
+    return values
+
+
+@dataclass
+class PageParams:
+    limit: int
+    cursor: str | None
+
+
+def page_params(
+    limit: int = Query(
+        DEFAULT_LIMIT, ge=1, le=MAX_LIMIT,
+        description=f"Taille de page ({DEFAULT_LIMIT} par défaut) : s'il reste des lignes, la réponse "
+                    "est tronquée et X-Next-Cursor donne la suite",
+    ),
+    cursor: str | None = Query(None, description="Valeur du header X-Next-Cursor de la page précédente"),
+) -> PageParams:
+    return PageParams(limit=limit, cursor=cursor)
+
+
+def _keyset(stmt: Select, keys: Sequence, page: PageParams) -> Select:
+    if page.cursor:
+        values = decode_cursor(page.cursor, len(keys))
+        stmt = stmt.where(tuple_(*keys) > tuple_(*values) if len(keys) > 1 else keys[0] > values[0])
+    return stmt.order_by(*keys).limit(page.limit + 1)
+
+
+def _cut(rows: list, keys: Sequence, page: PageParams, response: Response) -> list:
+    if len(rows) > page.limit:
+        rows = rows[: page.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, k.key) for k in keys])
+    return rows
+
+
+def paginate(db: Session, stmt: Select, keys: Sequence, page: PageParams, response: Response) -> list:
+    """
+    Exécute `stmt` (un select d'entités) trié sur `keys` (colonnes, la dernière unique : id)
+    à partir du curseur, et pose X-Next-Cursor s'il reste des lignes.
+    """
+    return _cut(db.scalars(_keyset(stmt, keys, page)).all(), keys, page, response)
+
+
+def paginate_rows(db: Session, stmt: Select, keys: Sequence, page: PageParams, response: Response) -> list:
+    """Comme paginate, pour un select de colonnes (lignes Row ; les clés doivent être sélectionnées)."""
+    return _cut(db.execute(_keyset(stmt, keys, page)).all(), keys, page, response)
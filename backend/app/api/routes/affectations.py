@@ -1,46 +1,81 @@
-import calendar
 from datetime import date as date_type
 from typing import List
 from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_session
-from app.core.security import get_current_user, ensure_can_modify_garde, require_roles
+from app.api.concurrency import affectation_etag, commit_or_conflict, require_if_match, set_garde_etag
+from app.api.deps import get_session, get_async_session
+from app.api.fast_json import rows_response, schema_columns
+from app.api.pagination import PageParams, page_params, paginate_rows
+from app.core.security import get_current_user, get_current_user_async, ensure_can_modify_garde, require_roles
 from app.db.models import Affectation, Garde, Piquet, Personnel, Personnel as PersonnelModel
 from app.schemas.affectation import AffectationCreate, AffectationRead, AffectationOpeCheckPatch
+from app.schemas.garde import GardeDelta
+from app.services.garde_versions import garde_delta
+from app.services.month_stats import month_counts
 from app.services.planning import has_all_required_competences, would_make_three_in_a_row
 
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/affectations", tags=["affectations"])
 
+# colonnes d'AffectationRead, dans l'ordre du schéma (liste servie par fast_json)
+AFFECTATION_COLUMNS = schema_columns(Affectation, AffectationRead)
+
+# version de garde connue du client : la réponse d'une mutation contient tout ce qui a changé
+# depuis (par défaut : depuis la version lue avant la mutation, soit ses seuls effets)
+SINCE_VERSION = Query(None, ge=0, description="Version de la garde connue du client")
+
 
 @router.get("", response_model=list[AffectationRead], dependencies=[Depends(require_roles("ADMIN","OFFICIER","OPE","AGENT","CHEF_EQUIPE","ADJ_CHEF_EQUIPE"))])
 def list_affectations(
+    response: Response,
     garde_id: int | None = Query(None),
+    personnel_id: int | None = Query(None),
+    equipe_id: int | None = Query(None, description="Équipe de la garde"),
+    date_from: date_type | None = Query(None, description="Date de garde ≥ (incluse)"),
+    date_to: date_type | None = Query(None, description="Date de garde ≤ (incluse)"),
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_session)
 ):
-    q = select(Affectation)
+    """Affectations filtrées, paginées par id (curseur dans X-Next-Cursor)."""
+    q = select(*AFFECTATION_COLUMNS)
     if garde_id is not None:
         q = q.where(Affectation.garde_id == garde_id)
-    return db.scalars(q.order_by(Affectation.garde_id)).all()
+    if personnel_id is not None:
+        q = q.where(Affectation.personnel_id == personnel_id)
+    if equipe_id is not None or date_from is not None or date_to is not None:
+        q = q.join(Garde, Garde.id == Affectation.garde_id)
+        if equipe_id is not None:
+            q = q.where(Garde.equipe_id == equipe_id)
+        if date_from is not None:
+            q = q.where(Garde.date >= date_from)
+        if date_to is not None:
+            q = q.where(Garde.date <= date_to)
+    rows = paginate_rows(db, q, [Affectation.id], page, response)
+    return rows_response(rows, response)
 
 
 @router.post(
     "",
-    response_model=AffectationRead,
+    response_model=GardeDelta,
     dependencies=[Depends(require_roles("ADMIN","OFFICIER","OPE","CHEF_EQUIPE","ADJ_CHEF_EQUIPE"))],
 )
 def create_affectation(
     payload: AffectationCreate,
+    request: Request,
+    response: Response,
+    since_version: int | None = SINCE_VERSION,
     db: Session = Depends(get_session),
     user: PersonnelModel = Depends(get_current_user),
 ):
     g = db.get(Garde, payload.garde_id)
     if not g:
         raise HTTPException(404, "Garde introuvable")
+    before = g.version
     p = db.get(Piquet, payload.piquet_id)
     if not p:
         raise HTTPException(404, "Piquet introuvable")
@@ -50,6 +85,7 @@ def create_affectation(
 
     # 🔒 bloque si la garde est validée (sauf ADMIN/OFFICIER)
     ensure_can_modify_garde(user, g)
+    require_if_match(request, db, g)
 
     ok, reasons = has_all_required_competences(db, pers.id, p.id, g.date)
     if not ok:
@@ -116,9 +152,10 @@ def create_affectation(
         ope_checked_at=None,
     )
     db.add(aff)
-    db.commit()
-    db.refresh(aff)
-    return aff
+    # deux planificateurs sur la même case : uq_garde_piquet / uq_garde_personnel → 409
+    commit_or_conflict(db, g.id, "Poste ou personnel déjà affecté sur cette garde")
+    set_garde_etag(response, g)
+    return garde_delta(db, g, before if since_version is None else since_version)
 
 
 # --- Schémas de réponse ---
@@ -151,17 +188,17 @@ class MyUpcomingAff(BaseModel):
 
 # GET /affectations/mine_upcoming
 @router.get("/mine_upcoming", response_model=List[MyUpcomingAff])
-def mine_upcoming_affectations(
+async def mine_upcoming_affectations(
     limit: int = Query(10, ge=1, le=100),
     start: date_type | None = Query(None),
-    db: Session = Depends(get_session),
-    user: PersonnelModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session),
+    user: PersonnelModel = Depends(get_current_user_async),
 ):
     if start is None:
         start = date_type.today()
 
     rows = (
-        db.execute(
+        (await db.execute(
             select(Affectation)
             .options(
                 joinedload(Affectation.garde).joinedload(Garde.equipe),  # 🔹 charge l’équipe
@@ -174,7 +211,7 @@ def mine_upcoming_affectations(
             )
             .order_by(Garde.date.asc(), Garde.slot.asc())
             .limit(limit)
-        )
+        ))
         .unique()
         .scalars()
         .all()
@@ -224,10 +261,8 @@ def suggest_personnels(
     # Charge uniquement les personnels actifs (si tu as un flag), sinon tous
     people = db.scalars(select(Personnel)).all()
 
-    # compter correctement le nombre de gardes du mois pour chaque personne
-    month_first = g.date.replace(day=1)
-    month_last_day = calendar.monthrange(g.date.year, g.date.month)[1]
-    month_last = g.date.replace(day=month_last_day)
+    # nombre de gardes du mois de chaque personne : compteurs tenus à jour (une lecture)
+    counts = month_counts(db, g.date.year, g.date.month)
 
     rows = []
     for pers in people:
@@ -237,16 +272,7 @@ def suggest_personnels(
         if would_make_three_in_a_row(db, pers.id, g, pqt):
             continue
 
-        # nombre de gardes dans le mois (compte réel)
-        nb = db.scalar(
-            select(func.count(Affectation.id))
-            .join(Garde, Garde.id == Affectation.garde_id)
-            .where(
-                Affectation.personnel_id == pers.id,
-                Garde.date >= month_first,
-                Garde.date <= month_last,
-            )
-        ) or 0
+        nb = counts.get(pers.id, 0)
 
         rows.append({
             "id": pers.id,
@@ -260,18 +286,24 @@ def suggest_personnels(
 
 @router.patch(
     "/{affectation_id}",
-    response_model=AffectationRead,
+    response_model=GardeDelta,
     dependencies=[Depends(require_roles("ADMIN", "OFFICIER", "OPE"))],
 )
 def patch_affectation_ope_checked(
     affectation_id: int,
     payload: AffectationOpeCheckPatch,
+    request: Request,
+    response: Response,
+    since_version: int | None = SINCE_VERSION,
     db: Session = Depends(get_session),
     user: PersonnelModel = Depends(get_current_user),
 ):
     a = db.get(Affectation, affectation_id)
     if not a:
         raise HTTPException(404, "Affectation introuvable")
+    g = db.get(Garde, a.garde_id)
+    require_if_match(request, db, g, affectation_etag(a))
+    before = g.version
 
     # Option métier: autoriser OPE même si garde validée (c'est de la saisie/contrôle)
     # Si tu veux verrouiller quand validée, dé-commente:
@@ -284,9 +316,9 @@ def patch_affectation_ope_checked(
     a.ope_checked_at = datetime.now(timezone.utc) if a.ope_checked else None
 
     db.add(a)
-    db.commit()
-    db.refresh(a)
-    return a
+    commit_or_conflict(db, g.id, "Affectation modifiée ou supprimée entre-temps")
+    set_garde_etag(response, g)
+    return garde_delta(db, g, before if since_version is None else since_version)
 
 class BulkOpeCheckPayload(BaseModel):
     checked: bool
@@ -294,17 +326,23 @@ class BulkOpeCheckPayload(BaseModel):
 
 @router.post(
     "/garde/{garde_id}/ope-check",
+    response_model=GardeDelta,
     dependencies=[Depends(require_roles("ADMIN", "OFFICIER", "OPE"))],
 )
 def bulk_ope_check_for_garde(
     garde_id: int,
     payload: BulkOpeCheckPayload,
+    request: Request,
+    response: Response,
+    since_version: int | None = SINCE_VERSION,
     db: Session = Depends(get_session),
     user: PersonnelModel = Depends(get_current_user),
 ):
     g = db.get(Garde, garde_id)
     if not g:
         raise HTTPException(404, "Garde introuvable")
+    require_if_match(request, db, g)
+    before = g.version
 
     # Même remarque que plus haut :
     # si tu veux interdire quand la garde est validée, dé-commente :
@@ -317,12 +355,20 @@ def bulk_ope_check_for_garde(
         a.ope_checked = bool(payload.checked)
         a.ope_checked_at = now
 
-    db.commit()
-    return {"ok": True, "garde_id": garde_id, "count": len(affs), "checked": bool(payload.checked)}
+    commit_or_conflict(db, g.id, "Affectations de la garde modifiées entre-temps")
+    set_garde_etag(response, g)
+    return garde_delta(db, g, before if since_version is None else since_version)
 
-@router.delete("/{affectation_id}", dependencies=[Depends(require_roles("ADMIN","OFFICIER","OPE","CHEF_EQUIPE","ADJ_CHEF_EQUIPE"))])
+@router.delete(
+    "/{affectation_id}",
+    response_model=GardeDelta,
+    dependencies=[Depends(require_roles("ADMIN","OFFICIER","OPE","CHEF_EQUIPE","ADJ_CHEF_EQUIPE"))],
+)
 def delete_affectation(
     affectation_id: int,
+    request: Request,
+    response: Response,
+    since_version: int | None = SINCE_VERSION,
     db: Session = Depends(get_session),
     user: PersonnelModel = Depends(get_current_user),
 ):
@@ -335,6 +381,10 @@ def delete_affectation(
 
     # 🔒 bloque la suppression si garde validée (sauf ADMIN/OFFICIER)
     ensure_can_modify_garde(user, g)
+    require_if_match(request, db, g, affectation_etag(a))
+    before = g.version
 
-    db.delete(a); db.commit()
-    return {"ok": True}
+    db.delete(a)
+    commit_or_conflict(db, g.id, "Affectation modifiée ou déjà supprimée entre-temps")
+    set_garde_etag(response, g)
+    return garde_delta(db, g, before if since_version is None else since_version)
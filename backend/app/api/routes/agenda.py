@@ -0,0 +1,60 @@
+# app/api/routes/agenda.py
+# Abonnement iCalendar d'un agent à ses gardes validées
+#   GET  /agenda/link         → URL d'abonnement de l'utilisateur connecté (créée au besoin)
+#   POST /agenda/link/rotate  → nouveau token (l'ancienne URL est révoquée)
+#   GET  /agenda/{token}.ics  → flux public (le token fait office d'authentification)
+from email.utils import format_datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_session
+from app.api.http_cache import CACHE_CONTROL, is_not_modified, not_modified
+from app.core.security import get_current_user
+from app.db.models import AgendaFeed, Personnel
+from app.schemas.agenda import AgendaLinkRead
+from app.services.agenda import CONTENT_TYPE, cached_feed, feed_state, get_or_create_feed, rotate_token
+
+router = APIRouter(prefix="/agenda", tags=["agenda"])
+
+
+def _link(request: Request, feed: AgendaFeed) -> AgendaLinkRead:
+    url = str(request.url_for("agenda_feed", token=feed.token))
+    return AgendaLinkRead(token=feed.token, url=url, webcal_url="webcal://" + url.split("://", 1)[1])
+
+
+@router.get("/link", response_model=AgendaLinkRead)
+def get_agenda_link(
+    request: Request,
+    db: Session = Depends(get_session),
+    user: Personnel = Depends(get_current_user),
+):
+    return _link(request, get_or_create_feed(db, user.id))
+
+
+@router.post("/link/rotate", response_model=AgendaLinkRead)
+def rotate_agenda_link(
+    request: Request,
+    db: Session = Depends(get_session),
+    user: Personnel = Depends(get_current_user),
+):
+    return _link(request, rotate_token(db, user.id))
+
+
+@router.get("/{token}.ics", name="agenda_feed")
+def agenda_feed(token: str, request: Request, db: Session = Depends(get_session)):
+    state = feed_state(db, token)
+    if state is None:
+        raise HTTPException(404, "Agenda introuvable")
+
+    headers = {
+        "ETag": state.etag,
+        "Last-Modified": format_datetime(state.last_modified, usegmt=True),
+        "Cache-Control": CACHE_CONTROL,
+    }
+    if is_not_modified(request, state.etag, state.last_modified):
+        return not_modified(headers)
+
+    body = cached_feed(db, state)
+    headers["Content-Disposition"] = 'inline; filename="gardes.ics"'
+    return Response(content=body, media_type=CONTENT_TYPE, headers=headers)
@@ -0,0 +1,29 @@
+# app/api/routes/analytics.py
+# Analyses du planning
+#   GET /analytics/fairness?year=[&equipe_id=]
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_session
+from app.core.security import require_roles
+from app.schemas.analytics import FairnessReport
+from app.services.fairness import fairness_report
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+
+@router.get(
+    "/fairness",
+    response_model=FairnessReport,
+    dependencies=[Depends(require_roles("ADMIN", "OFFICIER", "CHEF_EQUIPE", "ADJ_CHEF_EQUIPE"))],
+)
+def get_fairness(
+    year: int = Query(..., ge=1970, le=2100),
+    equipe_id: int | None = Query(None, description="Agents de cette équipe (sinon tous)"),
+    db: Session = Depends(get_session),
+):
+    """
+    Répartition annuelle par agent (nuits, week-end, fériés, astreinte / garde, pro / volontaire)
+    et dispersion par catégorie (écart-type, Gini, max - min).
+    """
+    return fairness_report(db, year, equipe_id)
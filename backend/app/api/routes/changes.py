@@ -0,0 +1,108 @@
+# app/api/routes/changes.py
+# Flux SSE des changements du planning d'un mois (affectations, indisponibilités, gardes)
+#   POST /changes/ticket                         → ticket court (Authorization: Bearer)
+#   GET  /changes/stream?year=&month=[&equipe_id=]&ticket=
+#
+# EventSource ne sait pas envoyer d'en-tête Authorization : le navigateur échange d'abord son
+# jeton contre un ticket de 60 s, limité à ce flux, qu'il passe dans l'URL (le jeton de
+# connexion n'apparaît ainsi ni dans les journaux d'accès ni dans l'historique). Le flux est
+# fermé (événement « expired ») à l'échéance du jeton de connexion. Au (re)branchement, le
+# client recharge le mois une fois, puis applique les événements reçus ; « resync » signifie
+# qu'il doit recharger à nouveau.
+import asyncio
+import json
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.security import (
+    STREAM_TICKET_SECONDS, access_token_claims, create_stream_ticket, decode_stream_ticket,
+    get_current_user_async, user_from_claims_async, user_has_any_role,
+)
+from app.db.models import Personnel
+from app.db.session import AsyncSessionLocal
+from app.services.change_feed import broker
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+PLANNER_ROLES = ("ADMIN", "OFFICIER", "OPE", "CHEF_EQUIPE", "ADJ_CHEF_EQUIPE")
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+def _bearer(request: Request) -> str | None:
+    auth = request.headers.get("authorization", "")
+    return auth[7:] if auth.lower().startswith("bearer ") else None
+
+
+@router.post("/ticket")
+async def change_stream_ticket(
+    request: Request,
+    user: Personnel = Depends(get_current_user_async),
+):
+    if not settings.CHANGE_FEED_ENABLED:
+        raise HTTPException(404, "Flux des changements désactivé")
+    if not user_has_any_role(user, *PLANNER_ROLES):
+        raise HTTPException(403, "Droits insuffisants")
+    return {"ticket": create_stream_ticket(_bearer(request)), "expires_in": STREAM_TICKET_SECONDS}
+
+
+@router.get("/stream")
+async def change_stream(
+    request: Request,
+    year: int = Query(..., ge=1970, le=2100),
+    month: int = Query(..., ge=1, le=12),
+    equipe_id: int | None = Query(None, description="Vue d'une équipe (sinon tout le mois)"),
+    ticket: str | None = Query(None, description="Ticket de POST /changes/ticket (EventSource)"),
+):
+    if not settings.CHANGE_FEED_ENABLED:
+        raise HTTPException(404, "Flux des changements désactivé")
+    # clients capables d'envoyer l'en-tête : jeton de connexion ; navigateur : ticket
+    token = _bearer(request)
+    if token:
+        claims = access_token_claims(token)
+        expires_at = claims.get("exp")
+    elif ticket:
+        claims = decode_stream_ticket(ticket)
+        expires_at = claims.get("session_exp")
+    else:
+        raise HTTPException(401, "Identification requise")
+    # session courte : aucune connexion BDD n'est gardée pendant toute la durée du flux
+    async with AsyncSessionLocal() as db:
+        user = await user_from_claims_async(claims, db)
+        if not user_has_any_role(user, *PLANNER_ROLES):
+            raise HTTPException(403, "Droits insuffisants")
+
+    sub = broker.subscribe(year, month, equipe_id)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            yield _sse("hello", {"year": year, "month": month, "equipe_id": equipe_id})
+            while True:
+                timeout = settings.CHANGE_FEED_HEARTBEAT_S
+                if expires_at is not None:
+                    remaining = expires_at - time.time()
+                    if remaining <= 0:
+                        # jeton de connexion échu : le client se ré-identifie avant de rebrancher
+                        yield _sse("expired", {})
+                        return
+                    timeout = min(timeout, remaining)
+                try:
+                    ev = await asyncio.wait_for(sub.queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield _sse(ev.get("type", "message"), ev)
+        finally:
+            broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from app.api.deps import get_session
+from app.api.http_cache import serve_ref
 from app.db.models import Competence
 from app.schemas.competence import CompetenceCreate, CompetenceRead
+from app.services.ref_versions import COMPETENCES
 
 router = APIRouter(prefix="/competences", tags=["competences"])
 
+_LIST = TypeAdapter(list[CompetenceRead])
+
 @router.post("", response_model=CompetenceRead)
 @router.post("/", response_model=CompetenceRead)
 def create_competence(payload: CompetenceCreate, db: Session = Depends(get_session)):
@@ -19,8 +24,12 @@ def create_competence(payload: CompetenceCreate, db: Session = Depends(get_sessi
 
 @router.get("/", response_model=list[CompetenceRead])
 @router.get("", response_model=list[CompetenceRead])
-def list_competences(db: Session = Depends(get_session)):
-    return db.scalars(select(Competence).order_by(Competence.code)).all()
+def list_competences(request: Request, db: Session = Depends(get_session)):
+    # ETag versionné : 304 tant qu'aucune compétence n'a été modifiée
+    return serve_ref(
+        request, db, COMPETENCES, _LIST,
+        lambda: db.scalars(select(Competence).order_by(Competence.code)).all(),
+    )
 
 @router.put("/{cid}", response_model=CompetenceRead)
 @router.put("{cid}", response_model=CompetenceRead)
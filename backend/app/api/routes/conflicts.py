@@ -0,0 +1,50 @@
+# app/api/routes/conflicts.py
+# Affectations futures qui ne sont plus couvertes par les compétences exigées
+# (relevées par le job quotidien "competence_sweep" ; lancement manuel : POST /scheduler/jobs/competence_sweep/run)
+from datetime import date as date_type
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_session
+from app.core.security import require_roles
+from app.db.models import Affectation, AffectationConflict, Competence, Garde
+from app.schemas.conflict import ConflictRead
+
+router = APIRouter(prefix="/conflicts", tags=["conflicts"])
+
+
+@router.get(
+    "",
+    response_model=list[ConflictRead],
+    dependencies=[Depends(require_roles("ADMIN", "OFFICIER", "OPE", "CHEF_EQUIPE", "ADJ_CHEF_EQUIPE"))],
+)
+def list_conflicts(
+    equipe_id: int | None = Query(None, description="Équipe de la garde"),
+    date_from: date_type | None = Query(None, description="Date de garde ≥ (défaut : aujourd'hui)"),
+    include_resolved: bool = Query(False),
+    db: Session = Depends(get_session),
+):
+    c = AffectationConflict
+    q = (
+        select(
+            c.id, c.affectation_id, Affectation.garde_id, Garde.date, Garde.slot, Garde.equipe_id,
+            Affectation.piquet_id, Affectation.personnel_id, c.competence_id,
+            Competence.code.label("competence_code"), c.kind, c.expired_on,
+            c.detected_at, c.notified_at, c.resolved_at,
+        )
+        .join(Affectation, Affectation.id == c.affectation_id)
+        .join(Garde, Garde.id == Affectation.garde_id)
+        .join(Competence, Competence.id == c.competence_id)
+        .where(Garde.date >= (date_from or date_type.today()))
+        .order_by(Garde.date, Garde.slot, c.id)
+    )
+    if equipe_id is not None:
+        q = q.where(Garde.equipe_id == equipe_id)
+    if not include_resolved:
+        q = q.where(c.resolved_at.is_(None))
+    return [
+        ConflictRead(**{**row._asdict(), "slot": row.slot.value})
+        for row in db.execute(q)
+    ]
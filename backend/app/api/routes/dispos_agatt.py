@@ -4,14 +4,13 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_session
+from app.api.deps import get_async_session
 from app.core.roles import require_roles
 from app.db.models import (
     DispoAgatt, Personnel, PiquetCompetence, PersonnelCompetence, RoleEnum,
 )
-from app.services.gmail_fetcher import fetch_csv_from_gmail
 
 router = APIRouter(prefix="/dispos-agatt", tags=["dispos-agatt"])
 
@@ -22,12 +21,12 @@ def _normalize(s: str) -> str:
 
 @router.get("")
 @router.get("/")
-def get_dispos_agatt(
+async def get_dispos_agatt(
     date: str = Query(..., description="Date ISO YYYY-MM-DD"),
     slot: str = Query(..., description="JOUR ou NUIT"),
     is_astreinte: bool = Query(False),
     piquet_id: Optional[int] = Query(None),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
 ):
     """
     Retourne les personnels disponibles pour une garde donnée,
@@ -51,12 +50,12 @@ def get_dispos_agatt(
         raise HTTPException(status_code=400, detail=f"Date invalide : {date}")
 
     # Noms (normalisés) des dispos pour cette date + ces types
-    rows: list[DispoAgatt] = db.scalars(
+    rows: list[DispoAgatt] = (await db.scalars(
         select(DispoAgatt).where(
             DispoAgatt.date == target_date,
             DispoAgatt.type_occ.in_(types),
         )
-    ).all()
+    )).all()
 
     if not rows:
         return []
@@ -66,35 +65,41 @@ def get_dispos_agatt(
     # Compétences requises par le piquet (si fourni)
     required_competence_ids: set[int] | None = None
     if piquet_id is not None:
-        reqs = db.scalars(
+        reqs = (await db.scalars(
             select(PiquetCompetence).where(PiquetCompetence.piquet_id == piquet_id)
-        ).all()
+        )).all()
         required_competence_ids = {r.competence_id for r in reqs} if reqs else set()
 
     # Matching contre les personnels actifs
-    all_persons: list[Personnel] = db.scalars(
+    all_persons: list[Personnel] = (await db.scalars(
         select(Personnel).where(Personnel.is_active == True)
-    ).all()
+    )).all()
+    candidates = [
+        p for p in all_persons
+        if (_normalize(p.nom), _normalize(p.prenom)) in dispo_keys
+    ]
+
+    # Compétences des candidats (une seule requête)
+    comps_by_person: dict[int, set[int]] = {}
+    if required_competence_ids and candidates:
+        for pid, cid in (await db.execute(
+            select(PersonnelCompetence.personnel_id, PersonnelCompetence.competence_id).where(
+                PersonnelCompetence.personnel_id.in_([p.id for p in candidates]),
+                PersonnelCompetence.competence_id.in_(required_competence_ids),
+            )
+        )).all():
+            comps_by_person.setdefault(pid, set()).add(cid)
 
     matched = []
     seen_ids: set[int] = set()
 
-    for person in all_persons:
-        key = (_normalize(person.nom), _normalize(person.prenom))
-        if key not in dispo_keys:
-            continue
+    for person in candidates:
         if person.id in seen_ids:
             continue
 
         # Filtre compétences (présence uniquement, pas d'expiration)
         if required_competence_ids:
-            pcs = db.scalars(
-                select(PersonnelCompetence).where(
-                    PersonnelCompetence.personnel_id == person.id,
-                    PersonnelCompetence.competence_id.in_(required_competence_ids),
-                )
-            ).all()
-            if not required_competence_ids.issubset({pc.competence_id for pc in pcs}):
+            if not required_competence_ids.issubset(comps_by_person.get(person.id, set())):
                 continue
 
         seen_ids.add(person.id)
@@ -111,9 +116,9 @@ def get_dispos_agatt(
 
 
 @router.get("/pro-garde")
-def get_pro_garde(
+async def get_pro_garde(
     date: str = Query(..., description="Date ISO YYYY-MM-DD"),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
 ):
     """Retourne les professionnels de garde (G24) pour une date donnée."""
     try:
@@ -121,21 +126,21 @@ def get_pro_garde(
     except ValueError:
         raise HTTPException(status_code=400, detail=f"Date invalide : {date}")
 
-    rows: list[DispoAgatt] = db.scalars(
+    rows: list[DispoAgatt] = (await db.scalars(
         select(DispoAgatt).where(
             DispoAgatt.date == target_date,
             DispoAgatt.type_occ == "G24",
         )
-    ).all()
+    )).all()
 
     if not rows:
         return []
 
     dispo_keys = {(r.nom, r.prenom) for r in rows}
 
-    all_persons: list[Personnel] = db.scalars(
+    all_persons: list[Personnel] = (await db.scalars(
         select(Personnel).where(Personnel.is_active == True)
-    ).all()
+    )).all()
 
     matched = []
     seen_ids: set[int] = set()
@@ -161,6 +166,8 @@ def trigger_gmail_fetch(
     _=Depends(require_roles(RoleEnum.ADMIN, RoleEnum.OFFICIER)),
 ):
     """Déclenche manuellement la récupération et la sync BDD du CSV (ADMIN/OFFICIER)."""
+    from app.services.gmail_fetcher import fetch_csv_from_gmail  # imaplib/email : import à la demande
+
     try:
         msg = fetch_csv_from_gmail()
         return {"status": "ok", "detail": msg}
@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
-from app.core.security import require_roles
-from app.api.deps import get_session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.security import require_roles, require_roles_async
+from app.api.deps import get_session, get_async_session
+from app.api.http_cache import serve_ref_async
 from app.db.models import Equipe
 from app.schemas.equipe import EquipeCreate, EquipeRead, EquipeUpdate
+from app.services.ref_versions import EQUIPES
 
 router = APIRouter(prefix="/equipes", tags=["equipes"])
 
+_LIST = TypeAdapter(list[EquipeRead])
+
 @router.post("", response_model=EquipeRead)
 @router.post("/", response_model=EquipeRead)
 def create_equipe(payload: EquipeCreate, db: Session = Depends(get_session)):
@@ -22,10 +28,13 @@ def create_equipe(payload: EquipeCreate, db: Session = Depends(get_session)):
     db.refresh(e)
     return e
 
-@router.get("/", response_model=list[EquipeRead], dependencies=[Depends(require_roles("ADMIN","OFFICIER","OPE","CHEF_EQUIPE","ADJ_CHEF_EQUIPE","AGENT"))])
-@router.get("", response_model=list[EquipeRead], dependencies=[Depends(require_roles("ADMIN","OFFICIER","OPE","CHEF_EQUIPE","ADJ_CHEF_EQUIPE","AGENT"))])
-def list_equipes(db: Session = Depends(get_session)):
-    return db.scalars(select(Equipe).order_by(Equipe.code)).all()
+@router.get("/", response_model=list[EquipeRead], dependencies=[Depends(require_roles_async("ADMIN","OFFICIER","OPE","CHEF_EQUIPE","ADJ_CHEF_EQUIPE","AGENT"))])
+@router.get("", response_model=list[EquipeRead], dependencies=[Depends(require_roles_async("ADMIN","OFFICIER","OPE","CHEF_EQUIPE","ADJ_CHEF_EQUIPE","AGENT"))])
+async def list_equipes(request: Request, db: AsyncSession = Depends(get_async_session)):
+    # ETag versionné : 304 tant qu'aucune équipe n'a été modifiée
+    async def load():
+        return (await db.scalars(select(Equipe).order_by(Equipe.code))).all()
+    return await serve_ref_async(request, db, EQUIPES, _LIST, load)
 
 @router.put("/{equipe_id}", response_model=EquipeRead)
 @router.put("{equipe_id}", response_model=EquipeRead)
@@ -0,0 +1,44 @@
+# app/api/routes/exports.py
+# Exports de statistiques (CSV / XLSX) envoyés au fil de l'eau
+#   GET /exports/stats?start=&end=&group_by=personnel|piquet|equipe|statut_service&format=csv|xlsx
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.security import require_roles
+from app.services.feuille_data import content_disposition
+from app.services.stats_export import CSV_MEDIA_TYPE, XLSX_MEDIA_TYPE, stats_query, stream_csv, stream_xlsx
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+
+@router.get(
+    "/stats",
+    dependencies=[Depends(require_roles("ADMIN", "OFFICIER", "CHEF_EQUIPE", "ADJ_CHEF_EQUIPE"))],
+)
+def export_stats(
+    start: date = Query(..., description="Première date de garde (incluse)"),
+    end: date = Query(..., description="Dernière date de garde (incluse)"),
+    group_by: Literal["personnel", "piquet", "equipe", "statut_service"] = Query("personnel"),
+    format: Literal["csv", "xlsx"] = Query("csv"),
+):
+    """
+    Comptes de gardes (nuits, week-end, fériés, pro / volontaire, astreintes) de la période,
+    groupés en base, envoyés ligne à ligne.
+    """
+    if end < start:
+        raise HTTPException(400, "La date de fin doit suivre la date de début")
+
+    headers, stmt = stats_query(start, end, group_by)
+    filename = f"statistiques_{group_by}_{start.isoformat()}_{end.isoformat()}.{format}"
+    if format == "xlsx":
+        body, media_type = stream_xlsx(headers, stmt), XLSX_MEDIA_TYPE
+    else:
+        body, media_type = stream_csv(headers, stmt), CSV_MEDIA_TYPE
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": content_disposition(filename)},
+    )
@@ -2,19 +2,20 @@ from datetime import date as date_type, datetime, timedelta
 import calendar
 from typing import List, Iterable
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import select, and_, func, exists, extract, or_
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from app.core.mailer import (
-    send_mail, build_validation_html, MAIL_FROM_NAME,
-    build_html_agent_team, build_html_agent_external,
-)
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_session
+from app.api.concurrency import commit_or_conflict, conflict, require_if_match, set_garde_etag
+from app.api.deps import get_session, get_async_session
+from app.api.fast_json import rows_response, schema_columns
 from app.core.security import (
     get_current_user,
+    get_current_user_async,
     ensure_can_validate_for_team,
     ensure_admin_off,
     ensure_can_modify_garde, require_roles
@@ -26,14 +27,22 @@ from app.db.models import (
     Affectation, Personnel as PersonnelModel, PersonnelRole, RoleEnum,
     Indisponibilite,
 )
-from app.services.planning import would_make_three_in_a_row
+from app.services import candidates
+from app.services.garde_versions import garde_delta
+from app.services.planning import personnels_making_three_in_a_row
+from app.services.feuille_data import content_disposition, load_feuilles, mois_label
+from app.services.validation_jobs import get_or_create_job, run_validation_job, supersede_jobs
+from app.schemas.candidate import CandidateMatrix, GardeCandidates
 from app.schemas.garde import (
     GardeRead, GenerateMonthRequest, GardeCreate,
-    AssignTeamRequest, GenerateMonthAllRequest,
+    AssignTeamRequest, GenerateMonthAllRequest, GardeDelta,
 )
 
 router = APIRouter(prefix="/gardes", tags=["gardes"])
 
+# colonnes de GardeRead, dans l'ordre du schéma (listes servies par fast_json)
+GARDE_COLUMNS = schema_columns(Garde, GardeRead)
+
 
 def _is_weekend(d: date_type) -> bool:
     return d.weekday() >= 5
@@ -98,15 +107,15 @@ def _seed_french_holidays(db: Session, year: int) -> None:
 # ---------- GET /gardes (liste par année/mois (+ filtre équipe optionnel)) ----------
 @router.get("", response_model=list[GardeRead])
 @router.get("/", response_model=list[GardeRead])
-def list_gardes(
+async def list_gardes(
     year: int = Query(..., ge=1970, le=2100),
     month: int = Query(..., ge=1, le=12),
     equipe_id: int | None = Query(None),
     include_unassigned: bool = Query(False),
-    db: Session = Depends(get_session),
-    user: PersonnelModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session),
+    user: PersonnelModel = Depends(get_current_user_async),
 ):
-    q = select(Garde).where(
+    q = select(*GARDE_COLUMNS).where(
         and_(
             extract("year", Garde.date) == year,
             extract("month", Garde.date) == month,
@@ -139,8 +148,8 @@ def list_gardes(
             q = q.where(Garde.validated.is_(True))
 
     q = q.order_by(Garde.date.asc(), Garde.slot.asc())
-    rows = db.scalars(q).all()
-    return rows
+    rows = (await db.execute(q)).all()
+    return rows_response(rows)
 
 
 @router.get("/all", response_model=list[GardeRead], dependencies=[Depends(require_roles("ADMIN","OFFICIER","OPE","CHEF_EQUIPE","ADJ_CHEF_EQUIPE"))])
@@ -154,7 +163,7 @@ def list_gardes_all_month(
     à une équipe ou non (equipe_id peut être NULL).
     """
     q = (
-        select(Garde)
+        select(*GARDE_COLUMNS)
         .where(
             and_(
                 extract("year", Garde.date) == year,
@@ -163,7 +172,7 @@ def list_gardes_all_month(
         )
         .order_by(Garde.date.asc(), Garde.slot.asc())
     )
-    return db.scalars(q).all()
+    return rows_response(db.execute(q).all())
 
 
 # ---------- POST /gardes/generate_month (crée les gardes du mois SANS équipe) ----------
@@ -228,6 +237,7 @@ def create_garde(
 @router.delete("/{garde_id}")
 def delete_garde(
     garde_id: int,
+    request: Request,
     db: Session = Depends(get_session),
     user: PersonnelModel = Depends(get_current_user),
 ):
@@ -237,19 +247,47 @@ def delete_garde(
 
     # 🔒 bloque la suppression si la garde est validée (sauf ADMIN/OFFICIER)
     ensure_can_modify_garde(user, g)
+    require_if_match(request, db, g)
 
     db.delete(g)
-    db.commit()
+    commit_or_conflict(db, g.id, "Garde modifiée entre-temps")
     return {"ok": True}
 
 
+# ---------- GET /gardes/{id}/changes (delta depuis une version connue) ----------
+@router.get(
+    "/{garde_id}/changes",
+    response_model=GardeDelta,
+    dependencies=[Depends(require_roles("ADMIN","OFFICIER","OPE","AGENT","CHEF_EQUIPE","ADJ_CHEF_EQUIPE"))],
+)
+def garde_changes(
+    garde_id: int,
+    since_version: int = Query(..., ge=0, description="Version connue du client (0 : état complet)"),
+    db: Session = Depends(get_session),
+):
+    """
+    Affectations / indisponibilités créées, modifiées ou supprimées depuis `since_version`.
+    Réponse vide si le client est à jour ; full=True s'il doit tout remplacer.
+    """
+    g = db.get(Garde, garde_id)
+    if not g:
+        raise HTTPException(404, "Garde introuvable")
+    return garde_delta(db, g, since_version)
+
+
 # ---------- PUT /gardes/assign_team (affecter l’équipe d’un jour/slot) ----------
 @router.put("/assign_team", response_model=GardeRead, dependencies=[Depends(require_roles("ADMIN","OFFICIER","OPE"))])
 def assign_team(
     payload: AssignTeamRequest,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_session),
     user: PersonnelModel = Depends(get_current_user),
 ):
+    """
+    If-Match (ETag de la garde) : l'équipe n'est remplacée que si la garde n'a pas changé
+    depuis la lecture du client (sinon 412 avec l'état courant).
+    """
     if not db.get(Equipe, payload.equipe_id):
         raise HTTPException(404, "Équipe inconnue")
     slot = Slot[payload.slot] if isinstance(payload.slot, str) else payload.slot
@@ -258,14 +296,25 @@ def assign_team(
     if existing:
         # 🔒 bloque si déjà validée (sauf ADMIN/OFFICIER)
         ensure_can_modify_garde(user, existing)
+        require_if_match(request, db, existing)
         existing.equipe_id = payload.equipe_id
-        db.commit(); db.refresh(existing); return existing
+        commit_or_conflict(db, existing.id, "Garde modifiée entre-temps")
+        db.refresh(existing); set_garde_etag(response, existing)
+        return existing
 
     g = Garde(
         date=payload.date, slot=slot, equipe_id=payload.equipe_id,
         is_weekend=_is_weekend(payload.date), is_holiday=_is_holiday(db, payload.date)
     )
-    db.add(g); db.commit(); db.refresh(g)
+    db.add(g)
+    try:
+        db.commit()
+    except IntegrityError:
+        # créée au même instant par un autre planificateur (uq_date_slot_team)
+        db.rollback()
+        current_id = db.scalar(select(Garde.id).where(Garde.date == payload.date, Garde.slot == slot))
+        raise conflict(db, current_id, "Garde créée entre-temps par un autre planificateur") from None
+    db.refresh(g); set_garde_etag(response, g)
     return g
 
 
@@ -273,6 +322,8 @@ def assign_team(
 @router.put("/clear_team", response_model=GardeRead, dependencies=[Depends(require_roles("ADMIN","OFFICIER","OPE"))])
 def clear_team(
     payload: AssignTeamRequest,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_session),
     user: PersonnelModel = Depends(get_current_user),
 ):
@@ -283,9 +334,11 @@ def clear_team(
 
     # 🔒 bloque si validée (sauf ADMIN/OFFICIER)
     ensure_can_modify_garde(user, existing)
+    require_if_match(request, db, existing)
 
     existing.equipe_id = None
-    db.commit(); db.refresh(existing)
+    commit_or_conflict(db, existing.id, "Garde modifiée entre-temps")
+    db.refresh(existing); set_garde_etag(response, existing)
     return existing
 
 
@@ -399,13 +452,15 @@ def suggest_personnels(
     ).all()
 
     # 3) Base: personnels actifs — équipe de la garde si equipe_only, sinon toutes équipes
+    # colonnes de PersonnelMini seulement (réponse servie par fast_json)
+    cols = schema_columns(Personnel, PersonnelMini)
     if equipe_only and garde.equipe_id is not None:
-        base = select(Personnel).where(
+        base = select(*cols).where(
             Personnel.equipe_id == garde.equipe_id,
             Personnel.is_active.is_(True),
         )
     else:
-        base = select(Personnel).where(
+        base = select(*cols).where(
             Personnel.is_active.is_(True),
         )
 
@@ -447,12 +502,54 @@ def suggest_personnels(
         )
 
     base = base.order_by(Personnel.nom, Personnel.prenom)
-    rows = db.scalars(base).all()
+    rows = db.execute(base).all()
 
     # 7) Exclure ceux dont l'ajout ferait un enchainement ≥ 3 gardes consécutives (2×24h d'affilée)
-    rows = [r for r in rows if not would_make_three_in_a_row(db, r.id, garde, piquet)]
+    #    (une requête pour tous les candidats)
+    excluded = personnels_making_three_in_a_row(db, [r.id for r in rows], garde, piquet)
+    rows = [r for r in rows if r.id not in excluded]
 
-    return [PersonnelMini.model_validate(r, from_attributes=True) for r in rows]
+    return rows_response(rows)
+
+
+# ---------- GET /gardes/{id}/candidates (suggestions + dispos AGATT + pros de garde) ----------
+@router.get(
+    "/{garde_id}/candidates",
+    response_model=GardeCandidates,
+    dependencies=[Depends(require_roles("ADMIN", "OFFICIER", "OPE", "CHEF_EQUIPE", "ADJ_CHEF_EQUIPE"))],
+)
+def garde_candidates(
+    garde_id: int,
+    piquet_id: int = Query(..., description="ID du piquet"),
+    with_matrix: bool = Query(False, description="Joindre la matrice de tous les piquets"),
+    db: Session = Depends(get_session),
+):
+    """Les trois listes du panneau d'ajout en un appel, avec les motifs d'inéligibilité."""
+    garde = db.get(Garde, garde_id)
+    if not garde:
+        raise HTTPException(status_code=404, detail="Garde introuvable")
+    piquet = db.get(Piquet, piquet_id)
+    if not piquet:
+        raise HTTPException(status_code=404, detail="Piquet introuvable")
+    return candidates.garde_candidates(db, garde, piquet, with_matrix)
+
+
+@router.get(
+    "/{garde_id}/candidate-matrix",
+    response_model=CandidateMatrix,
+    dependencies=[Depends(require_roles("ADMIN", "OFFICIER", "OPE", "CHEF_EQUIPE", "ADJ_CHEF_EQUIPE"))],
+)
+def garde_candidate_matrix(
+    garde_id: int,
+    response: Response,
+    db: Session = Depends(get_session),
+):
+    """Agents affectables sur chaque piquet de la garde, en une réponse (ETag = version de la garde)."""
+    garde = db.get(Garde, garde_id)
+    if not garde:
+        raise HTTPException(status_code=404, detail="Garde introuvable")
+    set_garde_etag(response, garde)
+    return candidates.candidate_matrix(db, garde)
 
 
 # ---------- VALIDATION / DEVALIDATION DU MOIS ----------
@@ -463,31 +560,20 @@ def _month_filter(annee: int, mois: int):
     )
 
 
-VALIDATION_FIXED_RECIPIENT = "operation-st-lo@sdis50.fr"
-
-def _get_officier_emails(db: Session) -> list[str]:
-    rows = db.execute(
-        select(Personnel.email)
-        .join(PersonnelRole, PersonnelRole.personnel_id == Personnel.id)
-        .where(
-            PersonnelRole.role == RoleEnum.OFFICIER,
-            Personnel.is_active.is_(True),
-            Personnel.email.is_not(None),
-            Personnel.email != "",
-        )
-        .distinct()
-    ).all()
-    return [r[0] for r in rows if r and r[0]]
-
-
-@router.post("/valider-mois")
+@router.post("/valider-mois", status_code=202)
 def valider_mois(
+    background: BackgroundTasks,
     annee: int = Query(..., ge=1970, le=2100),
     mois: int = Query(..., ge=1, le=12),
     equipe_id: int = Query(...),
     db: Session = Depends(get_session),
     user = Depends(get_current_user),
 ):
+    """
+    Valide les gardes du mois puis confie PDF + notifications à un job de fond.
+    Suivi : GET /jobs/{job_id}. Re-soumettre la même validation renvoie le même job
+    (relancé seulement s'il a échoué ou s'il est bloqué) : aucun agent n'est mailé deux fois.
+    """
     # 1️⃣ Récupérer les gardes du mois pour l’équipe
     gardes = db.scalars(
         select(Garde)
@@ -503,207 +589,24 @@ def valider_mois(
     # 2️⃣ Valider les gardes
     now = datetime.utcnow()
     for g in gardes:
-        g.validated = True
-        g.validated_at = now
-    db.commit()
-
-    # 3️⃣ Préparer infos générales
-    equipe = db.get(Equipe, equipe_id)
-    equipe_nom = equipe.libelle or equipe.code or f"Équipe {equipe_id}"
-    mois_nom = datetime(annee, mois, 1).strftime("%B %Y").capitalize()
-    validator_fullname = f"{getattr(user, 'prenom', '')} {getattr(user, 'nom', '')}".strip() or user.email
-
-    # 4️⃣ Mail validation -> operation-st-lo + OFFICIER
-    subject_admin = f"Validation feuille de garde – {mois_nom} – {equipe_nom}"
-
-    # ✅ Ton template (core/mailer.py) attend exactement: (mois_label, equipe_label, validateur)
-    html_admin = build_validation_html(mois_nom, equipe_nom, validator_fullname)
-
-    recipients = {VALIDATION_FIXED_RECIPIENT}
-    recipients.update(_get_officier_emails(db))
-
-    send_mail(sorted(recipients), subject_admin, html_admin, db=db)
-
-    # 5️⃣ Récupérer toutes les affectations concernées
-    garde_ids = [g.id for g in gardes]
-    affs = db.scalars(
-        select(Affectation)
-        .join(Garde, Garde.id == Affectation.garde_id)
-        .join(Piquet, Piquet.id == Affectation.piquet_id)
-        .where(Affectation.garde_id.in_(garde_ids))
-    ).unique().all()
-
-    # Indexer les gardes
-    garde_map = {g.id: g for g in gardes}
-    piquet_map = {a.piquet_id: db.get(Piquet, a.piquet_id) for a in affs}
-
-    # 6️⃣ Grouper par personnel
-    # tuple : (date, slot, piquet_label, statut_service)
-    pers_map: dict[int, list[tuple[str, str, str, str]]] = {}
-    for a in affs:
-        g = garde_map.get(a.garde_id)
-        if not g:
-            continue
-        pqt = piquet_map.get(a.piquet_id)
-        pers_map.setdefault(a.personnel_id, []).append((
-            g.date.strftime("%d/%m/%Y"),
-            g.slot.name.capitalize(),
-            pqt.libelle or pqt.code or "—",
-            (a.statut_service or "volontaire").lower(),
-        ))
-
-    # 7️⃣ Envoyer un mail à chaque pompier
-    subject_user = f"Vos gardes – {mois_nom} – {equipe_nom}"
-    personnels = db.scalars(select(Personnel).where(Personnel.id.in_(pers_map.keys()))).all()
-
-    # 7.5️⃣ Générer le PDF de la feuille de garde
-    pdf_bytes: bytes | None = None
-    pdf_filename: str | None = None
-    try:
-        from app.services.pdf_generator import generate_feuille_garde_pdf
-
-        def _pdf_name(p) -> str:
-            nom    = (p.nom    or "").strip()
-            prenom = (p.prenom or "").strip()
-            return f"{nom} {prenom[0]}." if prenom else nom
-
-        # Noms des agents ayant des affectations
-        pers_name_map = {p.id: _pdf_name(p) for p in personnels}
-
-        # Tous les piquets (triés par position puis code), même ceux non utilisés
-        pq_rows = db.scalars(
-            select(Piquet).order_by(Piquet.position, Piquet.code)
-        ).all()
-        pdf_piquets: list[dict] = [
-            {"id": p.id, "label": p.libelle or p.code or f"P{p.id}", "is_astreinte": bool(p.is_astreinte)}
-            for p in pq_rows
-        ]
-
-        # aff_map : {garde_id: {piquet_id: agent_fullname}}
-        pdf_aff_map: dict[int, dict[int, str]] = {}
-        for a in affs:
-            pdf_aff_map.setdefault(a.garde_id, {})[a.piquet_id] = (
-                pers_name_map.get(a.personnel_id, "?")
-            )
-
-        # Membres actifs de l'équipe
-        team_members = db.scalars(
-            select(Personnel).where(
-                Personnel.equipe_id == equipe_id,
-                Personnel.is_active.is_(True),
-            )
-        ).all()
-        team_ids = {p.id for p in team_members}
-        team_names = {
-            p.id: _pdf_name(p)
-            for p in team_members
-        }
-
-        # Indisponibilités
-        indispos = db.scalars(
-            select(Indisponibilite).where(Indisponibilite.garde_id.in_(garde_ids))
-        ).all()
-        indispo_by_garde: dict[int, set[int]] = {}
-        for i in indispos:
-            indispo_by_garde.setdefault(i.garde_id, set()).add(i.personnel_id)
-
-        # Affectés par garde
-        assigned_by_garde: dict[int, set[int]] = {}
-        for a in affs:
-            assigned_by_garde.setdefault(a.garde_id, set()).add(a.personnel_id)
-
-        pdf_non_aff_map: dict[int, list[str]] = {}
-        pdf_indispo_map: dict[int, list[str]] = {}
-        for g in gardes:
-            assigned = assigned_by_garde.get(g.id, set())
-            indispo_ids = indispo_by_garde.get(g.id, set())
-            pdf_non_aff_map[g.id] = sorted(
-                team_names[pid] for pid in team_ids
-                if pid not in assigned and pid not in indispo_ids
-            )
-            pdf_indispo_map[g.id] = sorted(
-                team_names[pid] for pid in team_ids & indispo_ids
-            )
+        if not g.validated:
+            g.validated = True
+            g.validated_at = now
+    commit_or_conflict(db, None, "Gardes du mois modifiées pendant la validation — réessayer")
 
-        garde_data_for_pdf = [
-            {
-                "id": g.id,
-                "date": g.date,
-                "slot": g.slot.name if hasattr(g.slot, "name") else str(g.slot),
-            }
-            for g in sorted(gardes, key=lambda g: (
-                g.date,
-                0 if (g.slot.name if hasattr(g.slot, "name") else str(g.slot)) == "JOUR" else 1,
-            ))
-        ]
-
-        pdf_bytes = generate_feuille_garde_pdf(
-            equipe_label=equipe_nom,
-            mois_label=mois_nom,
-            gardes=garde_data_for_pdf,
-            piquets=pdf_piquets,
-            aff_map=pdf_aff_map,
-            non_aff_map=pdf_non_aff_map,
-            indispo_map=pdf_indispo_map,
-        )
-        safe_equipe = equipe_nom.replace(" ", "_").replace("/", "-")
-        safe_mois = mois_nom.replace(" ", "_")
-        pdf_filename = f"feuille_garde_{safe_equipe}_{safe_mois}.pdf"
-
-    except Exception as _pdf_err:
-        import traceback
-        print(f"[PDF] ❌ Erreur génération PDF: {_pdf_err}")
-        traceback.print_exc()
-
-    print(f"[PDF] pdf_bytes={'OK (' + str(len(pdf_bytes)) + ' bytes)' if pdf_bytes else 'NONE — PJ non générée'}")
-
-    for p in personnels:
-        if not p.email:
-            continue
-
-        all_rows = pers_map[p.id]  # list[tuple[date, slot, piquet, statut_service]]
-
-        if p.statut == Statut.PRO:
-            # PRO pur : jamais de mail
-            print(f"[MAIL] ⏭ {p.email} ignoré (statut PRO)")
-            continue
-        elif p.statut == Statut.DOUBLE:
-            # DOUBLE : mail uniquement si au moins une garde en mode volontaire
-            vol_rows = [r for r in all_rows if r[3] == "volontaire"]
-            if not vol_rows:
-                print(f"[MAIL] ⏭ {p.email} ignoré (DOUBLE sans garde volontaire)")
-                continue
-            mail_rows = vol_rows
-        else:
-            # VOLONTAIRE : toutes ses gardes
-            mail_rows = all_rows
-
-        fullname = f"{p.prenom} {p.nom}".strip()
-        # Tronquer le 4e élément (statut_service) — le template attend (date, slot, piquet)
-        gardes_rows = sorted([(r[0], r[1], r[2]) for r in mail_rows], key=lambda r: (r[0], 0 if r[1].upper() == "JOUR" else 1))
-
-        is_team = p.equipe_id == equipe_id
-        if is_team:
-            html_user = build_html_agent_team(fullname, mois_nom, equipe_nom, gardes_rows)
-            attach = (
-                [(pdf_filename, pdf_bytes, "application/pdf")]
-                if pdf_bytes and pdf_filename else None
-            )
-        else:
-            html_user = build_html_agent_external(fullname, mois_nom, equipe_nom, gardes_rows)
-            attach = None
-        print(f"[MAIL] → {p.email} | statut={p.statut.value} | gardes={len(gardes_rows)} | pj={'OUI' if attach else 'NON'}")
-        try:
-            send_mail(p.email, subject_user, html_user, db=db, attachments=attach)
-        except Exception as e:
-            print(f"[MAIL] ❌ Erreur envoi à {p.email}: {e}")
+    # 3️⃣ Job PDF + mails (idempotent)
+    validator_fullname = f"{getattr(user, 'prenom', '')} {getattr(user, 'nom', '')}".strip() or user.email
+    job, to_run = get_or_create_job(db, annee, mois, equipe_id, validator_fullname)
+    if to_run:
+        background.add_task(run_validation_job, job.id)
 
     return {
-        "status": "ok",
+        "status": "accepted",
+        "job_id": job.id,
+        "job_status": job.status,
         "validated_count": len(gardes),
-        "notified_count": len(personnels) + 1,
-        "equipe": equipe_nom,
-        "mois": mois_nom,
+        "equipe_id": equipe_id,
+        "mois": mois_label(annee, mois),
     }
 
 
@@ -716,95 +619,44 @@ def get_pdf_feuille(
     user=Depends(get_current_user),
 ):
     """Génère et retourne le PDF de la feuille de garde sans envoyer d'emails."""
-    gardes = db.scalars(
-        select(Garde).where(
-            extract("year", Garde.date) == annee,
-            extract("month", Garde.date) == mois,
-            Garde.equipe_id == equipe_id,
-        )
-    ).all()
-    if not gardes:
+    feuilles = load_feuilles(db, annee, mois, equipe_id)
+    if not feuilles:
         raise HTTPException(404, "Aucune garde trouvée pour ce mois/équipe")
-
-    equipe = db.get(Equipe, equipe_id)
-    equipe_nom = equipe.libelle or equipe.code or f"Équipe {equipe_id}"
-    mois_nom = datetime(annee, mois, 1).strftime("%B %Y").capitalize()
-
-    garde_ids = [g.id for g in gardes]
-    affs = db.scalars(
-        select(Affectation)
-        .join(Garde, Garde.id == Affectation.garde_id)
-        .join(Piquet, Piquet.id == Affectation.piquet_id)
-        .where(Affectation.garde_id.in_(garde_ids))
-    ).unique().all()
+    f = feuilles[0]
 
     from app.services.pdf_generator import generate_feuille_garde_pdf
+    pdf_bytes = generate_feuille_garde_pdf(**f["pdf_kwargs"])
 
-    def _pdf_name(p) -> str:
-        nom = (p.nom or "").strip()
-        prenom = (p.prenom or "").strip()
-        return f"{nom} {prenom[0]}." if prenom else nom
-
-    pers_ids = {a.personnel_id for a in affs}
-    personnels = db.scalars(select(Personnel).where(Personnel.id.in_(pers_ids))).all()
-    pers_name_map = {p.id: _pdf_name(p) for p in personnels}
-
-    pq_rows = db.scalars(select(Piquet).order_by(Piquet.position, Piquet.code)).all()
-    pdf_piquets = [
-        {"id": p.id, "label": p.libelle or p.code or f"P{p.id}", "is_astreinte": bool(p.is_astreinte)}
-        for p in pq_rows
-    ]
-
-    pdf_aff_map: dict[int, dict[int, str]] = {}
-    for a in affs:
-        pdf_aff_map.setdefault(a.garde_id, {})[a.piquet_id] = pers_name_map.get(a.personnel_id, "?")
-
-    team_members = db.scalars(
-        select(Personnel).where(Personnel.equipe_id == equipe_id, Personnel.is_active.is_(True))
-    ).all()
-    team_ids = {p.id for p in team_members}
-    team_names = {p.id: _pdf_name(p) for p in team_members}
-
-    indispos = db.scalars(select(Indisponibilite).where(Indisponibilite.garde_id.in_(garde_ids))).all()
-    indispo_by_garde: dict[int, set[int]] = {}
-    for i in indispos:
-        indispo_by_garde.setdefault(i.garde_id, set()).add(i.personnel_id)
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={"Content-Disposition": content_disposition(f["filename"])},
+    )
 
-    assigned_by_garde: dict[int, set[int]] = {}
-    for a in affs:
-        assigned_by_garde.setdefault(a.garde_id, set()).add(a.personnel_id)
 
-    pdf_non_aff_map: dict[int, list[str]] = {}
-    pdf_indispo_map: dict[int, list[str]] = {}
-    for g in gardes:
-        assigned = assigned_by_garde.get(g.id, set())
-        indispo_ids = indispo_by_garde.get(g.id, set())
-        pdf_non_aff_map[g.id] = sorted(team_names[pid] for pid in team_ids if pid not in assigned and pid not in indispo_ids)
-        pdf_indispo_map[g.id] = sorted(team_names[pid] for pid in team_ids & indispo_ids)
-
-    garde_data_for_pdf = [
-        {"id": g.id, "date": g.date, "slot": g.slot.name if hasattr(g.slot, "name") else str(g.slot)}
-        for g in sorted(gardes, key=lambda g: (g.date, 0 if (g.slot.name if hasattr(g.slot, "name") else str(g.slot)) == "JOUR" else 1))
-    ]
-
-    pdf_bytes = generate_feuille_garde_pdf(
-        equipe_label=equipe_nom,
-        mois_label=mois_nom,
-        gardes=garde_data_for_pdf,
-        piquets=pdf_piquets,
-        aff_map=pdf_aff_map,
-        non_aff_map=pdf_non_aff_map,
-        indispo_map=pdf_indispo_map,
-    )
+@router.get("/pdf-feuilles.zip")
+def get_pdf_feuilles_zip(
+    annee: int = Query(..., ge=1970, le=2100),
+    mois: int | None = Query(None, ge=1, le=12, description="Absent → toute l'année"),
+    db: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    """
+    Archive ZIP des feuilles de garde de toutes les équipes pour un mois (ou toute l'année).
+    Les données sont chargées en une passe, les PDF rendus en parallèle et l'archive
+    envoyée au fil de l'eau (jamais construite entièrement en mémoire).
+    """
+    feuilles = load_feuilles(db, annee, mois)
+    if not feuilles:
+        raise HTTPException(404, "Aucune garde trouvée pour cette période")
 
-    safe_equipe = equipe_nom.replace(" ", "_").replace("/", "-")
-    safe_mois = mois_nom.replace(" ", "_")
-    filename = f"feuille_garde_{safe_equipe}_{safe_mois}.pdf"
+    from app.services.pdf_zip import stream_feuilles_zip
 
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    periode = f"{annee}-{mois:02d}" if mois is not None else str(annee)
+    return StreamingResponse(
+        stream_feuilles_zip(feuilles),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="feuilles_garde_{periode}.zip"'},
     )
 
 
@@ -836,5 +688,6 @@ def devalider_mois(
             g.validated_at = None
             db.add(g)
             updated += 1
-    db.commit()
+    supersede_jobs(db, annee, mois, equipe_id)
+    commit_or_conflict(db, None, "Gardes du mois modifiées pendant la dévalidation — réessayer")
     return {"status": "ok", "gardes_mises_a_jour": updated, "scope": {"annee": annee, "mois": mois, "equipe_id": equipe_id}}
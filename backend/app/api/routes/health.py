@@ -1,4 +1,14 @@
-from fastapi import APIRouter
+import os
+import time
+
+from fastapi import APIRouter, Depends
+from sqlalchemy import text
+
+from app.core import boot
+from app.core.config import settings
+from app.core.security import require_roles
+from app.db import session as db_session
+from app.db.pool import pool_stats
 
 router = APIRouter()
 
@@ -6,3 +16,46 @@ router = APIRouter()
 @router.get("health")
 async def health():
     return {"status": "ok"}
+
+
+@router.get("/health/startup")
+def health_startup():
+    """Durées de démarrage de CE worker (imports, schéma, seed, scheduler) et budget."""
+    return {"pid": os.getpid(), "budget_ms": settings.STARTUP_BUDGET_MS, **boot.report()}
+
+
+@router.get("/health/db", dependencies=[Depends(require_roles("ADMIN"))])
+def health_db():
+    """
+    État des pools de connexions de CE worker (chaque process a les siens) :
+    connexions empruntées, overflow, attente au checkout, + latence d'un SELECT 1.
+    Réservé aux admins (configuration interne) ; le détail d'une erreur reste dans les logs.
+    """
+    t0 = time.perf_counter()
+    try:
+        with db_session.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        db_ok, error = True, None
+    except Exception as e:
+        print(f"[HEALTH] SELECT 1 en échec : {e!r}")
+        db_ok, error = False, "database unavailable"
+    ping_ms = round((time.perf_counter() - t0) * 1000, 2)
+
+    pools = {"sync": pool_stats(db_session.engine)}
+    if db_session._async_engine is not None:
+        pools["async"] = pool_stats(db_session._async_engine.sync_engine)
+    return {
+        "status": "ok" if db_ok else "error",
+        "error": error,
+        "pid": os.getpid(),
+        "ping_ms": ping_ms,
+        "config": {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pre_ping": settings.DB_POOL_PRE_PING,
+            "statement_timeout_ms": settings.DB_STATEMENT_TIMEOUT_MS,
+        },
+        "pools": pools,
+    }
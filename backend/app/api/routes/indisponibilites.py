@@ -1,26 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
-from sqlalchemy import select
-from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
+from app.api.concurrency import commit_or_conflict, require_if_match
 from app.api.deps import get_session
+from app.api.pagination import PageParams, page_params, paginate
 from app.core.security import get_current_user, user_has_any_role
-from app.db.models import Garde, Indisponibilite, Personnel
-
-router = APIRouter(prefix="/indisponibilites", tags=["indisponibilites"])
-
-
-class IndispoRead(BaseModel):
-    id: int
-    garde_id: int
-    personnel_id: int
-    model_config = {"from_attributes": True}
+from app.db.models import Garde, Indisponibilite, Personnel, Slot
+from app.schemas.indisponibilite import IndispoBulkCreate, IndispoBulkResult, IndispoCreate, IndispoRead
+from app.services import change_feed, garde_versions
 
+BULK_MAX_DAYS = 366
 
-class IndispoCreate(BaseModel):
-    garde_id: int
-    personnel_id: int
+router = APIRouter(prefix="/indisponibilites", tags=["indisponibilites"])
 
 
 def _is_privileged(user: Personnel) -> bool:
@@ -36,8 +30,12 @@ def _check_garde_not_validated(garde: Garde, user: Personnel) -> None:
 
 @router.get("", response_model=list[IndispoRead])
 def list_indisponibilites(
+    response: Response,
     garde_id: int | None = Query(None),
     personnel_id: int | None = Query(None),
+    date_from: date | None = Query(None, description="Date de garde ≥ (incluse)"),
+    date_to: date | None = Query(None, description="Date de garde ≤ (incluse)"),
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_session),
     user: Personnel = Depends(get_current_user),
 ):
@@ -46,12 +44,19 @@ def list_indisponibilites(
         q = q.where(Indisponibilite.garde_id == garde_id)
     if personnel_id is not None:
         q = q.where(Indisponibilite.personnel_id == personnel_id)
-    return db.scalars(q).all()
+    if date_from is not None or date_to is not None:
+        q = q.join(Garde, Garde.id == Indisponibilite.garde_id)
+        if date_from is not None:
+            q = q.where(Garde.date >= date_from)
+        if date_to is not None:
+            q = q.where(Garde.date <= date_to)
+    return paginate(db, q, [Indisponibilite.id], page, response)
 
 
 @router.post("", response_model=IndispoRead)
 def create_indisponibilite(
     payload: IndispoCreate,
+    request: Request,
     db: Session = Depends(get_session),
     user: Personnel = Depends(get_current_user),
 ):
@@ -65,23 +70,110 @@ def create_indisponibilite(
     if not garde:
         raise HTTPException(404, "Garde introuvable")
     _check_garde_not_validated(garde, user)
+    require_if_match(request, db, garde)
     if not db.get(Personnel, target_id):
         raise HTTPException(404, "Personnel introuvable")
 
     indi = Indisponibilite(garde_id=payload.garde_id, personnel_id=target_id)
     db.add(indi)
-    try:
-        db.commit()
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(409, "Déjà marqué indisponible")
+    commit_or_conflict(db, garde.id, "Déjà marqué indisponible")
     db.refresh(indi)
     return indi
 
 
+def _insert_missing(db: Session, garde_ids: list[int], personnel_id: int) -> list[tuple[int, int]]:
+    """INSERT … ON CONFLICT DO NOTHING ; renvoie les (id, garde_id) réellement créés."""
+    t = Indisponibilite.__table__
+    now = datetime.utcnow()
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as insert_ignore
+        else:
+            from sqlalchemy.dialects.sqlite import insert as insert_ignore
+        stmt = (
+            insert_ignore(t)
+            .values([{"garde_id": gid, "personnel_id": personnel_id, "created_at": now} for gid in garde_ids])
+            .on_conflict_do_nothing(index_elements=["garde_id", "personnel_id"])
+            .returning(t.c.id, t.c.garde_id)
+        )
+        return [tuple(r) for r in db.execute(stmt)]
+    # autres bases : gardes déjà déclarées écartées avant l'INSERT
+    existing = set(db.scalars(
+        select(t.c.garde_id).where(t.c.personnel_id == personnel_id, t.c.garde_id.in_(garde_ids))
+    ))
+    created = []
+    for gid in garde_ids:
+        if gid not in existing:
+            res = db.execute(insert(t).values(garde_id=gid, personnel_id=personnel_id, created_at=now))
+            created.append((res.inserted_primary_key[0], gid))
+    return created
+
+
+@router.post("/bulk", response_model=IndispoBulkResult)
+def create_indisponibilites_bulk(
+    payload: IndispoBulkCreate,
+    db: Session = Depends(get_session),
+    user: Personnel = Depends(get_current_user),
+):
+    """
+    Indisponibilité sur toutes les gardes d'une période (filtrée par créneaux / équipe) ou
+    d'une liste. Gardes déjà déclarées ignorées (skipped), feuilles validées ignorées sauf
+    pour ADMIN/OFFICIER (locked).
+    """
+    # Agents et OPE ne peuvent déclarer que leur propre indisponibilité
+    target_id = payload.personnel_id if _is_privileged(user) else user.id
+
+    by_range = payload.date_from is not None or payload.date_to is not None
+    if by_range == (payload.garde_ids is not None):
+        raise HTTPException(400, "Indiquer soit une période (date_from, date_to), soit garde_ids")
+    if not db.get(Personnel, target_id):
+        raise HTTPException(404, "Personnel introuvable")
+
+    q = select(Garde.id, Garde.validated)
+    if by_range:
+        if payload.date_from is None or payload.date_to is None:
+            raise HTTPException(400, "date_from et date_to sont requis ensemble")
+        if payload.date_to < payload.date_from:
+            raise HTTPException(400, "date_to doit être postérieure ou égale à date_from")
+        if (payload.date_to - payload.date_from).days >= BULK_MAX_DAYS:
+            raise HTTPException(400, f"Période limitée à {BULK_MAX_DAYS} jours")
+        q = q.where(Garde.date >= payload.date_from, Garde.date <= payload.date_to)
+        if payload.slots:
+            q = q.where(Garde.slot.in_([Slot(s) for s in payload.slots]))
+        if payload.equipe_id is not None:
+            q = q.where(Garde.equipe_id == payload.equipe_id)
+    else:
+        wanted = set(payload.garde_ids)
+        if len(wanted) > 2 * BULK_MAX_DAYS:
+            raise HTTPException(400, f"{2 * BULK_MAX_DAYS} gardes au plus")
+        q = q.where(Garde.id.in_(wanted))
+    gardes = db.execute(q.order_by(Garde.id)).all()
+    if not by_range and len(gardes) != len(wanted):
+        missing = sorted(wanted - {gid for gid, _ in gardes})
+        raise HTTPException(404, f"Garde(s) introuvable(s) : {', '.join(map(str, missing))}")
+
+    allowed = [gid for gid, validated in gardes if not validated or _is_admin_off(user)]
+    created = _insert_missing(db, allowed, target_id) if allowed else []
+
+    # insert() Core : versions de garde et flux SSE alimentés explicitement
+    garde_versions.record_rows(db, garde_versions.INDISPONIBILITE, "created", created)
+    change_feed.publish_rows(db, Indisponibilite, "created", [
+        {"id": iid, "garde_id": gid, "personnel_id": target_id} for iid, gid in created
+    ])
+    db.commit()
+    return IndispoBulkResult(
+        created=len(created),
+        skipped=len(allowed) - len(created),
+        locked=len(gardes) - len(allowed),
+        indisponibilites=[IndispoRead(id=iid, garde_id=gid, personnel_id=target_id) for iid, gid in sorted(created)],
+    )
+
+
 @router.delete("/{indi_id}")
 def delete_indisponibilite(
     indi_id: int,
+    request: Request,
     db: Session = Depends(get_session),
     user: Personnel = Depends(get_current_user),
 ):
@@ -92,11 +184,12 @@ def delete_indisponibilite(
     garde = db.get(Garde, indi.garde_id)
     if garde:
         _check_garde_not_validated(garde, user)
+        require_if_match(request, db, garde)
 
     # Un non-privilégié ne peut supprimer que sa propre indisponibilité
     if not _is_privileged(user) and indi.personnel_id != user.id:
         raise HTTPException(403, "Vous ne pouvez supprimer que vos propres indisponibilités")
 
     db.delete(indi)
-    db.commit()
+    commit_or_conflict(db, indi.garde_id, "Indisponibilité déjà supprimée entre-temps")
     return {"ok": True}
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_session
+from app.core.security import get_current_user
+from app.db.models import ValidationJob
+from app.schemas.job import JobRead
+from app.services.validation_jobs import job_progress
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}", response_model=JobRead, dependencies=[Depends(get_current_user)])
+def get_job(job_id: int, db: Session = Depends(get_session)):
+    """Avancement d'un job de validation (mails envoyés / en échec, taille du PDF)."""
+    job = db.get(ValidationJob, job_id)
+    if not job:
+        raise HTTPException(404, "Job introuvable")
+    return job_progress(db, job)
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.core.query_metrics import render_prometheus
+from app.core.security import require_roles_async
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_roles_async("ADMIN"))],
+)
+async def metrics():
+    """
+    Agrégats par route (format texte Prometheus) : requêtes HTTP, requêtes SQL, temps SQL,
+    max de requêtes par appel, nombre d'appels signalés N+1. Valeurs propres à CE worker.
+    Réservé aux admins : le scraper s'authentifie avec un jeton de compte ADMIN.
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -1,9 +1,10 @@
 import secrets
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from app.api.deps import get_session
+from app.api.pagination import PageParams, page_params, paginate
 from app.db.models import (
     Personnel,
     PersonnelCompetence,
@@ -79,10 +80,20 @@ def create_personnel(payload: PersonnelCreate, db: Session = Depends(get_session
 # --- LIST ---
 @router.get("", response_model=list[PersonnelRead])   # sans slash
 @router.get("/", response_model=list[PersonnelRead])  # avec slash
-def list_personnels(db: Session = Depends(get_session)):
-    return db.scalars(
-        select(Personnel).order_by(Personnel.nom, Personnel.prenom)
-    ).all()
+def list_personnels(
+    response: Response,
+    equipe_id: int | None = Query(None),
+    active: bool | None = Query(None),
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_session),
+):
+    """Personnels triés par nom/prénom, paginés (curseur dans X-Next-Cursor)."""
+    q = select(Personnel)
+    if equipe_id is not None:
+        q = q.where(Personnel.equipe_id == equipe_id)
+    if active is not None:
+        q = q.where(Personnel.is_active.is_(active))
+    return paginate(db, q, [Personnel.nom, Personnel.prenom, Personnel.id], page, response)
 
 
 # --- COMPÉTENCES ---
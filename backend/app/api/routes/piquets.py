@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel, TypeAdapter
 from typing import List
 from sqlalchemy import select, and_
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError
-from app.core.security import require_roles
-from app.api.deps import get_session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.security import require_roles, require_roles_async
+from app.api.deps import get_session, get_async_session
+from app.api.http_cache import serve_ref_async
 from app.db.models import Piquet, PiquetCompetence, Competence
 from app.schemas.piquet import PiquetCreate, PiquetRead, CompetenceMini
+from app.services.ref_versions import PIQUETS
 
 router = APIRouter(prefix="/piquets", tags=["piquets"])
 
+_LIST = TypeAdapter(list[PiquetRead])
+
 # -------- helpers --------
 def _query_piquet_with_exigences(db: Session):
     return (
@@ -53,11 +58,14 @@ def create_piquet(payload: PiquetCreate, db: Session = Depends(get_session)):
     p = db.scalar(_query_piquet_with_exigences(db).where(Piquet.id == p.id))
     return _to_read_schema(p)
 
-@router.get("/", response_model=list[PiquetRead], dependencies=[Depends(require_roles("ADMIN","OFFICIER","OPE","CHEF_EQUIPE","ADJ_CHEF_EQUIPE","AGENT"))])
-@router.get("", response_model=list[PiquetRead], dependencies=[Depends(require_roles("ADMIN","OFFICIER","OPE","CHEF_EQUIPE","ADJ_CHEF_EQUIPE","AGENT"))])
-def list_piquets(db: Session = Depends(get_session)):
-    rows = db.execute(_query_piquet_with_exigences(db)).unique().scalars().all()
-    return [_to_read_schema(p) for p in rows]
+@router.get("/", response_model=list[PiquetRead], dependencies=[Depends(require_roles_async("ADMIN","OFFICIER","OPE","CHEF_EQUIPE","ADJ_CHEF_EQUIPE","AGENT"))])
+@router.get("", response_model=list[PiquetRead], dependencies=[Depends(require_roles_async("ADMIN","OFFICIER","OPE","CHEF_EQUIPE","ADJ_CHEF_EQUIPE","AGENT"))])
+async def list_piquets(request: Request, db: AsyncSession = Depends(get_async_session)):
+    # ETag versionné (piquets, exigences, compétences) : 304 tant que rien n'a changé
+    async def load():
+        rows = (await db.execute(_query_piquet_with_exigences(db))).unique().scalars().all()
+        return [_to_read_schema(p) for p in rows]
+    return await serve_ref_async(request, db, PIQUETS, _LIST, load)
 
 @router.delete("/{piquet_id}", status_code=204)
 @router.delete("{piquet_id}", status_code=204)
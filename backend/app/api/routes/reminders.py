@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_session
+from app.core.security import require_roles
+from app.db.models import ReminderBatch
+from app.services.scheduler import reminder_summary
+
+router = APIRouter(
+    prefix="/reminders",
+    tags=["reminders"],
+    dependencies=[Depends(require_roles("ADMIN", "OFFICIER"))],
+)
+
+
+@router.get("")
+def list_reminders(db: Session = Depends(get_session)):
+    """Rappels mensuels planifiés, du plus récent au plus ancien (envoyés / en attente / en échec)."""
+    batches = db.scalars(
+        select(ReminderBatch).order_by(ReminderBatch.annee.desc(), ReminderBatch.mois.desc())
+    ).all()
+    return [reminder_summary(db, b) for b in batches]
+
+
+@router.get("/{annee}/{mois}")
+def get_reminder(annee: int, mois: int, db: Session = Depends(get_session)):
+    batch = db.scalar(
+        select(ReminderBatch).where(ReminderBatch.annee == annee, ReminderBatch.mois == mois)
+    )
+    if not batch:
+        raise HTTPException(404, "Aucun rappel planifié pour ce mois")
+    return reminder_summary(db, batch)
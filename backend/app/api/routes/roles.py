@@ -1,9 +1,14 @@
 # app/api/roles.py
+import hashlib
+import json
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Request, Response
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
 from app.api.deps import get_session
+from app.api.http_cache import CACHE_CONTROL, is_not_modified, json_bytes, not_modified
+from app.api.pagination import PageParams, page_params, paginate
 from app.core.security import get_current_user
 from app.db.models import Personnel, PersonnelRole, RoleEnum
 
@@ -19,27 +24,37 @@ class AssignRolePayload(BaseModel):
     role: RoleEnum
 
 # ---------- LISTE DES RÔLES (pour le formulaire) ----------
+# liste figée par l'enum : corps et ETag calculés une fois par process
+_ROLES_BODY = json.dumps([r.value for r in RoleEnum]).encode()
+_ROLES_ETAG = '"roles-' + hashlib.sha1(_ROLES_BODY).hexdigest()[:12] + '"'
+
+
 @router.get("")
-def list_all_roles():
+def list_all_roles(request: Request):
     # renvoie la liste des rôles disponibles sous forme de strings
-    return [r.value for r in RoleEnum]
+    if is_not_modified(request, _ROLES_ETAG):
+        return not_modified({"ETag": _ROLES_ETAG, "Cache-Control": CACHE_CONTROL})
+    return json_bytes(_ROLES_BODY, _ROLES_ETAG)
 
-# ---------- LISTER LES RÔLES D’UN UTILISATEUR ----------
-@router.get("/{personnel_id}")
-def list_personnel_roles(personnel_id: int, db: Session = Depends(get_session), user=Depends(get_current_user)):
-    # Option : limiter la visibilité (ex: admin/officier), sinon enlève ce check
-    # if not _is_admin_or_officier(user): raise HTTPException(403, "Accès réservé")
-    p = db.get(Personnel, personnel_id)
-    if not p: raise HTTPException(404, "Personnel introuvable")
-    roles = [r.role.value for r in p.roles]
-    return roles or ["AGENT"]
-
-# ---------- LISTER TOUS LES UTILISATEURS + RÔLES (déjà présent chez toi) ----------
+# ---------- LISTER TOUS LES UTILISATEURS + RÔLES ----------
+# déclaré avant /{personnel_id} : sinon « list-users » est capturé comme un id (422)
 @router.get("/list-users")
 @router.get("list-users")
-def list_users(db: Session = Depends(get_session), user=Depends(get_current_user)):
+def list_users(
+    response: Response,
+    equipe_id: int | None = Query(None),
+    active: bool | None = Query(None),
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
     if not _is_admin_or_officier(user): raise HTTPException(403, "Accès réservé")
-    rows = db.query(Personnel).all()
+    q = select(Personnel).options(selectinload(Personnel.roles))
+    if equipe_id is not None:
+        q = q.where(Personnel.equipe_id == equipe_id)
+    if active is not None:
+        q = q.where(Personnel.is_active.is_(active))
+    rows = paginate(db, q, [Personnel.id], page, response)
     return [
         {
             "id": p.id,
@@ -50,6 +65,16 @@ def list_users(db: Session = Depends(get_session), user=Depends(get_current_user
         for p in rows
     ]
 
+# ---------- LISTER LES RÔLES D’UN UTILISATEUR ----------
+@router.get("/{personnel_id}")
+def list_personnel_roles(personnel_id: int, db: Session = Depends(get_session), user=Depends(get_current_user)):
+    # Option : limiter la visibilité (ex: admin/officier), sinon enlève ce check
+    # if not _is_admin_or_officier(user): raise HTTPException(403, "Accès réservé")
+    p = db.get(Personnel, personnel_id)
+    if not p: raise HTTPException(404, "Personnel introuvable")
+    roles = [r.role.value for r in p.roles]
+    return roles or ["AGENT"]
+
 # ---------- ASSIGN (POST avec JSON body) ----------
 @router.post("/assign")
 def assign_role(payload: AssignRolePayload, db: Session = Depends(get_session), user=Depends(get_current_user)):
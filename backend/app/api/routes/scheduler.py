@@ -0,0 +1,37 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_session
+from app.core.security import require_roles
+from app.services.scheduled_jobs import JOBS, is_running, jobs_status, run_job
+
+router = APIRouter(
+    prefix="/scheduler",
+    tags=["scheduler"],
+    dependencies=[Depends(require_roles("ADMIN"))],
+)
+
+
+@router.get("")
+def get_scheduler_status(db: Session = Depends(get_session)):
+    """
+    Statut des jobs planifiés (dernière / prochaine exécution, durée, erreur),
+    lu en base : identique quel que soit le worker qui répond.
+    """
+    try:
+        from app.services.scheduling import scheduler_state
+        worker = scheduler_state()
+    except ImportError:
+        worker = {"mode": "off", "running": False, "is_leader": False}
+    return {"worker": worker, "jobs": jobs_status(db)}
+
+
+@router.post("/jobs/{job_id}/run", status_code=202)
+def run_job_now(job_id: str, background: BackgroundTasks, db: Session = Depends(get_session)):
+    """Lance un job immédiatement (dans ce worker), sauf s'il est déjà en cours."""
+    if job_id not in JOBS:
+        raise HTTPException(404, "Job inconnu")
+    if is_running(db, job_id):
+        raise HTTPException(409, "Job déjà en cours d'exécution")
+    background.add_task(run_job, job_id, "manual")
+    return {"status": "accepted", "job_id": job_id}
@@ -0,0 +1,59 @@
+# app/core/boot.py
+# Chronométrage du démarrage d'un worker : imports de app.main puis étapes du startup.
+# Les durées sont journalisées ([BOOT]) et exposées sur /health/startup ; au-delà de
+# STARTUP_BUDGET_MS, un avertissement est émis pour suivre les régressions.
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+
+_t0: float | None = None
+_last: float | None = None
+steps: dict[str, float] = {}
+total_ms: float | None = None
+
+
+def start() -> None:
+    """À appeler tout en haut de app.main, avant les imports lourds."""
+    global _t0, _last
+    _t0 = _last = time.perf_counter()
+    steps.clear()
+
+
+def mark(name: str) -> None:
+    """Durée écoulée depuis le repère précédent (ex. « imports »)."""
+    global _last
+    if _last is None:
+        start()
+    now = time.perf_counter()
+    steps[name] = round((now - _last) * 1000, 1)
+    _last = now
+
+
+@contextmanager
+def step(name: str):
+    global _last
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        steps[name] = round((time.perf_counter() - t0) * 1000, 1)
+        _last = time.perf_counter()
+
+
+def finish() -> None:
+    global total_ms
+    from app.core.config import settings
+
+    if _t0 is None:
+        return
+    total_ms = round((time.perf_counter() - _t0) * 1000, 1)
+    detail = ", ".join(f"{k} {v:.0f} ms" for k, v in steps.items())
+    print(f"[BOOT] Démarrage en {total_ms:.0f} ms ({detail})")
+    budget = settings.STARTUP_BUDGET_MS
+    if budget > 0 and total_ms > budget:
+        print(f"[BOOT] ⚠️ Budget de démarrage dépassé : {total_ms:.0f} ms > {budget} ms")
+
+
+def report() -> dict:
+    return {"total_ms": total_ms, "steps": dict(steps)}
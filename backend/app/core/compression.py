@@ -0,0 +1,14 @@
+# app/core/compression.py
+# Gzip des réponses, sauf flux SSE : le GZipMiddleware de Starlette accumule la sortie
+# compressée sans la vider, ce qui retarderait les événements de /changes/stream.
+from fastapi.middleware.gzip import GZipMiddleware
+
+
+class GZipExceptEventStream(GZipMiddleware):
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http":
+            for key, value in scope["headers"]:
+                if key == b"accept" and b"text/event-stream" in value:
+                    await self.app(scope, receive, send)
+                    return
+        await super().__call__(scope, receive, send)
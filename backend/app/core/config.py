@@ -11,8 +11,48 @@ class Settings(BaseSettings):
     postgres_host: str = "localhost"
     postgres_port: int = 5432
 
+    # --- Pool de connexions (par process ; total ≈ workers × (size + overflow)) ---
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30              # s d'attente max d'une connexion libre
+    DB_POOL_RECYCLE: int = 1800            # s avant renouvellement d'une connexion (-1 = jamais)
+    # True : SELECT 1 à chaque checkout ; False : connexion invalidée à la 1re erreur (+ recycle)
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_TIMEOUT_MS: int = 30000   # statement_timeout Postgres par session (0 = aucun)
+
+    # --- Schéma / démarrage ---
+    # create_all : tables créées au démarrage (dev, SQLite)
+    # migrations : schéma géré par Alembic (alembic upgrade head au déploiement) ;
+    #              le démarrage vérifie seulement la révision de la base
+    DB_SCHEMA_MODE: str = "create_all"
+    STARTUP_BUDGET_MS: int = 2000          # au-delà : avertissement [BOOT] dans les logs (0 = off)
+
+    # --- Métriques SQL par requête (Server-Timing, /metrics) ---
+    SQL_METRICS_ENABLED: bool = True
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10     # même requête répétée plus de N fois → log N+1 (0 = off)
+
+    # --- Compression des réponses (gzip si le client l'accepte) ---
+    GZIP_MIN_BYTES: int = 1024             # corps plus petits envoyés tels quels (0 = gzip désactivé)
+    GZIP_LEVEL: int = 6                    # 1 (rapide) … 9 (compact)
+
+    # --- Flux des changements du planning (SSE GET /changes/stream) ---
+    CHANGE_FEED_ENABLED: bool = True
+    # Postgres : diffusion entre workers par LISTEN/NOTIFY (sinon : process courant seulement)
+    CHANGE_FEED_PG_NOTIFY: bool = True
+    CHANGE_FEED_CHANNEL: str = "planning_changes"
+    CHANGE_FEED_QUEUE_SIZE: int = 500      # événements en attente par client avant « resync »
+    CHANGE_FEED_HEARTBEAT_S: int = 25      # commentaire SSE périodique (proxys, détection coupure)
+
     FRONTEND_URL: str = "https://pompier.gandour.org"
 
+    # --- Agenda iCalendar des agents (GET /agenda/{token}.ics) ---
+    AGENDA_TZ: str = "Europe/Paris"
+    AGENDA_JOUR_START: str = "07:00"       # début d'une garde JOUR (heure locale)
+    AGENDA_NUIT_START: str = "19:00"       # début d'une garde NUIT (fin le lendemain)
+    AGENDA_SLOT_HOURS: int = 12            # durée d'une garde
+    AGENDA_PAST_DAYS: int = 90             # historique publié avant aujourd'hui
+    AGENDA_CACHE_SIZE: int = 1000          # flux rendus gardés en mémoire par process
+
     # --- JWT ---
     JWT_SECRET: str  # obligatoire
     JWT_ALG: str = "HS256"
@@ -28,6 +68,22 @@ class Settings(BaseSettings):
     GMAIL_CSV_SUBJECT: Optional[str] = None
     GMAIL_FETCH_HOUR: int = 3
 
+    # --- Balayage des compétences expirées sur le planning (job quotidien) ---
+    COMPETENCE_SWEEP_HOUR: int = 4
+
+    # --- Rappel mensuel (envoi par lots) ---
+    REMINDER_CHUNK_SIZE: int = 25          # destinataires traités par lot
+    REMINDER_MAX_PER_MINUTE: int = 30      # limite de débit SMTP (0 = illimité)
+    REMINDER_MAX_ATTEMPTS: int = 3         # tentatives par destinataire
+
+    # --- Scheduler (APScheduler) ---
+    # leader : un seul process du déploiement exécute les jobs (advisory lock Postgres)
+    # all    : chaque process exécute les jobs (ancien comportement, mono-worker)
+    # off    : aucun job dans ce process
+    SCHEDULER_MODE: str = "leader"
+    SCHEDULER_LOCK_KEY: int = 730125       # clé pg_advisory_lock partagée par les workers
+    SCHEDULER_LEADER_POLL_S: int = 30      # intervalle de tentative / vérification du verrou
+
     model_config = SettingsConfigDict(
         env_file=".env",
         extra="ignore",
@@ -55,6 +111,21 @@ class Settings(BaseSettings):
             "ou POSTGRES_DB / POSTGRES_USER / POSTGRES_PASSWORD"
         )
 
+    @property
+    def async_db_url(self) -> str:
+        """
+        URL de db_url avec un driver asynchrone (routes `async def`).
+        - postgresql / postgresql+psycopg → postgresql+psycopg (psycopg 3 gère l'async)
+        - sqlite → sqlite+aiosqlite (dev, nécessite aiosqlite)
+        """
+        url = self.db_url
+        scheme, sep, rest = url.partition("://")
+        if scheme.startswith("postgresql"):
+            return f"postgresql+psycopg{sep}{rest}"
+        if scheme.startswith("sqlite"):
+            return f"sqlite+aiosqlite{sep}{rest}"
+        return url
+
     @property
     def cors_list(self) -> List[str]:
         """
@@ -1,24 +1,31 @@
 # app/core/email_utils.py
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+# fastapi-mail n'est importé qu'au premier envoi (pas au démarrage du worker)
+from functools import lru_cache
+
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=os.getenv("MAIL_USERNAME"),
-    MAIL_PASSWORD=os.getenv("MAIL_PASSWORD"),
-    MAIL_FROM=os.getenv("MAIL_FROM"),
-    MAIL_PORT=int(os.getenv("MAIL_PORT", "587")),
-    MAIL_SERVER=os.getenv("MAIL_SERVER"),
-    MAIL_FROM_NAME=os.getenv("MAIL_FROM_NAME", "FEUILLE_GARDE"),
-    # fastapi-mail récent n'accepte plus MAIL_TLS / MAIL_SSL, mais
-    # MAIL_STARTTLS / MAIL_SSL_TLS → on mappe sur tes variables existantes
-    MAIL_STARTTLS=(os.getenv("MAIL_TLS", "True") == "True"),
-    MAIL_SSL_TLS=(os.getenv("MAIL_SSL", "False") == "True"),
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-)
+
+@lru_cache(maxsize=1)
+def _conf():
+    from fastapi_mail import ConnectionConfig
+
+    return ConnectionConfig(
+        MAIL_USERNAME=os.getenv("MAIL_USERNAME"),
+        MAIL_PASSWORD=os.getenv("MAIL_PASSWORD"),
+        MAIL_FROM=os.getenv("MAIL_FROM"),
+        MAIL_PORT=int(os.getenv("MAIL_PORT", "587")),
+        MAIL_SERVER=os.getenv("MAIL_SERVER"),
+        MAIL_FROM_NAME=os.getenv("MAIL_FROM_NAME", "FEUILLE_GARDE"),
+        # fastapi-mail récent n'accepte plus MAIL_TLS / MAIL_SSL, mais
+        # MAIL_STARTTLS / MAIL_SSL_TLS → on mappe sur tes variables existantes
+        MAIL_STARTTLS=(os.getenv("MAIL_TLS", "True") == "True"),
+        MAIL_SSL_TLS=(os.getenv("MAIL_SSL", "False") == "True"),
+        USE_CREDENTIALS=True,
+        VALIDATE_CERTS=True,
+    )
 
 
 async def send_email(
@@ -35,6 +42,8 @@ async def send_email(
     - body : texte ou HTML
     - html : True -> body est du HTML, False -> texte brut
     """
+    from fastapi_mail import FastMail, MessageSchema
+
     message = MessageSchema(
         subject=subject,
         recipients=recipients,
@@ -42,5 +51,5 @@ async def send_email(
         subtype="html" if html else "plain",
     )
 
-    fm = FastMail(conf)
+    fm = FastMail(_conf())
     await fm.send_message(message)
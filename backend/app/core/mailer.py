@@ -2,6 +2,7 @@
 from __future__ import annotations
 import os
 import smtplib
+from dataclasses import dataclass
 from email import encoders
 from email.mime.base import MIMEBase
 from email.mime.multipart import MIMEMultipart
@@ -20,24 +21,71 @@ except Exception:
 # ——————————————————————————————————————
 # Helpers lecture settings (DB -> ENV -> défaut)
 # ——————————————————————————————————————
+def _as_str(val) -> Optional[str]:
+    # value peut être texte ou JSON; on convertit en str simple quand utile
+    if isinstance(val, (dict, list)):
+        # pas utile ici; on retourne None pour forcer env
+        return None
+    return str(val) if val is not None else None
+
+
 def _get_db_setting(db: Optional[Session], key: str) -> Optional[str]:
     if db is None or AppSetting is None:
         return None
     row = db.query(AppSetting).filter(AppSetting.key == key).first()
     if not row:
         return None
-    val = row.value
-    # value peut être texte ou JSON; on convertit en str simple quand utile
-    if isinstance(val, (dict, list)):
-        # pas utile ici; on retourne None pour forcer env
-        return None
-    return str(val) if val is not None else None
+    return _as_str(row.value)
 
 
 def get_setting(db: Optional[Session], key: str, default: Optional[str] = None) -> Optional[str]:
     return _get_db_setting(db, key) or os.getenv(key) or default
 
 
+_SMTP_KEYS = (
+    "MAIL_USERNAME", "MAIL_PASSWORD", "MAIL_FROM", "MAIL_FROM_NAME",
+    "MAIL_SERVER", "MAIL_PORT", "MAIL_TLS", "MAIL_SSL",
+)
+
+
+@dataclass(frozen=True)
+class SmtpSettings:
+    username: str
+    password: str
+    mail_from: str
+    mail_from_name: str
+    server_host: str
+    server_port: int
+    use_tls: bool
+    use_ssl: bool
+
+
+def load_smtp_settings(db: Optional[Session] = None) -> SmtpSettings:
+    """
+    Paramètres SMTP (BDD -> ENV -> défaut) en une seule requête.
+    Pour un lot d'envois (validation, rappels) : charger une fois, passer smtp= à send_mail.
+    """
+    stored: dict[str, Optional[str]] = {}
+    if db is not None and AppSetting is not None:
+        for row in db.query(AppSetting).filter(AppSetting.key.in_(_SMTP_KEYS)):
+            stored[row.key] = _as_str(row.value)
+
+    def get(key: str, default: str) -> str:
+        return stored.get(key) or os.getenv(key) or default
+
+    username = get("MAIL_USERNAME", "")
+    return SmtpSettings(
+        username=username,
+        password=get("MAIL_PASSWORD", ""),
+        mail_from=get("MAIL_FROM", username),
+        mail_from_name=get("MAIL_FROM_NAME", MAIL_FROM_NAME),
+        server_host=get("MAIL_SERVER", "smtp.gmail.com"),
+        server_port=int(get("MAIL_PORT", "587")),
+        use_tls=get("MAIL_TLS", "True").lower() == "true",
+        use_ssl=get("MAIL_SSL", "False").lower() == "true",
+    )
+
+
 # ——————————————————————————————————————
 # Const d’expo pour compat (utilisée par gardes.py)
 # NB: on ne tape pas la DB au import. Juste un défaut lisible.
@@ -54,24 +102,23 @@ def send_mail(
     html: str,
     *,
     db: Optional[Session] = None,
+    smtp: Optional[SmtpSettings] = None,
     reply_to: Optional[str] = None,
     attachments: list[tuple[str, bytes, str]] | None = None,
 ) -> None:
     """
     Envoie un e-mail HTML via SMTP (TLS recommandé).
-    Lit d’abord les paramètres en BDD (table app_settings), sinon variables d’environnement.
+    Lit d’abord les paramètres en BDD (table app_settings), sinon variables d’environnement ;
+    smtp (load_smtp_settings) évite cette relecture à chaque mail d'un lot.
 
     attachments: liste de (filename, data_bytes, content_type)
                  ex. [("feuille.pdf", pdf_bytes, "application/pdf")]
     """
-    username = get_setting(db, "MAIL_USERNAME", "")
-    password = get_setting(db, "MAIL_PASSWORD", "")
-    mail_from = get_setting(db, "MAIL_FROM", username) or ""
-    mail_from_name = get_setting(db, "MAIL_FROM_NAME", MAIL_FROM_NAME) or MAIL_FROM_NAME
-    server_host = get_setting(db, "MAIL_SERVER", "smtp.gmail.com") or "smtp.gmail.com"
-    server_port = int(get_setting(db, "MAIL_PORT", "587") or "587")
-    use_tls = (get_setting(db, "MAIL_TLS", "True") or "True").lower() == "true"
-    use_ssl = (get_setting(db, "MAIL_SSL", "False") or "False").lower() == "true"
+    cfg = smtp or load_smtp_settings(db)
+    username, password = cfg.username, cfg.password
+    mail_from, mail_from_name = cfg.mail_from, cfg.mail_from_name
+    server_host, server_port = cfg.server_host, cfg.server_port
+    use_tls, use_ssl = cfg.use_tls, cfg.use_ssl
 
     if isinstance(to, str):
         recipients = [to]
@@ -335,6 +382,37 @@ def build_html_monthly_reminder(
     return _html_base(f"GARDE SPV – Vos gardes de {mois_label}", body)
 
 
+# ——————————————————————————————————————
+# Template : compétences expirées sur des gardes planifiées (balayage quotidien)
+# ——————————————————————————————————————
+def build_html_competence_conflicts(
+    rows: list[tuple[str, str, str, str, str]],  # (date, slot, agent, piquet, motif)
+) -> str:
+    head = "".join(
+        f'<th style="padding:8px 10px;text-align:left;background:#1a2c6e;color:#c8d8ff;font-weight:600">{h}</th>'
+        for h in ("Date", "Slot", "Agent", "Piquet", "Motif")
+    )
+    cells = "".join(
+        '<tr>' + "".join(
+            f'<td style="padding:6px 10px;border-bottom:1px solid #1e2a4a;color:#c8d8ff">{v}</td>'
+            for v in row
+        ) + '</tr>'
+        for row in rows
+    )
+    body = (
+        f'<p style="margin:0 0 14px;font-size:15px">{len(rows)} affectation(s) planifiée(s) ne sont plus couvertes '
+        f'par les compétences exigées de leur piquet :</p>'
+        '<table role="presentation" width="100%" cellspacing="0" cellpadding="0"'
+        ' style="border-collapse:collapse;font-size:14px;background:#0d1530;border-radius:8px;overflow:hidden;margin:10px 0 14px">'
+        f'<thead><tr>{head}</tr></thead><tbody>{cells}</tbody></table>'
+        '<p style="margin:0 0 14px;font-size:13px;color:#8ea0d9">'
+        'Remplacez ces agents ou mettez à jour leurs compétences avant la garde.</p>'
+        f'<p style="margin:0 0 4px;font-size:14px;color:#9fb2ff">Bien cordialement,</p>'
+        f'<p style="margin:0;font-size:14px">{MAIL_FROM_NAME}</p>'
+    )
+    return _html_base("GARDE SPV – Compétences expirées sur le planning", body)
+
+
 def send_email(
     to: str,
     subject: str,
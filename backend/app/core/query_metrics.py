@@ -0,0 +1,188 @@
+# app/core/query_metrics.py
+# Comptage / chronométrage des requêtes SQL par requête HTTP + détection des N+1
+#
+# - les events SQLAlchemy (before/after_cursor_execute) alimentent les stats de la requête
+#   HTTP courante (contextvar : suit aussi les routes sync exécutées dans le threadpool) ;
+# - le middleware ajoute un header Server-Timing et agrège par route (exposé sur /metrics) ;
+# - une requête qui exécute plus de SQL_N_PLUS_ONE_THRESHOLD fois la même forme de requête
+#   est journalisée comme N+1 probable.
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Listes de paramètres « IN (…) » et littéraux : une seule forme quel que soit le nombre d'ids
+_IN_LIST = re.compile(r"\((?:\s*(?:%\(\w+\)s|\?|\$\d+|:\w+)\s*,?)+\)")
+_NUMBERS = re.compile(r"\b\d+\b")
+_SPACES = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    s = _IN_LIST.sub("(?)", statement)
+    s = _NUMBERS.sub("N", s)
+    return _SPACES.sub(" ", s).strip()
+
+
+class _RequestStats:
+    __slots__ = ("count", "duration_s", "shapes")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration_s = 0.0
+        self.shapes: Counter[str] = Counter()
+
+
+_current: ContextVar[_RequestStats | None] = ContextVar("query_stats", default=None)
+
+
+# ──────────────────────────────────────────────
+# Events SQLAlchemy
+# ──────────────────────────────────────────────
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    stats.count += 1
+    stats.duration_s += time.perf_counter() - starts.pop()
+    stats.shapes[statement_shape(statement)] += 1
+
+
+def instrument_engine(engine: Engine) -> None:
+    """À appeler pour chaque engine (pour un AsyncEngine : engine.sync_engine)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ──────────────────────────────────────────────
+# Agrégats par route (par process)
+# ──────────────────────────────────────────────
+
+class _RouteTotals:
+    __slots__ = ("requests", "queries", "db_s", "total_s", "max_queries", "n_plus_one")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.queries = 0
+        self.db_s = 0.0
+        self.total_s = 0.0
+        self.max_queries = 0
+        self.n_plus_one = 0
+
+
+_totals: dict[tuple[str, str], _RouteTotals] = {}
+_totals_lock = threading.Lock()
+
+
+def _record(method: str, route: str, stats: _RequestStats, total_s: float, suspect: bool) -> None:
+    with _totals_lock:
+        t = _totals.get((method, route))
+        if t is None:
+            t = _totals[(method, route)] = _RouteTotals()
+        t.requests += 1
+        t.queries += stats.count
+        t.db_s += stats.duration_s
+        t.total_s += total_s
+        t.max_queries = max(t.max_queries, stats.count)
+        if suspect:
+            t.n_plus_one += 1
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def render_prometheus() -> str:
+    """Export texte Prometheus des agrégats par route de CE process."""
+    with _totals_lock:
+        items = sorted(_totals.items())
+        rows = [(m, r, t.requests, t.queries, t.db_s, t.total_s, t.max_queries, t.n_plus_one)
+                for (m, r), t in items]
+    metrics = [
+        ("http_requests_total", "counter", "Requêtes HTTP traitées", 2),
+        ("sql_queries_total", "counter", "Requêtes SQL exécutées", 3),
+        ("sql_query_seconds_total", "counter", "Temps cumulé passé en SQL", 4),
+        ("http_request_seconds_total", "counter", "Temps cumulé de traitement", 5),
+        ("sql_queries_per_request_max", "gauge", "Maximum de requêtes SQL pour une requête HTTP", 6),
+        ("sql_n_plus_one_total", "counter", "Requêtes HTTP signalées N+1", 7),
+    ]
+    lines: list[str] = []
+    for name, kind, help_, idx in metrics:
+        lines.append(f"# HELP {name} {help_}")
+        lines.append(f"# TYPE {name} {kind}")
+        for row in rows:
+            value = row[idx]
+            value = f"{value:.6f}" if isinstance(value, float) else str(value)
+            lines.append(f'{name}{{method="{row[0]}",route="{_escape(row[1])}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+# ──────────────────────────────────────────────
+# Middleware ASGI
+# ──────────────────────────────────────────────
+
+class QueryMetricsMiddleware:
+    """Middleware ASGI : stats SQL de chaque requête + header Server-Timing."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = _RequestStats()
+        token = _current.set(stats)
+        t0 = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                app_ms = (time.perf_counter() - t0) * 1000
+                timing = (
+                    f'db;dur={stats.duration_s * 1000:.1f};desc="{stats.count} queries", '
+                    f"app;dur={app_ms:.1f}"
+                ).encode("latin-1")
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"server-timing", timing)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            self._finish(scope["method"], route, stats, time.perf_counter() - t0)
+
+    @staticmethod
+    def _finish(method: str, route: str, stats: _RequestStats, total_s: float) -> None:
+        threshold = settings.SQL_N_PLUS_ONE_THRESHOLD
+        suspect = False
+        if threshold > 0 and stats.shapes:
+            shape, n = stats.shapes.most_common(1)[0]
+            if n > threshold:
+                suspect = True
+                logger.warning(
+                    f"[SQL] ⚠️ N+1 probable {method} {route} : {n}× la même requête "
+                    f"({stats.count} requêtes, {stats.duration_s * 1000:.1f} ms) — {shape[:300]}"
+                )
+        _record(method, route, stats, total_s, suspect)
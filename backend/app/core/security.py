@@ -6,9 +6,11 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import jwt, JWTError
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
-from app.api.deps import get_session
+from app.api.deps import get_session, get_async_session
 from app.db.models import RoleEnum, Garde, Personnel
 
 # ====== CONFIG (mets ça dans tes settings si tu veux) ======
@@ -82,9 +84,50 @@ _http_bearer = HTTPBearer(auto_error=False)
 def _decode_token(token: str) -> dict:
     try:
         # lève JWTError si invalide/expiré
-        return jwt.decode(token, JWT_SECRET, algorithms=[ALGO])
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGO])
     except JWTError as e:
         raise HTTPException(status_code=401, detail="Token invalide ou expiré") from e
+    # jeton à portée restreinte (ticket de flux…) : pas un jeton de connexion
+    if payload.get("scope"):
+        raise HTTPException(status_code=401, detail="Token invalide ou expiré")
+    return payload
+
+
+def access_token_claims(token: str) -> dict:
+    """Contenu d'un jeton de connexion valide (401 sinon)."""
+    return _decode_token(token)
+
+
+# ====== TICKET DU FLUX SSE ======
+# EventSource ne sait pas envoyer d'en-tête : le jeton passe dans l'URL (journaux d'accès,
+# historique du navigateur). On n'y met donc jamais le jeton de connexion, seulement un
+# ticket de STREAM_TICKET_SECONDS valable pour GET /changes/stream, qui reprend l'échéance
+# du jeton de connexion (le flux est fermé à cette échéance).
+STREAM_SCOPE = "change_stream"
+STREAM_TICKET_SECONDS = 60
+
+
+def create_stream_ticket(access_token: str) -> str:
+    login = _decode_token(access_token)
+    now = datetime.now(timezone.utc)
+    payload = {
+        "sub": login.get("sub"),
+        "scope": STREAM_SCOPE,
+        "iat": int(now.timestamp()),
+        "exp": int((now + timedelta(seconds=STREAM_TICKET_SECONDS)).timestamp()),
+        "session_exp": login.get("exp"),
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=ALGO)
+
+
+def decode_stream_ticket(ticket: str) -> dict:
+    try:
+        data = jwt.decode(ticket, JWT_SECRET, algorithms=[ALGO])
+    except JWTError as e:
+        raise HTTPException(status_code=401, detail="Ticket invalide ou expiré") from e
+    if data.get("scope") != STREAM_SCOPE:
+        raise HTTPException(status_code=401, detail="Ticket invalide ou expiré")
+    return data
 
 
 def get_current_user(
@@ -115,6 +158,41 @@ def get_current_user(
     return user
 
 
+async def get_current_user_async(
+    creds: Optional[HTTPAuthorizationCredentials] = Depends(_http_bearer),
+    db: AsyncSession = Depends(get_async_session),
+) -> Personnel:
+    """
+    Équivalent async de get_current_user (routes `async def`).
+    Les rôles sont chargés d'avance : pas de lazy-load possible en async.
+    """
+    if creds is None or not creds.credentials:
+        raise HTTPException(status_code=401, detail="Identification requise")
+    return await user_from_token_async(creds.credentials, db)
+
+
+async def user_from_token_async(token: str, db: AsyncSession) -> Personnel:
+    """JWT → Personnel (rôles chargés)."""
+    return await user_from_claims_async(_decode_token(token), db)
+
+
+async def user_from_claims_async(payload: dict, db: AsyncSession) -> Personnel:
+    """Contenu de jeton déjà vérifié (connexion ou ticket de flux) → Personnel (rôles chargés)."""
+    email = payload.get("sub")
+    if not email:
+        raise HTTPException(status_code=401, detail="Token sans sujet")
+
+    user = await db.scalar(
+        select(Personnel).options(selectinload(Personnel.roles)).where(Personnel.email == email).limit(1)
+    )
+    if not user:
+        raise HTTPException(status_code=401, detail="Utilisateur inconnu")
+    if getattr(user, "is_active", True) is False:
+        raise HTTPException(status_code=401, detail="Compte inactif")
+
+    return user
+
+
 # ====== ROLES / AUTORISATIONS ======
 def user_roles_set(user: Personnel) -> Set[RoleEnum]:
     """Retourne l'ensemble des rôles du user depuis la BDD (RoleEnum)."""
@@ -236,3 +314,13 @@ def require_roles(*roles):
         return user
 
     return _dep
+
+
+def require_roles_async(*roles):
+    """Comme require_roles, pour les routes `async def` (utilisateur chargé en async)."""
+    async def _dep(user: Personnel = Depends(get_current_user_async)):
+        if not user_has_any_role(user, *roles):
+            raise HTTPException(status_code=403, detail="Droits insuffisants")
+        return user
+
+    return _dep
@@ -0,0 +1,69 @@
+# app/db/migrations.py
+# Schéma au démarrage : create_all (dev) ou migrations Alembic versionnées (DB_SCHEMA_MODE)
+#
+# En mode « migrations », le démarrage n'importe pas Alembic et ne réfléchit pas les tables :
+# il compare la révision enregistrée (alembic_version) aux têtes lues dans alembic/versions.
+from __future__ import annotations
+
+import ast
+import re
+from pathlib import Path
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+MODES = ("create_all", "migrations")
+VERSIONS_DIR = Path(__file__).resolve().parents[2] / "alembic" / "versions"
+
+_ASSIGN = re.compile(r"^(revision|down_revision)\s*(?::[^=]+)?=\s*(.+)$", re.M)
+
+
+def head_revisions(versions_dir: Path = VERSIONS_DIR) -> set[str]:
+    """Têtes du graphe de migrations (révisions dont aucune autre ne descend)."""
+    revisions: set[str] = set()
+    parents: set[str] = set()
+    for path in versions_dir.glob("*.py"):
+        values = dict(_ASSIGN.findall(path.read_text(encoding="utf-8")))
+        if "revision" not in values:
+            continue
+        revisions.add(ast.literal_eval(values["revision"]))
+        down = ast.literal_eval(values.get("down_revision", "None"))
+        if isinstance(down, str):
+            parents.add(down)
+        elif down:
+            parents.update(down)
+    return revisions - parents
+
+
+def current_revisions(engine: Engine) -> set[str]:
+    with engine.connect() as conn:
+        if not inspect(conn).has_table("alembic_version"):
+            return set()
+        return set(conn.execute(text("SELECT version_num FROM alembic_version")).scalars())
+
+
+def ensure_schema(engine: Engine) -> str:
+    """Prépare / vérifie le schéma selon DB_SCHEMA_MODE ; renvoie le mode appliqué."""
+    mode = (settings.DB_SCHEMA_MODE or "create_all").lower()
+    if mode not in MODES:
+        print(f"[WARN] DB_SCHEMA_MODE={mode!r} inconnu — utilisation de 'create_all'.")
+        mode = "create_all"
+
+    if mode == "create_all":
+        from app.db.base import Base
+        import app.db.models  # noqa: F401
+
+        Base.metadata.create_all(bind=engine)
+        return mode
+
+    expected = head_revisions()
+    current = current_revisions(engine)
+    if not current:
+        print("[DB] ⚠️ Aucune révision Alembic en base — lancez « alembic upgrade head » "
+              "(base créée par create_all : « alembic stamp head »).")
+    elif current != expected:
+        print(f"[DB] ⚠️ Schéma en révision {sorted(current)}, attendu {sorted(expected)} "
+              "— lancez « alembic upgrade head ».")
+    return mode
@@ -10,8 +10,10 @@ from sqlalchemy import (
     DateTime,
     Enum as SAEnum,
     ForeignKey,
+    Index,
     Integer,
     String,
+    Text,
     UniqueConstraint,
     JSON,
 )
@@ -66,6 +68,9 @@ class Personnel(Base):
     )
     equipe: Mapped["Equipe"] = relationship("Equipe", back_populates="personnels")
 
+    # tri / pagination keyset de GET /personnels
+    __table_args__ = (Index("ix_personnels_nom_prenom_id", "nom", "prenom", "id"),)
+
     # ✅ cascade pour supprimer automatiquement les liaisons lors d'une suppression de personnel
     competences: Mapped[list["PersonnelCompetence"]] = relationship(
         "PersonnelCompetence",
@@ -170,10 +175,16 @@ class Affectation(Base):
     __table_args__ = (
         UniqueConstraint("garde_id", "piquet_id", name="uq_garde_piquet"),
         UniqueConstraint("garde_id", "personnel_id", name="uq_garde_personnel"),
+        # filtre personnel_id + pagination par id (GET /affectations?personnel_id=)
+        Index("ix_affectations_personnel_id_id", "personnel_id", "id"),
     )
     ope_checked = Column(Boolean, nullable=False, server_default="false")
     ope_checked_at = Column(DateTime(timezone=True), nullable=True)
 
+    # verrou optimiste (If-Match / 409 sur les routes de mutation)
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+
 class Piquet(Base):
     __tablename__ = "piquets"
 
@@ -198,6 +209,7 @@ class Garde(Base):
     is_holiday: Mapped[bool] = mapped_column(Boolean, default=False)
     __table_args__ = (
         UniqueConstraint("date", "slot", name="uq_date_slot_team"),
+        Index("ix_gardes_equipe_id_date", "equipe_id", "date"),
     )
     equipe_id: Mapped[int | None] = mapped_column(ForeignKey("equipes.id"), nullable=True)
     equipe: Mapped["Equipe"] = relationship("Equipe")
@@ -205,6 +217,12 @@ class Garde(Base):
     validated: Mapped[bool] = mapped_column(Boolean, default=False)
     validated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
+    # incrémentée à chaque changement de la garde ou de ses affectations / indisponibilités
+    # (app/services/garde_versions.py) ; détail des changements dans garde_changes
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+    # verrou optimiste : tout UPDATE ORM vérifie la version lue (StaleDataError sinon)
+    __mapper_args__ = {"version_id_col": version}
+
 class RoleEnum(str, enum.Enum):
     ADMIN = "ADMIN"
     OFFICIER = "OFFICIER"
@@ -222,8 +240,9 @@ class PersonnelRole(Base):
     __table_args__ = (UniqueConstraint("personnel_id", "role", name="uq_personnel_role"),)
 
 try:
-    # si Postgres
-    from sqlalchemy.dialects.postgresql import JSONB as SAJSON
+    # JSONB sous Postgres, JSON générique ailleurs (SQLite de dev / benchmarks)
+    from sqlalchemy.dialects.postgresql import JSONB
+    SAJSON = JSON().with_variant(JSONB(), "postgresql")
 except Exception:
     from sqlalchemy import JSON as SAJSON
 
@@ -241,6 +260,7 @@ class Indisponibilite(Base):
 
     __table_args__ = (
         UniqueConstraint("garde_id", "personnel_id", name="uq_indi_garde_pers"),
+        Index("ix_indisponibilites_personnel_id_id", "personnel_id", "id"),
     )
 
 
@@ -267,4 +287,204 @@ class AppConfig(Base):
 class AppSetting(Base):
     __tablename__ = "app_settings"
     key: Mapped[str]   = mapped_column(String(100), primary_key=True)
-    value: Mapped[dict | str | int | bool | None] = mapped_column(JSON, nullable=True)
\ No newline at end of file
+    value: Mapped[dict | str | int | bool | None] = mapped_column(JSON, nullable=True)
+
+class ValidationJob(Base):
+    """Traitement asynchrone d'une validation de mois (PDF + notifications)."""
+    __tablename__ = "validation_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    annee: Mapped[int] = mapped_column(Integer)
+    mois: Mapped[int] = mapped_column(Integer)
+    equipe_id: Mapped[int] = mapped_column(ForeignKey("equipes.id", ondelete="CASCADE"), index=True)
+    # incrémenté à chaque dévalidation → une re-validation crée un nouveau job
+    seq: Mapped[int] = mapped_column(Integer, default=0)
+    # pending / running / done / failed / superseded
+    status: Mapped[str] = mapped_column(String(20), default="pending", index=True)
+    validateur: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    mails_total: Mapped[int] = mapped_column(Integer, default=0)
+    pdf_size: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("annee", "mois", "equipe_id", "seq", name="uq_validation_job"),
+    )
+
+
+class ValidationMail(Base):
+    """Un envoi de mail d'un job : la ligne est créée AVANT l'envoi (au plus une fois)."""
+    __tablename__ = "validation_mails"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    job_id: Mapped[int] = mapped_column(
+        ForeignKey("validation_jobs.id", ondelete="CASCADE"), index=True
+    )
+    kind: Mapped[str] = mapped_column(String(10))           # admin / agent
+    recipient: Mapped[str] = mapped_column(String(255))     # email agent ("" pour le mail admin)
+    status: Mapped[str] = mapped_column(String(10), default="sending")  # sending / sent / failed
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("job_id", "kind", "recipient", name="uq_validation_mail"),
+    )
+
+
+class ReminderBatch(Base):
+    """Rappel mensuel planifié (un par mois ciblé) : reprise possible après crash."""
+    __tablename__ = "reminder_batches"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    annee: Mapped[int] = mapped_column(Integer)
+    mois: Mapped[int] = mapped_column(Integer)
+    status: Mapped[str] = mapped_column(String(20), default="pending", index=True)  # pending / running / done
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("annee", "mois", name="uq_reminder_batch"),
+    )
+
+
+class ReminderTask(Base):
+    """Un destinataire du rappel mensuel."""
+    __tablename__ = "reminder_tasks"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    batch_id: Mapped[int] = mapped_column(
+        ForeignKey("reminder_batches.id", ondelete="CASCADE"), index=True
+    )
+    personnel_id: Mapped[int] = mapped_column(
+        ForeignKey("personnels.id", ondelete="CASCADE"), index=True
+    )
+    email: Mapped[str] = mapped_column(String(255))
+    # pending / queued / sending / sent / failed / skipped
+    status: Mapped[str] = mapped_column(String(10), default="pending", index=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("batch_id", "personnel_id", name="uq_reminder_task"),
+    )
+
+
+class SchedulerJob(Base):
+    """État persistant d'un job planifié (partagé entre tous les workers)."""
+    __tablename__ = "scheduler_jobs"
+
+    id: Mapped[str] = mapped_column(String(50), primary_key=True)
+    trigger: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    next_run_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    last_started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    last_finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    last_duration_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    last_status: Mapped[str | None] = mapped_column(String(10), nullable=True)  # ok / error
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    last_holder: Mapped[str | None] = mapped_column(String(100), nullable=True)  # host:pid
+    last_origin: Mapped[str | None] = mapped_column(String(10), nullable=True)   # cron / manual
+    # exécution en cours (verrou par job : jamais deux exécutions simultanées)
+    running_since: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    running_holder: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    run_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class AgendaFeed(Base):
+    """Abonnement iCalendar d'un agent (GET /agenda/{token}.ics)."""
+    __tablename__ = "agenda_feeds"
+
+    personnel_id: Mapped[int] = mapped_column(
+        ForeignKey("personnels.id", ondelete="CASCADE"), primary_key=True
+    )
+    # secret de l'URL d'abonnement (les clients calendrier n'envoient pas de JWT)
+    token: Mapped[str] = mapped_column(String(64), unique=True, index=True)
+    # incrémentée à chaque changement des affectations / gardes validées de l'agent (ETag)
+    version: Mapped[int] = mapped_column(Integer, default=1)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class RefVersion(Base):
+    """Compteur de version d'un jeu de données de référence (ETag des listes piquets / équipes…)."""
+    __tablename__ = "ref_versions"
+
+    name: Mapped[str] = mapped_column(String(30), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class GardeChange(Base):
+    """Journal des changements d'une garde : une ligne par objet touché et par version."""
+    __tablename__ = "garde_changes"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    garde_id: Mapped[int] = mapped_column(ForeignKey("gardes.id", ondelete="CASCADE"))
+    version: Mapped[int] = mapped_column(Integer)
+    # "garde" | "affectation" | "indisponibilite"
+    entity: Mapped[str] = mapped_column(String(20))
+    entity_id: Mapped[int] = mapped_column(Integer)
+    # "created" | "updated" | "deleted"
+    action: Mapped[str] = mapped_column(String(10))
+    changed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_garde_changes_garde_id_version", "garde_id", "version"),
+    )
+
+
+class PersonnelMonthStat(Base):
+    """
+    Compteurs mensuels d'un agent, tenus à jour dans la transaction de chaque affectation
+    (app/services/month_stats.py) : classement des suggestions et statistiques sans agrégat.
+    """
+    __tablename__ = "personnel_month_stats"
+
+    personnel_id: Mapped[int] = mapped_column(
+        ForeignKey("personnels.id", ondelete="CASCADE"), primary_key=True
+    )
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    month: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # toutes les affectations du mois, puis leur répartition
+    gardes: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    nuits: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    weekend: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    holiday: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    pro: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    volontaire: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    astreinte: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # lecture d'un mois pour tous les agents (suggestions, statistiques)
+        Index("ix_personnel_month_stats_year_month", "year", "month"),
+    )
+
+
+class AffectationConflict(Base):
+    """
+    Affectation future qui n'est plus couverte par une compétence exigée par son piquet
+    (expirée depuis la saisie, ou retirée) — relevée par le balayage quotidien
+    (app/services/competence_sweep.py).
+    """
+    __tablename__ = "affectation_conflicts"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # pas d'index séparé : uq_conflict_affectation_competence commence par affectation_id
+    affectation_id: Mapped[int] = mapped_column(ForeignKey("affectations.id", ondelete="CASCADE"))
+    competence_id: Mapped[int] = mapped_column(ForeignKey("competences.id", ondelete="CASCADE"))
+    # "expired" (date_expiration < date de garde) | "missing" (compétence absente)
+    kind: Mapped[str] = mapped_column(String(10))
+    expired_on: Mapped[date | None] = mapped_column(Date, nullable=True)
+    detected_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    notified_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # renseignée quand l'affectation redevient couverte (compétence prolongée, agent changé)
+    resolved_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("affectation_id", "competence_id", name="uq_conflict_affectation_competence"),
+    )
@@ -0,0 +1,99 @@
+# app/db/pool.py
+# Pools de connexions instrumentés : temps d'attente au checkout + statistiques live
+from __future__ import annotations
+
+import threading
+import time
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+
+class _TimedPoolMixin:
+    """Mesure le temps passé dans connect() (attente d'une connexion libre + ouverture)."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+
+    def connect(self):
+        t0 = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - t0
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_total_s += waited
+                self.wait_max_s = max(self.wait_max_s, waited)
+
+    def recreate(self):
+        # appelé par engine.dispose() : on garde les compteurs cumulés
+        new = super().recreate()
+        new.checkouts, new.timeouts = self.checkouts, self.timeouts
+        new.wait_total_s, new.wait_max_s = self.wait_total_s, self.wait_max_s
+        return new
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_kwargs(url: str, is_async: bool = False) -> dict:
+    """Options create_engine / create_async_engine issues de Settings (DB_*)."""
+    if url.startswith("sqlite"):
+        # SQLite (dev) : pool par défaut de SQLAlchemy, pas de statement_timeout
+        return {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    kwargs: dict = {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        # appliqué à chaque session Postgres ouverte par le pool
+        kwargs["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return kwargs
+
+
+def pool_stats(engine: Engine) -> dict:
+    """Photographie du pool d'un engine (sync ou async.sync_engine) dans CE process."""
+    pool = engine.pool
+    out: dict = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        out.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # négatif tant que le pool n'est pas plein (convention SQLAlchemy)
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+        })
+    if isinstance(pool, _TimedPoolMixin):
+        with pool._stats_lock:
+            n = pool.checkouts
+            out.update({
+                "checkouts": n,
+                "timeouts": pool.timeouts,
+                "wait_avg_ms": round(pool.wait_total_s * 1000 / n, 2) if n else 0.0,
+                "wait_max_ms": round(pool.wait_max_s * 1000, 2),
+            })
+    return out
@@ -19,7 +19,9 @@ FERIES_2025 = {
 }
 
 def seed(session: Session):
-    for d, label in FERIES_2025.items():
-        if not session.scalar(select(Holiday).where(Holiday.date == d)):
-            session.add(Holiday(date=d, label=label))
-    session.commit()
+    # une seule requête pour tous les jours déjà présents (exécuté à chaque démarrage)
+    existing = set(session.scalars(select(Holiday.date).where(Holiday.date.in_(FERIES_2025))))
+    missing = [Holiday(date=d, label=label) for d, label in FERIES_2025.items() if d not in existing]
+    if missing:
+        session.add_all(missing)
+        session.commit()
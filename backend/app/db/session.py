@@ -1,6 +1,43 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.query_metrics import instrument_engine
+from app.db.pool import engine_kwargs
 
-engine = create_engine(settings.db_url, pool_pre_ping=True)
+engine = create_engine(settings.db_url, **engine_kwargs(settings.db_url))
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# --- Async (routes de lecture `async def`) ---
+# Créé au premier usage : le driver async n'est importé que si une route async est appelée.
+_async_engine: AsyncEngine | None = None
+_AsyncSessionLocal: async_sessionmaker | None = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            settings.async_db_url, **engine_kwargs(settings.async_db_url, is_async=True)
+        )
+        instrument_engine(_async_engine.sync_engine)
+    return _async_engine
+
+
+def AsyncSessionLocal():
+    global _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        # expire_on_commit=False : les objets restent lisibles après commit (pas de lazy-load en async)
+        _AsyncSessionLocal = async_sessionmaker(
+            get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _AsyncSessionLocal()
+
+
+# --- Hooks de session ---
+# Compteurs mensuels, versions de garde, flux de changements, agendas et versions des
+# référentiels sont tenus à jour par des écouteurs sur Session, enregistrés à l'import de leur
+# module. Importés ici : toute session ouverte (API, scheduler, import AGATT, scripts) les a,
+# sans dépendre des routes chargées. Aucun de ces modules n'importe app.db.session.
+from app.services import agenda, change_feed, garde_versions, month_stats, ref_versions  # noqa: E402,F401
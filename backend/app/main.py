@@ -1,8 +1,14 @@
+from app.core import boot
+
+boot.start()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.compression import GZipExceptEventStream
 from app.core.config import settings
-from app.db.base import Base
+from app.core.query_metrics import QueryMetricsMiddleware
+from app.db.migrations import ensure_schema
 from app.db.session import engine, SessionLocal
 from app.api.routes import (
     auth,
@@ -18,36 +24,20 @@ from app.api.routes import (
     roles,
     password_reset,
     dispos_agatt,
+    jobs,
+    reminders,
+    scheduler,
+    metrics,
+    agenda,
+    changes,
+    exports,
+    analytics,
+    conflicts,
 )
 from app.db.seed_holidays_fr import seed as seed_holidays
-
-try:
-    from apscheduler.schedulers.background import BackgroundScheduler
-    from app.services.scheduler import send_monthly_reminder
-    from app.services.gmail_fetcher import fetch_csv_from_gmail
-    from app.core.config import settings as _s
-    _scheduler = BackgroundScheduler(timezone="Europe/Paris")
-    _scheduler.add_job(
-        send_monthly_reminder,
-        "cron",
-        day=25,
-        hour=8,
-        minute=0,
-        id="monthly_reminder",
-        replace_existing=True,
-    )
-    _scheduler.add_job(
-        fetch_csv_from_gmail,
-        "cron",
-        hour=_s.GMAIL_FETCH_HOUR,
-        minute=0,
-        id="gmail_csv_fetch",
-        replace_existing=True,
-    )
-    _HAS_SCHEDULER = True
-except ImportError:
-    _HAS_SCHEDULER = False
-    print("[WARN] apscheduler non installé — rappel mensuel désactivé. Lancez : pip install apscheduler")
+from app.services import ref_versions
+from app.services.change_feed import start_change_feed, stop_change_feed
+from app.services.scheduling import start_scheduler, shutdown_scheduler
 
 
 app = FastAPI(title="FEUILLE_GARDE API")
@@ -60,23 +50,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # lisibles par les devtools / le front en cross-origin
+    expose_headers=["Server-Timing", "X-Next-Cursor"],
 )
 
+if settings.SQL_METRICS_ENABLED:
+    app.add_middleware(QueryMetricsMiddleware)
+
+# --- Compression (mois de gardes / affectations : plusieurs centaines de Kio en JSON) ---
+if settings.GZIP_MIN_BYTES > 0:
+    app.add_middleware(GZipExceptEventStream, minimum_size=settings.GZIP_MIN_BYTES, compresslevel=settings.GZIP_LEVEL)
+
 
 @app.on_event("startup")
 def on_startup():
-    Base.metadata.create_all(bind=engine)
-    with SessionLocal() as s:
-        seed_holidays(s)
-    if _HAS_SCHEDULER:
-        _scheduler.start()
-        print("[INFO] Scheduler démarré — rappel mensuel programmé le 25 à 08h00.")
+    with boot.step("schema"):
+        ensure_schema(engine)
+    with boot.step("seed"):
+        with SessionLocal() as s:
+            seed_holidays(s)
+            ref_versions.ensure_rows(s)
+    with boot.step("scheduler"):
+        start_scheduler()
+    with boot.step("changes"):
+        start_change_feed(engine)
+    boot.finish()
 
 
 @app.on_event("shutdown")
 def on_shutdown():
-    if _HAS_SCHEDULER:
-        _scheduler.shutdown(wait=False)
+    shutdown_scheduler()
+    stop_change_feed()
 
 
 # --- Routes ---
@@ -93,3 +97,14 @@ app.include_router(users_me.router)
 app.include_router(roles.router)
 app.include_router(password_reset.router)
 app.include_router(dispos_agatt.router)
+app.include_router(jobs.router)
+app.include_router(reminders.router)
+app.include_router(scheduler.router)
+app.include_router(metrics.router)
+app.include_router(agenda.router)
+app.include_router(changes.router)
+app.include_router(exports.router)
+app.include_router(analytics.router)
+app.include_router(conflicts.router)
+
+boot.mark("imports")
@@ -32,5 +32,8 @@ class AffectationRead(BaseModel):
     ope_checked: bool
     ope_checked_at: Optional[datetime] = None
 
+    # verrou optimiste (ETag "affectation-{id}-{version}" pour If-Match)
+    version: int = 1
+
     class Config:
         from_attributes = True
\ No newline at end of file
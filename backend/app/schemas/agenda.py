@@ -0,0 +1,8 @@
+# app/schemas/agenda.py
+from pydantic import BaseModel
+
+
+class AgendaLinkRead(BaseModel):
+    token: str
+    url: str          # https://…/agenda/{token}.ics
+    webcal_url: str   # même URL en webcal:// (ouverture directe par les apps calendrier)
@@ -0,0 +1,36 @@
+# app/schemas/analytics.py
+from pydantic import BaseModel
+
+
+class CategoryDispersion(BaseModel):
+    category: str     # gardes | nuits | weekend | holiday | astreinte | garde | pro | volontaire
+    total: int
+    mean: float
+    stdev: float      # écart-type de population
+    gini: float       # 0 = parfaitement réparti, → 1 = concentré sur un seul agent
+    min: int
+    max: int
+    max_min: int
+
+
+class AgentCounts(BaseModel):
+    personnel_id: int
+    nom: str
+    prenom: str
+    equipe_id: int | None = None
+    gardes: int = 0
+    nuits: int = 0
+    weekend: int = 0
+    holiday: int = 0
+    astreinte: int = 0
+    garde: int = 0    # affectations hors astreinte
+    pro: int = 0
+    volontaire: int = 0
+
+
+class FairnessReport(BaseModel):
+    year: int
+    equipe_id: int | None = None
+    agents: int
+    categories: list[CategoryDispersion]
+    per_agent: list[AgentCounts]
@@ -0,0 +1,33 @@
+# app/schemas/candidate.py
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class Candidate(BaseModel):
+    id: int
+    nom: str
+    prenom: str
+    grade: str
+    equipe_id: Optional[int] = None
+    statut: str
+    eligible: bool  # affectable sur le piquet (l'indisponibilité déclarée n'est qu'indicative)
+    reasons: list[str] = []
+
+
+class CandidateMatrix(BaseModel):
+    garde_id: int
+    version: int
+    eligible: dict[int, list[int]]  # piquet → agents actifs affectables, triés par nom
+    team: list[int]  # agents actifs de l'équipe de la garde (tous si pas d'équipe)
+    agatt: dict[str, list[int]]  # type AGATT du jour (DJ, DN, DAJ, DAN, G24) → agents
+    indispos: list[int]
+
+
+class GardeCandidates(BaseModel):
+    garde_id: int
+    piquet_id: int
+    suggestions: list[Candidate]  # équipe de la garde, éligibles
+    dispos_agatt: list[Candidate]  # dispos AGATT du créneau (DJ/DN, + DAJ/DAN en astreinte)
+    pros_de_garde: list[Candidate]  # pros de garde (G24) du jour
+    matrix: Optional[CandidateMatrix] = None  # ?with_matrix=1 : tous les piquets de la garde
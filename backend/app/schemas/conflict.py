@@ -0,0 +1,23 @@
+# app/schemas/conflict.py
+from datetime import date, datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+
+class ConflictRead(BaseModel):
+    id: int
+    affectation_id: int
+    garde_id: int
+    date: date
+    slot: str
+    equipe_id: Optional[int] = None
+    piquet_id: int
+    personnel_id: int
+    competence_id: int
+    competence_code: str
+    kind: Literal["expired", "missing"]
+    expired_on: Optional[date] = None
+    detected_at: datetime
+    notified_at: Optional[datetime] = None
+    resolved_at: Optional[datetime] = None
@@ -3,6 +3,8 @@ from datetime import date, datetime
 from typing import Literal, Optional, Union
 from pydantic import BaseModel, field_serializer
 from app.db.models import Slot as SlotEnum  # <-- importe l'Enum Python/SQLAlchemy
+from app.schemas.affectation import AffectationRead
+from app.schemas.indisponibilite import IndispoRead
 
 SlotLiteral = Literal["JOUR", "NUIT"]
 
@@ -26,6 +28,7 @@ class GardeRead(BaseModel):
     def serialize_slot(self, v): return getattr(v, "value", v)
     validated: bool
     validated_at: Optional[datetime] = None
+    version: int = 1
 
 
 class GenerateMonthRequest(BaseModel):
@@ -44,3 +47,19 @@ class AssignTeamRequest(BaseModel):
 class GenerateMonthAllRequest(BaseModel):
     year: int
     month: int
+
+
+class GardeDelta(BaseModel):
+    """
+    Changements d'une garde entre `since_version` (exclue) et `version`.
+    full=True : le client doit remplacer son état (affectations / indisponibilités = tout).
+    """
+    garde_id: int
+    version: int
+    since_version: int
+    full: bool = False
+    garde: Optional[GardeRead] = None
+    affectations: list[AffectationRead] = []
+    indisponibilites: list[IndispoRead] = []
+    deleted_affectations: list[int] = []
+    deleted_indisponibilites: list[int] = []
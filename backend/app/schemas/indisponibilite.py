@@ -0,0 +1,34 @@
+# app/schemas/indisponibilite.py
+from datetime import date
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+
+class IndispoRead(BaseModel):
+    id: int
+    garde_id: int
+    personnel_id: int
+    model_config = {"from_attributes": True}
+
+
+class IndispoCreate(BaseModel):
+    garde_id: int
+    personnel_id: int
+
+
+class IndispoBulkCreate(BaseModel):
+    personnel_id: int
+    # soit une période (+ filtre de créneaux, d'équipe), soit une liste de gardes
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    slots: Optional[list[Literal["JOUR", "NUIT"]]] = None
+    equipe_id: Optional[int] = None
+    garde_ids: Optional[list[int]] = None
+
+
+class IndispoBulkResult(BaseModel):
+    created: int
+    skipped: int  # déjà déclarées
+    locked: int  # feuilles validées (réservées à ADMIN/OFFICIER)
+    indisponibilites: list[IndispoRead]
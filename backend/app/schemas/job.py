@@ -0,0 +1,22 @@
+# app/schemas/job.py
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+
+class JobRead(BaseModel):
+    id: int
+    type: str
+    status: str  # pending / running / done / failed / superseded
+    annee: int
+    mois: int
+    equipe_id: int
+    mails_total: int = 0
+    mails_sent: int = 0
+    mails_failed: int = 0
+    mails_pending: int = 0
+    pdf_size: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,289 @@
+# app/services/agenda.py
+# Flux iCalendar (abonnement) des gardes validées d'un agent
+#
+# Chaque agent a une ligne agenda_feeds (token secret + version). La version est incrémentée
+# dans la transaction même qui modifie ses affectations ou la validation de ses gardes
+# (événements de session ci-dessous) : l'ETag du flux en découle, et un client calendrier qui
+# interroge l'URL toutes les N minutes reçoit un 304 au prix d'une lecture par clé unique.
+# Le flux n'est reconstruit (une seule requête, index ix_affectations_personnel_id_id) que
+# lorsque la version change ; le rendu est gardé en mémoire par agent.
+from __future__ import annotations
+
+import secrets
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import AgendaFeed, Affectation, Garde, Piquet, Slot
+
+PRODID = "-//FEUILLE_GARDE//Agenda agent//FR"
+CONTENT_TYPE = "text/calendar; charset=utf-8"
+
+_PENDING_KEY = "agenda_personnel_ids"
+# colonnes d'une garde visibles dans le flux
+_GARDE_FIELDS = ("validated", "date", "slot", "equipe_id")
+_PIQUET_FIELDS = ("code", "libelle")
+
+
+# =========================
+# 🔑 Token d'abonnement
+# =========================
+
+def new_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def get_or_create_feed(db: Session, personnel_id: int) -> AgendaFeed:
+    feed = db.get(AgendaFeed, personnel_id)
+    if feed is None:
+        feed = AgendaFeed(personnel_id=personnel_id, token=new_token(), version=1,
+                          changed_at=datetime.utcnow())
+        db.add(feed)
+        db.commit()
+        db.refresh(feed)
+    return feed
+
+
+def rotate_token(db: Session, personnel_id: int) -> AgendaFeed:
+    """Nouveau token : l'ancienne URL d'abonnement cesse de fonctionner."""
+    feed = db.get(AgendaFeed, personnel_id)
+    if feed is None:
+        return get_or_create_feed(db, personnel_id)
+    feed.token = new_token()
+    db.commit()
+    db.refresh(feed)
+    return feed
+
+
+# =========================
+# 🔁 Version par agent (événements de session)
+# =========================
+
+def _history_values(obj, attr: str) -> list:
+    hist = inspect(obj).attrs[attr].history
+    return [v for v in (*hist.added, *hist.deleted, *hist.unchanged) if v is not None]
+
+
+def _changed(obj, fields: tuple[str, ...]) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[f].history.has_changes() for f in fields)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_agenda_changes(session: Session, flush_context, instances) -> None:
+    """Agents dont le flux change avec ce flush (résolus avant les DELETE en cascade)."""
+    pids: set[int] = set()
+    garde_ids: set[int] = set()
+    piquet_ids: set[int] = set()
+
+    for obj in session.new:
+        if isinstance(obj, Affectation):
+            pid = obj.personnel_id if obj.personnel_id is not None else getattr(obj.personnel, "id", None)
+            if pid is not None:
+                pids.add(pid)
+    for obj in session.deleted:
+        if isinstance(obj, Affectation):
+            pids.update(_history_values(obj, "personnel_id"))
+        elif isinstance(obj, Garde) and obj.id is not None:
+            garde_ids.add(obj.id)
+        elif isinstance(obj, Piquet) and obj.id is not None:
+            piquet_ids.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Affectation):
+            if session.is_modified(obj, include_collections=False):
+                pids.update(_history_values(obj, "personnel_id"))
+        elif isinstance(obj, Garde):
+            if obj.id is not None and _changed(obj, _GARDE_FIELDS):
+                garde_ids.add(obj.id)
+        elif isinstance(obj, Piquet):
+            if obj.id is not None and _changed(obj, _PIQUET_FIELDS):
+                piquet_ids.add(obj.id)
+
+    if garde_ids or piquet_ids:
+        q = select(Affectation.personnel_id).distinct()
+        if garde_ids and piquet_ids:
+            q = q.where(Affectation.garde_id.in_(garde_ids) | Affectation.piquet_id.in_(piquet_ids))
+        elif garde_ids:
+            q = q.where(Affectation.garde_id.in_(garde_ids))
+        else:
+            q = q.where(Affectation.piquet_id.in_(piquet_ids))
+        pids.update(session.connection().execute(q).scalars())
+
+    if pids:
+        session.info.setdefault(_PENDING_KEY, set()).update(pids)
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_agenda_versions(session: Session, flush_context) -> None:
+    pids = session.info.pop(_PENDING_KEY, None)
+    if not pids:
+        return
+    session.connection().execute(
+        update(AgendaFeed.__table__)
+        .where(AgendaFeed.__table__.c.personnel_id.in_(sorted(pids)))
+        .values(version=AgendaFeed.__table__.c.version + 1, changed_at=datetime.utcnow())
+    )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_agenda_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+# =========================
+# 📅 Rendu iCalendar (RFC 5545)
+# =========================
+
+@dataclass(frozen=True)
+class FeedState:
+    personnel_id: int
+    version: int
+    changed_at: datetime
+    window_start: date
+
+    @property
+    def etag(self) -> str:
+        # la fenêtre glisse chaque jour : elle fait partie de l'identité du contenu
+        return f'W/"agenda-{self.personnel_id}-{self.version}-{self.window_start:%Y%m%d}"'
+
+    @property
+    def last_modified(self) -> datetime:
+        window = datetime.combine(self.window_start, time.min)
+        return max(self.changed_at, window).replace(microsecond=0, tzinfo=timezone.utc)
+
+
+def feed_state(db: Session, token: str, today: date | None = None) -> FeedState | None:
+    row = db.execute(
+        select(AgendaFeed.personnel_id, AgendaFeed.version, AgendaFeed.changed_at)
+        .where(AgendaFeed.token == token)
+    ).first()
+    if row is None:
+        return None
+    today = today or date.today()
+    return FeedState(
+        personnel_id=row.personnel_id,
+        version=row.version,
+        changed_at=row.changed_at,
+        window_start=today - timedelta(days=settings.AGENDA_PAST_DAYS),
+    )
+
+
+def _escape(text: str) -> str:
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _fold(line: str) -> str:
+    """Lignes de 75 octets max, continuation par CRLF + espace."""
+    if len(line.encode("utf-8")) <= 75:
+        return line
+    parts, cur, size = [], "", 0
+    for ch in line:
+        n = len(ch.encode("utf-8"))
+        if size + n > 75:
+            parts.append(cur)
+            cur, size = " ", 1
+        cur += ch
+        size += n
+    parts.append(cur)
+    return "\r\n".join(parts)
+
+
+def _utc(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _slot_bounds(d: date, slot: Slot, tz: ZoneInfo) -> tuple[datetime, datetime]:
+    start_s = settings.AGENDA_NUIT_START if slot == Slot.NUIT else settings.AGENDA_JOUR_START
+    hh, mm = (int(x) for x in start_s.split(":"))
+    start = datetime.combine(d, time(hh, mm), tzinfo=tz)
+    # durée en heure locale « murale » : une nuit de changement d'heure garde ses bornes
+    end = (start.replace(tzinfo=None) + timedelta(hours=settings.AGENDA_SLOT_HOURS)).replace(tzinfo=tz)
+    return start, end
+
+
+def render_feed(db: Session, state: FeedState) -> bytes:
+    """Gardes validées de l'agent depuis window_start — une seule requête."""
+    rows = db.execute(
+        select(
+            Affectation.id,
+            Affectation.statut_service,
+            Garde.date,
+            Garde.slot,
+            Piquet.code,
+            Piquet.libelle,
+        )
+        .join(Garde, Garde.id == Affectation.garde_id)
+        .join(Piquet, Piquet.id == Affectation.piquet_id)
+        .where(
+            Affectation.personnel_id == state.personnel_id,
+            Garde.validated.is_(True),
+            Garde.date >= state.window_start,
+        )
+        .order_by(Garde.date, Garde.slot, Affectation.id)
+    ).all()
+
+    tz = ZoneInfo(settings.AGENDA_TZ)
+    stamp = _utc(state.changed_at.replace(tzinfo=timezone.utc))
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        "X-WR-CALNAME:Mes gardes",
+        f"X-WR-TIMEZONE:{settings.AGENDA_TZ}",
+        "REFRESH-INTERVAL;VALUE=DURATION:PT1H",
+        "X-PUBLISHED-TTL:PT1H",
+    ]
+    for r in rows:
+        slot = r.slot if isinstance(r.slot, Slot) else Slot(r.slot)
+        start, end = _slot_bounds(r.date, slot, tz)
+        summary = f"Garde {slot.value.lower()} – {r.code}"
+        description = r.libelle or r.code
+        if r.statut_service:
+            description += f" ({r.statut_service})"
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:affectation-{r.id}@feuille-garde",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{_utc(start)}",
+            f"DTEND:{_utc(end)}",
+            f"SUMMARY:{_escape(summary)}",
+            f"DESCRIPTION:{_escape(description)}",
+            "TRANSP:OPAQUE",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(_fold(l) for l in lines) + "\r\n").encode("utf-8")
+
+
+# =========================
+# 🗃️ Cache des flux rendus (par process)
+# =========================
+
+_cache: OrderedDict[int, tuple[str, bytes]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def cached_feed(db: Session, state: FeedState) -> bytes:
+    """Flux de l'agent ; reconstruit seulement si l'ETag (version, fenêtre) a changé."""
+    etag = state.etag
+    with _cache_lock:
+        hit = _cache.get(state.personnel_id)
+        if hit and hit[0] == etag:
+            _cache.move_to_end(state.personnel_id)
+            return hit[1]
+    body = render_feed(db, state)
+    with _cache_lock:
+        _cache[state.personnel_id] = (etag, body)
+        _cache.move_to_end(state.personnel_id)
+        while len(_cache) > max(settings.AGENDA_CACHE_SIZE, 0):
+            _cache.popitem(last=False)
+    return body
@@ -0,0 +1,211 @@
+# app/services/candidates.py
+# Candidats d'une garde pour le panneau d'ajout du planning
+#
+# Le panneau affichait trois listes issues de trois requêtes HTTP (suggestions, dispos AGATT,
+# pros de garde G24), chacune rechargeant personnels et compétences de son côté. GardeContext
+# charge une seule fois ce dont les trois ont besoin — agents actifs, compétences exigées et
+# détenues, occupation autour du créneau, lignes AGATT du jour, indisponibilités et
+# affectations de la garde — puis chaque liste n'est qu'un filtre en mémoire, chaque agent
+# accompagné des motifs qui l'empêchent (ou non) d'être affecté.
+from __future__ import annotations
+
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.models import (
+    Affectation, Competence, DispoAgatt, Garde, Indisponibilite, Personnel, PersonnelCompetence,
+    Piquet, PiquetCompetence, Slot,
+)
+from app.schemas.candidate import Candidate, CandidateMatrix, GardeCandidates
+from app.services.planning import completes_three_in_a_row, occupancy_around
+
+INDISPO_REASON = "indisponibilité déclarée"  # indicative : n'empêche pas l'affectation
+
+
+def _normalize(s: str) -> str:
+    return unicodedata.normalize("NFD", s).encode("ascii", "ignore").decode().upper().strip()
+
+
+def agatt_types(slot: Slot, is_astreinte: bool) -> set[str]:
+    """Garde NUIT → DN, JOUR → DJ ; astreinte : + DAN / DAJ (comme GET /dispos-agatt)."""
+    if slot == Slot.NUIT:
+        return {"DN", "DAN"} if is_astreinte else {"DN"}
+    return {"DJ", "DAJ"} if is_astreinte else {"DJ"}
+
+
+# =========================
+# 📦 Contexte préchargé
+# =========================
+
+@dataclass
+class GardeContext:
+    garde: Garde
+    personnels: list  # agents actifs (id, nom, prenom, grade, equipe_id, statut), triés par nom
+    requirements: dict[int, frozenset[int]]  # piquet → compétences exigées
+    codes: dict[int, str]  # compétence → code
+    held: dict[int, dict[int, date | None]]  # agent → compétence exigée détenue → expiration
+    valid: dict[int, frozenset[int]] = field(default_factory=dict)  # agent → valides à la date
+    assigned: set[int] = field(default_factory=set)
+    indispos: set[int] = field(default_factory=set)
+    occupancy: dict[int, set] = field(default_factory=dict)
+    agatt: dict[tuple[str, str], set[str]] = field(default_factory=dict)  # (nom, prénom) → types
+
+    def blocking_reasons(self, pid: int, piquet: Piquet) -> list[str]:
+        reasons = []
+        if pid in self.assigned:
+            reasons.append("déjà affecté sur cette garde")
+        held = self.held.get(pid, {})
+        for cid in sorted(self.requirements.get(piquet.id, frozenset()) - self.valid.get(pid, frozenset())):
+            if cid in held:
+                reasons.append(f"compétence {self.codes[cid]} expirée le {held[cid]:%d/%m/%Y}")
+            else:
+                reasons.append(f"compétence {self.codes[cid]} manquante")
+        if not piquet.is_astreinte and completes_three_in_a_row(self.occupancy.get(pid, set()), self.garde):
+            reasons.append("3 gardes d'affilée")
+        return reasons
+
+    def candidate(self, row, piquet: Piquet) -> Candidate:
+        reasons = self.blocking_reasons(row.id, piquet)
+        eligible = not reasons
+        if row.id in self.indispos:
+            reasons.append(INDISPO_REASON)
+        return Candidate(
+            id=row.id, nom=row.nom, prenom=row.prenom, grade=row.grade, equipe_id=row.equipe_id,
+            statut=row.statut.value if hasattr(row.statut, "value") else str(row.statut),
+            eligible=eligible, reasons=reasons,
+        )
+
+    def team(self) -> list:
+        """Agents de l'équipe de la garde (tous si la garde n'a pas d'équipe)."""
+        if self.garde.equipe_id is None:
+            return self.personnels
+        return [r for r in self.personnels if r.equipe_id == self.garde.equipe_id]
+
+    def in_agatt(self, row, types: set[str]) -> bool:
+        return bool(self.agatt.get((_normalize(row.nom), _normalize(row.prenom)), set()) & types)
+
+
+def load_context(db: Session, garde: Garde, piquets: list[Piquet]) -> GardeContext:
+    """Une requête par nature de donnée, quel que soit le nombre de piquets ou d'agents."""
+    requirements: dict[int, set[int]] = {p.id: set() for p in piquets}
+    codes: dict[int, str] = {}
+    if piquets:
+        for piquet_id, cid, code in db.execute(
+            select(PiquetCompetence.piquet_id, Competence.id, Competence.code)
+            .join(Competence, Competence.id == PiquetCompetence.competence_id)
+            .where(PiquetCompetence.piquet_id.in_(list(requirements)))
+        ):
+            requirements[piquet_id].add(cid)
+            codes[cid] = code
+
+    personnels = db.execute(
+        select(Personnel.id, Personnel.nom, Personnel.prenom, Personnel.grade, Personnel.equipe_id,
+               Personnel.statut)
+        .where(Personnel.is_active.is_(True))
+        .order_by(Personnel.nom, Personnel.prenom, Personnel.id)
+    ).all()
+
+    held: dict[int, dict[int, date | None]] = {}
+    if codes:
+        for pid, cid, expiration in db.execute(
+            select(PersonnelCompetence.personnel_id, PersonnelCompetence.competence_id,
+                   PersonnelCompetence.date_expiration)
+            .join(Personnel, Personnel.id == PersonnelCompetence.personnel_id)
+            .where(Personnel.is_active.is_(True), PersonnelCompetence.competence_id.in_(list(codes)))
+        ):
+            held.setdefault(pid, {})[cid] = expiration
+
+    ctx = GardeContext(
+        garde=garde,
+        personnels=personnels,
+        requirements={k: frozenset(v) for k, v in requirements.items()},
+        codes=codes,
+        held=held,
+    )
+    # couverture : une passe sur les compétences détenues (même règle que
+    # has_all_required_competences : expiration absente ou ≥ date de garde)
+    ctx.valid = {
+        pid: frozenset(cid for cid, exp in comps.items() if exp is None or exp >= garde.date)
+        for pid, comps in held.items()
+    }
+    ctx.assigned = set(db.scalars(select(Affectation.personnel_id).where(Affectation.garde_id == garde.id)))
+    ctx.indispos = set(db.scalars(
+        select(Indisponibilite.personnel_id).where(Indisponibilite.garde_id == garde.id)
+    ))
+    if any(not p.is_astreinte for p in piquets):
+        ctx.occupancy = occupancy_around(db, garde)
+    for nom, prenom, type_occ in db.execute(
+        select(DispoAgatt.nom, DispoAgatt.prenom, DispoAgatt.type_occ).where(DispoAgatt.date == garde.date)
+    ):
+        ctx.agatt.setdefault((nom, prenom), set()).add(type_occ)
+    return ctx
+
+
+# =========================
+# 🧑‍🚒 Listes du panneau
+# =========================
+
+def garde_candidates(db: Session, garde: Garde, piquet: Piquet, with_matrix: bool = False) -> GardeCandidates:
+    """
+    Suggestions (équipe de la garde, éligibles seulement), dispos AGATT du créneau et pros de
+    garde du jour ; ces deux dernières listes gardent les inéligibles, avec leurs motifs.
+    with_matrix : matrice de tous les piquets jointe, tirée du même contexte (pas de second
+    chargement au premier affichage du panneau).
+    """
+    piquets = _all_piquets(db) if with_matrix else [piquet]
+    ctx = load_context(db, garde, piquets)
+    suggestions = [c for c in (ctx.candidate(r, piquet) for r in ctx.team()) if c.eligible]
+    types = agatt_types(garde.slot, bool(piquet.is_astreinte))
+    dispos = [ctx.candidate(r, piquet) for r in ctx.personnels if ctx.in_agatt(r, types)]
+    pros = [ctx.candidate(r, piquet) for r in ctx.personnels if ctx.in_agatt(r, {"G24"})]
+    return GardeCandidates(
+        garde_id=garde.id, piquet_id=piquet.id,
+        suggestions=suggestions, dispos_agatt=dispos, pros_de_garde=pros,
+        matrix=_matrix(ctx, piquets) if with_matrix else None,
+    )
+
+
+def _all_piquets(db: Session) -> list[Piquet]:
+    return db.scalars(select(Piquet).order_by(Piquet.position, Piquet.id)).all()
+
+
+def candidate_matrix(db: Session, garde: Garde) -> CandidateMatrix:
+    """
+    Agents affectables sur chaque piquet de la garde (mêmes règles que les suggestions) :
+    le panneau passe d'un piquet à l'autre sans nouvel appel.
+    """
+    piquets = _all_piquets(db)
+    return _matrix(load_context(db, garde, piquets), piquets)
+
+
+def _matrix(ctx: GardeContext, piquets: list[Piquet]) -> CandidateMatrix:
+    garde = ctx.garde
+    # piquets regroupés par ensemble d'exigences : une vérification par (agent, ensemble),
+    # pas par (agent, piquet)
+    by_reqs: dict[frozenset[int], list[Piquet]] = {}
+    for p in piquets:
+        by_reqs.setdefault(ctx.requirements[p.id], []).append(p)
+
+    eligible: dict[int, list[int]] = {p.id: [] for p in piquets}
+    agatt: dict[str, list[int]] = {}
+    for row in ctx.personnels:
+        for t in sorted(ctx.agatt.get((_normalize(row.nom), _normalize(row.prenom)), ())):
+            agatt.setdefault(t, []).append(row.id)
+        if row.id in ctx.assigned:
+            continue
+        valid = ctx.valid.get(row.id, frozenset())
+        tired = completes_three_in_a_row(ctx.occupancy.get(row.id, set()), garde)
+        for reqs, group in by_reqs.items():
+            if reqs <= valid:
+                for p in group:
+                    if p.is_astreinte or not tired:
+                        eligible[p.id].append(row.id)
+
+    return CandidateMatrix(
+        garde_id=garde.id, version=garde.version, eligible=eligible,
+        team=[r.id for r in ctx.team()], agatt=agatt, indispos=sorted(ctx.indispos),
+    )
@@ -0,0 +1,326 @@
+# app/services/change_feed.py
+# Flux des changements du planning (affectations, indisponibilités, gardes) pour les clients
+# connectés en SSE (GET /changes/stream) : ils appliquent les deltas au lieu de recharger.
+#
+# Capture : événements de session (after_flush), comme pour les flux agenda / versions de
+# référence — toute écriture ORM est publiée, quelle que soit la route.
+# Diffusion :
+#   - Postgres : pg_notify() dans la transaction même (livré au COMMIT, jamais en cas de
+#     rollback) ; chaque worker écoute le canal (LISTEN, thread dédié) et redistribue à ses
+#     abonnés. Un planificateur connecté au worker A voit donc les écritures du worker B.
+#   - SQLite / sans pont : publication en process après le commit.
+# Chaque abonné a une file bornée : s'il ne suit pas, ses événements sont remplacés par un
+# unique « resync » (le client recharge le mois).
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from datetime import date, datetime
+from enum import Enum
+from typing import Any
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Affectation, Garde, Indisponibilite
+from app.services import garde_versions
+
+_PENDING_KEY = "change_feed_events"
+_FLUSH_KEY = "change_feed_flush"
+NOTIFY_MAX_BYTES = 7900  # limite Postgres : 8000 octets par notification
+
+# champs publiés par type d'objet
+_FIELDS: dict[type, tuple[str, ...]] = {
+    Affectation: ("id", "garde_id", "piquet_id", "personnel_id", "created_at", "statut_service",
+                  "ope_checked", "ope_checked_at", "version"),
+    Indisponibilite: ("id", "garde_id", "personnel_id"),
+    Garde: ("id", "date", "slot", "equipe_id", "is_weekend", "is_holiday", "validated", "validated_at",
+            "version"),
+}
+_KINDS = {Affectation: "affectation", Indisponibilite: "indisponibilite", Garde: "garde"}
+
+
+def _json_default(v: Any):
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    if isinstance(v, Enum):
+        return v.value
+    raise TypeError(type(v).__name__)
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, default=_json_default, ensure_ascii=False, separators=(",", ":"))
+
+
+# =========================
+# 📡 Abonnés (par process)
+# =========================
+
+class Subscriber:
+    """Un client SSE : périmètre (mois, équipe) + file d'événements sur sa boucle asyncio."""
+
+    def __init__(self, year: int, month: int, equipe_id: int | None) -> None:
+        self.year, self.month, self.equipe_id = year, month, equipe_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=max(settings.CHANGE_FEED_QUEUE_SIZE, 1))
+
+    def matches(self, ev: dict) -> bool:
+        if ev.get("type") == "resync":
+            return True
+        if (ev.get("year"), ev.get("month")) != (self.year, self.month):
+            return False
+        # une garde sans équipe (ou qui change d'équipe) concerne toutes les vues du mois
+        return self.equipe_id is None or not ev.get("equipe_ids") or self.equipe_id in ev["equipe_ids"] \
+            or None in ev["equipe_ids"]
+
+    def offer(self, ev: dict) -> None:
+        """Appelé dans la boucle de l'abonné."""
+        try:
+            self.queue.put_nowait(ev)
+        except asyncio.QueueFull:
+            # client trop lent : on jette le retard, il rechargera le mois
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync", "reason": "lagged"})
+
+
+class ChangeBroker:
+    def __init__(self) -> None:
+        self._subs: set[Subscriber] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, year: int, month: int, equipe_id: int | None) -> Subscriber:
+        sub = Subscriber(year, month, equipe_id)
+        with self._lock:
+            self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            self._subs.discard(sub)
+
+    def publish(self, events: list[dict]) -> None:
+        """Thread-safe : appelable depuis un thread du pool, le thread LISTEN ou une boucle."""
+        with self._lock:
+            subs = list(self._subs)
+        for sub in subs:
+            for ev in events:
+                if sub.matches(ev):
+                    try:
+                        sub.loop.call_soon_threadsafe(sub.offer, ev)
+                    except RuntimeError:  # boucle fermée (arrêt du worker)
+                        self.unsubscribe(sub)
+                        break
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subs)
+
+
+broker = ChangeBroker()
+
+
+# =========================
+# 🧲 Capture (événements de session)
+# =========================
+
+def _row(obj, kind_type: type) -> dict:
+    # valeurs déjà chargées seulement : aucun rechargement (SELECT) pendant le flush
+    loaded = inspect(obj).dict
+    return {f: loaded[f] for f in _FIELDS[kind_type] if f in loaded}
+
+
+def _history(obj, attr: str) -> list:
+    return list(inspect(obj).attrs[attr].history.deleted)
+
+
+def _scope(d: date | None, equipe_ids) -> dict:
+    if d is None:
+        return {"year": None, "month": None, "equipe_ids": []}
+    return {"year": d.year, "month": d.month, "equipe_ids": sorted(set(equipe_ids), key=lambda x: (x is None, x))}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context) -> None:
+    if not settings.CHANGE_FEED_ENABLED:
+        return
+    changes: list[tuple[str, type, Any]] = []
+    for action, objs in (("created", session.new), ("deleted", session.deleted)):
+        for obj in objs:
+            if type(obj) in _KINDS:
+                changes.append((action, type(obj), obj))
+    for obj in session.dirty:
+        if type(obj) in _KINDS and session.is_modified(obj, include_collections=False):
+            changes.append(("updated", type(obj), obj))
+    if not changes:
+        return
+
+    # date / équipe des gardes parentes : objets de la session, sinon une requête
+    gardes: dict[int, tuple[date, list]] = {}
+    for _, t, obj in changes:
+        if t is Garde:
+            hist = _history(obj, "equipe_id")
+            gardes[obj.id] = (obj.date, [obj.equipe_id, *hist])
+    missing = {obj.garde_id for _, t, obj in changes if t is not Garde and obj.garde_id not in gardes}
+    if missing:
+        for gid, d, eq in session.connection().execute(
+            select(Garde.id, Garde.date, Garde.equipe_id).where(Garde.id.in_(missing))
+        ):
+            gardes[gid] = (d, [eq])
+
+    events = []
+    for action, t, obj in changes:
+        kind = _KINDS[t]
+        gid = obj.id if t is Garde else obj.garde_id
+        d, equipe_ids = gardes.get(gid, (None, []))
+        data = {"id": obj.id} if action == "deleted" and t is not Garde else _row(obj, t)
+        events.append({"type": f"{kind}.{action}", "garde_id": gid, **_scope(d, equipe_ids), kind: data})
+    # publiés en fin de flush : la nouvelle version de garde (garde_versions, autre écouteur
+    # after_flush) est alors connue quel que soit l'ordre des écouteurs
+    session.info.setdefault(_FLUSH_KEY, []).extend(events)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _emit_flushed(session: Session, flush_context) -> None:
+    events = session.info.pop(_FLUSH_KEY, None)
+    if events:
+        _emit(session, events)
+
+
+def publish_rows(session: Session, model: type, action: str, rows: list[dict]) -> None:
+    """
+    Publie des lignes écrites hors ORM (insert() Core, que after_flush ne voit pas) ;
+    rows : dicts des champs publiés, garde_id compris.
+    """
+    if not settings.CHANGE_FEED_ENABLED or not rows:
+        return
+    kind = _KINDS[model]
+    gardes = {
+        gid: (d, [eq])
+        for gid, d, eq in session.connection().execute(
+            select(Garde.id, Garde.date, Garde.equipe_id).where(Garde.id.in_({r["garde_id"] for r in rows}))
+        )
+    }
+    events = []
+    for r in rows:
+        d, equipe_ids = gardes.get(r["garde_id"], (None, []))
+        events.append({"type": f"{kind}.{action}", "garde_id": r["garde_id"], **_scope(d, equipe_ids),
+                       kind: {f: r[f] for f in _FIELDS[model] if f in r}})
+    _emit(session, events)
+
+
+def _emit(session: Session, events: list[dict]) -> None:
+    # version de la garde après ce changement : le client tient à jour son If-Match de garde
+    versions = garde_versions.new_versions(session)
+    for ev in events:
+        version = versions.get(ev["garde_id"])
+        if version is not None:
+            ev["garde_version"] = version
+    if _use_pg_notify(session):
+        _notify(session, events)
+    else:
+        session.info.setdefault(_PENDING_KEY, []).extend(events)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+    events = session.info.pop(_PENDING_KEY, None)
+    if events:
+        # même forme que via NOTIFY (dates / enums en chaînes)
+        broker.publish(json.loads(_dumps(events)))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_FLUSH_KEY, None)
+
+
+# =========================
+# 🐘 Pont Postgres LISTEN / NOTIFY
+# =========================
+
+def _use_pg_notify(session: Session) -> bool:
+    return settings.CHANGE_FEED_PG_NOTIFY and session.get_bind().dialect.name == "postgresql"
+
+
+def _notify(session: Session, events: list[dict]) -> None:
+    """Événements regroupés en notifications de moins de 8000 octets (livrées au COMMIT)."""
+    conn = session.connection()
+    batch: list[str] = []
+    size = 2
+
+    def flush_batch() -> None:
+        if batch:
+            conn.execute(select(func.pg_notify(settings.CHANGE_FEED_CHANNEL, "[" + ",".join(batch) + "]")))
+
+    for ev in events:
+        item = _dumps(ev)
+        n = len(item.encode("utf-8")) + 1
+        if n + 2 > NOTIFY_MAX_BYTES:
+            # ligne énorme (ne devrait pas arriver) : les abonnés du mois rechargent
+            item = _dumps({"type": "resync", "reason": "payload", **{k: ev[k] for k in ("year", "month")}})
+            n = len(item.encode("utf-8")) + 1
+        if size + n > NOTIFY_MAX_BYTES:
+            flush_batch()
+            batch, size = [], 2
+        batch.append(item)
+        size += n
+    flush_batch()
+
+
+_listener: threading.Thread | None = None
+_stop = threading.Event()
+
+
+def _conninfo() -> str:
+    url = make_url(settings.db_url).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+def _listen_forever() -> None:
+    import psycopg
+
+    channel = settings.CHANGE_FEED_CHANNEL
+    first = True
+    while not _stop.is_set():
+        try:
+            with psycopg.connect(_conninfo(), autocommit=True) as conn:
+                conn.execute(f'LISTEN "{channel}"')
+                print(f"[CHANGES] 🔊 LISTEN {channel}")
+                if not first:
+                    # des notifications ont pu être perdues pendant la coupure
+                    broker.publish([{"type": "resync", "reason": "reconnect"}])
+                first = False
+                while not _stop.is_set():
+                    for n in conn.notifies(timeout=1.0):
+                        try:
+                            broker.publish(json.loads(n.payload))
+                        except ValueError:
+                            print(f"[CHANGES] ⚠️ Notification illisible ignorée ({len(n.payload)} octets)")
+        except Exception as e:  # coupure réseau / redémarrage Postgres
+            if _stop.is_set():
+                break
+            print(f"[CHANGES] ⚠️ Écoute interrompue ({e!r}) — nouvelle tentative dans 5 s")
+            _stop.wait(5)
+
+
+def start_change_feed(engine) -> None:
+    """Démarre l'écoute LISTEN du worker (Postgres uniquement)."""
+    global _listener
+    if not (settings.CHANGE_FEED_ENABLED and settings.CHANGE_FEED_PG_NOTIFY):
+        return
+    if engine.dialect.name != "postgresql" or (_listener and _listener.is_alive()):
+        return
+    _stop.clear()
+    _listener = threading.Thread(target=_listen_forever, name="change-feed-listen", daemon=True)
+    _listener.start()
+
+
+def stop_change_feed() -> None:
+    _stop.set()
+    if _listener is not None:
+        _listener.join(timeout=3)
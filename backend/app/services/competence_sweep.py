@@ -0,0 +1,183 @@
+# app/services/competence_sweep.py
+# Balayage quotidien des compétences expirées sur les affectations futures
+#
+# La couverture des compétences n'est vérifiée qu'à la création d'une affectation : si une
+# PersonnelCompetence expire (ou est retirée) ensuite, les gardes déjà planifiées deviennent
+# silencieusement invalides. Le balayage (job "competence_sweep") les retrouve toutes en une
+# requête ensembliste — affectations ⨝ gardes futures ⨝ exigences du piquet ⟕ compétences de
+# l'agent — puis synchronise affectation_conflicts par des ordres SQL ensemblistes (aucune
+# revérification affectation par affectation) :
+#   - conflits nouveaux insérés, conflits résolus puis réapparus rouverts ;
+#   - conflits ouverts qui ne sont plus trouvés marqués résolus ;
+# et prévient les planificateurs (ADMIN / OFFICIER : tout ; chefs et adjoints : leur équipe)
+# des conflits pas encore notifiés, en un mail récapitulatif par destinataire.
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import DateTime, and_, case, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models import (
+    Affectation, AffectationConflict, Competence, Garde, Personnel, PersonnelCompetence,
+    PersonnelRole, Piquet, PiquetCompetence, RoleEnum,
+)
+
+_conflicts = AffectationConflict.__table__
+
+GLOBAL_ROLES = (RoleEnum.ADMIN, RoleEnum.OFFICIER)
+TEAM_ROLES = (RoleEnum.CHEF_EQUIPE, RoleEnum.ADJ_CHEF_EQUIPE)
+
+
+def uncovered(today: date):
+    """
+    SELECT (affectation_id, competence_id, kind, expired_on) des affectations dont la garde
+    est aujourd'hui ou plus tard et qu'une compétence exigée ne couvre plus à la date de garde
+    (même règle que planning.has_all_required_competences).
+    """
+    return (
+        select(
+            Affectation.id.label("affectation_id"),
+            PiquetCompetence.competence_id.label("competence_id"),
+            case((PersonnelCompetence.id.is_(None), "missing"), else_="expired").label("kind"),
+            PersonnelCompetence.date_expiration.label("expired_on"),
+        )
+        .join(Garde, Garde.id == Affectation.garde_id)
+        .join(PiquetCompetence, PiquetCompetence.piquet_id == Affectation.piquet_id)
+        .outerjoin(PersonnelCompetence, and_(
+            PersonnelCompetence.personnel_id == Affectation.personnel_id,
+            PersonnelCompetence.competence_id == PiquetCompetence.competence_id,
+        ))
+        .where(
+            Garde.date >= today,
+            or_(PersonnelCompetence.id.is_(None), PersonnelCompetence.date_expiration < Garde.date),
+        )
+    )
+
+
+def sweep(db: Session, today: date | None = None) -> dict[str, int]:
+    """Synchronise affectation_conflicts avec l'état courant ; commit à la charge de l'appelant."""
+    today = today or date.today()
+    now = datetime.utcnow()
+    found = uncovered(today).subquery("found")
+    c = _conflicts
+    same = and_(found.c.affectation_id == c.c.affectation_id, found.c.competence_id == c.c.competence_id)
+    is_found = select(found.c.affectation_id).where(same).exists()
+
+    new = insert(c).from_select(
+        ["affectation_id", "competence_id", "kind", "expired_on", "detected_at"],
+        select(found.c.affectation_id, found.c.competence_id, found.c.kind, found.c.expired_on,
+               literal(now, DateTime))
+        .where(~select(c.c.id).where(same).exists()),
+    )
+    # rowcount d'un INSERT … SELECT non renseigné par tous les pilotes (psycopg : -1)
+    if db.get_bind().dialect.insert_returning:
+        opened = len(db.execute(new.returning(c.c.id)).all())
+    else:
+        opened = db.execute(new).rowcount
+    # déjà connus : motif / date d'expiration à jour, rouverts s'ils avaient été résolus
+    reopened = db.execute(
+        update(c).where(c.c.resolved_at.is_not(None), is_found)
+        .values(resolved_at=None, notified_at=None, detected_at=now)
+    ).rowcount
+    db.execute(
+        update(c).where(is_found).values(
+            kind=select(found.c.kind).where(same).scalar_subquery(),
+            expired_on=select(found.c.expired_on).where(same).scalar_subquery(),
+        )
+    )
+    # gardes passées : conflits laissés tels quels (historique)
+    future = select(Affectation.id).join(Garde, Garde.id == Affectation.garde_id).where(Garde.date >= today)
+    resolved = db.execute(
+        update(c).where(c.c.resolved_at.is_(None), ~is_found, c.c.affectation_id.in_(future))
+        .values(resolved_at=now)
+    ).rowcount
+    return {"opened": opened, "reopened": reopened, "resolved": resolved}
+
+
+# =========================
+# 📨 Notification des planificateurs
+# =========================
+
+def _recipients(db: Session) -> tuple[set[str], dict[int, set[str]]]:
+    """(e-mails ADMIN / OFFICIER, équipe → e-mails des chefs et adjoints)."""
+    everyone: set[str] = set()
+    by_team: dict[int, set[str]] = {}
+    for email, role, equipe_id in db.execute(
+        select(Personnel.email, PersonnelRole.role, Personnel.equipe_id)
+        .join(PersonnelRole, PersonnelRole.personnel_id == Personnel.id)
+        .where(
+            Personnel.is_active.is_(True),
+            Personnel.email.is_not(None),
+            PersonnelRole.role.in_(GLOBAL_ROLES + TEAM_ROLES),
+        )
+    ):
+        if role in GLOBAL_ROLES:
+            everyone.add(email)
+        elif equipe_id is not None:
+            by_team.setdefault(equipe_id, set()).add(email)
+    return everyone, by_team
+
+
+def notify(db: Session, today: date | None = None) -> int:
+    """
+    Un mail récapitulatif par planificateur pour les conflits ouverts pas encore notifiés ;
+    renvoie le nombre de conflits notifiés (reçus par au moins un destinataire — sans
+    destinataire joignable, ils restent à notifier). Commit à la charge de l'appelant.
+    """
+    from app.core.mailer import build_html_competence_conflicts, load_smtp_settings, send_mail
+
+    today = today or date.today()
+    c = _conflicts
+    rows = db.execute(
+        select(c.c.id, Garde.date, Garde.slot, Garde.equipe_id, Personnel.nom, Personnel.prenom,
+               Piquet.code, Competence.code, c.c.kind, c.c.expired_on)
+        .join(Affectation, Affectation.id == c.c.affectation_id)
+        .join(Garde, Garde.id == Affectation.garde_id)
+        .join(Personnel, Personnel.id == Affectation.personnel_id)
+        .join(Piquet, Piquet.id == Affectation.piquet_id)
+        .join(Competence, Competence.id == c.c.competence_id)
+        .where(c.c.resolved_at.is_(None), c.c.notified_at.is_(None), Garde.date >= today)
+        .order_by(Garde.date, Garde.slot, Piquet.position)
+    ).all()
+    if not rows:
+        return 0
+
+    everyone, by_team = _recipients(db)
+    mails: dict[str, list[tuple[int, tuple[str, str, str, str, str]]]] = {}
+    for conflict_id, d, slot, equipe_id, nom, prenom, piquet, comp, kind, expired_on in rows:
+        motif = f"{comp} expirée le {expired_on:%d/%m/%Y}" if kind == "expired" else f"{comp} manquante"
+        line = (f"{d:%d/%m/%Y}", slot.value, f"{prenom} {nom}", piquet, motif)
+        for email in everyone | by_team.get(equipe_id, set()):
+            mails.setdefault(email, []).append((conflict_id, line))
+
+    # notifié = au moins un planificateur l'a reçu ; les autres repartent au prochain passage
+    delivered: set[int] = set()
+    smtp = load_smtp_settings(db)
+    for email, items in mails.items():
+        try:
+            send_mail(email, "GARDE SPV – Compétences expirées sur le planning",
+                      build_html_competence_conflicts([line for _, line in items]), smtp=smtp)
+        except Exception as e:
+            print(f"[SWEEP] ❌ Mail à {email} non envoyé : {e}")
+        else:
+            delivered.update(conflict_id for conflict_id, _ in items)
+
+    if delivered:
+        db.execute(update(c).where(c.c.id.in_(sorted(delivered))).values(notified_at=datetime.utcnow()))
+    return len(delivered)
+
+
+def run_competence_sweep() -> None:
+    """Job planifié : balayage + notifications (sa propre session)."""
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        counts = sweep(db)
+        db.commit()
+        notified = notify(db)
+        db.commit()
+    print(
+        f"[SWEEP] Compétences : {counts['opened']} conflit(s) nouveau(x), {counts['reopened']} rouvert(s), "
+        f"{counts['resolved']} résolu(s), {notified} notifié(s)."
+    )
@@ -0,0 +1,77 @@
+# app/services/fairness.py
+# Équité de répartition des gardes sur une année (nuits, week-end, fériés, astreintes…)
+#
+# Une seule requête : la somme annuelle des compteurs mensuels (personnel_month_stats, tenus
+# à jour à chaque affectation) par agent, jointe aux agents du périmètre — les agents actifs
+# sans aucune garde comptent (0), c'est justement ce qu'on cherche à voir. Les mesures de
+# dispersion sont ensuite calculées par catégorie sur ces N valeurs.
+from __future__ import annotations
+
+import math
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Personnel, PersonnelMonthStat
+from app.schemas.analytics import AgentCounts, CategoryDispersion, FairnessReport
+from app.services.month_stats import COUNTERS
+
+# ordre des catégories dans la réponse ; "garde" = affectations hors astreinte
+CATEGORIES = ("gardes", "nuits", "weekend", "holiday", "astreinte", "garde", "pro", "volontaire")
+
+
+def gini(values: list[int]) -> float:
+    """Coefficient de Gini (valeurs ≥ 0) ; 0 si tout est nul."""
+    n = len(values)
+    total = sum(values)
+    if n == 0 or total == 0:
+        return 0.0
+    weighted = sum(i * v for i, v in enumerate(sorted(values), start=1))
+    return 2 * weighted / (n * total) - (n + 1) / n
+
+
+def dispersion(category: str, values: list[int]) -> CategoryDispersion:
+    n = len(values)
+    total = sum(values)
+    mean = total / n if n else 0.0
+    stdev = math.sqrt(sum((v - mean) ** 2 for v in values) / n) if n else 0.0
+    lo, hi = (min(values), max(values)) if n else (0, 0)
+    return CategoryDispersion(
+        category=category, total=total, mean=round(mean, 3), stdev=round(stdev, 3),
+        gini=round(gini(values), 4), min=lo, max=hi, max_min=hi - lo,
+    )
+
+
+def fairness_report(db: Session, year: int, equipe_id: int | None = None) -> FairnessReport:
+    st = PersonnelMonthStat
+    yearly = (
+        select(st.personnel_id, *(func.sum(getattr(st, c)).label(c) for c in COUNTERS))
+        .where(st.year == year)
+        .group_by(st.personnel_id)
+        .subquery()
+    )
+    q = (
+        select(Personnel.id, Personnel.nom, Personnel.prenom, Personnel.equipe_id,
+               *(func.coalesce(yearly.c[c], 0) for c in COUNTERS))
+        .outerjoin(yearly, yearly.c.personnel_id == Personnel.id)
+        # agents actifs du périmètre, plus ceux partis en cours d'année mais qui ont gardé
+        .where(or_(Personnel.is_active.is_(True), yearly.c.gardes > 0))
+        .order_by(Personnel.nom, Personnel.prenom, Personnel.id)
+    )
+    if equipe_id is not None:
+        q = q.where(Personnel.equipe_id == equipe_id)
+
+    agents = []
+    for pid, nom, prenom, eq, *counts in db.execute(q):
+        row = dict(zip(COUNTERS, (int(v) for v in counts)))
+        agents.append(AgentCounts(personnel_id=pid, nom=nom, prenom=prenom, equipe_id=eq,
+                                  garde=row["gardes"] - row["astreinte"], **row))
+
+    columns = {c: [getattr(a, c) for a in agents] for c in CATEGORIES}
+    return FairnessReport(
+        year=year,
+        equipe_id=equipe_id,
+        agents=len(agents),
+        categories=[dispersion(c, columns[c]) for c in CATEGORIES],
+        per_agent=agents,
+    )
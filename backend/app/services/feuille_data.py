@@ -0,0 +1,159 @@
+# app/services/feuille_data.py
+# Préparation des données des feuilles de garde (PDF) pour une ou plusieurs équipes
+from __future__ import annotations
+
+import unicodedata
+from datetime import datetime
+from urllib.parse import quote
+
+from sqlalchemy import select, extract, or_
+from sqlalchemy.orm import Session
+
+from app.db.models import Affectation, Equipe, Garde, Indisponibilite, Personnel, Piquet
+
+
+def _pdf_name(p: Personnel) -> str:
+    nom = (p.nom or "").strip()
+    prenom = (p.prenom or "").strip()
+    return f"{nom} {prenom[0]}." if prenom else nom
+
+
+def _slot_name(g: Garde) -> str:
+    return g.slot.name if hasattr(g.slot, "name") else str(g.slot)
+
+
+def mois_label(annee: int, mois: int) -> str:
+    return datetime(annee, mois, 1).strftime("%B %Y").capitalize()
+
+
+def equipe_label(equipe: Equipe | None, equipe_id: int) -> str:
+    if equipe is None:
+        return f"Équipe {equipe_id}"
+    return equipe.libelle or equipe.code or f"Équipe {equipe_id}"
+
+
+def feuille_filename(equipe_nom: str, mois_nom: str) -> str:
+    safe_equipe = equipe_nom.replace(" ", "_").replace("/", "-")
+    safe_mois = mois_nom.replace(" ", "_")
+    return f"feuille_garde_{safe_equipe}_{safe_mois}.pdf"
+
+
+def content_disposition(filename: str) -> str:
+    """Header Content-Disposition (RFC 6266) : repli ASCII + nom UTF-8 (« Février », « Équipe »…)."""
+    fallback = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+    return f'attachment; filename="{fallback}"; filename*=UTF-8\'\'{quote(filename)}'
+
+
+def load_feuilles(
+    db: Session,
+    annee: int,
+    mois: int | None = None,
+    equipe_id: int | None = None,
+) -> list[dict]:
+    """
+    Charge en un nombre fixe de requêtes (indépendant du nombre d'équipes / de mois)
+    tout ce qu'il faut pour générer les feuilles de garde de la période.
+
+    Retourne une liste triée par (mois, équipe) de :
+      {"equipe_id", "annee", "mois", "equipe_label", "mois_label", "filename",
+       "garde_ids", "pdf_kwargs"}
+    où pdf_kwargs est directement passable à generate_feuille_garde_pdf
+    (uniquement des types simples → sérialisable vers un autre process).
+    """
+    q = select(Garde).where(
+        extract("year", Garde.date) == annee,
+        Garde.equipe_id.is_not(None),
+    )
+    if mois is not None:
+        q = q.where(extract("month", Garde.date) == mois)
+    if equipe_id is not None:
+        q = q.where(Garde.equipe_id == equipe_id)
+    gardes = db.scalars(q).all()
+    if not gardes:
+        return []
+
+    # Regroupement (mois, équipe) → gardes
+    groups: dict[tuple[int, int], list[Garde]] = {}
+    for g in gardes:
+        groups.setdefault((g.date.month, g.equipe_id), []).append(g)
+
+    equipe_ids = {g.equipe_id for g in gardes}
+    garde_ids = [g.id for g in gardes]
+
+    equipes = {e.id: e for e in db.scalars(select(Equipe).where(Equipe.id.in_(equipe_ids))).all()}
+
+    affs = db.scalars(select(Affectation).where(Affectation.garde_id.in_(garde_ids))).all()
+
+    # Personnels affectés + membres actifs des équipes concernées (une seule requête)
+    pers_ids = {a.personnel_id for a in affs}
+    personnels = db.scalars(
+        select(Personnel).where(
+            or_(
+                Personnel.id.in_(pers_ids),
+                Personnel.equipe_id.in_(equipe_ids) & Personnel.is_active.is_(True),
+            )
+        )
+    ).all()
+    pers_name_map = {p.id: _pdf_name(p) for p in personnels}
+    team_ids_by_equipe: dict[int, set[int]] = {}
+    for p in personnels:
+        if p.equipe_id in equipe_ids and p.is_active:
+            team_ids_by_equipe.setdefault(p.equipe_id, set()).add(p.id)
+
+    # Tous les piquets (triés par position puis code), même ceux non utilisés
+    pq_rows = db.scalars(select(Piquet).order_by(Piquet.position, Piquet.code)).all()
+    pdf_piquets = [
+        {"id": p.id, "label": p.libelle or p.code or f"P{p.id}", "is_astreinte": bool(p.is_astreinte)}
+        for p in pq_rows
+    ]
+
+    indispos = db.scalars(
+        select(Indisponibilite).where(Indisponibilite.garde_id.in_(garde_ids))
+    ).all()
+    indispo_by_garde: dict[int, set[int]] = {}
+    for i in indispos:
+        indispo_by_garde.setdefault(i.garde_id, set()).add(i.personnel_id)
+
+    aff_map: dict[int, dict[int, str]] = {}
+    assigned_by_garde: dict[int, set[int]] = {}
+    for a in affs:
+        aff_map.setdefault(a.garde_id, {})[a.piquet_id] = pers_name_map.get(a.personnel_id, "?")
+        assigned_by_garde.setdefault(a.garde_id, set()).add(a.personnel_id)
+
+    out: list[dict] = []
+    for (m, eq_id) in sorted(groups):
+        eq_gardes = sorted(groups[(m, eq_id)], key=lambda g: (g.date, 0 if _slot_name(g) == "JOUR" else 1))
+        team_ids = team_ids_by_equipe.get(eq_id, set())
+
+        non_aff_map: dict[int, list[str]] = {}
+        indispo_map: dict[int, list[str]] = {}
+        for g in eq_gardes:
+            assigned = assigned_by_garde.get(g.id, set())
+            indispo_ids = indispo_by_garde.get(g.id, set())
+            non_aff_map[g.id] = sorted(
+                pers_name_map[pid] for pid in team_ids
+                if pid not in assigned and pid not in indispo_ids
+            )
+            indispo_map[g.id] = sorted(pers_name_map[pid] for pid in team_ids & indispo_ids)
+
+        eq_nom = equipe_label(equipes.get(eq_id), eq_id)
+        m_nom = mois_label(annee, m)
+        out.append({
+            "equipe_id": eq_id,
+            "annee": annee,
+            "mois": m,
+            "equipe_label": eq_nom,
+            "mois_label": m_nom,
+            "filename": feuille_filename(eq_nom, m_nom),
+            "garde_ids": [g.id for g in eq_gardes],
+            "pdf_kwargs": {
+                "equipe_label": eq_nom,
+                "mois_label": m_nom,
+                "gardes": [{"id": g.id, "date": g.date, "slot": _slot_name(g)} for g in eq_gardes],
+                "piquets": pdf_piquets,
+                "aff_map": {g.id: aff_map.get(g.id, {}) for g in eq_gardes},
+                "non_aff_map": non_aff_map,
+                "indispo_map": indispo_map,
+            },
+        })
+    return out
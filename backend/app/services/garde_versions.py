@@ -0,0 +1,214 @@
+# app/services/garde_versions.py
+# Version de chaque garde et journal de ses changements (deltas de resynchronisation)
+#
+# gardes.version est incrémentée dans la transaction qui crée / modifie / supprime une
+# affectation ou une indisponibilité de la garde, ou la garde elle-même (événements de session,
+# comme pour les flux agenda et ref_versions) ; chaque incrément note les objets touchés dans
+# garde_changes. Un client qui connaît la version N d'une garde se resynchronise avec le seul
+# delta (lignes modifiées + ids supprimés) au lieu de recharger toutes ses affectations.
+#
+# gardes.version est aussi la version_id_col de Garde (verrou optimiste) : quand la garde
+# elle-même est modifiée par l'ORM, son UPDATE a déjà incrémenté la version — on la reprend
+# au lieu d'incrémenter une seconde fois.
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+
+from app.db.models import Affectation, Garde, GardeChange, Indisponibilite
+from app.schemas.affectation import AffectationRead
+from app.schemas.garde import GardeDelta, GardeRead
+from app.schemas.indisponibilite import IndispoRead
+
+GARDE = "garde"
+AFFECTATION = "affectation"
+INDISPONIBILITE = "indisponibilite"
+
+_CHILDREN: dict[type, str] = {Affectation: AFFECTATION, Indisponibilite: INDISPONIBILITE}
+_gardes = Garde.__table__
+_NEW_VERSIONS_KEY = "garde_versions_new"
+
+
+# =========================
+# 🔁 Incrément (événements de session)
+# =========================
+
+def _collect(session: Session) -> tuple[dict[int, dict[tuple[str, int], str]], dict[int, int]]:
+    """
+    (garde_id → {(entité, id): action}, garde_id → version déjà incrémentée par l'ORM) pour ce
+    flush (état d'avant flush, ids déjà attribués).
+    """
+    deleted_gardes = {obj.id for obj in session.deleted if isinstance(obj, Garde)}
+    touched: dict[int, dict[tuple[str, int], str]] = {}
+    orm_versions: dict[int, int] = {}
+
+    def note(garde_id, entity: str, entity_id: int, action: str) -> None:
+        if garde_id is not None and garde_id not in deleted_gardes:
+            touched.setdefault(garde_id, {})[(entity, entity_id)] = action
+
+    for obj in session.new:
+        entity = _CHILDREN.get(type(obj))
+        if entity:
+            note(obj.garde_id, entity, obj.id, "created")
+    for obj in session.dirty:
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, Garde):
+            note(obj.id, GARDE, obj.id, "updated")
+            orm_versions[obj.id] = obj.version
+            continue
+        entity = _CHILDREN.get(type(obj))
+        if entity:
+            note(obj.garde_id, entity, obj.id, "updated")
+            # déplacée d'une garde à l'autre : supprimée de l'ancienne
+            for old in inspect(obj).attrs.garde_id.history.deleted:
+                if old != obj.garde_id:
+                    note(old, entity, obj.id, "deleted")
+    for obj in session.deleted:
+        entity = _CHILDREN.get(type(obj))
+        if entity:
+            note(obj.garde_id, entity, obj.id, "deleted")
+    return touched, orm_versions
+
+
+def _bump(conn, garde_id: int) -> int | None:
+    stmt = update(_gardes).where(_gardes.c.id == garde_id).values(version=_gardes.c.version + 1)
+    if conn.dialect.update_returning:
+        return conn.execute(stmt.returning(_gardes.c.version)).scalar()
+    conn.execute(stmt)
+    return conn.scalar(select(_gardes.c.version).where(_gardes.c.id == garde_id))
+
+
+def _bump_many(conn, garde_ids: list[int]) -> dict[int, int]:
+    """garde_id → nouvelle version (gardes supprimées par ailleurs absentes)."""
+    ids = sorted(garde_ids)
+    if len(ids) <= 1:
+        version = _bump(conn, ids[0]) if ids else None
+        return {} if version is None else {ids[0]: version}
+    # ordre fixe des verrous de ligne entre transactions concurrentes, puis un seul UPDATE
+    conn.execute(select(_gardes.c.id).where(_gardes.c.id.in_(ids)).order_by(_gardes.c.id).with_for_update())
+    stmt = update(_gardes).where(_gardes.c.id.in_(ids)).values(version=_gardes.c.version + 1)
+    if conn.dialect.update_returning:
+        return dict(conn.execute(stmt.returning(_gardes.c.id, _gardes.c.version)).all())
+    conn.execute(stmt)
+    return dict(conn.execute(select(_gardes.c.id, _gardes.c.version).where(_gardes.c.id.in_(ids))).all())
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_garde_versions(session: Session, flush_context) -> None:
+    touched, orm_versions = _collect(session)
+    if touched:
+        _apply(session, touched, orm_versions)
+
+
+def record_rows(session: Session, entity: str, action: str, rows) -> None:
+    """
+    Versions et journal pour des lignes écrites hors ORM (insert() Core, que les événements
+    de session ne voient pas) ; rows : (id, garde_id).
+    """
+    touched: dict[int, dict[tuple[str, int], str]] = {}
+    for entity_id, garde_id in rows:
+        touched.setdefault(garde_id, {})[(entity, entity_id)] = action
+    if touched:
+        _apply(session, touched, {})
+
+
+def _apply(session: Session, touched: dict[int, dict[tuple[str, int], str]],
+           orm_versions: dict[int, int]) -> None:
+    conn = session.connection()
+    now = datetime.utcnow()
+    log = []
+    new_versions = session.info.setdefault(_NEW_VERSIONS_KEY, {})
+    bumped = _bump_many(conn, [gid for gid in touched if not orm_versions.get(gid)])
+    for garde_id in sorted(touched):
+        version = orm_versions.get(garde_id) or bumped.get(garde_id)
+        if version is None:  # garde supprimée par ailleurs
+            continue
+        new_versions[garde_id] = version
+        obj = session.identity_map.get(identity_key(Garde, garde_id))
+        if obj is not None:
+            # la Garde chargée dans la session reflète la nouvelle version sans relecture
+            set_committed_value(obj, "version", version)
+        log.extend(
+            {"garde_id": garde_id, "version": version, "entity": entity,
+             "entity_id": entity_id, "action": action, "changed_at": now}
+            for (entity, entity_id), action in touched[garde_id].items()
+        )
+    if log:
+        conn.execute(insert(GardeChange.__table__), log)
+
+
+def new_versions(session: Session) -> dict[int, int]:
+    """garde_id → dernière version attribuée dans la transaction en cours (flux de changements)."""
+    return session.info.get(_NEW_VERSIONS_KEY, {})
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _forget_new_versions(session: Session) -> None:
+    session.info.pop(_NEW_VERSIONS_KEY, None)
+
+
+# =========================
+# 🧮 Delta depuis une version
+# =========================
+
+def garde_delta(db: Session, garde: Garde, since_version: int | None) -> GardeDelta:
+    """
+    Changements de `garde` après `since_version`.
+    since_version absent, < 1 (antérieur au journal) ou > version courante (base restaurée) :
+    état complet (full=True).
+    """
+    version = garde.version
+    out = GardeDelta(garde_id=garde.id, version=version, since_version=since_version or 0)
+    if since_version is None or since_version < 1 or since_version > version:
+        out.full = True
+        out.garde = GardeRead.model_validate(garde)
+        out.affectations = [
+            AffectationRead.model_validate(a)
+            for a in db.scalars(select(Affectation).where(Affectation.garde_id == garde.id)
+                                .order_by(Affectation.id))
+        ]
+        out.indisponibilites = [
+            IndispoRead.model_validate(i)
+            for i in db.scalars(select(Indisponibilite).where(Indisponibilite.garde_id == garde.id)
+                                .order_by(Indisponibilite.id))
+        ]
+        return out
+    if since_version == version:
+        return out
+
+    # dernière action par objet (le journal est lu dans l'ordre des versions)
+    last: dict[tuple[str, int], str] = {}
+    for entity, entity_id, action in db.execute(
+        select(GardeChange.entity, GardeChange.entity_id, GardeChange.action)
+        .where(GardeChange.garde_id == garde.id, GardeChange.version > since_version)
+        .order_by(GardeChange.version, GardeChange.id)
+    ):
+        last[(entity, entity_id)] = action
+
+    def ids(entity: str, deleted: bool) -> list[int]:
+        return sorted(i for (e, i), a in last.items() if e == entity and (a == "deleted") == deleted)
+
+    if (GARDE, garde.id) in last:
+        out.garde = GardeRead.model_validate(garde)
+    for entity, model, schema, rows_attr, deleted_attr in (
+        (AFFECTATION, Affectation, AffectationRead, "affectations", "deleted_affectations"),
+        (INDISPONIBILITE, Indisponibilite, IndispoRead, "indisponibilites", "deleted_indisponibilites"),
+    ):
+        deleted = ids(entity, True)
+        upserted = ids(entity, False)
+        rows = []
+        if upserted:
+            rows = db.scalars(select(model).where(model.id.in_(upserted), model.garde_id == garde.id)
+                              .order_by(model.id)).all()
+            # disparue depuis (suppression en cascade hors ORM…) : signalée supprimée
+            found = {r.id for r in rows}
+            deleted = sorted({*deleted, *(i for i in upserted if i not in found)})
+        setattr(out, rows_attr, [schema.model_validate(r) for r in rows])
+        setattr(out, deleted_attr, deleted)
+    return out
@@ -0,0 +1,314 @@
+# app/services/month_stats.py
+# Compteurs mensuels par agent (table personnel_month_stats)
+#
+# Nombre d'affectations du mois et leur répartition (nuits, week-end, fériés, pro / volontaire,
+# astreintes), tenus à jour dans la transaction même qui crée, modifie ou supprime une
+# affectation (événements de session, comme garde_versions) : le classement des suggestions et
+# les statistiques lisent une ligne par agent et par mois au lieu de recompter les affectations.
+#
+# - affectation créée / supprimée / déplacée : incréments atomiques
+#   (INSERT … ON CONFLICT DO UPDATE col = col + n), sûrs entre transactions concurrentes ;
+# - changement rare à effet large (garde supprimée ou déplacée, piquet supprimé ou passé en
+#   astreinte) : les (agent, mois) concernés sont recalculés depuis les affectations ;
+# - réparation complète (import en masse hors ORM, restauration…) :
+#       python -m app.services.month_stats [--year 2026]
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import date, datetime
+
+from sqlalchemy import (
+    DateTime, Integer, and_, case, cast, delete, event, extract, func, insert, inspect, literal, select, update,
+)
+from sqlalchemy.orm import Session
+
+from app.db.models import Affectation, Garde, Personnel, PersonnelMonthStat, Piquet, Slot
+
+COUNTERS = ("gardes", "nuits", "weekend", "holiday", "pro", "volontaire", "astreinte")
+
+_stats = PersonnelMonthStat.__table__
+_PENDING = "month_stats_pending"      # (agent, année, mois) → incréments (avant flush)
+_RECOMPUTE = "month_stats_recompute"  # (agent, année, mois) à recalculer
+
+# attributs d'une affectation qui changent sa contribution
+_AFF_KEYS = ("personnel_id", "garde_id", "piquet_id", "statut_service")
+# attributs d'une garde qui changent la contribution de toutes ses affectations
+_GARDE_KEYS = ("date", "slot", "is_weekend", "is_holiday")
+
+Key = tuple[int, int, int]
+
+
+def _vector(garde_row, astreinte: bool, statut: str | None) -> list[int]:
+    """Contribution d'une affectation, dans l'ordre de COUNTERS."""
+    _, slot, is_weekend, is_holiday = garde_row
+    statut = (statut or "").lower()
+    return [
+        1,
+        int(slot == Slot.NUIT),
+        int(bool(is_weekend)),
+        int(bool(is_holiday)),
+        int(statut == "pro"),
+        int(statut == "volontaire"),
+        int(bool(astreinte)),
+    ]
+
+
+def _add(acc: dict[Key, list[int]], key: Key, vec: list[int], sign: int) -> None:
+    cur = acc.setdefault(key, [0] * len(COUNTERS))
+    for i, v in enumerate(vec):
+        cur[i] += sign * v
+
+
+def _apply(conn, acc: dict[Key, list[int]], values: list[tuple], sign: int) -> None:
+    """values : (personnel_id, garde_id, piquet_id, statut_service) ; gardes lues en base."""
+    garde_ids = {v[1] for v in values}
+    piquet_ids = {v[2] for v in values}
+    gardes = {
+        r[0]: r[1:]
+        for r in conn.execute(
+            select(Garde.id, Garde.date, Garde.slot, Garde.is_weekend, Garde.is_holiday)
+            .where(Garde.id.in_(garde_ids))
+        )
+    }
+    astreinte = dict(conn.execute(select(Piquet.id, Piquet.is_astreinte).where(Piquet.id.in_(piquet_ids))).all())
+    for personnel_id, garde_id, piquet_id, statut in values:
+        g = gardes.get(garde_id)
+        if g is None:  # garde supprimée dans ce flush : mois recalculés (before_flush)
+            continue
+        _add(acc, (personnel_id, g[0].year, g[0].month), _vector(g, astreinte.get(piquet_id), statut), sign)
+
+
+def _old_values(obj: Affectation) -> tuple:
+    """Valeurs d'avant modification (historique d'attribut)."""
+    state = inspect(obj)
+    out = []
+    for attr in _AFF_KEYS:
+        hist = state.attrs[attr].history
+        out.append(hist.deleted[0] if hist.deleted else getattr(obj, attr))
+    return tuple(out)
+
+
+def _changed(obj, attrs: tuple[str, ...]) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+
+def _keys_of(conn, *where) -> set[Key]:
+    """(agent, année, mois) des affectations filtrées (état en base)."""
+    rows = conn.execute(
+        select(Affectation.personnel_id, Garde.date)
+        .join(Garde, Garde.id == Affectation.garde_id)
+        .where(*where)
+    )
+    return {(pid, d.year, d.month) for pid, d in rows}
+
+
+# =========================
+# 🔁 Maintenance incrémentale (événements de session)
+# =========================
+
+@event.listens_for(Session, "before_flush")
+def _collect_month_stats(session: Session, flush_context, instances) -> None:
+    """Contributions retirées (état en base, avant le flush) et mois à recalculer."""
+    removed: list[tuple] = []
+    recompute: set[Key] = session.info.setdefault(_RECOMPUTE, set())
+    garde_ids: set[int] = set()
+    piquet_ids: set[int] = set()
+
+    for obj in session.deleted:
+        if isinstance(obj, Affectation):
+            removed.append(tuple(getattr(obj, a) for a in _AFF_KEYS))
+        elif isinstance(obj, Garde):
+            garde_ids.add(obj.id)
+        elif isinstance(obj, Piquet):
+            piquet_ids.add(obj.id)
+    conn = session.connection()
+    for obj in session.dirty:
+        if isinstance(obj, Affectation) and _changed(obj, _AFF_KEYS):
+            removed.append(_old_values(obj))
+        elif isinstance(obj, Garde) and _changed(obj, _GARDE_KEYS):
+            garde_ids.add(obj.id)
+            # garde déplacée : ses affectations arrivent dans le nouveau mois
+            recompute.update((pid, obj.date.year, obj.date.month) for pid in conn.scalars(
+                select(Affectation.personnel_id).where(Affectation.garde_id == obj.id)))
+        elif isinstance(obj, Piquet) and _changed(obj, ("is_astreinte",)):
+            piquet_ids.add(obj.id)
+
+    if garde_ids:
+        recompute |= _keys_of(conn, Affectation.garde_id.in_(garde_ids))
+    if piquet_ids:
+        recompute |= _keys_of(conn, Affectation.piquet_id.in_(piquet_ids))
+    if removed:
+        _apply(conn, session.info.setdefault(_PENDING, {}), removed, -1)
+
+
+@event.listens_for(Session, "after_flush")
+def _write_month_stats(session: Session, flush_context) -> None:
+    """Contributions ajoutées (état après flush) puis écriture des compteurs."""
+    acc: dict[Key, list[int]] = session.info.pop(_PENDING, {})
+    recompute: set[Key] = session.info.pop(_RECOMPUTE, set())
+    added = [
+        tuple(getattr(obj, a) for a in _AFF_KEYS)
+        for obj in (*session.new, *session.dirty)
+        if isinstance(obj, Affectation) and (obj in session.new or _changed(obj, _AFF_KEYS))
+    ]
+    if not acc and not added and not recompute:
+        return
+    conn = session.connection()
+    if added:
+        _apply(conn, acc, added, +1)
+
+    # agents supprimés dans ce flush : leurs lignes partent en cascade
+    gone = {obj.id for obj in session.deleted if isinstance(obj, Personnel)}
+    for key in recompute:
+        acc.pop(key, None)
+    increments = [
+        {"personnel_id": key[0], "year": key[1], "month": key[2], **dict(zip(COUNTERS, vec))}
+        for key, vec in sorted(acc.items())  # ordre fixe des verrous de ligne
+        if key[0] not in gone and any(vec)
+    ]
+    if increments:
+        _increment(conn, increments)
+    recompute = {k for k in recompute if k[0] not in gone}
+    if recompute:
+        _recompute(conn, recompute)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_month_stats(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+    session.info.pop(_RECOMPUTE, None)
+
+
+def _increment(conn, rows: list[dict]) -> None:
+    """col = col + n par (agent, année, mois), ligne créée au besoin."""
+    now = datetime.utcnow()
+    for row in rows:
+        row["updated_at"] = now
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        stmt = upsert(_stats)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["personnel_id", "year", "month"],
+            set_={**{c: _stats.c[c] + stmt.excluded[c] for c in COUNTERS},
+                  "updated_at": stmt.excluded.updated_at},
+        )
+        conn.execute(stmt, rows)
+        return
+    # autres bases : UPDATE puis INSERT si aucune ligne
+    for row in rows:
+        key = and_(_stats.c.personnel_id == row["personnel_id"], _stats.c.year == row["year"],
+                   _stats.c.month == row["month"])
+        res = conn.execute(update(_stats).where(key).values(
+            updated_at=now, **{c: _stats.c[c] + row[c] for c in COUNTERS}))
+        if res.rowcount == 0:
+            conn.execute(insert(_stats), row)
+
+
+# =========================
+# 🧮 Recalcul depuis les affectations
+# =========================
+
+def counter_columns() -> list:
+    """
+    Agrégats SQL des COUNTERS (dans l'ordre), sur affectations ⨝ gardes ⨝ piquets :
+    partagés avec les exports de statistiques.
+    """
+    def count_if(cond):
+        return func.sum(case((cond, 1), else_=0))
+
+    statut = func.lower(Affectation.statut_service)
+    return [
+        func.count(Affectation.id),
+        count_if(Garde.slot == Slot.NUIT),
+        count_if(Garde.is_weekend.is_(True)),
+        count_if(Garde.is_holiday.is_(True)),
+        count_if(statut == "pro"),
+        count_if(statut == "volontaire"),
+        count_if(Piquet.is_astreinte.is_(True)),
+    ]
+
+
+def _aggregate(*where):
+    """SELECT agent, année, mois, compteurs…, updated_at (ordre des colonnes de la table)."""
+    year = cast(extract("year", Garde.date), Integer)
+    month = cast(extract("month", Garde.date), Integer)
+    return (
+        select(
+            Affectation.personnel_id, year, month,
+            *counter_columns(),
+            literal(datetime.utcnow(), DateTime),
+        )
+        .join(Garde, Garde.id == Affectation.garde_id)
+        .join(Piquet, Piquet.id == Affectation.piquet_id)
+        .where(*where)
+        .group_by(Affectation.personnel_id, year, month)
+    )
+
+
+_COLUMNS = ("personnel_id", "year", "month", *COUNTERS, "updated_at")
+
+
+def _month_bounds(year: int, month: int) -> tuple[date, date]:
+    first = date(year, month, 1)
+    return first, (date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1))
+
+
+def _recompute(conn, keys: set[Key]) -> None:
+    """Remplace les lignes (agent, année, mois) par l'agrégat des affectations."""
+    by_month: dict[tuple[int, int], set[int]] = {}
+    for pid, y, m in keys:
+        by_month.setdefault((y, m), set()).add(pid)
+    for (y, m), pids in sorted(by_month.items()):
+        conn.execute(delete(_stats).where(
+            _stats.c.year == y, _stats.c.month == m, _stats.c.personnel_id.in_(pids)))
+        first, after = _month_bounds(y, m)
+        conn.execute(insert(_stats).from_select(_COLUMNS, _aggregate(
+            Affectation.personnel_id.in_(pids), Garde.date >= first, Garde.date < after)))
+
+
+def rebuild(db: Session, year: int | None = None) -> int:
+    """
+    Recalcule toute la table (ou une année) depuis les affectations ; commit à la charge de
+    l'appelant. Renvoie le nombre de lignes écrites.
+    """
+    if year is None:
+        db.execute(delete(_stats))
+        db.execute(insert(_stats).from_select(_COLUMNS, _aggregate()))
+    else:
+        db.execute(delete(_stats).where(_stats.c.year == year))
+        db.execute(insert(_stats).from_select(_COLUMNS, _aggregate(
+            Garde.date >= date(year, 1, 1), Garde.date < date(year + 1, 1, 1))))
+    where = [] if year is None else [_stats.c.year == year]
+    return db.scalar(select(func.count()).select_from(_stats).where(*where)) or 0
+
+
+def month_counts(db: Session, year: int, month: int) -> dict[int, int]:
+    """personnel_id → nombre d'affectations du mois (agents sans ligne : 0)."""
+    return dict(db.execute(
+        select(_stats.c.personnel_id, _stats.c.gardes)
+        .where(_stats.c.year == year, _stats.c.month == month)
+    ).all())
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Recalcule personnel_month_stats depuis les affectations")
+    ap.add_argument("--year", type=int, help="une seule année (toutes par défaut)")
+    args = ap.parse_args()
+
+    from app.db.session import SessionLocal
+
+    t0 = time.perf_counter()
+    with SessionLocal() as db:
+        n = rebuild(db, args.year)
+        db.commit()
+    print(f"[STATS] ✅ {n} ligne(s) agent/mois recalculée(s) en {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from io import BytesIO
 
 from reportlab.lib import colors
@@ -7,8 +8,9 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.platypus import (
-    Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle,
+    Flowable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle,
 )
 
 # ── Palette — thème light planning ─────────────────────────
@@ -40,6 +42,15 @@ _JOURS_FR = ["Lun", "Mar", "Mer", "Jeu", "Ven", "Sam", "Dim"]
 
 PAGE_W, PAGE_H = landscape(A4)
 MARGIN = 12 * mm
+CELL_PAD = 4
+
+# "fast"      : styles mis en cache, cellules vides sans Paragraph, texte simple pré-coupé
+#               dessiné par _CellText (un objet texte par cellule, sans parsing), ROWBACKGROUNDS
+# "paragraph" : rendu historique (un ParagraphStyle + un Paragraph par cellule)
+# Même taille de fichier (mois dense de benchmarks/bench_pdf.py : 19,9 Kio contre 20,1) ; une
+# cellule str dessinée par la Table coûtait un objet texte à coordonnées absolues par LIGNE,
+# ce qui doublait le PDF compressé (41,7 Kio).
+RENDER_MODES = ("fast", "paragraph")
 
 
 def _par(text: str, *, color=_TEXT, size: float = 7.0,
@@ -56,6 +67,95 @@ def _par(text: str, *, color=_TEXT, size: float = 7.0,
     return Paragraph(text.replace("\n", "<br/>"), style)
 
 
+@lru_cache(maxsize=64)
+def _cell_style(color, size: float, bold: bool, align: str) -> ParagraphStyle:
+    return ParagraphStyle(
+        "fg_cell",
+        fontName="Helvetica-Bold" if bold else "Helvetica",
+        fontSize=size,
+        textColor=color,
+        leading=size * 1.35,
+        alignment=TA_CENTER if align == "CENTER" else TA_LEFT,
+        wordWrap="CJK",
+    )
+
+
+def _wrap_plain(text: str, font: str, size: float, width: float) -> str:
+    """Coupure gloutonne caractère par caractère (comme wordWrap="CJK") → lignes séparées par \\n."""
+    if stringWidth(text, font, size) <= width:
+        return text
+    lines: list[str] = []
+    cur, cur_w = "", 0.0
+    for ch in text:
+        w = stringWidth(ch, font, size)
+        if cur and cur_w + w > width:
+            lines.append(cur.rstrip())
+            cur, cur_w = ("", 0.0) if ch == " " else (ch, w)
+        else:
+            cur += ch
+            cur_w += w
+    if cur:
+        lines.append(cur)
+    return "\n".join(lines)
+
+
+class _CellText(Flowable):
+    """
+    Texte simple déjà coupé en lignes : un seul objet texte par cellule, position de départ
+    puis décalages relatifs — le même flux PDF qu'un Paragraph, sans parsing ni style par
+    cellule.
+    """
+
+    def __init__(self, lines: list[str], font: str, size: float, color, align: str):
+        super().__init__()
+        self.lines = lines
+        self.font = font
+        self.size = size
+        self.color = color
+        self.align = align
+        self.leading = size * 1.35
+
+    def wrap(self, availWidth, availHeight):
+        self.width = availWidth
+        self.height = self.leading * len(self.lines)
+        return self.width, self.height
+
+    def draw(self):
+        t = self.canv.beginText(0, self.height - self.size)
+        t.setFont(self.font, self.size, self.leading)
+        t.setFillColor(self.color)
+        x = 0.0
+        for line in self.lines:
+            if self.align == "CENTER":
+                dx = (self.width - stringWidth(line, self.font, self.size)) / 2
+                t.setXPos(dx - x)
+                x = dx
+            t.textLine(line)
+        self.canv.drawText(t)
+
+
+def _fast_cell(text: str, *, color=_TEXT, size: float = 7.0,
+               bold: bool = False, align: str = "CENTER", width: float = 0.0):
+    """
+    Cellule du mode "fast" :
+    - vide          → "" (aucun objet créé)
+    - texte simple  → _CellText (coupé à la largeur de la colonne)
+    - balisage HTML → Paragraph avec style partagé
+    """
+    if not text:
+        return ""
+    if "<" in text or "&" in text:
+        return Paragraph(text.replace("\n", "<br/>"), _cell_style(color, size, bold, align))
+    font = "Helvetica-Bold" if bold else "Helvetica"
+    lines = [w for line in text.split("\n") for w in _wrap_plain(line, font, size, width).split("\n")]
+    return _CellText(lines, font, size, color, align)
+
+
+def _paragraph_cell(text: str, *, color=_TEXT, size: float = 7.0,
+                    bold: bool = False, align: str = "CENTER", width: float = 0.0) -> Paragraph:
+    return _par(text, color=color, size=size, bold=bold, align=align)
+
+
 def generate_feuille_garde_pdf(
     equipe_label: str,
     mois_label: str,
@@ -69,6 +169,7 @@ def generate_feuille_garde_pdf(
     # {garde_id: [fullname, ...]}
     indispo_map: dict[int, list[str]],
     # {garde_id: [fullname, ...]}
+    mode: str = "fast",
 ) -> bytes:
     """
     PDF paysage A4 — thème light planning :
@@ -76,7 +177,13 @@ def generate_feuille_garde_pdf(
     - 1 ligne par piquet (tous affichés, même vides)
     - Ligne « Non affectés »
     - Ligne « Indisponibles »
+
+    mode : voir RENDER_MODES (même rendu visuel, "fast" alloue beaucoup moins).
     """
+    if mode not in RENDER_MODES:
+        raise ValueError(f"mode de rendu inconnu : {mode}")
+    fast = mode == "fast"
+    cell = _fast_cell if fast else _paragraph_cell
     buf = BytesIO()
     n_gardes = len(gardes)
 
@@ -86,17 +193,20 @@ def generate_feuille_garde_pdf(
     col_w    = (usable_w - label_w) / max(n_gardes, 1)
     col_widths = [label_w] + [col_w] * n_gardes
 
+    label_tw = label_w - 2 * CELL_PAD
+    col_tw   = col_w - 2 * CELL_PAD
+
     # Taille police adaptée
     fs = max(5.0, min(8.0, 8.0 * 14 / max(n_gardes, 14)))
 
     # ── En-tête : une colonne par garde ────────────────────
-    header_row = [_par("", size=fs)]
+    header_row = [cell("", size=fs)]
     for g in gardes:
         d    = g["date"]
         slot = g["slot"]
         day  = _JOURS_FR[d.weekday()]
         txt  = f"<b>{day} {d.strftime('%d/%m')}</b><br/>{slot}"
-        header_row.append(_par(txt, color=_HDR_FG, size=fs))
+        header_row.append(cell(txt, color=_HDR_FG, size=fs))
 
     # ── Lignes piquets — séparées garde / astreinte ─────────
     garde_pqs    = [p for p in piquets if not p.get("is_astreinte")]
@@ -105,10 +215,10 @@ def generate_feuille_garde_pdf(
     def _piquet_rows(pq_list: list[dict]) -> list[list]:
         rows = []
         for pq in pq_list:
-            row = [_par(pq["label"], color=_TEXT, size=fs, bold=True, align="LEFT")]
+            row = [cell(pq["label"], color=_TEXT, size=fs, bold=True, align="LEFT", width=label_tw)]
             for g in gardes:
                 agent = (aff_map.get(g["id"]) or {}).get(pq["id"], "")
-                row.append(_par(agent, color=_TEXT, size=fs))
+                row.append(cell(agent, color=_TEXT, size=fs, width=col_tw))
             rows.append(row)
         return rows
 
@@ -118,20 +228,20 @@ def generate_feuille_garde_pdf(
     # Séparateur visuel entre gardes et astreintes
     _SEP_BG  = colors.HexColor("#c4b5fd")   # violet clair
     _SEP_FG  = colors.HexColor("#3b0764")
-    sep_row  = [_par("Astreinte", color=_SEP_FG, size=fs, bold=True, align="LEFT")] + \
-               [_par("", size=fs) for _ in gardes]
+    sep_row  = [cell("Astreinte", color=_SEP_FG, size=fs, bold=True, align="LEFT", width=label_tw)] + \
+               [cell("", size=fs) for _ in gardes]
 
     # ── Ligne non affectés ──────────────────────────────────
-    non_aff_row = [_par("Non affectés", color=_NON_AFF_C, size=fs, bold=True, align="LEFT")]
+    non_aff_row = [cell("Non affectés", color=_NON_AFF_C, size=fs, bold=True, align="LEFT", width=label_tw)]
     for g in gardes:
         txt = ", ".join(non_aff_map.get(g["id"], []))
-        non_aff_row.append(_par(txt, color=_NON_AFF_C, size=fs, align="LEFT"))
+        non_aff_row.append(cell(txt, color=_NON_AFF_C, size=fs, align="LEFT", width=col_tw))
 
     # ── Ligne indisponibles ─────────────────────────────────
-    indispo_row = [_par("Indisponibles", color=_INDISPO_C, size=fs, bold=True, align="LEFT")]
+    indispo_row = [cell("Indisponibles", color=_INDISPO_C, size=fs, bold=True, align="LEFT", width=label_tw)]
     for g in gardes:
         txt = ", ".join(indispo_map.get(g["id"], []))
-        indispo_row.append(_par(txt, color=_INDISPO_C, size=fs, align="LEFT"))
+        indispo_row.append(cell(txt, color=_INDISPO_C, size=fs, align="LEFT", width=col_tw))
 
     # Construction de la table : en-tête + gardes + séparateur + astreintes + non-aff + indispo
     has_sep = bool(ast_pqs)
@@ -153,10 +263,10 @@ def generate_feuille_garde_pdf(
 
     style = [
         # Padding global
-        ("TOPPADDING",    (0, 0), (-1, -1), 4),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-        ("LEFTPADDING",   (0, 0), (-1, -1), 4),
-        ("RIGHTPADDING",  (0, 0), (-1, -1), 4),
+        ("TOPPADDING",    (0, 0), (-1, -1), CELL_PAD),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), CELL_PAD),
+        ("LEFTPADDING",   (0, 0), (-1, -1), CELL_PAD),
+        ("RIGHTPADDING",  (0, 0), (-1, -1), CELL_PAD),
         ("VALIGN",        (0, 0), (-1, -1), "TOP"),
         # Grille fine
         ("GRID",          (0, 0), (-1, -1), 0.5, _BORDER),
@@ -187,13 +297,29 @@ def generate_feuille_garde_pdf(
         style.append(("BACKGROUND", (col_i, 0), (col_i, 0), bg))
 
     # Fond des lignes piquets : alternance sur garde_rows puis ast_rows (sans la ligne sep)
-    alt_i = 0
-    for row_i in range(1, 1 + n_garde_rows + n_ast_rows + (1 if has_sep else 0)):
-        if has_sep and row_i == idx_sep:
-            continue  # la ligne sep a son propre fond
-        row_bg = _WHITE if alt_i % 2 == 0 else _SURFACE_2
-        style.append(("BACKGROUND", (1, row_i), (-1, row_i), row_bg))
-        alt_i += 1
+    if fast:
+        # 2 commandes ROWBACKGROUNDS au lieu d'un BACKGROUND par ligne ;
+        # l'alternance se poursuit sur les astreintes après le séparateur.
+        alt = [_WHITE, _SURFACE_2]
+        if n_garde_rows:
+            style.append(("ROWBACKGROUNDS", (1, 1), (-1, n_garde_rows), alt))
+        if n_ast_rows:
+            ast_alt = alt if n_garde_rows % 2 == 0 else alt[::-1]
+            style.append(("ROWBACKGROUNDS", (1, idx_ast_start), (-1, idx_ast_start + n_ast_rows - 1), ast_alt))
+
+        # cellules vides ("") : hauteur d'une ligne à la taille de police de la feuille
+        style += [
+            ("FONTSIZE",  (0, 0), (-1, -1), fs),
+            ("LEADING",   (0, 0), (-1, -1), fs * 1.35),
+        ]
+    else:
+        alt_i = 0
+        for row_i in range(1, 1 + n_garde_rows + n_ast_rows + (1 if has_sep else 0)):
+            if has_sep and row_i == idx_sep:
+                continue  # la ligne sep a son propre fond
+            row_bg = _WHITE if alt_i % 2 == 0 else _SURFACE_2
+            style.append(("BACKGROUND", (1, row_i), (-1, row_i), row_bg))
+            alt_i += 1
 
     table = Table(table_data, colWidths=col_widths, repeatRows=1)
     table.setStyle(TableStyle(style))
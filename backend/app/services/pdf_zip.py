@@ -0,0 +1,56 @@
+# app/services/pdf_zip.py
+# Génération parallèle des feuilles de garde + archive ZIP streamée
+from __future__ import annotations
+
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator
+
+from app.services.pdf_generator import generate_feuille_garde_pdf
+from app.services.zip_stream import ZipSink
+
+MAX_PDF_WORKERS = 4
+PDF_WINDOW_PER_WORKER = 2
+
+
+def stream_feuilles_zip(feuilles: list[dict]) -> Iterator[bytes]:
+    """
+    Rend les PDF (feuilles issues de load_feuilles) en parallèle dans des process séparés
+    et renvoie les morceaux de l'archive ZIP dès qu'une entrée est terminée.
+    L'archive complète n'est jamais en mémoire : seulement les PDF de la fenêtre en cours
+    (PDF_WINDOW_PER_WORKER par worker).
+    """
+    sink = ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        if len(feuilles) <= 1:
+            for f in feuilles:
+                zf.writestr(f["filename"], generate_feuille_garde_pdf(**f["pdf_kwargs"]))
+                yield sink.drain()
+        else:
+            workers = min(len(feuilles), os.cpu_count() or 1, MAX_PDF_WORKERS)
+            # "spawn" : les workers n'héritent ni des connexions BDD ni des threads du serveur
+            ctx = multiprocessing.get_context("spawn")
+            # fenêtre bornée : au plus `window` PDF rendus ou en cours, quel que soit le
+            # rythme de lecture du client
+            window = PDF_WINDOW_PER_WORKER * workers
+            todo = iter(feuilles)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                futures = {}
+
+                def refill() -> None:
+                    for f in todo:
+                        futures[pool.submit(generate_feuille_garde_pdf, **f["pdf_kwargs"])] = f["filename"]
+                        if len(futures) >= window:
+                            break
+
+                refill()
+                while futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        zf.writestr(futures.pop(fut), fut.result())
+                        yield sink.drain()
+                    refill()
+    # répertoire central écrit à la fermeture
+    yield sink.drain()
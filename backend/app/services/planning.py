@@ -49,9 +49,6 @@ def has_all_required_competences(
         have.add(pc.competence_id)
     missing = required_ids - have
     if missing:
-        # libellés manquants
-        miss_labels = [db.get(PiquetCompetence, next(iter([c for c in reqs if c.competence_id==m])))
-                       for m in missing]
         return False, [f"compétence manquante id={m}" for m in missing]
     return True, reasons
 
@@ -93,14 +90,57 @@ def would_make_three_in_a_row(
 
     # ajoute la garde candidate
     occupied.add((garde.date, garde.slot))
+    return _has_three_in_a_row(occupied, garde.date)
 
+
+def _has_three_in_a_row(occupied: set[tuple[date, Slot]], around: date) -> bool:
     # détecte une série de 3 sans trou 24h (i.e., sans journée complète vide entre)
     # on regarde des motifs: (J,N,J) ou (N,J,N) sur 2 jours glissants.
     def has(b: tuple[date, Slot]) -> bool: return b in occupied
     for delta in [-1, 0]:
-        d = garde.date + timedelta(days=delta)
+        d = around + timedelta(days=delta)
         if has((d, Slot.JOUR)) and has((d, Slot.NUIT)) and has((d+timedelta(days=1), Slot.JOUR)):
             return True  # J N J
         if has((d, Slot.NUIT)) and has((d+timedelta(days=1), Slot.JOUR)) and has((d+timedelta(days=1), Slot.NUIT)):
             return True  # N J N
     return False
+
+
+def personnels_making_three_in_a_row(
+    db: Session, personnel_ids: Iterable[int], garde: Garde, piquet: Piquet
+) -> set[int]:
+    """Version groupée de would_make_three_in_a_row : les personnels (parmi personnel_ids)
+    pour qui cette garde ferait 3 gardes d'affilée — une seule requête pour tous."""
+    ids = list(personnel_ids)
+    if piquet.is_astreinte or not ids:
+        return set()
+    occupied = occupancy_around(db, garde, ids)
+    return {pid for pid, occ in occupied.items() if completes_three_in_a_row(occ, garde)}
+
+
+def occupancy_around(
+    db: Session, garde: Garde, personnel_ids: Iterable[int] | None = None
+) -> dict[int, set[tuple[date, Slot]]]:
+    """Créneaux (hors astreinte) occupés autour de la garde (J-1, J, J+1), par personnel ;
+    tous les personnels si personnel_ids est None."""
+    slots = prev_next_slots(garde.date, garde.slot)
+    q = (
+        select(Affectation.personnel_id, Garde.date, Garde.slot)
+        .join(Garde, Garde.id == Affectation.garde_id)
+        .join(Piquet, Piquet.id == Affectation.piquet_id)
+        .where(
+            or_(Piquet.is_astreinte.is_(False), Piquet.is_astreinte.is_(None)),
+            or_(*[and_(Garde.date == d, Garde.slot == s) for (d, s) in slots]),
+        )
+    )
+    if personnel_ids is not None:
+        q = q.where(Affectation.personnel_id.in_(list(personnel_ids)))
+    occupied: dict[int, set[tuple[date, Slot]]] = {}
+    for pid, d, s in db.execute(q).all():
+        occupied.setdefault(pid, set()).add((d, s))
+    return occupied
+
+
+def completes_three_in_a_row(occupied: set[tuple[date, Slot]], garde: Garde) -> bool:
+    """True si ajouter la garde à ces créneaux occupés ferait 3 gardes d'affilée."""
+    return _has_three_in_a_row(occupied | {(garde.date, garde.slot)}, garde.date)
@@ -0,0 +1,141 @@
+# app/services/ref_versions.py
+# Versions des données de référence (piquets, équipes, compétences)
+#
+# Ces listes sont rechargées à chaque affichage de page mais ne changent que quelques fois par
+# an. Chaque jeu a un compteur (table ref_versions) incrémenté dans la transaction qui modifie
+# une de ses lignes (événements de session, comme pour les flux agenda) : les routes de liste en
+# tirent un ETag fort, répondent 304 sans requête de liste ni sérialisation, et gardent le JSON
+# rendu en mémoire pour les clients sans cache.
+#
+# Les lignes sont créées par la migration 0009 (et au démarrage si absentes) ; l'ETag embarque
+# aussi l'empreinte du schéma de réponse, pour qu'un déploiement qui change la forme du JSON
+# invalide les caches même si les données n'ont pas bougé.
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime
+
+from pydantic import TypeAdapter
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.models import Competence, Equipe, Piquet, PiquetCompetence, RefVersion
+
+PIQUETS = "piquets"
+EQUIPES = "equipes"
+COMPETENCES = "competences"
+NAMES = (PIQUETS, EQUIPES, COMPETENCES)
+
+# modèle modifié → listes dont le contenu change (les piquets embarquent code/libellé des compétences)
+_TRACKED: dict[type, tuple[str, ...]] = {
+    Piquet: (PIQUETS,),
+    PiquetCompetence: (PIQUETS,),
+    Equipe: (EQUIPES,),
+    Competence: (COMPETENCES, PIQUETS),
+}
+
+_PENDING_KEY = "ref_versions_pending"
+_table = RefVersion.__table__
+
+
+# =========================
+# 🔁 Incrément (événements de session)
+# =========================
+
+@event.listens_for(Session, "before_flush")
+def _collect_ref_changes(session: Session, flush_context, instances) -> None:
+    names: set[str] = set()
+    for obj in (*session.new, *session.deleted):
+        names.update(_TRACKED.get(type(obj), ()))
+    for obj in session.dirty:
+        tracked = _TRACKED.get(type(obj))
+        if tracked and session.is_modified(obj, include_collections=False):
+            names.update(tracked)
+    if names:
+        session.info.setdefault(_PENDING_KEY, set()).update(names)
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_ref_versions(session: Session, flush_context) -> None:
+    names = session.info.pop(_PENDING_KEY, None)
+    if not names:
+        return
+    conn = session.connection()
+    now = datetime.utcnow()
+    for name in sorted(names):
+        res = conn.execute(
+            update(_table).where(_table.c.name == name)
+            .values(version=_table.c.version + 1, changed_at=now)
+        )
+        if res.rowcount == 0:
+            conn.execute(insert(_table).values(name=name, version=1, changed_at=now))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_ref_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+# =========================
+# 🏷️ ETag
+# =========================
+
+_schema_tags: dict[str, str] = {}
+
+
+def schema_tag(name: str, adapter: TypeAdapter) -> str:
+    """Empreinte courte du schéma JSON de la liste (calculée une fois par process)."""
+    tag = _schema_tags.get(name)
+    if tag is None:
+        raw = json.dumps(adapter.json_schema(), sort_keys=True, separators=(",", ":"))
+        tag = _schema_tags[name] = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:10]
+    return tag
+
+
+def _etag(name: str, row, schema: str) -> str:
+    if row is None:  # base créée par create_all avant le premier démarrage : pas encore de ligne
+        return f'"{name}-0-{schema}"'
+    # changed_at : distingue deux bases (réinitialisée / restaurée) au même numéro de version
+    return f'"{name}-{row.version}-{int(row.changed_at.timestamp())}-{schema}"'
+
+
+def _version_stmt(name: str):
+    return select(RefVersion.version, RefVersion.changed_at).where(RefVersion.name == name)
+
+
+def current_etag(db: Session, name: str, adapter: TypeAdapter) -> str:
+    return _etag(name, db.execute(_version_stmt(name)).first(), schema_tag(name, adapter))
+
+
+async def current_etag_async(db: AsyncSession, name: str, adapter: TypeAdapter) -> str:
+    return _etag(name, (await db.execute(_version_stmt(name))).first(), schema_tag(name, adapter))
+
+
+def ensure_rows(db: Session) -> int:
+    """Crée les compteurs absents (bases créées par create_all) ; renvoie le nombre créé."""
+    existing = set(db.scalars(select(RefVersion.name)))
+    missing = [n for n in NAMES if n not in existing]
+    if missing:
+        now = datetime.utcnow()
+        db.execute(insert(_table), [{"name": n, "version": 0, "changed_at": now} for n in missing])
+        db.commit()
+    return len(missing)
+
+
+# =========================
+# 🗃️ JSON rendu (par process)
+# =========================
+
+_bodies: dict[str, tuple[str, bytes]] = {}
+
+
+def cached_body(name: str, etag: str) -> bytes | None:
+    hit = _bodies.get(name)
+    return hit[1] if hit and hit[0] == etag else None
+
+
+def store_body(name: str, etag: str, body: bytes) -> bytes:
+    _bodies[name] = (etag, body)
+    return body
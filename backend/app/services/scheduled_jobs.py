@@ -0,0 +1,167 @@
+# app/services/scheduled_jobs.py
+# Registre des jobs planifiés + exécution tracée en base (table scheduler_jobs).
+#
+# Indépendant d'APScheduler : utilisé aussi bien par le scheduler du process leader que
+# par l'endpoint « lancer maintenant » (n'importe quel worker).
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import select, update, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.models import SchedulerJob
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Identifiant du process courant (affiché dans le statut)
+HOLDER = f"{socket.gethostname()}:{os.getpid()}"
+
+# Au-delà, une exécution « en cours » est considérée comme perdue (process tué)
+JOB_MAX_RUNTIME = timedelta(hours=2)
+
+
+def _send_monthly_reminder():
+    from app.services.scheduler import send_monthly_reminder
+    return send_monthly_reminder()
+
+
+def _resume_reminder_batches():
+    from app.services.scheduler import resume_reminder_batches
+    return resume_reminder_batches()
+
+
+def _fetch_csv_from_gmail():
+    from app.services.gmail_fetcher import fetch_csv_from_gmail
+    return fetch_csv_from_gmail()
+
+
+def _competence_sweep():
+    from app.services.competence_sweep import run_competence_sweep
+    return run_competence_sweep()
+
+
+# id du job → fonction exécutée
+JOBS: dict[str, Callable[[], object]] = {
+    "monthly_reminder": _send_monthly_reminder,
+    "reminder_resume": _resume_reminder_batches,
+    "gmail_csv_fetch": _fetch_csv_from_gmail,
+    "competence_sweep": _competence_sweep,
+}
+
+
+def _claim(job_id: str) -> bool:
+    """Réserve l'exécution du job (update atomique) ; False si déjà en cours ailleurs."""
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        if db.get(SchedulerJob, job_id) is None:
+            db.add(SchedulerJob(id=job_id))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+        res = db.execute(
+            update(SchedulerJob)
+            .where(
+                SchedulerJob.id == job_id,
+                or_(
+                    SchedulerJob.running_since.is_(None),
+                    SchedulerJob.running_since < now - JOB_MAX_RUNTIME,
+                ),
+            )
+            .values(running_since=now, running_holder=HOLDER)
+        )
+        db.commit()
+        return res.rowcount == 1
+
+
+def is_running(db: Session, job_id: str) -> bool:
+    row = db.get(SchedulerJob, job_id)
+    return bool(
+        row and row.running_since
+        and row.running_since >= datetime.utcnow() - JOB_MAX_RUNTIME
+    )
+
+
+def run_job(job_id: str, origin: str = "cron") -> None:
+    """Exécute un job du registre en enregistrant début, durée, statut et erreur."""
+    func = JOBS[job_id]
+    if not _claim(job_id):
+        print(f"[SCHED] ⏭ {job_id} déjà en cours sur un autre process — ignoré.")
+        return
+
+    started = datetime.utcnow()
+    t0 = time.perf_counter()
+    status, error = "ok", None
+    try:
+        func()
+    except Exception as e:
+        logger.exception(f"[SCHED] ❌ {job_id} en échec")
+        status, error = "error", str(e)[:1000]
+    duration_ms = int((time.perf_counter() - t0) * 1000)
+
+    with SessionLocal() as db:
+        db.execute(
+            update(SchedulerJob)
+            .where(SchedulerJob.id == job_id)
+            .values(
+                last_started_at=started,
+                last_finished_at=datetime.utcnow(),
+                last_duration_ms=duration_ms,
+                last_status=status,
+                last_error=error,
+                last_holder=HOLDER,
+                last_origin=origin,
+                running_since=None,
+                running_holder=None,
+                run_count=SchedulerJob.run_count + 1,
+            )
+        )
+        db.commit()
+    print(f"[SCHED] {job_id} ({origin}) terminé : {status} en {duration_ms} ms.")
+
+
+def record_schedule(entries: list[tuple[str, str, datetime | None]]) -> None:
+    """Enregistre (job_id, trigger, prochaine exécution) vus par le scheduler leader."""
+    with SessionLocal() as db:
+        for job_id, trigger, next_run in entries:
+            row = db.get(SchedulerJob, job_id)
+            if row is None:
+                row = SchedulerJob(id=job_id)
+                db.add(row)
+            row.trigger = trigger
+            row.next_run_at = next_run
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+
+
+def jobs_status(db: Session) -> list[dict]:
+    rows = {r.id: r for r in db.scalars(select(SchedulerJob)).all()}
+    out = []
+    for job_id in JOBS:
+        r = rows.get(job_id)
+        out.append({
+            "id": job_id,
+            "trigger": r.trigger if r else None,
+            "next_run_at": r.next_run_at if r else None,
+            "last_started_at": r.last_started_at if r else None,
+            "last_finished_at": r.last_finished_at if r else None,
+            "last_duration_ms": r.last_duration_ms if r else None,
+            "last_status": r.last_status if r else None,
+            "last_error": r.last_error if r else None,
+            "last_holder": r.last_holder if r else None,
+            "last_origin": r.last_origin if r else None,
+            "running": is_running(db, job_id),
+            "running_holder": r.running_holder if r else None,
+            "run_count": r.run_count if r else 0,
+        })
+    return out
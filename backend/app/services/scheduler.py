@@ -1,12 +1,28 @@
 # app/services/scheduler.py
 # Job cron : envoi du récapitulatif mensuel le 25 de chaque mois (gardes du mois suivant)
-from datetime import date, datetime
+#
+# Le rappel est d'abord planifié en base (ReminderBatch + une ReminderTask par destinataire),
+# puis traité par lots de REMINDER_CHUNK_SIZE avec une limite de débit. Chaque tâche passe par
+#   pending → queued (réservée par un lot) → sending → sent | failed   (ou skipped)
+# ce qui permet de reprendre après un redémarrage en sachant qui a déjà été servi.
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 
-from sqlalchemy import select, extract
+from sqlalchemy import select, extract, update, or_, and_, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.db.session import SessionLocal
-from app.db.models import Affectation, Equipe, Garde, Personnel, Piquet
-from app.core.mailer import send_mail, build_html_monthly_reminder
+from app.db.models import (
+    Affectation, Equipe, Garde, Personnel, Piquet, ReminderBatch, ReminderTask,
+)
+from app.core.mailer import send_mail, load_smtp_settings, build_html_monthly_reminder
+
+# Une tâche réservée / en cours d'envoi sans nouvelle depuis ce délai appartient à un
+# traitement interrompu.
+TASK_STALE_AFTER = timedelta(minutes=15)
 
 
 def _next_month(d: date) -> tuple[int, int]:
@@ -15,89 +31,335 @@ def _next_month(d: date) -> tuple[int, int]:
     return d.year, d.month + 1
 
 
-def send_monthly_reminder() -> None:
+def _mois_label(annee: int, mois: int) -> str:
+    return datetime(annee, mois, 1).strftime("%B %Y").capitalize()
+
+
+class _RateLimiter:
+    """Espace les envois pour ne pas dépasser max_per_minute (0 = illimité)."""
+
+    def __init__(self, max_per_minute: int) -> None:
+        self.interval = 60.0 / max_per_minute if max_per_minute > 0 else 0.0
+        self._next = 0.0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if now < self._next:
+            time.sleep(self._next - now)
+            now = self._next
+        self._next = now + self.interval
+
+
+# ──────────────────────────────────────────────
+# Planification
+# ──────────────────────────────────────────────
+
+def plan_monthly_reminder(annee: int, mois: int) -> int:
     """
-    Envoie à chaque agent affecté le récapitulatif de ses gardes du mois suivant.
-    Appelé automatiquement le 25 de chaque mois à 08h00.
+    Crée (ou complète) le lot du mois : une tâche par agent actif avec e-mail ayant au
+    moins une affectation sur le mois. Idempotent. Retourne l'id du lot.
     """
-    today = date.today()
-    ny, nm = _next_month(today)
-    mois_label = datetime(ny, nm, 1).strftime("%B %Y").capitalize()
+    with SessionLocal() as db:
+        batch = db.scalar(
+            select(ReminderBatch).where(ReminderBatch.annee == annee, ReminderBatch.mois == mois)
+        )
+        if batch is None:
+            batch = ReminderBatch(annee=annee, mois=mois)
+            db.add(batch)
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                batch = db.scalar(
+                    select(ReminderBatch).where(ReminderBatch.annee == annee, ReminderBatch.mois == mois)
+                )
 
-    print(f"[CRON] Envoi rappel mensuel pour {mois_label}…")
+        recipients = db.execute(
+            select(Personnel.id, Personnel.email)
+            .join(Affectation, Affectation.personnel_id == Personnel.id)
+            .join(Garde, Garde.id == Affectation.garde_id)
+            .where(
+                extract("year", Garde.date) == annee,
+                extract("month", Garde.date) == mois,
+                Personnel.is_active.is_(True),
+                Personnel.email.is_not(None),
+                Personnel.email != "",
+            )
+            .distinct()
+        ).all()
+        planned = set(db.scalars(select(ReminderTask.personnel_id).where(ReminderTask.batch_id == batch.id)))
+        new_tasks = [
+            ReminderTask(batch_id=batch.id, personnel_id=pid, email=email)
+            for pid, email in recipients if pid not in planned
+        ]
+        if new_tasks:
+            db.add_all(new_tasks)
+            batch.status = "pending"
+            batch.finished_at = None
+        db.commit()
+        print(f"[CRON] Rappel {_mois_label(annee, mois)} planifié : "
+              f"{len(planned) + len(new_tasks)} destinataire(s), {len(new_tasks)} nouveau(x).")
+        return batch.id
+
+
+# ──────────────────────────────────────────────
+# Lots : réservation + rendu HTML
+# ──────────────────────────────────────────────
 
+def _claimable(max_attempts: int):
+    return or_(
+        ReminderTask.status == "pending",
+        and_(ReminderTask.status == "failed", ReminderTask.attempts < max_attempts),
+    )
+
+
+def _claim_chunk(batch_id: int, size: int) -> list[tuple[int, int, str]]:
+    """Réserve jusqu'à `size` tâches à envoyer → [(task_id, personnel_id, email)]."""
+    claimable = _claimable(max(1, settings.REMINDER_MAX_ATTEMPTS))
+    now = datetime.utcnow()
     with SessionLocal() as db:
-        # Toutes les affectations du mois suivant
-        affs = db.scalars(
-            select(Affectation)
+        ids = db.scalars(
+            select(ReminderTask.id)
+            .where(ReminderTask.batch_id == batch_id, claimable)
+            .order_by(ReminderTask.id)
+            .limit(size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            return []
+        # statut revérifié dans l'UPDATE : une tâche réservée entre-temps par un autre
+        # traitement (SQLite : pas de SKIP LOCKED) n'est pas reprise
+        claim = update(ReminderTask).where(claimable).values(status="queued", updated_at=now)
+        if db.get_bind().dialect.update_returning:
+            rows = db.execute(
+                claim.where(ReminderTask.id.in_(ids))
+                .returning(ReminderTask.id, ReminderTask.personnel_id, ReminderTask.email)
+            ).all()
+        else:
+            won = [tid for tid in ids if db.execute(claim.where(ReminderTask.id == tid)).rowcount == 1]
+            rows = db.execute(
+                select(ReminderTask.id, ReminderTask.personnel_id, ReminderTask.email)
+                .where(ReminderTask.id.in_(won))
+            ).all() if won else []
+        db.commit()
+        return sorted(tuple(r) for r in rows)
+
+
+def _render_chunk(annee: int, mois: int, tasks: list[tuple[int, int, str]]) -> list[tuple[int, str, str | None]]:
+    """Construit le HTML de chaque destinataire du lot → [(task_id, email, html | None)]."""
+    if not tasks:
+        return []
+    mois_label = _mois_label(annee, mois)
+    pers_ids = [pid for _, pid, _ in tasks]
+    with SessionLocal() as db:
+        names = {
+            pid: f"{prenom} {nom}".strip()
+            for pid, prenom, nom in db.execute(
+                select(Personnel.id, Personnel.prenom, Personnel.nom).where(Personnel.id.in_(pers_ids))
+            ).all()
+        }
+        rows_by_pers: dict[int, list[tuple]] = {}
+        for pid, d, slot, eq_code, eq_lib, pq_lib, pq_code in db.execute(
+            select(
+                Affectation.personnel_id, Garde.date, Garde.slot,
+                Equipe.code, Equipe.libelle, Piquet.libelle, Piquet.code,
+            )
             .join(Garde, Garde.id == Affectation.garde_id)
+            .join(Piquet, Piquet.id == Affectation.piquet_id)
+            .outerjoin(Equipe, Equipe.id == Garde.equipe_id)
             .where(
-                extract("year", Garde.date) == ny,
-                extract("month", Garde.date) == nm,
+                Affectation.personnel_id.in_(pers_ids),
+                extract("year", Garde.date) == annee,
+                extract("month", Garde.date) == mois,
             )
-        ).all()
+        ).all():
+            rows_by_pers.setdefault(pid, []).append((d, slot.value, eq_code or eq_lib or "—", pq_lib or pq_code))
 
-        if not affs:
-            print(f"[CRON] Aucune affectation pour {mois_label}, aucun mail envoyé.")
-            return
+    out: list[tuple[int, str, str | None]] = []
+    for task_id, pid, email in tasks:
+        rows = [
+            (d.strftime("%d/%m/%Y"), slot, equipe, piquet)
+            for d, slot, equipe, piquet in sorted(rows_by_pers.get(pid, []), key=lambda r: (r[0], r[1]))
+        ]
+        html = build_html_monthly_reminder(names.get(pid, email), mois_label, rows) if rows else None
+        out.append((task_id, email, html))
+    return out
 
-        # Préchargement des entités liées
-        garde_ids = {a.garde_id for a in affs}
-        piquet_ids = {a.piquet_id for a in affs}
 
-        gardes = {g.id: g for g in db.scalars(select(Garde).where(Garde.id.in_(garde_ids))).all()}
-        piquets = {p.id: p for p in db.scalars(select(Piquet).where(Piquet.id.in_(piquet_ids))).all()}
+def _claim_and_render(batch_id: int, annee: int, mois: int, size: int):
+    return _render_chunk(annee, mois, _claim_chunk(batch_id, size))
 
-        equipe_ids = {g.equipe_id for g in gardes.values() if g.equipe_id}
-        equipes = {e.id: e for e in db.scalars(select(Equipe).where(Equipe.id.in_(equipe_ids))).all()}
 
-        # Grouper par personnel
-        pers_affs: dict[int, list] = {}
-        for a in affs:
-            pers_affs.setdefault(a.personnel_id, []).append(a)
+def _transition(task_id: int, expected: str, **values) -> bool:
+    """Passe la tâche à un nouvel état seulement si elle est encore `expected` (True si fait)."""
+    with SessionLocal() as db:
+        done = db.execute(
+            update(ReminderTask)
+            .where(ReminderTask.id == task_id, ReminderTask.status == expected)
+            .values(updated_at=datetime.utcnow(), **values)
+        ).rowcount == 1
+        db.commit()
+        return done
 
-        personnels = db.scalars(
-            select(Personnel).where(
-                Personnel.id.in_(pers_affs.keys()),
-                Personnel.is_active.is_(True),
-                Personnel.email.is_not(None),
+
+# ──────────────────────────────────────────────
+# Traitement / reprise
+# ──────────────────────────────────────────────
+
+def process_reminder_batch(batch_id: int) -> tuple[int, int]:
+    """
+    Envoie les tâches restantes du lot. Le lot suivant est réservé et son HTML rendu
+    dans un thread pendant l'envoi du lot courant. Retourne (envoyés, erreurs).
+    """
+    with SessionLocal() as db:
+        batch = db.get(ReminderBatch, batch_id)
+        if batch is None or batch.status == "done":
+            return 0, 0
+        annee, mois = batch.annee, batch.mois
+        batch.status = "running"
+        db.commit()
+
+    size = max(1, settings.REMINDER_CHUNK_SIZE)
+    limiter = _RateLimiter(settings.REMINDER_MAX_PER_MINUTE)
+    subject = f"Vos gardes – {_mois_label(annee, mois)}"
+    sent, errors = 0, 0
+
+    # paramètres SMTP (app_settings) lus une fois pour tout le lot
+    with SessionLocal() as db:
+        smtp = load_smtp_settings(db)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="reminder-render") as pool:
+        pending = pool.submit(_claim_and_render, batch_id, annee, mois, size)
+        while True:
+            chunk = pending.result()
+            if not chunk:
+                break
+            pending = pool.submit(_claim_and_render, batch_id, annee, mois, size)
+            for task_id, email, html in chunk:
+                if html is None:
+                    # plus aucune affectation sur le mois depuis la planification
+                    _transition(task_id, "queued", status="skipped")
+                    continue
+                limiter.wait()
+                # tâche remise en attente puis reprise par un autre traitement : pas d'envoi ici
+                if not _transition(task_id, "queued", status="sending", attempts=ReminderTask.attempts + 1):
+                    continue
+                try:
+                    send_mail(email, subject, html, smtp=smtp)
+                except Exception as e:
+                    print(f"[CRON] ⚠️ Erreur envoi à {email}: {e}")
+                    _transition(task_id, "sending", status="failed", error=str(e)[:1000])
+                    errors += 1
+                else:
+                    _transition(task_id, "sending", status="sent", error=None, sent_at=datetime.utcnow())
+                    sent += 1
+
+    with SessionLocal() as db:
+        batch = db.get(ReminderBatch, batch_id)
+        remaining = db.scalar(
+            select(func.count(ReminderTask.id)).where(
+                ReminderTask.batch_id == batch_id,
+                or_(
+                    ReminderTask.status.in_(("pending", "queued", "sending")),
+                    and_(
+                        ReminderTask.status == "failed",
+                        ReminderTask.attempts < max(1, settings.REMINDER_MAX_ATTEMPTS),
+                    ),
+                ),
+            )
+        )
+        if not remaining:
+            batch.status = "done"
+            batch.finished_at = datetime.utcnow()
+        db.commit()
+    return sent, errors
+
+
+def _live_batches(stale: datetime):
+    """Lots « running » dont une tâche a bougé récemment : un traitement est encore actif
+    (chaque réservation / envoi rafraîchit updated_at et sert de signe de vie)."""
+    return (
+        select(ReminderBatch.id)
+        .where(
+            ReminderBatch.status == "running",
+            select(ReminderTask.id)
+            .where(ReminderTask.batch_id == ReminderBatch.id, ReminderTask.updated_at >= stale)
+            .exists(),
+        )
+    )
+
+
+def resume_reminder_batches() -> None:
+    """
+    Reprend les lots non terminés (appelé périodiquement par le scheduler).
+    Les lots encore traités par ailleurs (signe de vie récent) sont laissés tranquilles.
+    - tâches « queued » abandonnées : jamais envoyées → remises en attente ;
+    - tâches « sending » abandonnées : envoi interrompu, issue inconnue → marquées en échec
+      sans nouvelle tentative automatique (pas de double envoi).
+    """
+    stale = datetime.utcnow() - TASK_STALE_AFTER
+    with SessionLocal() as db:
+        live = _live_batches(stale)
+        db.execute(
+            update(ReminderTask)
+            .where(ReminderTask.status == "queued", ReminderTask.updated_at < stale,
+                   ReminderTask.batch_id.not_in(live))
+            .values(status="pending", updated_at=datetime.utcnow())
+        )
+        db.execute(
+            update(ReminderTask)
+            .where(ReminderTask.status == "sending", ReminderTask.updated_at < stale,
+                   ReminderTask.batch_id.not_in(live))
+            .values(
+                status="failed",
+                attempts=max(1, settings.REMINDER_MAX_ATTEMPTS),
+                error="envoi interrompu (redémarrage) — réception non garantie",
+                updated_at=datetime.utcnow(),
             )
+        )
+        db.commit()
+        batch_ids = db.scalars(
+            select(ReminderBatch.id).where(ReminderBatch.status != "done", ReminderBatch.id.not_in(live))
         ).all()
 
-        sent, errors = 0, 0
-        for p in personnels:
-            if not p.email:
-                continue
-
-            rows: list[tuple[str, str, str, str]] = []
-            for a in sorted(
-                pers_affs[p.id],
-                key=lambda x: (gardes[x.garde_id].date, gardes[x.garde_id].slot.value),
-            ):
-                g = gardes.get(a.garde_id)
-                pq = piquets.get(a.piquet_id)
-                if not g or not pq:
-                    continue
-                eq = equipes.get(g.equipe_id) if g.equipe_id else None
-                equipe_label = (eq.code or eq.libelle) if eq else "—"
-                rows.append((
-                    g.date.strftime("%d/%m/%Y"),
-                    g.slot.value,
-                    equipe_label,
-                    pq.libelle or pq.code,
-                ))
-
-            if not rows:
-                continue
-
-            fullname = f"{p.prenom} {p.nom}".strip()
-            html = build_html_monthly_reminder(fullname, mois_label, rows)
-            subject = f"Vos gardes – {mois_label}"
-            try:
-                send_mail(p.email, subject, html, db=db)
-                sent += 1
-            except Exception as e:
-                print(f"[CRON] ⚠️ Erreur envoi à {p.email}: {e}")
-                errors += 1
+    for batch_id in batch_ids:
+        process_reminder_batch(batch_id)
+
+
+def send_monthly_reminder() -> None:
+    """
+    Envoie à chaque agent affecté le récapitulatif de ses gardes du mois suivant.
+    Appelé automatiquement le 25 de chaque mois à 08h00.
+    """
+    ny, nm = _next_month(date.today())
+    mois_label = _mois_label(ny, nm)
+    print(f"[CRON] Envoi rappel mensuel pour {mois_label}…")
+
+    batch_id = plan_monthly_reminder(ny, nm)
+    sent, errors = process_reminder_batch(batch_id)
 
     print(f"[CRON] Rappel {mois_label} terminé : {sent} envoyés, {errors} erreur(s).")
+
+
+def reminder_summary(db: Session, batch: ReminderBatch) -> dict:
+    counts = dict(
+        db.execute(
+            select(ReminderTask.status, func.count(ReminderTask.id))
+            .where(ReminderTask.batch_id == batch.id)
+            .group_by(ReminderTask.status)
+        ).all()
+    )
+    return {
+        "id": batch.id,
+        "annee": batch.annee,
+        "mois": batch.mois,
+        "status": batch.status,
+        "total": sum(counts.values()),
+        "sent": counts.get("sent", 0),
+        "pending": counts.get("pending", 0) + counts.get("queued", 0) + counts.get("sending", 0),
+        "failed": counts.get("failed", 0),
+        "skipped": counts.get("skipped", 0),
+        "created_at": batch.created_at,
+        "finished_at": batch.finished_at,
+    }
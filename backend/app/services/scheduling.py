@@ -0,0 +1,189 @@
+# app/services/scheduling.py
+# Scheduler APScheduler + élection d'un leader entre les workers uvicorn/gunicorn.
+#
+# Chaque worker démarre un scheduler en pause. Un thread tente périodiquement de prendre
+# un advisory lock Postgres (session-level, sur une connexion dédiée) : le worker qui le
+# détient reprend le scheduler, les autres restent en pause. Si la connexion du leader
+# tombe (process tué, réseau), Postgres libère le verrou et un autre worker prend le relais.
+#
+# APScheduler n'est importé qu'au démarrage effectif du scheduler (pas en SCHEDULER_MODE=off).
+from __future__ import annotations
+
+import threading
+from datetime import timezone
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.session import engine
+from app.services.scheduled_jobs import HOLDER, record_schedule, run_job
+
+MODES = ("leader", "all", "off")
+
+_scheduler = None  # BackgroundScheduler, créé par _build_scheduler()
+
+
+def _build_scheduler():
+    from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MISSED
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    scheduler = BackgroundScheduler(
+        timezone="Europe/Paris",
+        # pas de rattrapage en rafale après une bascule de leader ; les jobs sont idempotents
+        job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 15 * 60},
+    )
+    scheduler.add_job(
+        run_job, "cron", args=["monthly_reminder"],
+        day=25, hour=8, minute=0,
+        id="monthly_reminder", replace_existing=True,
+    )
+    # reprise des rappels interrompus (redémarrage en cours d'envoi)
+    scheduler.add_job(
+        run_job, "interval", args=["reminder_resume"],
+        minutes=15,
+        id="reminder_resume", replace_existing=True,
+    )
+    scheduler.add_job(
+        run_job, "cron", args=["gmail_csv_fetch"],
+        hour=settings.GMAIL_FETCH_HOUR, minute=0,
+        id="gmail_csv_fetch", replace_existing=True,
+    )
+    # affectations futures devenues invalides (compétence expirée depuis la saisie)
+    scheduler.add_job(
+        run_job, "cron", args=["competence_sweep"],
+        hour=settings.COMPETENCE_SWEEP_HOUR, minute=0,
+        id="competence_sweep", replace_existing=True,
+    )
+    scheduler.add_listener(_sync_schedule, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
+    return scheduler
+
+
+def _sync_schedule(event=None) -> None:
+    """Recopie triggers + prochaines exécutions en base (lisibles depuis tous les workers)."""
+    if _scheduler is None:
+        return
+    entries = []
+    for job in _scheduler.get_jobs():
+        nrt = job.next_run_time
+        if nrt is not None:
+            nrt = nrt.astimezone(timezone.utc).replace(tzinfo=None)
+        entries.append((job.id, str(job.trigger), nrt))
+    try:
+        record_schedule(entries)
+    except Exception as e:
+        print(f"[SCHED] ⚠️ Impossible d'enregistrer le planning : {e}")
+
+
+class _LeaderElection(threading.Thread):
+    """Thread qui prend / surveille l'advisory lock et (dé)met en pause le scheduler."""
+
+    def __init__(self) -> None:
+        super().__init__(name="scheduler-leader", daemon=True)
+        self.is_leader = False
+        self._stop_event = threading.Event()
+        self._conn = None
+        # connexion hors pool : elle est gardée ouverte tant que le process est leader
+        self._engine = create_engine(settings.db_url, poolclass=NullPool)
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                if self.is_leader:
+                    self._conn.execute(text("SELECT 1"))
+                else:
+                    self._try_acquire()
+            except Exception as e:
+                print(f"[SCHED] ⚠️ Connexion du verrou perdue ({e}) — passage en follower.")
+                self._release()
+            self._stop_event.wait(settings.SCHEDULER_LEADER_POLL_S)
+
+    def _try_acquire(self) -> None:
+        conn = self._engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        got = conn.execute(
+            text("SELECT pg_try_advisory_lock(:k)"), {"k": settings.SCHEDULER_LOCK_KEY}
+        ).scalar()
+        if not got:
+            conn.close()
+            return
+        self._conn = conn
+        self.is_leader = True
+        _scheduler.resume()
+        _sync_schedule()
+        print(f"[SCHED] 👑 {HOLDER} est leader — jobs planifiés actifs.")
+
+    def _release(self) -> None:
+        if self.is_leader:
+            _scheduler.pause()
+        self.is_leader = False
+        if self._conn is not None:
+            try:
+                self._conn.execute(
+                    text("SELECT pg_advisory_unlock(:k)"), {"k": settings.SCHEDULER_LOCK_KEY}
+                )
+            except Exception:
+                pass  # connexion morte : le verrou est déjà libéré côté serveur
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._release()
+
+
+_election: _LeaderElection | None = None
+
+
+def _mode() -> str:
+    mode = (settings.SCHEDULER_MODE or "leader").lower()
+    if mode not in MODES:
+        print(f"[WARN] SCHEDULER_MODE={mode!r} inconnu — utilisation de 'leader'.")
+        return "leader"
+    if mode == "leader" and engine.dialect.name != "postgresql":
+        # pas d'advisory lock (SQLite de dev) : un seul process attendu
+        return "all"
+    return mode
+
+
+def start_scheduler() -> None:
+    global _election, _scheduler
+    mode = _mode()
+    if mode == "off":
+        print("[INFO] Scheduler désactivé dans ce process (SCHEDULER_MODE=off).")
+        return
+    try:
+        _scheduler = _build_scheduler()
+    except ImportError:
+        print("[WARN] apscheduler non installé — rappel mensuel désactivé. Lancez : pip install apscheduler")
+        return
+    if mode == "all":
+        _scheduler.start()
+        _sync_schedule()
+        print("[INFO] Scheduler démarré — rappel mensuel programmé le 25 à 08h00.")
+        return
+    _scheduler.start(paused=True)
+    _election = _LeaderElection()
+    _election.start()
+    print(f"[INFO] Scheduler en attente du verrou leader ({HOLDER}).")
+
+
+def shutdown_scheduler() -> None:
+    if _election is not None:
+        _election.stop()
+    if _scheduler is not None and _scheduler.running:
+        _scheduler.shutdown(wait=False)
+
+
+def scheduler_state() -> dict:
+    """État du scheduler dans CE process (les autres workers ont le leur)."""
+    mode = _mode()
+    running = _scheduler is not None and _scheduler.running
+    return {
+        "mode": mode,
+        "holder": HOLDER,
+        "running": running,
+        "is_leader": (mode == "all" and running) or bool(_election and _election.is_leader),
+    }
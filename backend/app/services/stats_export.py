@@ -0,0 +1,227 @@
+# app/services/stats_export.py
+# Export des statistiques de gardes (CSV / XLSX) envoyé au fil de l'eau
+#
+# Les comptes (gardes, nuits, week-end, fériés, pro / volontaire, astreintes) sont calculés
+# par GROUP BY en base (mêmes agrégats que personnel_month_stats) ; les lignes sont lues par
+# paquets (curseur serveur sous Postgres) et écrites dans la réponse au fur et à mesure.
+# L'en-tête part avant même l'exécution de la requête : un export pluriannuel de tous les
+# agents commence à se télécharger immédiatement, en mémoire constante.
+#
+# XLSX : classeur minimal (SpreadsheetML, chaînes inline) dont la feuille est écrite
+# directement dans une entrée ZIP streamée — pas de fichier temporaire ni d'archive complète
+# en mémoire.
+from __future__ import annotations
+
+import csv
+import io
+import re
+import zipfile
+from datetime import date
+from typing import Iterable, Iterator
+from xml.sax.saxutils import escape
+
+from sqlalchemy import Select, func, select
+
+from app.db.models import Affectation, Equipe, Garde, Personnel, Piquet
+from app.db.session import SessionLocal
+from app.services.month_stats import counter_columns
+from app.services.zip_stream import ZipSink
+
+COUNT_HEADERS = ("Gardes", "Nuits", "Week-end", "Fériés", "Pro", "Volontaire", "Astreintes")
+
+BATCH_ROWS = 500
+
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+# =========================
+# 🧮 Agrégat SQL
+# =========================
+
+def stats_query(start: date, end: date, group_by: str) -> tuple[list[str], Select]:
+    """(en-têtes, SELECT groupé) des affectations dont la garde est entre start et end inclus."""
+    counts = counter_columns()
+    base = (
+        select()
+        .select_from(Affectation)
+        .join(Garde, Garde.id == Affectation.garde_id)
+        .join(Piquet, Piquet.id == Affectation.piquet_id)
+        .where(Garde.date >= start, Garde.date <= end)
+    )
+    if group_by == "personnel":
+        keys = (Personnel.id, Personnel.nom, Personnel.prenom, Personnel.grade, Equipe.code)
+        stmt = (
+            base.add_columns(*keys, *counts)
+            .join(Personnel, Personnel.id == Affectation.personnel_id)
+            .outerjoin(Equipe, Equipe.id == Personnel.equipe_id)
+            .group_by(*keys)
+            .order_by(Personnel.nom, Personnel.prenom, Personnel.id)
+        )
+        return ["Id", "Nom", "Prénom", "Grade", "Équipe", *COUNT_HEADERS], stmt
+    if group_by == "piquet":
+        keys = (Piquet.code, Piquet.libelle, Piquet.position, Piquet.id)
+        stmt = (
+            base.add_columns(Piquet.code, Piquet.libelle, *counts)
+            .group_by(*keys)
+            .order_by(Piquet.position, Piquet.code)
+        )
+        return ["Piquet", "Libellé", *COUNT_HEADERS], stmt
+    if group_by == "equipe":
+        # équipe de la garde (pas celle de l'agent)
+        keys = (Equipe.code, Equipe.libelle)
+        stmt = (
+            base.add_columns(*keys, *counts)
+            .outerjoin(Equipe, Equipe.id == Garde.equipe_id)
+            .group_by(*keys)
+            .order_by(Equipe.code)
+        )
+        return ["Équipe", "Libellé", *COUNT_HEADERS], stmt
+    if group_by == "statut_service":
+        statut = func.coalesce(func.lower(Affectation.statut_service), "")
+        stmt = base.add_columns(statut, *counts).group_by(statut).order_by(statut)
+        return ["Statut", *COUNT_HEADERS], stmt
+    raise ValueError(f"group_by inconnu : {group_by}")
+
+
+def _rows(stmt: Select) -> Iterator[tuple]:
+    """Lignes du SELECT par paquets (session propre : la réponse survit à la requête)."""
+    with SessionLocal() as db:
+        yield from db.execute(stmt.execution_options(yield_per=BATCH_ROWS))
+
+
+def _batches(rows: Iterable[tuple]) -> Iterator[list[tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_ROWS:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# =========================
+# 📄 CSV
+# =========================
+
+def stream_csv(headers: list[str], stmt: Select) -> Iterator[bytes]:
+    """CSV « ; » avec BOM (ouvert tel quel par Excel), comme l'export AGATT."""
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter=";")
+    writer.writerow(headers)
+    yield ("\ufeff" + buf.getvalue()).encode("utf-8")
+    for batch in _batches(_rows(stmt)):
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(batch)
+        yield buf.getvalue().encode("utf-8")
+
+
+# =========================
+# 📊 XLSX
+# =========================
+
+_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        _XML + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        _XML + f'<Relationships xmlns="{_PKG_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        _XML + f'<Relationships xmlns="{_PKG_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # style 1 : en-têtes en gras
+    "xl/styles.xml": (
+        _XML + f'<styleSheet xmlns="{_NS}">'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+
+# caractères interdits en XML 1.0
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _col(i: int) -> str:
+    """0 → A, 25 → Z, 26 → AA…"""
+    name = ""
+    i += 1
+    while i:
+        i, r = divmod(i - 1, 26)
+        name = chr(65 + r) + name
+    return name
+
+
+def _xml_row(r: int, values, style: int = 0) -> str:
+    s = f' s="{style}"' if style else ""
+    cells = []
+    for i, v in enumerate(values):
+        ref = f"{_col(i)}{r}"
+        if v is None:
+            continue
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            cells.append(f'<c r="{ref}"{s}><v>{v}</v></c>')
+        else:
+            text = escape(_ILLEGAL_XML.sub("", str(v)))
+            cells.append(f'<c r="{ref}"{s} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{r}">{"".join(cells)}</row>'
+
+
+def stream_xlsx(headers: list[str], stmt: Select, sheet_title: str = "Statistiques") -> Iterator[bytes]:
+    sink = ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in _STATIC_PARTS.items():
+            zf.writestr(name, content)
+        zf.writestr("xl/workbook.xml", (
+            _XML + f'<workbook xmlns="{_NS}" xmlns:r="{_REL_NS}"><sheets>'
+            f'<sheet name="{escape(sheet_title[:31])}" sheetId="1" r:id="rId1"/>'
+            '</sheets></workbook>'
+        ))
+        # taille inconnue à l'avance : entrée ZIP64
+        with zf.open("xl/worksheets/sheet1.xml", mode="w", force_zip64=True) as sheet:
+            sheet.write((
+                _XML + f'<worksheet xmlns="{_NS}"><sheetViews><sheetView workbookViewId="0">'
+                '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                '</sheetView></sheetViews><sheetData>' + _xml_row(1, headers, style=1)
+            ).encode("utf-8"))
+            yield sink.drain()
+            r = 1
+            for batch in _batches(_rows(stmt)):
+                chunk = []
+                for row in batch:
+                    r += 1
+                    chunk.append(_xml_row(r, row))
+                sheet.write("".join(chunk).encode("utf-8"))
+                yield sink.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    # répertoire central écrit à la fermeture
+    yield sink.drain()
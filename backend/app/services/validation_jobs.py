@@ -0,0 +1,318 @@
+# app/services/validation_jobs.py
+# Validation de mois en tâche de fond : génération du PDF + envoi des notifications.
+#
+# Idempotence : chaque mail est « réservé » par l'insertion d'une ligne ValidationMail
+# (contrainte unique job/kind/recipient) AVANT l'envoi. Un job relancé (re-soumission,
+# reprise après crash) saute donc tout destinataire déjà servi : au plus un mail par agent.
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.mailer import (
+    send_mail, load_smtp_settings, build_validation_html,
+    build_html_agent_team, build_html_agent_external,
+)
+from app.db.models import (
+    Affectation, Garde, Personnel, PersonnelRole, Piquet, RoleEnum, Statut,
+    ValidationJob, ValidationMail,
+)
+from app.db.session import SessionLocal
+from app.services.feuille_data import load_feuilles
+
+logger = logging.getLogger(__name__)
+
+VALIDATION_FIXED_RECIPIENT = "operation-st-lo@sdis50.fr"
+
+# Un job pending/running sans activité depuis ce délai est considéré comme perdu
+# (process redémarré) et peut être relancé.
+JOB_STALE_AFTER = timedelta(minutes=5)
+
+
+def _get_officier_emails(db: Session) -> list[str]:
+    rows = db.execute(
+        select(Personnel.email)
+        .join(PersonnelRole, PersonnelRole.personnel_id == Personnel.id)
+        .where(
+            PersonnelRole.role == RoleEnum.OFFICIER,
+            Personnel.is_active.is_(True),
+            Personnel.email.is_not(None),
+            Personnel.email != "",
+        )
+        .distinct()
+    ).all()
+    return [r[0] for r in rows if r and r[0]]
+
+
+# ──────────────────────────────────────────────
+# Création / reprise
+# ──────────────────────────────────────────────
+
+def get_or_create_job(
+    db: Session, annee: int, mois: int, equipe_id: int, validateur: str
+) -> tuple[ValidationJob, bool]:
+    """
+    Retourne (job, à_lancer).
+    Un job actif (non « superseded ») existant pour le mois/équipe est réutilisé :
+    il n'est relancé que s'il a échoué ou s'il est bloqué depuis JOB_STALE_AFTER.
+    """
+    base = select(ValidationJob).where(
+        ValidationJob.annee == annee,
+        ValidationJob.mois == mois,
+        ValidationJob.equipe_id == equipe_id,
+    )
+    job = db.scalar(base.where(ValidationJob.status != "superseded").order_by(ValidationJob.seq.desc()))
+    if job is not None:
+        return job, is_resumable(job)
+
+    seq = db.scalar(
+        select(func.count(ValidationJob.id)).where(
+            ValidationJob.annee == annee,
+            ValidationJob.mois == mois,
+            ValidationJob.equipe_id == equipe_id,
+        )
+    ) or 0
+    job = ValidationJob(annee=annee, mois=mois, equipe_id=equipe_id, seq=seq, validateur=validateur)
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # soumission concurrente : l'autre requête a créé le job
+        db.rollback()
+        return db.scalar(base.where(ValidationJob.seq == seq)), False
+    db.refresh(job)
+    return job, True
+
+
+def is_resumable(job: ValidationJob) -> bool:
+    if job.status == "failed":
+        return True
+    if job.status in ("pending", "running"):
+        return (job.updated_at or job.created_at) < datetime.utcnow() - JOB_STALE_AFTER
+    return False
+
+
+def supersede_jobs(db: Session, annee: int, mois: int, equipe_id: int | None = None) -> int:
+    """Appelé à la dévalidation : une prochaine validation renverra les mails."""
+    q = update(ValidationJob).where(
+        ValidationJob.annee == annee,
+        ValidationJob.mois == mois,
+        ValidationJob.status != "superseded",
+    )
+    if equipe_id is not None:
+        q = q.where(ValidationJob.equipe_id == equipe_id)
+    return db.execute(q.values(status="superseded", updated_at=datetime.utcnow())).rowcount
+
+
+def job_progress(db: Session, job: ValidationJob) -> dict:
+    counts = dict(
+        db.execute(
+            select(ValidationMail.status, func.count(ValidationMail.id))
+            .where(ValidationMail.job_id == job.id)
+            .group_by(ValidationMail.status)
+        ).all()
+    )
+    return {
+        "id": job.id,
+        "type": "validation_mois",
+        "status": job.status,
+        "annee": job.annee,
+        "mois": job.mois,
+        "equipe_id": job.equipe_id,
+        "mails_total": job.mails_total,
+        "mails_sent": counts.get("sent", 0),
+        "mails_failed": counts.get("failed", 0),
+        "mails_pending": counts.get("sending", 0),
+        "pdf_size": job.pdf_size,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+# ──────────────────────────────────────────────
+# Envoi « au plus une fois »
+# ──────────────────────────────────────────────
+
+def _claim(db: Session, job: ValidationJob, kind: str, recipient: str) -> ValidationMail | None:
+    """Réserve l'envoi ; None si déjà envoyé / en cours par ailleurs."""
+    row = ValidationMail(job_id=job.id, kind=kind, recipient=recipient, status="sending")
+    db.add(row)
+    try:
+        db.commit()
+        return row
+    except IntegrityError:
+        db.rollback()
+    # Un envoi précédent a échoué → on le retente, en le re-réservant atomiquement
+    res = db.execute(
+        update(ValidationMail)
+        .where(
+            ValidationMail.job_id == job.id,
+            ValidationMail.kind == kind,
+            ValidationMail.recipient == recipient,
+            ValidationMail.status == "failed",
+        )
+        .values(status="sending", error=None)
+    )
+    db.commit()
+    if res.rowcount != 1:
+        return None
+    return db.scalar(
+        select(ValidationMail).where(
+            ValidationMail.job_id == job.id,
+            ValidationMail.kind == kind,
+            ValidationMail.recipient == recipient,
+        )
+    )
+
+
+def _send_once(db: Session, job: ValidationJob, kind: str, recipient: str, send) -> None:
+    row = _claim(db, job, kind, recipient)
+    if row is None:
+        logger.info(f"[JOB {job.id}] ⏭ {kind} {recipient or '-'} déjà traité")
+        return
+    try:
+        send()
+        row.status = "sent"
+        row.sent_at = datetime.utcnow()
+    except Exception as e:
+        logger.warning(f"[JOB {job.id}] ❌ Erreur envoi {kind} {recipient or '-'}: {e}")
+        row.status = "failed"
+        row.error = str(e)[:1000]
+    job.updated_at = datetime.utcnow()
+    db.commit()
+
+
+# ──────────────────────────────────────────────
+# Worker
+# ──────────────────────────────────────────────
+
+def run_validation_job(job_id: int) -> None:
+    """Point d'entrée du worker (BackgroundTasks) : ouvre sa propre session."""
+    # expire_on_commit=False : un commit par mail ; sans cela job, lignes d'envoi et agents
+    # seraient rechargés (un SELECT chacun) après chaque envoi. Le job est seul à les modifier.
+    with SessionLocal(expire_on_commit=False) as db:
+        job = db.get(ValidationJob, job_id)
+        if job is None or job.status == "superseded":
+            return
+        job.status = "running"
+        job.error = None
+        job.started_at = job.started_at or datetime.utcnow()
+        job.updated_at = datetime.utcnow()
+        db.commit()
+        try:
+            _process(db, job)
+        except Exception as e:
+            logger.exception(f"[JOB {job_id}] échec")
+            db.rollback()
+            job.status = "failed"
+            job.error = str(e)[:1000]
+        else:
+            failed = db.scalar(
+                select(func.count(ValidationMail.id)).where(
+                    ValidationMail.job_id == job.id, ValidationMail.status == "failed"
+                )
+            )
+            # des envois en échec → une re-soumission ne retentera qu'eux
+            job.status = "failed" if failed else "done"
+            job.error = f"{failed} envoi(s) en échec" if failed else None
+        job.finished_at = datetime.utcnow()
+        job.updated_at = job.finished_at
+        db.commit()
+
+
+def _process(db: Session, job: ValidationJob) -> None:
+    annee, mois, equipe_id = job.annee, job.mois, job.equipe_id
+
+    feuilles = load_feuilles(db, annee, mois, equipe_id)
+    if not feuilles:
+        raise ValueError("Aucune garde trouvée pour ce mois/équipe")
+    feuille = feuilles[0]
+    equipe_nom, mois_nom = feuille["equipe_label"], feuille["mois_label"]
+    garde_ids = feuille["garde_ids"]
+
+    # 1️⃣ PDF de la feuille de garde (pièce jointe des agents de l'équipe)
+    pdf_bytes: bytes | None = None
+    try:
+        from app.services.pdf_generator import generate_feuille_garde_pdf
+        pdf_bytes = generate_feuille_garde_pdf(**feuille["pdf_kwargs"])
+        job.pdf_size = len(pdf_bytes)
+    except Exception as e:
+        logger.exception(f"[JOB {job.id}] ❌ Erreur génération PDF: {e}")
+    job.updated_at = datetime.utcnow()
+    db.commit()
+    attach_team = [(feuille["filename"], pdf_bytes, "application/pdf")] if pdf_bytes else None
+
+    # 2️⃣ Gardes par personnel : (date, slot, piquet_label, statut_service)
+    gardes = {g.id: g for g in db.scalars(select(Garde).where(Garde.id.in_(garde_ids))).all()}
+    affs = db.scalars(select(Affectation).where(Affectation.garde_id.in_(garde_ids))).all()
+    piquets = {
+        p.id: p for p in db.scalars(
+            select(Piquet).where(Piquet.id.in_({a.piquet_id for a in affs}))
+        ).all()
+    }
+    pers_map: dict[int, list[tuple[str, str, str, str]]] = {}
+    for a in affs:
+        g, pqt = gardes[a.garde_id], piquets.get(a.piquet_id)
+        pers_map.setdefault(a.personnel_id, []).append((
+            g.date.strftime("%d/%m/%Y"),
+            g.slot.name.capitalize(),
+            (pqt.libelle or pqt.code) if pqt else "—",
+            (a.statut_service or "volontaire").lower(),
+        ))
+    personnels = db.scalars(select(Personnel).where(Personnel.id.in_(pers_map.keys()))).all()
+
+    # 3️⃣ Plan des envois
+    agent_mails: list[tuple[Personnel, list[tuple[str, str, str]]]] = []
+    for p in personnels:
+        if not p.email:
+            continue
+        all_rows = pers_map[p.id]
+        if p.statut == Statut.PRO:
+            continue  # PRO pur : jamais de mail
+        if p.statut == Statut.DOUBLE:
+            # DOUBLE : mail uniquement pour les gardes en mode volontaire
+            all_rows = [r for r in all_rows if r[3] == "volontaire"]
+            if not all_rows:
+                continue
+        rows = sorted(
+            ((r[0], r[1], r[2]) for r in all_rows),
+            key=lambda r: (r[0], 0 if r[1].upper() == "JOUR" else 1),
+        )
+        agent_mails.append((p, rows))
+    job.mails_total = 1 + len(agent_mails)
+    db.commit()
+    # paramètres SMTP lus une fois pour tout le job (et non à chaque mail)
+    smtp = load_smtp_settings(db)
+
+    # 4️⃣ Mail validation -> operation-st-lo + OFFICIER
+    recipients = {VALIDATION_FIXED_RECIPIENT}
+    recipients.update(_get_officier_emails(db))
+    subject_admin = f"Validation feuille de garde – {mois_nom} – {equipe_nom}"
+    html_admin = build_validation_html(mois_nom, equipe_nom, job.validateur or "")
+    _send_once(
+        db, job, "admin", "",
+        lambda: send_mail(sorted(recipients), subject_admin, html_admin, smtp=smtp),
+    )
+
+    # 5️⃣ Un mail par pompier
+    subject_user = f"Vos gardes – {mois_nom} – {equipe_nom}"
+    for p, rows in agent_mails:
+        fullname = f"{p.prenom} {p.nom}".strip()
+        if p.equipe_id == equipe_id:
+            html_user = build_html_agent_team(fullname, mois_nom, equipe_nom, rows)
+            attach = attach_team
+        else:
+            html_user = build_html_agent_external(fullname, mois_nom, equipe_nom, rows)
+            attach = None
+        _send_once(
+            db, job, "agent", p.email,
+            lambda p=p, html_user=html_user, attach=attach: send_mail(
+                p.email, subject_user, html_user, smtp=smtp, attachments=attach
+            ),
+        )
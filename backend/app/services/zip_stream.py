@@ -0,0 +1,28 @@
+# app/services/zip_stream.py
+# Archive ZIP écrite au fil de l'eau (feuilles de garde en ZIP, exports XLSX)
+from __future__ import annotations
+
+import io
+
+
+class ZipSink(io.RawIOBase):
+    """
+    Flux d'écriture non « seekable » : zipfile écrit alors les entrées avec
+    data descriptors, ce qui permet d'envoyer l'archive au fil de l'eau.
+    Les octets écrits sont gardés jusqu'au prochain drain().
+    """
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
@@ -0,0 +1,18 @@
+# Benchmarks backend (lancer depuis backend/ : python -m benchmarks.<module>)
+import os
+
+
+def use_database(db_url: str) -> None:
+    """
+    À appeler AVANT tout import de `app` : la config (Settings) est lue à l'import.
+    Les variables obligatoires absentes reçoivent une valeur factice (aucun mail n'est envoyé
+    par les benchmarks).
+    """
+    os.environ["DATABASE_URL"] = db_url
+    os.environ.setdefault("JWT_SECRET", "bench")
+    os.environ.setdefault("SCHEDULER_MODE", "off")
+    for key, value in {
+        "MAIL_USERNAME": "bench", "MAIL_PASSWORD": "bench", "MAIL_FROM": "bench@example.org",
+        "MAIL_SERVER": "localhost", "MAIL_PORT": "25",
+    }.items():
+        os.environ.setdefault(key, value)
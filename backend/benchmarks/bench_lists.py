@@ -0,0 +1,145 @@
+# benchmarks/bench_lists.py
+# Taille et temps de réponse des routes de liste sur un historique long (~100k affectations)
+#   python -m benchmarks.bench_lists --db-url sqlite:///./bench_lists.db [--fresh] [--years 2016 2026]
+#       [--repeat 3] [--json out.json] [--compare before.json]
+#
+# Compare, pour l'écran d'accueil d'un agent, l'ancien accès (toutes les affectations puis filtre
+# côté client, rejoué ici en suivant toutes les pages) au filtre serveur, et vérifie que la
+# dernière page d'un parcours par curseur coûte autant que la première (keyset, pas d'OFFSET).
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from datetime import date
+
+from benchmarks import use_database
+from benchmarks.bench_planning import _QUERIES
+
+
+def _measure(client, url: str, params: dict, repeat: int, follow: bool = False) -> dict:
+    """Temps médian / octets / requêtes SQL d'un appel (ou du parcours complet si follow)."""
+    timings, size, rows, pages, queries = [], 0, 0, 0, 0
+    for _ in range(repeat + 1):  # 1er passage = échauffement
+        size = rows = pages = queries = 0
+        cursor = None
+        t0 = time.perf_counter()
+        while True:
+            r = client.get(url, params=dict(params, cursor=cursor) if cursor else params)
+            r.raise_for_status()
+            size += len(r.content)
+            rows += len(r.json())
+            pages += 1
+            m = _QUERIES.search(r.headers.get("server-timing", ""))
+            queries += int(m.group(1)) if m else 0
+            cursor = r.headers.get("x-next-cursor")
+            if not (follow and cursor):
+                break
+        timings.append(time.perf_counter() - t0)
+    return {
+        "median_ms": round(statistics.median(timings[1:]) * 1000, 2),
+        "bytes": size,
+        "rows": rows,
+        "pages": pages,
+        "queries": queries,
+    }
+
+
+def _last_cursor(client, url: str, params: dict) -> str | None:
+    cursor, last = None, None
+    while True:
+        r = client.get(url, params=dict(params, cursor=cursor) if cursor else params)
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            return last
+        last = cursor
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--db-url", required=True, help="base dédiée au bench")
+    ap.add_argument("--fresh", action="store_true", help="recrée les tables et régénère les données")
+    ap.add_argument("--years", type=int, nargs=2, default=(2016, 2026), metavar=("DEBUT", "FIN"))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", help="écrit les résultats dans ce fichier")
+    ap.add_argument("--compare", help="résultats JSON d'un run précédent (référence)")
+    args = ap.parse_args()
+
+    use_database(args.db_url)
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func, select
+
+    import app.main as main_app
+    from app.core.security import create_access_token
+    from app.db.base import Base
+    from app.db.models import Affectation, Personnel
+    from app.db.session import SessionLocal, engine
+    from benchmarks.synthetic import populate, reset_schema
+
+    if args.fresh:
+        reset_schema(engine)
+    else:
+        Base.metadata.create_all(bind=engine)
+    years = tuple(range(args.years[0], args.years[1] + 1))
+    with SessionLocal() as db:
+        if not db.scalar(select(func.count(Personnel.id))):
+            t0 = time.perf_counter()
+            data = populate(db, years=years)
+            print(f"Données générées en {time.perf_counter() - t0:.0f} s : {data['affectations']} affectations")
+        n_aff = db.scalar(select(func.count(Affectation.id)))
+        # agent le plus affecté : le cas le plus lourd pour l'accueil
+        agent_id = db.scalar(
+            select(Affectation.personnel_id)
+            .group_by(Affectation.personnel_id).order_by(func.count().desc()).limit(1)
+        )
+        admin_email = db.scalar(select(Personnel.email).where(Personnel.nom == "BENCH"))
+
+    client = TestClient(main_app.app)
+    client.__enter__()
+    client.headers["Authorization"] = "Bearer " + create_access_token(admin_email, ["ADMIN"])
+    today = date(args.years[1], 6, 1).isoformat()  # « aujourd'hui » au milieu de la dernière année
+
+    rep = args.repeat
+    results = {
+        # accueil agent : avant (tout l'historique) / après (filtre serveur)
+        "home_all_affectations": _measure(client, "/affectations", {"limit": 2000}, rep, follow=True),
+        "home_mine_upcoming": _measure(
+            client, "/affectations", {"personnel_id": agent_id, "date_from": today}, rep
+        ),
+        "affectations_first_page": _measure(client, "/affectations", {"limit": 500}, rep),
+        "personnels_all": _measure(client, "/personnels", {}, rep, follow=True),
+        "personnels_equipe_active": _measure(
+            client, "/personnels", {"equipe_id": 1, "active": "true"}, rep
+        ),
+        "indisponibilites_mine": _measure(
+            client, "/indisponibilites", {"personnel_id": agent_id, "date_from": today}, rep
+        ),
+        "roles_list_users": _measure(client, "/roles/list-users", {}, rep, follow=True),
+    }
+    last = _last_cursor(client, "/affectations", {"limit": 500})
+    if last:
+        results["affectations_last_page"] = _measure(
+            client, "/affectations", {"limit": 500, "cursor": last}, rep
+        )
+
+    before = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            before = json.load(fh).get("results")
+    print(f"{n_aff} affectations")
+    for name, r in results.items():
+        line = (f"{name:<28} {r['median_ms']:>9.1f} ms  {r['bytes'] / 1024:>9.1f} Kio  "
+                f"{r['rows']:>7} lignes  {r['pages']:>4} pages  {r['queries']:>4} requêtes SQL")
+        old = (before or {}).get(name)
+        if old and old.get("median_ms"):
+            line += f"   ({old['median_ms'] / r['median_ms']:.2f}x)"
+        print(line)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"bench": "lists", "meta": {"affectations": n_aff, "dialect": engine.dialect.name},
+                       "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/bench_pdf.py
+# Micro-benchmark du rendu PDF des feuilles de garde : mode "fast" vs "paragraph"
+#   python -m benchmarks.bench_pdf [--repeat 5] [--piquets 25] [--json out.json]
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from app.services.pdf_generator import RENDER_MODES, generate_feuille_garde_pdf
+
+
+def dense_month(year: int = 2026, month: int = 3, n_piquets: int = 25, team_size: int = 40) -> dict:
+    """Mois complet (NUIT tous les jours, JOUR les week-ends), tous les piquets pourvus."""
+    gardes: list[dict] = []
+    d = date(year, month, 1)
+    gid = 1
+    while d.month == month:
+        slots = ("JOUR", "NUIT") if d.weekday() >= 5 else ("NUIT",)
+        for slot in slots:
+            gardes.append({"id": gid, "date": d, "slot": slot})
+            gid += 1
+        d += timedelta(days=1)
+
+    piquets = [
+        {"id": i, "label": f"Piquet {i:02d}", "is_astreinte": i > n_piquets - 4}
+        for i in range(1, n_piquets + 1)
+    ]
+    names = [f"NOM{i:02d} P." for i in range(team_size)]
+    aff_map = {
+        g["id"]: {pq["id"]: names[(g["id"] + pq["id"]) % team_size] for pq in piquets}
+        for g in gardes
+    }
+    non_aff = {g["id"]: names[: team_size - n_piquets - 3] for g in gardes}
+    indispo = {g["id"]: names[-3:] for g in gardes}
+    return {
+        "equipe_label": "Équipe BENCH",
+        "mois_label": "Mars 2026",
+        "gardes": gardes,
+        "piquets": piquets,
+        "aff_map": aff_map,
+        "non_aff_map": non_aff,
+        "indispo_map": indispo,
+    }
+
+
+def _pages(pdf: bytes) -> int:
+    return len(re.findall(rb"/Type /Page[^s]", pdf))
+
+
+def run(repeat: int = 5, n_piquets: int = 25) -> dict:
+    data = dense_month(n_piquets=n_piquets)
+    results: dict[str, dict] = {}
+    for mode in RENDER_MODES:
+        generate_feuille_garde_pdf(**data, mode=mode)  # échauffement (polices, caches)
+        timings = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            pdf = generate_feuille_garde_pdf(**data, mode=mode)
+            timings.append(time.perf_counter() - t0)
+
+        tracemalloc.start()
+        generate_feuille_garde_pdf(**data, mode=mode)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        pages = _pages(pdf)
+        best = min(timings)
+        results[mode] = {
+            "gardes": len(data["gardes"]),
+            "piquets": n_piquets,
+            "pages": pages,
+            "bytes": len(pdf),
+            "ms_total": round(best * 1000, 2),
+            "ms_per_page": round(best * 1000 / max(pages, 1), 2),
+            "peak_kib": round(peak / 1024, 1),
+        }
+    return results
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--piquets", type=int, default=25)
+    ap.add_argument("--json", help="écrit les résultats dans ce fichier")
+    args = ap.parse_args()
+
+    results = run(args.repeat, args.piquets)
+    for mode, r in results.items():
+        print(
+            f"{mode:<10} {r['pages']} page(s)  {r['ms_per_page']:>8.2f} ms/page  "
+            f"{r['ms_total']:>8.2f} ms  pic {r['peak_kib']:>9.1f} KiB  {r['bytes']} o"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"bench": "pdf", "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+# benchmarks/bench_planning.py
+# Benchmarks des chemins chauds du planning sur données synthétiques (SQLite ou Postgres local)
+#   python -m benchmarks.bench_planning --db-url sqlite:///./bench.db [--fresh] [--repeat 5]
+#       [--only list_gardes pdf_feuille] [--json out.json] [--compare before.json]
+#
+# --fresh recrée TOUTES les tables puis génère les données (benchmarks.synthetic) :
+# à n'utiliser que sur une base dédiée. Sans --fresh, une base vide est remplie, une base
+# déjà générée est réutilisée telle quelle.
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import re
+import statistics
+import subprocess
+import time
+from datetime import date
+
+from benchmarks import use_database
+
+YEARS = (2025, 2026)
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _summary(r: list[float], queries: list[int]) -> dict:
+    r_ms = sorted(x * 1000 for x in r)
+    out = {
+        "runs": len(r_ms),
+        "min_ms": round(r_ms[0], 2),
+        "median_ms": round(statistics.median(r_ms), 2),
+        "max_ms": round(r_ms[-1], 2),
+    }
+    if queries:
+        out["queries"] = max(queries)
+    return out
+
+
+class Bench:
+    """Contexte partagé : client HTTP authentifié ADMIN + ids de référence dans les données."""
+
+    def __init__(self, repeat: int) -> None:
+        from fastapi.testclient import TestClient
+        from sqlalchemy import select
+
+        import app.main as main
+        from app.core.security import create_access_token
+        from app.db.models import Garde, Piquet, PiquetCompetence, Personnel
+        from app.db.session import SessionLocal
+
+        self.repeat = repeat
+        self.client = TestClient(main.app)
+        self.client.__enter__()
+        with SessionLocal() as db:
+            admin = db.scalar(select(Personnel.email).where(Personnel.nom == "BENCH"))
+            self.year = max(YEARS)
+            self.month = 3
+            # garde de référence : milieu du mois, avec équipe
+            self.garde_id, self.equipe_id = db.execute(
+                select(Garde.id, Garde.equipe_id)
+                .where(Garde.date >= date(self.year, self.month, 14), Garde.equipe_id.is_not(None))
+                .order_by(Garde.date)
+                .limit(1)
+            ).one()
+            # piquet avec exigences (cas le plus coûteux des suggestions)
+            self.piquet_id = db.scalar(
+                select(Piquet.id).join(PiquetCompetence, PiquetCompetence.piquet_id == Piquet.id)
+                .where(Piquet.is_astreinte.is_(False))
+                .order_by(Piquet.position)
+                .limit(1)
+            ) or db.scalar(select(Piquet.id).order_by(Piquet.position).limit(1))
+        self.client.headers["Authorization"] = "Bearer " + create_access_token(admin, ["ADMIN"])
+
+    def timed(self, run, setup=None) -> dict:
+        """Chronomètre run() (après un échauffement) ; setup() n'est pas chronométré."""
+        if setup:
+            setup()
+        run()
+        timings, queries = [], []
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            t0 = time.perf_counter()
+            resp = run()
+            timings.append(time.perf_counter() - t0)
+            m = _QUERIES.search(getattr(resp, "headers", {}).get("server-timing", "") or "")
+            if m:
+                queries.append(int(m.group(1)))
+        return _summary(timings, queries)
+
+    def get(self, url: str, **params):
+        r = self.client.get(url, params=params)
+        r.raise_for_status()
+        return r
+
+    def post(self, url: str, json=None, **params):
+        r = self.client.post(url, json=json, params=params)
+        r.raise_for_status()
+        return r
+
+
+# ──────────────────────────────────────────────
+# Cas
+# ──────────────────────────────────────────────
+
+def case_list_gardes(b: Bench) -> dict:
+    return b.timed(lambda: b.get("/gardes", year=b.year, month=b.month))
+
+
+def case_suggestions(b: Bench) -> dict:
+    """GET /affectations/suggestions (tous les personnels, règles compétences + 3 gardes)."""
+    return b.timed(lambda: b.get("/affectations/suggestions", garde_id=b.garde_id, piquet_id=b.piquet_id))
+
+
+def case_suggest_personnels(b: Bench) -> dict:
+    """GET /gardes/{id}/suggest-personnels (toutes équipes)."""
+    return b.timed(lambda: b.get(
+        f"/gardes/{b.garde_id}/suggest-personnels", piquet_id=b.piquet_id, equipe_only="false"
+    ))
+
+
+def _remove_affectation(garde_id: int, piquet_id: int) -> None:
+    """
+    Suppression via l'ORM, pas un delete() Core : les hooks de session (compteurs mensuels,
+    versions de garde, flux de changements) voient la suppression comme pour la vraie API.
+    """
+    from sqlalchemy import select
+    from app.db.models import Affectation
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        for a in db.scalars(select(Affectation).where(
+            Affectation.garde_id == garde_id, Affectation.piquet_id == piquet_id
+        )):
+            db.delete(a)
+        db.commit()
+
+
+def case_create_affectation(b: Bench) -> dict:
+    """POST /affectations sur un piquet libre (l'affectation est supprimée entre deux mesures)."""
+    from sqlalchemy import select
+    from app.db.models import Affectation, Personnel, Piquet, Statut
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        taken = set(db.scalars(select(Affectation.piquet_id).where(Affectation.garde_id == b.garde_id)))
+        free = [pid for pid in db.scalars(select(Piquet.id).order_by(Piquet.position)) if pid not in taken]
+    if not free:
+        _remove_affectation(b.garde_id, b.piquet_id)
+        free = [b.piquet_id]
+    piquet_id = free[0]
+    candidates = b.get(
+        f"/gardes/{b.garde_id}/suggest-personnels", piquet_id=piquet_id, equipe_only="false"
+    ).json()
+    if not candidates:
+        return {"skipped": "aucun candidat"}
+    pers_id = candidates[0]["id"]
+    with SessionLocal() as db:
+        statut = db.scalar(select(Personnel.statut).where(Personnel.id == pers_id))
+    payload = {
+        "garde_id": b.garde_id, "piquet_id": piquet_id, "personnel_id": pers_id,
+        "statut_service": "pro" if statut == Statut.PRO else "volontaire",
+    }
+
+    def setup():
+        _remove_affectation(b.garde_id, piquet_id)
+
+    result = b.timed(lambda: b.post("/affectations", json=payload), setup)
+    setup()
+    return result
+
+
+def case_generate_year(b: Bench) -> dict:
+    """POST /gardes/generate_year sur une année vide (gardes supprimées entre deux mesures)."""
+    from sqlalchemy import delete, extract
+    from app.db.models import Garde
+    from app.db.session import SessionLocal
+
+    year = max(YEARS) + 1
+
+    def setup():
+        with SessionLocal() as db:
+            db.execute(delete(Garde).where(extract("year", Garde.date) == year))
+            db.commit()
+
+    result = b.timed(lambda: b.post("/gardes/generate_year", json={"year": year}), setup)
+    setup()
+    return result
+
+
+def case_sync_to_db(b: Bench) -> dict:
+    """Import AGATT : parse du CSV puis _sync_to_db, import complet puis incrémental (~5 %)."""
+    import random
+    from sqlalchemy import delete
+    from app.db.models import DispoAgatt
+    from app.db.session import SessionLocal
+    from app.services.gmail_fetcher import _parse_csv_bytes, _sync_to_db
+    from benchmarks.synthetic import agatt_csv_bytes, agatt_rows
+
+    with SessionLocal() as db:
+        content = agatt_csv_bytes(agatt_rows(db, years=YEARS))
+    entries = _parse_csv_bytes(content)
+    rnd = random.Random(7)
+    changed = set(e for e in entries if rnd.random() > 0.05)
+
+    def clear():
+        with SessionLocal() as db:
+            db.execute(delete(DispoAgatt))
+            db.commit()
+
+    def full():
+        with SessionLocal() as db:
+            _sync_to_db(db, entries)
+
+    def load_full():
+        clear()
+        full()
+
+    def incremental():
+        with SessionLocal() as db:
+            _sync_to_db(db, changed)
+
+    out = {
+        "csv_bytes": len(content),
+        "entries": len(entries),
+        "parse": b.timed(lambda: _parse_csv_bytes(content)),
+        "full": b.timed(full, clear),
+        "incremental": b.timed(incremental, load_full),
+    }
+    load_full()
+    return out
+
+
+def case_pdf_feuille(b: Bench) -> dict:
+    return b.timed(lambda: b.get("/gardes/pdf-feuille", annee=b.year, mois=b.month, equipe_id=b.equipe_id))
+
+
+def case_valider_mois(b: Bench) -> dict:
+    """POST /gardes/valider-mois, job PDF + mails inclus (SMTP remplacé par un stub)."""
+    import app.services.validation_jobs as vj
+
+    sent: list[str] = []
+
+    def stub_send_mail(to, subject, html, **kwargs):
+        # **kwargs : db / smtp / attachments… un changement de signature ne casse pas le stub
+        sent.append(subject)
+
+    real = vj.send_mail
+    vj.send_mail = stub_send_mail
+    try:
+        def setup():
+            b.post("/gardes/devalider-mois", annee=b.year, mois=b.month, equipe_id=b.equipe_id)
+            sent.clear()
+
+        result = b.timed(
+            lambda: b.post("/gardes/valider-mois", annee=b.year, mois=b.month, equipe_id=b.equipe_id),
+            setup,
+        )
+        result["mails"] = len(sent)
+        if not sent:
+            # job terminé sans aucun envoi : on mesurerait le chemin d'échec
+            from sqlalchemy import select
+            from app.db.models import ValidationJob
+            from app.db.session import SessionLocal
+
+            with SessionLocal() as db:
+                job = db.scalars(select(ValidationJob).order_by(ValidationJob.id.desc())).first()
+                detail = f"{job.status} : {job.error}" if job else "aucun job"
+            raise RuntimeError(f"valider_mois : aucun mail envoyé par le job de validation ({detail})")
+        setup()
+    finally:
+        vj.send_mail = real
+    return result
+
+
+CASES = {
+    "list_gardes": case_list_gardes,
+    "suggestions": case_suggestions,
+    "suggest_personnels": case_suggest_personnels,
+    "create_affectation": case_create_affectation,
+    "generate_year": case_generate_year,
+    "sync_to_db": case_sync_to_db,
+    "pdf_feuille": case_pdf_feuille,
+    "valider_mois": case_valider_mois,
+}
+
+
+def _flatten(prefix: str, r: dict) -> dict[str, dict]:
+    if "median_ms" in r or "skipped" in r:
+        return {prefix: r}
+    out = {}
+    for k, v in r.items():
+        if isinstance(v, dict):
+            out.update(_flatten(f"{prefix}.{k}", v))
+    return out
+
+
+def _print(results: dict, before: dict | None) -> None:
+    ref = {}
+    for name, r in (before or {}).items():
+        ref.update(_flatten(name, r))
+    for name, r in results.items():
+        for label, s in _flatten(name, r).items():
+            if "skipped" in s:
+                print(f"{label:<28} ignoré : {s['skipped']}")
+                continue
+            line = f"{label:<28} médiane {s['median_ms']:>9.2f} ms  min {s['min_ms']:>9.2f} ms"
+            if "queries" in s:
+                line += f"  {s['queries']:>5} requêtes SQL"
+            old = ref.get(label)
+            if old and old.get("median_ms"):
+                line += f"   ({old['median_ms'] / s['median_ms']:.2f}x)"
+            print(line)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--db-url", required=True, help="base dédiée au bench (SQLite ou Postgres local)")
+    ap.add_argument("--fresh", action="store_true", help="recrée les tables et régénère les données")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--personnels", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--only", nargs="+", choices=sorted(CASES), help="sous-ensemble de cas")
+    ap.add_argument("--json", help="écrit les résultats dans ce fichier")
+    ap.add_argument("--compare", help="résultats JSON d'un run précédent (référence)")
+    args = ap.parse_args()
+
+    use_database(args.db_url)
+    from sqlalchemy import func, select
+    from app.db.models import Personnel
+    from app.db.session import SessionLocal, engine
+    from benchmarks.synthetic import populate, reset_schema
+
+    data = None
+    if args.fresh:
+        reset_schema(engine)
+    else:
+        from app.db.base import Base
+        Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        if not db.scalar(select(func.count(Personnel.id))):
+            t0 = time.perf_counter()
+            data = populate(db, seed=args.seed, years=YEARS, n_personnels=args.personnels)
+            data["generated_s"] = round(time.perf_counter() - t0, 1)
+            print(f"Données générées : {data}")
+
+    b = Bench(args.repeat)
+    results = {}
+    for name in args.only or CASES:
+        results[name] = CASES[name](b)
+
+    before = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            before = json.load(fh).get("results")
+    _print(results, before)
+    if args.json:
+        meta = {
+            "dialect": engine.dialect.name,
+            "git": _git_rev(),
+            "python": platform.python_version(),
+            "repeat": args.repeat,
+            "data": data,
+        }
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"bench": "planning", "meta": meta, "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
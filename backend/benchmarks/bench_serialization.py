@@ -0,0 +1,208 @@
+# benchmarks/bench_serialization.py
+# Sérialisation des grosses réponses « mois » sur une année complète, toutes équipes
+#   python -m benchmarks.bench_serialization --db-url sqlite:///./bench_ser.db [--fresh] [--year 2026]
+#       [--repeat 3] [--json out.json] [--compare before.json]
+#
+# 1) HTTP : pour chacun des 12 mois, GET /gardes, GET /affectations (filtre de dates, toutes
+#    pages) et GET /gardes/{id}/suggest-personnels ; temps cumulé et octets transférés,
+#    sans compression (Accept-Encoding: identity) et avec gzip.
+# 2) Sérialisation seule (en process, sans HTTP) sur l'année : ancien chemin (entités ORM →
+#    validation Pydantic → json stdlib, ce que fait FastAPI avec response_model) contre le
+#    chemin rapide (tuples de colonnes → app.api.fast_json).
+from __future__ import annotations
+
+import argparse
+import calendar
+import json
+import statistics
+import time
+from datetime import date
+
+from benchmarks import use_database
+from benchmarks.bench_planning import _QUERIES
+
+
+def _median_ms(fn, repeat: int) -> float:
+    fn()  # échauffement
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings) * 1000
+
+
+def _fetch(client, url: str, params: dict, encoding: str) -> tuple[int, int, int]:
+    """(octets décodés, octets sur le fil, requêtes SQL) en suivant X-Next-Cursor."""
+    raw = wire = queries = 0
+    cursor = None
+    while True:
+        r = client.get(url, params=dict(params, cursor=cursor) if cursor else params,
+                       headers={"Accept-Encoding": encoding})
+        r.raise_for_status()
+        raw += len(r.content)
+        wire += r.num_bytes_downloaded
+        m = _QUERIES.search(r.headers.get("server-timing", ""))
+        queries += int(m.group(1)) if m else 0
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            return raw, wire, queries
+
+
+def _http_case(client, calls: list[tuple[str, dict]], repeat: int) -> dict:
+    def run(encoding: str):
+        for url, params in calls:
+            _fetch(client, url, params, encoding)
+
+    raw = wire_identity = wire_gzip = queries = 0
+    for url, params in calls:
+        r, w, q = _fetch(client, url, params, "identity")
+        raw, wire_identity, queries = raw + r, wire_identity + w, queries + q
+        wire_gzip += _fetch(client, url, params, "gzip")[1]
+    return {
+        "median_ms": round(_median_ms(lambda: run("identity"), repeat), 1),
+        "median_ms_gzip": round(_median_ms(lambda: run("gzip"), repeat), 1),
+        "bytes": raw,
+        "wire_bytes_gzip": wire_gzip,
+        "queries": queries,
+        "calls": len(calls),
+    }
+
+
+def _serialization_cases(year: int, repeat: int) -> dict:
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+
+    from app.api import fast_json
+    from app.api.routes.affectations import AFFECTATION_COLUMNS
+    from app.api.routes.gardes import GARDE_COLUMNS
+    from app.db.models import Affectation, Garde
+    from app.db.session import SessionLocal
+    from app.schemas.affectation import AffectationRead
+    from app.schemas.garde import GardeRead
+
+    first, last = date(year, 1, 1), date(year, 12, 31)
+    cases = {
+        "gardes": (GardeRead, Garde, GARDE_COLUMNS,
+                   lambda q: q.where(Garde.date.between(first, last))),
+        "affectations": (AffectationRead, Affectation, AFFECTATION_COLUMNS,
+                         lambda q: q.join(Garde, Garde.id == Affectation.garde_id)
+                         .where(Garde.date.between(first, last))),
+    }
+    out = {}
+    with SessionLocal() as db:
+        for name, (schema, model, columns, where) in cases.items():
+            adapter = TypeAdapter(list[schema])
+            entities = db.scalars(where(select(model))).all()
+            rows = db.execute(where(select(*columns))).all()
+
+            def legacy():
+                # ce que FastAPI fait d'un retour ORM avec response_model, puis JSONResponse
+                data = adapter.dump_python(adapter.validate_python(entities, from_attributes=True), mode="json")
+                return json.dumps(jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")).encode()
+
+            def fast():
+                return fast_json.dumps(fast_json.rows_to_dicts(rows))
+
+            assert json.loads(legacy()) == json.loads(fast()), f"{name} : sorties différentes"
+            out[name] = {
+                "rows": len(rows),
+                "legacy_ms": round(_median_ms(legacy, repeat), 1),
+                "fast_ms": round(_median_ms(fast, repeat), 1),
+                "bytes": len(fast()),
+            }
+            db.expunge_all()
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--db-url", required=True, help="base dédiée au bench")
+    ap.add_argument("--fresh", action="store_true", help="recrée les tables et régénère les données")
+    ap.add_argument("--year", type=int, default=2026)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", help="écrit les résultats dans ce fichier")
+    ap.add_argument("--compare", help="résultats JSON d'un run précédent (référence)")
+    args = ap.parse_args()
+
+    use_database(args.db_url)
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func, select
+
+    import app.main as main_app
+    from app.core.security import create_access_token
+    from app.db.base import Base
+    from app.db.models import Garde, Personnel, Piquet
+    from app.db.session import SessionLocal, engine
+    from benchmarks.synthetic import populate, reset_schema
+
+    if args.fresh:
+        reset_schema(engine)
+    else:
+        Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        if not db.scalar(select(func.count(Personnel.id))):
+            populate(db, years=(args.year,))
+        admin_email = db.scalar(select(Personnel.email).where(Personnel.nom == "BENCH"))
+        piquet_id = db.scalar(select(Piquet.id).order_by(Piquet.position).limit(1))
+        # une garde par mois (la première avec équipe) pour les suggestions
+        suggest_gardes = [
+            db.scalar(
+                select(Garde.id)
+                .where(Garde.date >= date(args.year, m, 1), Garde.equipe_id.is_not(None))
+                .order_by(Garde.date).limit(1)
+            )
+            for m in range(1, 13)
+        ]
+
+    client = TestClient(main_app.app)
+    client.__enter__()
+    client.headers["Authorization"] = "Bearer " + create_access_token(admin_email, ["ADMIN"])
+
+    months = range(1, 13)
+    y = args.year
+
+    def month_bounds(m: int) -> dict:
+        return {"date_from": date(y, m, 1).isoformat(),
+                "date_to": date(y, m, calendar.monthrange(y, m)[1]).isoformat()}
+
+    rep = args.repeat
+    results = {
+        "gardes_12_months": _http_case(
+            client, [("/gardes", {"year": y, "month": m}) for m in months], rep),
+        "affectations_12_months": _http_case(
+            client, [("/affectations", dict(month_bounds(m), limit=2000)) for m in months], rep),
+        "suggest_personnels_12": _http_case(
+            client, [(f"/gardes/{g}/suggest-personnels", {"piquet_id": piquet_id, "equipe_only": "false"})
+                     for g in suggest_gardes if g], rep),
+    }
+    serialization = _serialization_cases(y, rep)
+
+    before = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            before = json.load(fh).get("results")
+    print(f"HTTP, 12 mois de {y} (toutes équipes) :")
+    for name, r in results.items():
+        line = (f"  {name:<24} {r['median_ms']:>8.1f} ms  {r['bytes'] / 1024:>8.1f} Kio  "
+                f"gzip : {r['median_ms_gzip']:>8.1f} ms  {r['wire_bytes_gzip'] / 1024:>8.1f} Kio sur le fil  "
+                f"{r['queries']:>5} requêtes SQL")
+        old = (before or {}).get(name)
+        if old and old.get("median_ms"):
+            line += (f"   ({old['median_ms'] / r['median_ms']:.2f}x, "
+                     f"{old['wire_bytes_gzip'] / max(r['wire_bytes_gzip'], 1):.1f}x moins d'octets)")
+        print(line)
+    print("Sérialisation seule (année complète) :")
+    for name, r in serialization.items():
+        print(f"  {name:<24} {r['rows']:>7} lignes  ORM+Pydantic+json {r['legacy_ms']:>8.1f} ms  "
+              f"tuples+fast_json {r['fast_ms']:>8.1f} ms  ({r['legacy_ms'] / max(r['fast_ms'], 0.01):.1f}x)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"bench": "serialization", "meta": {"year": y, "dialect": engine.dialect.name},
+                       "results": results, "serialization": serialization}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
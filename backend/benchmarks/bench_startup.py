@@ -0,0 +1,108 @@
+# benchmarks/bench_startup.py
+# Temps de démarrage à froid d'un worker : import de app.main + startup (schéma, seed, scheduler)
+#   python -m benchmarks.bench_startup --db-url sqlite:///./bench.db [--runs 5] [--budget-ms 2000]
+#       [--schema-mode migrations] [--json out.json] [--compare before.json]
+#
+# Chaque mesure tourne dans un process Python neuf (aucun module en cache). Le premier run est
+# aussi lancé avec -X importtime pour lister les paquets les plus coûteux à l'import.
+# Code de sortie 1 si la médiane dépasse --budget-ms (utilisable en CI).
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import Counter
+
+from benchmarks import use_database
+
+_MARK = "BOOT_JSON "
+_SNIPPET = f"""
+import asyncio, json, time
+t0 = time.perf_counter()
+import app.main as m
+asyncio.run(m.app.router.startup())
+wall_ms = (time.perf_counter() - t0) * 1000
+from app.core import boot
+print({_MARK!r} + json.dumps(dict(boot.report(), wall_ms=round(wall_ms, 1))), flush=True)
+asyncio.run(m.app.router.shutdown())
+"""
+
+
+def _run_once(importtime: bool) -> tuple[dict, str]:
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", _SNIPPET]
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=os.environ.copy())
+    line = next((l for l in proc.stdout.splitlines() if l.startswith(_MARK)), None)
+    if proc.returncode != 0 or line is None:
+        raise SystemExit(f"Échec du démarrage :\n{proc.stderr[-2000:]}")
+    return json.loads(line[len(_MARK):]), proc.stderr
+
+
+def _top_packages(importtime_log: str, n: int) -> list[tuple[str, float]]:
+    """Temps « self » cumulé par paquet de premier niveau (sortie de -X importtime)."""
+    per_pkg: Counter[str] = Counter()
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            self_us, _cumul, name = (p.strip() for p in line[len("import time:"):].split("|"))
+            per_pkg[name.split(".")[0]] += int(self_us)
+        except ValueError:
+            continue  # en-tête de colonnes
+    return [(pkg, round(us / 1000, 1)) for pkg, us in per_pkg.most_common(n)]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--db-url", required=True)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=2000)
+    ap.add_argument("--schema-mode", choices=("create_all", "migrations"), help="force DB_SCHEMA_MODE")
+    ap.add_argument("--top", type=int, default=12, help="paquets les plus coûteux à afficher")
+    ap.add_argument("--json", help="écrit les résultats dans ce fichier")
+    ap.add_argument("--compare", help="résultats JSON d'un run précédent (référence)")
+    args = ap.parse_args()
+
+    use_database(args.db_url)
+    if args.schema_mode:
+        os.environ["DB_SCHEMA_MODE"] = args.schema_mode
+
+    first, log = _run_once(importtime=True)
+    runs = [_run_once(importtime=False)[0] for _ in range(args.runs)]
+
+    steps = list(runs[0]["steps"])
+    results = {
+        "runs": len(runs),
+        "wall_ms": round(statistics.median(r["wall_ms"] for r in runs), 1),
+        "steps_ms": {k: round(statistics.median(r["steps"].get(k, 0.0) for r in runs), 1) for k in steps},
+        "top_imports_ms": dict(_top_packages(log, args.top)),
+        "first_run_importtime_ms": first["wall_ms"],
+    }
+
+    before = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            before = json.load(fh).get("results")
+    ratio = ""
+    if before and before.get("wall_ms"):
+        ratio = f"   ({before['wall_ms'] / results['wall_ms']:.2f}x)"
+    print(f"Démarrage (médiane de {len(runs)} process) : {results['wall_ms']:.0f} ms{ratio}")
+    for k, v in results["steps_ms"].items():
+        ref = (before or {}).get("steps_ms", {}).get(k)
+        print(f"  {k:<12} {v:>8.1f} ms" + (f"   (avant {ref:.1f} ms)" if ref is not None else ""))
+    print("Imports les plus coûteux (temps propre par paquet) :")
+    for pkg, ms in results["top_imports_ms"].items():
+        print(f"  {pkg:<24} {ms:>8.1f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"bench": "startup", "results": results}, fh, indent=2)
+    if args.budget_ms and results["wall_ms"] > args.budget_ms:
+        print(f"⚠️ Budget dépassé : {results['wall_ms']:.0f} ms > {args.budget_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
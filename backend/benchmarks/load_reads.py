@@ -0,0 +1,143 @@
+# benchmarks/load_reads.py
+# Test de charge des routes de lecture (planning du matin) : N clients concurrents en boucle
+#   python -m benchmarks.load_reads --url http://localhost:8000 --token <JWT> \
+#       [--clients 200] [--duration 30] [--year 2026 --month 3] [--json out.json] [--compare before.json]
+#
+# Comparaison sync / async : lancer une fois sur un serveur avant le passage en async
+# (--json before.json), puis sur le serveur actuel avec --compare before.json.
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import date
+
+try:
+    import httpx
+except ImportError:  # dépendance de test uniquement
+    httpx = None
+
+
+def read_paths(year: int, month: int, day: date) -> list[str]:
+    """Mix de lectures d'un écran planning : gardes du mois, référentiels, mes gardes, dispos."""
+    d = day.isoformat()
+    return [
+        f"/gardes?year={year}&month={month}",
+        "/piquets",
+        "/equipes",
+        "/affectations/mine_upcoming?limit=10",
+        f"/dispos-agatt?date={d}&slot=NUIT",
+        f"/dispos-agatt/pro-garde?date={d}",
+    ]
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+async def _client_loop(client, paths: list[str], offset: int, deadline: float, samples: dict) -> None:
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        t0 = time.perf_counter()
+        try:
+            r = await client.get(path)
+            ok = r.status_code < 400
+        except Exception:
+            ok = False
+        samples[path]["ms" if ok else "errors"].append((time.perf_counter() - t0) * 1000)
+
+
+async def run(url: str, token: str, clients: int, duration: float, paths: list[str]) -> dict:
+    if httpx is None:
+        raise SystemExit("httpx requis : pip install httpx")
+    samples = {p: {"ms": [], "errors": []} for p in paths}
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=60) as client:
+        # échauffement : une requête par route (pools, caches)
+        for p in paths:
+            await client.get(p)
+        t0 = time.perf_counter()
+        deadline = t0 + duration
+        await asyncio.gather(*(
+            _client_loop(client, paths, i, deadline, samples) for i in range(clients)
+        ))
+        elapsed = time.perf_counter() - t0
+
+    per_path = {}
+    for p, s in samples.items():
+        ms = s["ms"]
+        per_path[p] = {
+            "ok": len(ms),
+            "errors": len(s["errors"]),
+            "rps": round(len(ms) / elapsed, 1),
+            "p50_ms": round(_pct(ms, 50), 1),
+            "p95_ms": round(_pct(ms, 95), 1),
+            "p99_ms": round(_pct(ms, 99), 1),
+        }
+    all_ms = [v for s in samples.values() for v in s["ms"]]
+    return {
+        "clients": clients,
+        "duration_s": round(elapsed, 1),
+        "total": {
+            "ok": len(all_ms),
+            "errors": sum(len(s["errors"]) for s in samples.values()),
+            "rps": round(len(all_ms) / elapsed, 1),
+            "mean_ms": round(statistics.fmean(all_ms), 1) if all_ms else 0.0,
+            "p95_ms": round(_pct(all_ms, 95), 1),
+            "p99_ms": round(_pct(all_ms, 99), 1),
+        },
+        "paths": per_path,
+    }
+
+
+def _print(results: dict, before: dict | None = None) -> None:
+    def line(label: str, r: dict, ref: dict | None) -> str:
+        s = (f"{label:<42} {r['rps']:>8.1f} req/s  p95 {r['p95_ms']:>8.1f} ms  "
+             f"p99 {r['p99_ms']:>8.1f} ms  err {r['errors']}")
+        if ref and ref.get("rps"):
+            s += f"   ({r['rps'] / ref['rps']:.2f}x req/s)"
+        return s
+
+    print(f"{results['clients']} clients, {results['duration_s']} s")
+    for p, r in results["paths"].items():
+        print(line(p, r, (before or {}).get("paths", {}).get(p)))
+    print(line("TOTAL", results["total"], (before or {}).get("total")))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--token", default="", help="JWT (Authorization: Bearer)")
+    ap.add_argument("--clients", type=int, default=200)
+    ap.add_argument("--duration", type=float, default=30)
+    ap.add_argument("--year", type=int, default=date.today().year)
+    ap.add_argument("--month", type=int, default=date.today().month)
+    ap.add_argument("--json", help="écrit les résultats dans ce fichier")
+    ap.add_argument("--compare", help="résultats JSON d'un run précédent (référence)")
+    args = ap.parse_args()
+
+    day = date(args.year, args.month, 1)
+    results = asyncio.run(run(
+        args.url, args.token, args.clients, args.duration, read_paths(args.year, args.month, day)
+    ))
+    before = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            before = json.load(fh).get("results")
+    _print(results, before)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"bench": "load_reads", "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+# benchmarks/load_scenarios.py
+# Test de charge « réaliste » : rejoue les chargements de pages du frontend pour N planificateurs
+# et M agents connectés en même temps, contre un serveur lancé sur une base de bench.
+#   python -m benchmarks.synthetic --db-url postgresql+psycopg://…/bench      # une fois
+#   uvicorn app.main:app --workers 2                                          # DATABASE_URL=…/bench
+#   python -m benchmarks.load_scenarios --url http://localhost:8000 \
+#       [--planners 10] [--agents 100] [--duration 60] [--think 2] [--year 2026 --month 3] \
+#       [--json out.json] [--compare before.json]
+#
+# Chaque utilisateur virtuel se connecte via /auth/login (comptes de benchmarks.synthetic,
+# mot de passe « bench »), puis enchaîne les pages de son profil avec un temps de réflexion :
+#   - planificateur : PlanningPage (référentiels, gardes du mois, Promise.all affectations +
+#     indisponibilités par garde, ouverture du panneau d'un piquet) et VisionGardesPage ;
+#   - agent : Home (mes affectations à venir, gardes du mois courant + suivant) et
+#     MesIndisponibilitesPage.
+# Résultats : p50/p95/p99 par endpoint et par page, + saturation du pool DB (/health/db).
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from collections import defaultdict
+from datetime import date
+
+from benchmarks.load_reads import _pct
+
+try:
+    import httpx
+except ImportError:  # dépendance de test uniquement
+    httpx = None
+
+PASSWORD = "bench"
+_ID = re.compile(r"/\d+(?=/|$)")
+
+
+class Recorder:
+    """Échantillons de latence par endpoint (méthode + route, ids normalisés) et par page."""
+
+    def __init__(self) -> None:
+        self.endpoints: dict[str, dict[str, list[float]]] = defaultdict(lambda: {"ms": [], "errors": []})
+        self.pages: dict[str, dict[str, list[float]]] = defaultdict(lambda: {"ms": [], "errors": []})
+        self.recording = False
+
+    async def call(self, client, method: str, path: str, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            r = await client.request(method, path, **kwargs)
+            ok = r.status_code < 400
+        except Exception:
+            r, ok = None, False
+        if self.recording:
+            key = f"{method} {_ID.sub('/{id}', path)}"
+            self.endpoints[key]["ms" if ok else "errors"].append((time.perf_counter() - t0) * 1000)
+        if not ok:
+            raise PageError(f"{method} {path} → {getattr(r, 'status_code', 'exception')}")
+        return r.json() if r.headers.get("content-type", "").startswith("application/json") else None
+
+    def get(self, client, path: str, **params):
+        return self.call(client, "GET", path, params=params or None)
+
+
+class PageError(Exception):
+    pass
+
+
+class _Ready:
+    """Compte les utilisateurs connectés (ou en échec) avant le départ chronométré."""
+
+    def __init__(self, total: int) -> None:
+        self.total, self.count, self.failed = total, 0, 0
+        self.event = asyncio.Event()
+
+    def arrive(self) -> None:
+        self.count += 1
+        if self.count >= self.total:
+            self.event.set()
+
+
+# ──────────────────────────────────────────────
+# Pages du frontend (mêmes appels, même parallélisme)
+# ──────────────────────────────────────────────
+
+async def planning_page(rec: Recorder, c, ctx: dict, rnd: random.Random) -> None:
+    """PlanningPage.tsx : loadBase, loadMonth (Promise.all sur les gardes), openPanel."""
+    await asyncio.gather(rec.get(c, "/equipes"), rec.get(c, "/piquets"), rec.get(c, "/personnels"))
+    gardes = await rec.get(c, "/gardes", year=ctx["year"], month=ctx["month"])
+
+    async def per_garde(g):
+        # séquentiel dans chaque garde, toutes les gardes en parallèle (comme le frontend)
+        await rec.get(c, "/affectations", garde_id=g["id"])
+        await rec.get(c, "/indisponibilites", garde_id=g["id"])
+
+    await asyncio.gather(*(per_garde(g) for g in gardes))
+    if gardes and ctx["piquets"]:
+        g, p = rnd.choice(gardes), rnd.choice(ctx["piquets"])
+        await asyncio.gather(
+            rec.get(c, f"/gardes/{g['id']}/suggest-personnels", piquet_id=p["id"], equipe_only="true"),
+            rec.get(c, "/dispos-agatt", date=g["date"], slot=g["slot"],
+                    is_astreinte=str(bool(p.get("is_astreinte"))).lower(), piquet_id=p["id"]),
+            rec.get(c, "/dispos-agatt/pro-garde", date=g["date"]),
+        )
+
+
+async def vision_page(rec: Recorder, c, ctx: dict, rnd: random.Random) -> None:
+    """VisionGardesPage.tsx : référentiels puis affectations de chaque garde du mois."""
+    await asyncio.gather(rec.get(c, "/equipes"), rec.get(c, "/piquets"), rec.get(c, "/personnels"))
+    gardes = await rec.get(c, "/gardes", year=ctx["year"], month=ctx["month"])
+    await asyncio.gather(*(rec.get(c, "/affectations", garde_id=g["id"]) for g in gardes))
+
+
+async def home_page(rec: Recorder, c, ctx: dict, rnd: random.Random) -> None:
+    """Home.tsx : /users/me, mes affectations à venir, référentiels, mois courant + suivant."""
+    await rec.get(c, "/users/me")
+    await rec.get(c, "/affectations", personnel_id=ctx["me"]["id"], date_from=date.today().isoformat())
+    await rec.get(c, "/piquets")
+    await rec.get(c, "/equipes")
+    y, m = ctx["year"], ctx["month"]
+    ny, nm = (y + 1, 1) if m == 12 else (y, m + 1)
+    await asyncio.gather(rec.get(c, "/gardes", year=y, month=m), rec.get(c, "/gardes", year=ny, month=nm))
+
+
+async def mes_indispos_page(rec: Recorder, c, ctx: dict, rnd: random.Random) -> None:
+    """MesIndisponibilitesPage.tsx : gardes de mon équipe + mes indisponibilités."""
+    me = ctx["me"]
+    params = {"year": ctx["year"], "month": ctx["month"]}
+    if me.get("equipe_id"):
+        params["equipe_id"] = me["equipe_id"]
+    await asyncio.gather(
+        rec.get(c, "/gardes", **params),
+        rec.get(c, "/indisponibilites", personnel_id=me["id"]),
+    )
+
+
+PROFILES = {
+    "planner": [(planning_page, 4), (vision_page, 1)],
+    "agent": [(home_page, 3), (mes_indispos_page, 1)],
+}
+
+
+# ──────────────────────────────────────────────
+# Utilisateurs virtuels
+# ──────────────────────────────────────────────
+
+async def virtual_user(rec: Recorder, url: str, email: str, profile: str, ctx: dict,
+                       think: float, seed: int, ready: _Ready, start: asyncio.Event,
+                       deadline: list[float]) -> None:
+    rnd = random.Random(seed)
+    pages, weights = zip(*PROFILES[profile])
+    async with httpx.AsyncClient(base_url=url, timeout=120) as c:
+        try:
+            r = await c.post("/auth/login", json={"email": email, "password": PASSWORD})
+            r.raise_for_status()
+            c.headers["Authorization"] = f"Bearer {r.json()['access_token']}"
+            ctx = dict(ctx, me=await rec.get(c, "/users/me"))
+        except (httpx.HTTPError, PageError):
+            ready.failed += 1
+            return
+        finally:
+            ready.arrive()
+        await start.wait()
+        # arrivées étalées sur le premier temps de réflexion
+        await asyncio.sleep(rnd.uniform(0, think))
+        while time.perf_counter() < deadline[0]:
+            page = rnd.choices(pages, weights)[0]
+            t0 = time.perf_counter()
+            try:
+                await page(rec, c, ctx, rnd)
+                ok = True
+            except PageError:
+                ok = False
+            if time.perf_counter() < deadline[0]:
+                rec.pages[f"{page.__name__} ({profile})"]["ms" if ok else "errors"].append(
+                    (time.perf_counter() - t0) * 1000
+                )
+            await asyncio.sleep(rnd.expovariate(1 / think) if think > 0 else 0)
+
+
+async def poll_db(url: str, token: str, stop: asyncio.Event, interval: float) -> dict:
+    """Relevés de /health/db pendant le test : pic de connexions empruntées, attente, timeouts."""
+    by_pid: dict[int, dict] = {}
+    first: dict[int, dict] = {}
+    ping: list[float] = []
+    async with httpx.AsyncClient(base_url=url, timeout=30,
+                                 headers={"Authorization": f"Bearer {token}"}) as c:
+        while not stop.is_set():
+            try:
+                h = (await c.get("/health/db")).json()
+            except Exception:
+                h = None
+            if h:
+                ping.append(h["ping_ms"])
+                for kind, p in h["pools"].items():
+                    key = (h["pid"], kind)
+                    first.setdefault(key, p)
+                    agg = by_pid.setdefault(key, {"pool": p["pool"], "samples": 0, "checked_out_max": 0,
+                                                  "overflow_max": None, "wait_max_ms": 0.0})
+                    agg["samples"] += 1
+                    agg["checked_out_max"] = max(agg["checked_out_max"], p.get("checked_out", 0))
+                    if "overflow" in p:
+                        agg["overflow_max"] = max(p["overflow"], agg["overflow_max"] or p["overflow"])
+                        agg["capacity"] = p["size"] + p["max_overflow"]
+                    if "timeouts" in p:
+                        agg["timeouts"] = p["timeouts"] - first[key]["timeouts"]
+                        agg["wait_max_ms"] = max(agg["wait_max_ms"], p["wait_max_ms"])
+                        agg["wait_avg_ms"] = p["wait_avg_ms"]
+            try:
+                await asyncio.wait_for(stop.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+    pools = {f"{pid}/{kind}": v for (pid, kind), v in sorted(by_pid.items())}
+    saturated = any(v.get("capacity") and v["checked_out_max"] >= v["capacity"] for v in pools.values())
+    return {
+        "ping_p95_ms": round(_pct(ping, 95), 1),
+        "saturated": saturated or any(v.get("timeouts") for v in pools.values()),
+        "pools": pools,
+    }
+
+
+def _stats(samples: dict[str, dict[str, list[float]]], elapsed: float) -> dict:
+    out = {}
+    for key in sorted(samples):
+        ms = samples[key]["ms"]
+        out[key] = {
+            "ok": len(ms),
+            "errors": len(samples[key]["errors"]),
+            "rps": round(len(ms) / elapsed, 2),
+            "p50_ms": round(_pct(ms, 50), 1),
+            "p95_ms": round(_pct(ms, 95), 1),
+            "p99_ms": round(_pct(ms, 99), 1),
+        }
+    return out
+
+
+async def run(url: str, planners: list[str], agents: list[str], duration: float, think: float,
+              year: int, month: int, poll_interval: float) -> dict:
+    if httpx is None:
+        raise SystemExit("httpx requis : pip install httpx")
+    rec = Recorder()
+    async with httpx.AsyncClient(base_url=url, timeout=60) as c:
+        r = await c.post("/auth/login", json={"email": planners[0], "password": PASSWORD})
+        if r.status_code != 200:
+            raise SystemExit(f"Connexion impossible ({planners[0]}) : base générée par benchmarks.synthetic ?")
+        token = r.json()["access_token"]
+        piquets = (await c.get("/piquets", headers={"Authorization": f"Bearer {token}"})).json()
+    ctx = {"year": year, "month": month, "piquets": piquets}
+
+    start, stop = asyncio.Event(), asyncio.Event()
+    deadline = [float("inf")]
+    accounts = [(e, "planner") for e in planners] + [(e, "agent") for e in agents]
+    ready = _Ready(len(accounts))
+    # connexions (mesurées à part : bcrypt coûte cher et n'arrive qu'une fois par session)
+    t_login = time.perf_counter()
+    users = [
+        asyncio.create_task(virtual_user(rec, url, email, profile, ctx, think, i, ready, start, deadline))
+        for i, (email, profile) in enumerate(accounts)
+    ]
+    await ready.event.wait()
+    login_s = time.perf_counter() - t_login
+
+    rec.recording = True
+    poller = asyncio.create_task(poll_db(url, token, stop, poll_interval))
+    t0 = time.perf_counter()
+    deadline[0] = t0 + duration
+    start.set()
+    await asyncio.gather(*users)
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    db = await poller
+
+    all_ms = [v for s in rec.endpoints.values() for v in s["ms"]]
+    return {
+        "users": {"planners": len(planners), "agents": len(agents)},
+        "think_s": think,
+        "duration_s": round(elapsed, 1),
+        "login_s": round(login_s, 1),
+        "login_failed": ready.failed,
+        "total": {
+            "requests": len(all_ms),
+            "errors": sum(len(s["errors"]) for s in rec.endpoints.values()),
+            "rps": round(len(all_ms) / elapsed, 1),
+            "p50_ms": round(_pct(all_ms, 50), 1),
+            "p95_ms": round(_pct(all_ms, 95), 1),
+            "p99_ms": round(_pct(all_ms, 99), 1),
+        },
+        "pages": _stats(rec.pages, elapsed),
+        "endpoints": _stats(rec.endpoints, elapsed),
+        "db": db,
+    }
+
+
+def _print(results: dict, before: dict | None = None) -> None:
+    def line(label: str, r: dict, ref: dict | None) -> str:
+        s = (f"{label:<48} {r['ok']:>6} ok  p50 {r['p50_ms']:>8.1f}  p95 {r['p95_ms']:>8.1f}  "
+             f"p99 {r['p99_ms']:>8.1f} ms  err {r['errors']}")
+        if ref and ref.get("p95_ms") and r["p95_ms"]:
+            s += f"   ({ref['p95_ms'] / r['p95_ms']:.2f}x p95)"
+        return s
+
+    u = results["users"]
+    print(f"{u['planners']} planificateurs + {u['agents']} agents, {results['duration_s']} s "
+          f"(réflexion {results['think_s']} s, connexions {results['login_s']} s, "
+          f"{results['login_failed']} échecs)")
+    for section in ("pages", "endpoints"):
+        print(f"— {section}")
+        for k, r in results[section].items():
+            print(line(k, r, (before or {}).get(section, {}).get(k)))
+    t = results["total"]
+    print(f"TOTAL {t['requests']} requêtes, {t['rps']} req/s, p50 {t['p50_ms']} ms, "
+          f"p95 {t['p95_ms']} ms, p99 {t['p99_ms']} ms, err {t['errors']}")
+    db = results["db"]
+    print(f"— DB : ping p95 {db['ping_p95_ms']} ms, {'SATURÉ' if db['saturated'] else 'ok'}")
+    for key, p in db["pools"].items():
+        cap = f"/{p['capacity']}" if p.get("capacity") else ""
+        print(f"  {key:<16} {p['pool']:<22} empruntées max {p['checked_out_max']}{cap}  "
+              f"attente max {p['wait_max_ms']} ms  timeouts {p.get('timeouts', 0)}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--planners", type=int, default=10, help="planificateurs simultanés")
+    ap.add_argument("--agents", type=int, default=100, help="agents simultanés")
+    ap.add_argument("--duration", type=float, default=60)
+    ap.add_argument("--think", type=float, default=2.0, help="temps de réflexion moyen entre pages (s)")
+    ap.add_argument("--year", type=int, default=date.today().year)
+    ap.add_argument("--month", type=int, default=date.today().month)
+    ap.add_argument("--admin-email", default="bench-admin@example.org")
+    ap.add_argument("--poll", type=float, default=1.0, help="intervalle de relevé /health/db (s)")
+    ap.add_argument("--json", help="écrit les résultats dans ce fichier")
+    ap.add_argument("--compare", help="résultats JSON d'un run précédent (référence)")
+    args = ap.parse_args()
+
+    # comptes de benchmarks.synthetic : bench-admin + agentNNN (mot de passe « bench »)
+    planners = [args.admin_email] * args.planners
+    agents = [f"agent{i:03d}@example.org" for i in range(args.agents)]
+    results = asyncio.run(run(
+        args.url, planners, agents, args.duration, args.think, args.year, args.month, args.poll
+    ))
+    before = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            before = json.load(fh).get("results")
+    _print(results, before)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"bench": "load_scenarios", "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+# benchmarks/synthetic.py
+# Générateur de données synthétiques d'un centre de secours (déterministe : même seed → mêmes données)
+#   python -m benchmarks.synthetic --db-url sqlite:///./bench.db [--personnels 200] [--years 2025 2026]
+#       [--csv exports/Export_bench.csv]
+from __future__ import annotations
+
+import argparse
+import calendar
+import csv
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+PRENOMS = [
+    "Frédéric", "Hélène", "Jérôme", "Céline", "Noël", "Loïc", "Mathis", "Chloé", "Théo", "Léa",
+    "Julien", "Camille", "Nicolas", "Élodie", "Antoine", "Manon", "Sébastien", "Inès", "Hugo", "Zoé",
+]
+NOMS = [
+    "BLONDET", "LEFÈVRE", "MARIE", "LEBRETON", "HÉBERT", "DUVAL", "LECOMTE", "GOSSELIN", "LEGRAND",
+    "PAYEN", "FOUCHER", "LEMOINE", "RENOUF", "QUÉTIER", "LAISNEY", "HAMEL", "JEANNE", "GUÉRIN",
+    "LEVAVASSEUR", "DESLANDES", "ROUXEL", "LECOEUR", "MAUGER", "TOSTAIN", "LEPETIT",
+]
+GRADES = ["Sap", "Cap", "Cch", "Sgt", "Sch", "Adj", "Adc", "Ltn", "Cne"]
+COMPETENCES = [
+    ("INC1", "Incendie niveau 1"), ("INC2", "Incendie niveau 2"), ("SUAP1", "Secours à personne 1"),
+    ("SUAP2", "Secours à personne 2"), ("COD0", "Conducteur VL"), ("COD1", "Conducteur engin-pompe"),
+    ("COD2", "Conducteur poids lourd"), ("CA", "Chef d'agrès"), ("CG", "Chef de groupe"),
+    ("SR", "Secours routier"), ("SAV", "Sauvetage aquatique"), ("FDF", "Feux de forêt"),
+]
+EQUIPE_COULEURS = ["#e74c3c", "#3498db", "#2ecc71", "#f39c12", "#9b59b6", "#1abc9c"]
+
+AGATT_HEADER = [
+    "Matricule Administratif", "Nom", "Prénom", "Date Occupation", "Creneau Deb - Fin",
+    "Type Occupation", "Libellé Type Occupation", "Libelle",
+]
+# type → (créneau, libellé, compteur) comme dans exports/Export_base_ST-LO.csv
+AGATT_TYPES = {
+    "G24": ("07:00:00 - 07:00:00", "Garde 24", "Compteur temps de travail SPP / PATS"),
+    "GA": ("07:00:00 - 07:00:00", "Garde agent logé", "Compteur temps de travail SPP / PATS"),
+    "DN": ("19:00:00 - 07:00:00", "Disponibilité garde nuit", "Compteur temps d'activité SPV"),
+    "DJ": ("07:00:00 - 19:00:00", "Disponibilité garde jour", "Compteur temps d'activité SPV"),
+    "DAN": ("19:00:00 - 07:00:00", "Disponibilité astreinte nuit", "Compteur temps d'activité SPV"),
+    "DAJ": ("07:00:00 - 19:00:00", "Disponibilité astreinte jour", "Compteur temps d'activité SPV"),
+    "N12": ("19:00:00 - 07:00:00", "Garde 12h nuit", "Compteur temps d'activité SPV"),
+    "J12": ("07:00:00 - 19:00:00", "Garde 12h jour", "Compteur temps d'activité SPV"),
+}
+
+
+def _slots_for(d: date, holidays: set[date]) -> tuple[str, ...]:
+    return ("JOUR", "NUIT") if d.weekday() >= 5 or d in holidays else ("NUIT",)
+
+
+def populate(
+    db: Session,
+    *,
+    seed: int = 42,
+    years: tuple[int, ...] = (2025, 2026),
+    n_equipes: int = 4,
+    n_personnels: int = 200,
+    n_piquets: int = 25,
+    fill_rate: float = 0.8,
+    admin_email: str = "bench-admin@example.org",
+) -> dict:
+    """
+    Remplit une base VIDE (tables créées) : équipes, personnels + rôles + compétences
+    (dont expirées), piquets + exigences, gardes de plusieurs années avec équipes en rotation
+    hebdomadaire, affectations (fill_rate des piquets) et indisponibilités.
+    Insertion en masse (insert() Core) : quelques secondes pour 2 ans / 200 personnels.
+    """
+    from app.api.routes.gardes import _french_holidays
+    from app.core.security import hash_password
+    from app.services import month_stats
+    from app.db.models import (
+        Affectation, Competence, Equipe, Garde, Holiday, Indisponibilite, Personnel,
+        PersonnelCompetence, PersonnelRole, Piquet, PiquetCompetence, RoleEnum, Slot, Statut,
+    )
+
+    rnd = random.Random(seed)
+
+    # --- Équipes / compétences / piquets ---
+    db.execute(insert(Equipe), [
+        {"code": f"E{i + 1}", "libelle": f"Équipe {i + 1}", "couleur": EQUIPE_COULEURS[i % len(EQUIPE_COULEURS)]}
+        for i in range(n_equipes)
+    ])
+    db.execute(insert(Competence), [{"code": c, "libelle": l} for c, l in COMPETENCES])
+    equipe_ids = list(db.scalars(select(Equipe.id).order_by(Equipe.id)))
+    comp_ids = list(db.scalars(select(Competence.id).order_by(Competence.id)))
+
+    n_astreinte = max(1, n_piquets // 6)
+    db.execute(insert(Piquet), [
+        {
+            "code": f"PQ{i + 1:02d}",
+            "libelle": f"{'Astreinte' if i >= n_piquets - n_astreinte else 'Piquet'} {i + 1:02d}",
+            "is_astreinte": i >= n_piquets - n_astreinte,
+            "position": i,
+        }
+        for i in range(n_piquets)
+    ])
+    piquet_rows = db.execute(select(Piquet.id, Piquet.is_astreinte).order_by(Piquet.position)).all()
+    exigences: dict[int, list[int]] = {}
+    pc_rows = []
+    for pid, _ in piquet_rows:
+        reqs = rnd.sample(comp_ids, rnd.choice((0, 1, 1, 2, 2, 3)))
+        exigences[pid] = reqs
+        pc_rows += [{"piquet_id": pid, "competence_id": cid} for cid in reqs]
+    if pc_rows:
+        db.execute(insert(PiquetCompetence), pc_rows)
+
+    # --- Personnels (+ compte admin du bench) ---
+    first_day = date(min(years), 1, 1)
+    last_day = date(max(years), 12, 31)
+    pwd = hash_password("bench")
+    pers_rows = []
+    for i in range(n_personnels):
+        statut = rnd.choices([Statut.PRO, Statut.VOLONTAIRE, Statut.DOUBLE], weights=(20, 65, 15))[0]
+        pers_rows.append({
+            "nom": f"{NOMS[i % len(NOMS)]}{'' if i < len(NOMS) else i // len(NOMS)}",
+            "prenom": PRENOMS[(i * 7) % len(PRENOMS)],
+            "grade": rnd.choice(GRADES),
+            "email": f"agent{i:03d}@example.org",
+            "statut": statut,
+            "hashed_password": pwd,
+            "is_active": rnd.random() > 0.03,
+            "equipe_id": equipe_ids[i % n_equipes],
+        })
+    pers_rows.append({
+        "nom": "BENCH", "prenom": "Admin", "grade": "Cdt", "email": admin_email,
+        "statut": Statut.PRO, "hashed_password": pwd, "is_active": True, "equipe_id": None,
+    })
+    db.execute(insert(Personnel), pers_rows)
+    people = db.execute(
+        select(Personnel.id, Personnel.equipe_id, Personnel.is_active, Personnel.email).order_by(Personnel.id)
+    ).all()
+    admin_id = next(p.id for p in people if p.email == admin_email)
+    agents = [p for p in people if p.id != admin_id]
+
+    role_rows = [{"personnel_id": admin_id, "role": RoleEnum.ADMIN}]
+    for k, p in enumerate(agents):
+        role_rows.append({"personnel_id": p.id, "role": RoleEnum.AGENT})
+        if k % 25 == 0:
+            role_rows.append({"personnel_id": p.id, "role": RoleEnum.OFFICIER})
+        elif k % 12 == 1:
+            role_rows.append({"personnel_id": p.id, "role": RoleEnum.CHEF_EQUIPE})
+    db.execute(insert(PersonnelRole), role_rows)
+
+    # compétences : 3 à 8 par agent, ~15 % avec expiration (dont une partie déjà échue)
+    comps_of: dict[int, set[int]] = {}
+    pcomp_rows = []
+    span = (last_day - first_day).days
+    for p in agents:
+        owned = rnd.sample(comp_ids, rnd.randint(3, 8))
+        comps_of[p.id] = set(owned)
+        for cid in owned:
+            expiration = first_day + timedelta(days=rnd.randint(0, span)) if rnd.random() < 0.15 else None
+            pcomp_rows.append({
+                "personnel_id": p.id, "competence_id": cid,
+                "date_obtention": first_day - timedelta(days=rnd.randint(30, 3000)),
+                "date_expiration": expiration,
+            })
+    db.execute(insert(PersonnelCompetence), pcomp_rows)
+
+    # --- Jours fériés + gardes (rotation hebdomadaire des équipes) ---
+    holidays: set[date] = set()
+    for y in years:
+        for d, label in _french_holidays(y).items():
+            holidays.add(d)
+            if not db.scalar(select(Holiday.id).where(Holiday.date == d)):
+                db.add(Holiday(date=d, label=label))
+    db.flush()
+
+    garde_rows = []
+    today = date.today()
+    d = first_day
+    while d <= last_day:
+        eq = equipe_ids[(d.isocalendar()[1] + d.year) % n_equipes]
+        for slot in _slots_for(d, holidays):
+            past = d < today.replace(day=1)
+            garde_rows.append({
+                "date": d, "slot": Slot[slot], "is_weekend": d.weekday() >= 5,
+                "is_holiday": d in holidays, "equipe_id": eq,
+                "validated": past, "validated_at": None,
+            })
+        d += timedelta(days=1)
+    db.execute(insert(Garde), garde_rows)
+    gardes = db.execute(select(Garde.id, Garde.equipe_id).order_by(Garde.date, Garde.slot)).all()
+
+    # --- Affectations + indisponibilités ---
+    team_of: dict[int, list] = {}
+    for p in agents:
+        if p.is_active:
+            team_of.setdefault(p.equipe_id, []).append(p.id)
+    aff_rows, indispo_rows = [], []
+    for g in gardes:
+        team = team_of.get(g.equipe_id, [])[:]
+        rnd.shuffle(team)
+        indispo = team[:2]
+        pool = team[2:]
+        indispo_rows += [{"garde_id": g.id, "personnel_id": pid} for pid in indispo]
+        for pid_pq, _ in piquet_rows:
+            if not pool or rnd.random() > fill_rate:
+                continue
+            reqs = exigences[pid_pq]
+            pick = next((x for x in pool if comps_of[x].issuperset(reqs)), None)
+            if pick is None:
+                continue
+            pool.remove(pick)
+            aff_rows.append({
+                "garde_id": g.id, "piquet_id": pid_pq, "personnel_id": pick,
+                "statut_service": rnd.choice(("pro", "volontaire", "volontaire")),
+            })
+    for chunk in range(0, len(aff_rows), 5000):
+        db.execute(insert(Affectation), aff_rows[chunk:chunk + 5000])
+    if indispo_rows:
+        db.execute(insert(Indisponibilite), indispo_rows)
+    # insert() Core : pas d'événements de session, compteurs mensuels recalculés en une fois
+    month_stats.rebuild(db)
+    db.commit()
+
+    return {
+        "seed": seed,
+        "years": list(years),
+        "equipes": n_equipes,
+        "personnels": len(agents),
+        "piquets": n_piquets,
+        "gardes": len(gardes),
+        "affectations": len(aff_rows),
+        "indisponibilites": len(indispo_rows),
+        "admin_email": admin_email,
+    }
+
+
+def agatt_rows(db: Session, *, seed: int = 42, years: tuple[int, ...] = (2025, 2026),
+               dispo_rate: float = 0.12) -> list[list[str]]:
+    """
+    Lignes CSV au format export AGATT (exports/Export_base_ST-LO.csv) pour les personnels
+    en base : G24/GA des pros, DN/DJ/DAN/DAJ des volontaires, N12/J12 (ignorés à l'import).
+    """
+    from app.db.models import Personnel, Statut
+
+    rnd = random.Random(seed + 1)
+    people = db.execute(
+        select(Personnel.id, Personnel.nom, Personnel.prenom, Personnel.statut)
+        .where(Personnel.equipe_id.is_not(None))
+        .order_by(Personnel.id)
+    ).all()
+    rows: list[list[str]] = []
+
+    def add(p, d: date, kind: str) -> None:
+        creneau, lib, compteur = AGATT_TYPES[kind]
+        rows.append([str(p.id), p.nom, p.prenom, d.strftime("%Y/%m/%d 00:00:00"), creneau, kind, lib, compteur])
+
+    for y in years:
+        for m in range(1, 13):
+            for day in range(1, calendar.monthrange(y, m)[1] + 1):
+                d = date(y, m, day)
+                for p in people:
+                    r = rnd.random()
+                    if p.statut in (Statut.PRO, Statut.DOUBLE) and r < 0.08:
+                        add(p, d, "G24" if r > 0.01 else "GA")
+                    elif p.statut != Statut.PRO and r < dispo_rate:
+                        add(p, d, rnd.choice(("DN", "DN", "DJ", "DAN", "DAJ", "N12", "J12")))
+    return rows
+
+
+def write_agatt_csv(path: str, rows: list[list[str]]) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        w = csv.writer(fh, delimiter=";", quoting=csv.QUOTE_ALL, lineterminator="\n")
+        w.writerow(AGATT_HEADER)
+        w.writerows(rows)
+
+
+def agatt_csv_bytes(rows: list[list[str]]) -> bytes:
+    import io
+    buf = io.StringIO()
+    w = csv.writer(buf, delimiter=";", quoting=csv.QUOTE_ALL, lineterminator="\n")
+    w.writerow(AGATT_HEADER)
+    w.writerows(rows)
+    return buf.getvalue().encode("utf-8")
+
+
+def reset_schema(engine) -> None:
+    """Supprime puis recrée toutes les tables (base dédiée au bench uniquement)."""
+    from app.db.base import Base
+    import app.db.models  # noqa: F401  (enregistre les tables)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def main() -> None:
+    from benchmarks import use_database
+
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--db-url", required=True, help="base dédiée : TOUTES les tables sont recréées")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--personnels", type=int, default=200)
+    ap.add_argument("--piquets", type=int, default=25)
+    ap.add_argument("--equipes", type=int, default=4)
+    ap.add_argument("--years", type=int, nargs="+", default=[2025, 2026])
+    ap.add_argument("--csv", help="écrit aussi un export AGATT synthétique à ce chemin")
+    args = ap.parse_args()
+
+    use_database(args.db_url)
+    from app.db.session import SessionLocal, engine
+
+    reset_schema(engine)
+    with SessionLocal() as db:
+        summary = populate(
+            db, seed=args.seed, years=tuple(args.years), n_equipes=args.equipes,
+            n_personnels=args.personnels, n_piquets=args.piquets,
+        )
+        print(summary)
+        if args.csv:
+            rows = agatt_rows(db, seed=args.seed, years=tuple(args.years))
+            write_agatt_csv(args.csv, rows)
+            print(f"{len(rows)} lignes AGATT → {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
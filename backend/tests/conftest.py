@@ -0,0 +1,49 @@
+# tests/conftest.py
+# Base SQLite jetable remplie par le générateur des benchmarks (lancer depuis backend/ :
+# python -m pytest -q). La config (Settings) est lue à l'import de `app` : la base est choisie
+# avant tout import applicatif.
+import shutil
+import tempfile
+
+import pytest
+
+from benchmarks import use_database
+
+_DB_DIR = tempfile.mkdtemp(prefix="feuille-garde-tests-")
+use_database(f"sqlite:///{_DB_DIR}/tests.db")
+
+# ~100k affectations : 11 ans de gardes, 200 agents, 25 piquets remplis à 80 %
+HISTORY_YEARS = tuple(range(2016, 2027))
+
+
+@pytest.fixture(scope="session")
+def dataset():
+    from app.db.session import SessionLocal, engine
+    from benchmarks.synthetic import populate, reset_schema
+
+    reset_schema(engine)
+    with SessionLocal() as db:
+        summary = populate(db, years=HISTORY_YEARS)
+    yield summary
+    engine.dispose()
+    shutil.rmtree(_DB_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client(dataset):
+    from fastapi.testclient import TestClient
+
+    import app.main as main_app
+    from app.core.security import create_access_token
+
+    with TestClient(main_app.app) as c:
+        c.headers["Authorization"] = "Bearer " + create_access_token(dataset["admin_email"], ["ADMIN"])
+        yield c
+
+
+@pytest.fixture
+def db(dataset):
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as s:
+        yield s
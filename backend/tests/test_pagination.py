@@ -0,0 +1,137 @@
+# tests/test_pagination.py
+# Pagination par curseur des routes de liste sur ~100k affectations (app/api/pagination.py)
+from datetime import date
+
+from sqlalchemy import func, select
+
+from app.api.pagination import DEFAULT_LIMIT, MAX_LIMIT, NEXT_CURSOR_HEADER, encode_cursor
+from app.db.models import Affectation, Indisponibilite, Personnel
+
+# borne large d'une ligne AffectationRead en JSON (~180 octets mesurés)
+MAX_ROW_BYTES = 250
+
+
+def _pages(client, url: str, params: dict) -> list:
+    """Toutes les pages d'un parcours par curseur (réponses HTTP, dans l'ordre)."""
+    pages, cursor = [], None
+    while True:
+        r = client.get(url, params=dict(params, cursor=cursor) if cursor else params)
+        assert r.status_code == 200, r.text
+        pages.append(r)
+        cursor = r.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return pages
+
+
+def _ids(pages: list) -> list[int]:
+    return [row["id"] for r in pages for row in r.json()]
+
+
+# =========================
+# 📏 Taille des réponses
+# =========================
+
+def test_history_has_100k_affectations(dataset, db):
+    assert db.scalar(select(func.count(Affectation.id))) >= 100_000
+
+
+def test_default_page_payload_is_bounded(client, db):
+    r = client.get("/affectations")
+    assert r.status_code == 200
+    assert len(r.json()) == DEFAULT_LIMIT
+    assert len(r.content) <= DEFAULT_LIMIT * MAX_ROW_BYTES
+
+
+def test_max_page_payload_is_bounded(client):
+    r = client.get("/affectations", params={"limit": MAX_LIMIT})
+    assert len(r.json()) == MAX_LIMIT
+    assert len(r.content) <= MAX_LIMIT * MAX_ROW_BYTES
+
+
+def test_deep_page_costs_as_much_as_first(client, db):
+    """Keyset : une page au fond de l'historique a la même taille que la première."""
+    last_id = db.scalar(select(func.max(Affectation.id)))
+    deep = client.get("/affectations", params={"cursor": encode_cursor([last_id - DEFAULT_LIMIT - 1])})
+    assert len(deep.json()) == DEFAULT_LIMIT
+    assert NEXT_CURSOR_HEADER in deep.headers
+    assert len(deep.content) <= DEFAULT_LIMIT * MAX_ROW_BYTES
+
+
+def test_server_filter_returns_only_the_agent_rows(client, db):
+    agent_id = db.scalar(
+        select(Affectation.personnel_id)
+        .group_by(Affectation.personnel_id).order_by(func.count().desc()).limit(1)
+    )
+    today = date(2026, 6, 1)
+    rows = client.get("/affectations", params={"personnel_id": agent_id, "date_from": today.isoformat()}).json()
+    assert rows and len(rows) < DEFAULT_LIMIT
+    assert {row["personnel_id"] for row in rows} == {agent_id}
+
+
+# =========================
+# 🔁 Parcours complet
+# =========================
+
+def test_affectations_traversal_has_no_gap_nor_duplicate(client, db):
+    pages = _pages(client, "/affectations", {"limit": MAX_LIMIT})
+    ids = _ids(pages)
+    expected = db.scalars(select(Affectation.id).order_by(Affectation.id)).all()
+    assert ids == expected
+    assert all(len(r.json()) == MAX_LIMIT for r in pages[:-1])
+    assert 0 < len(pages[-1].json()) <= MAX_LIMIT
+
+
+def test_composite_key_traversal_matches_sort_order(client, db):
+    """/personnels : clé (nom, prénom, id), homonymes compris ; petite page = nombreux curseurs."""
+    ids = _ids(_pages(client, "/personnels", {"limit": 7}))
+    expected = db.scalars(
+        select(Personnel.id).order_by(Personnel.nom, Personnel.prenom, Personnel.id)
+    ).all()
+    assert ids == expected
+
+
+def test_filtered_traversal_matches_query(client, db):
+    agent_id = db.scalar(select(Indisponibilite.personnel_id).limit(1))
+    ids = _ids(_pages(client, "/indisponibilites", {"personnel_id": agent_id, "limit": 3}))
+    expected = db.scalars(
+        select(Indisponibilite.id).where(Indisponibilite.personnel_id == agent_id).order_by(Indisponibilite.id)
+    ).all()
+    assert ids == expected and len(ids) > 3
+
+
+# =========================
+# 🚧 Limite par défaut et paramètres
+# =========================
+
+def test_default_limit_truncates_with_next_cursor(client, db):
+    """Sans ?limit : DEFAULT_LIMIT lignes et X-Next-Cursor, jamais une liste tronquée sans signal."""
+    r = client.get("/affectations")
+    first_ids = db.scalars(select(Affectation.id).order_by(Affectation.id).limit(DEFAULT_LIMIT)).all()
+    assert [row["id"] for row in r.json()] == first_ids
+    assert r.headers[NEXT_CURSOR_HEADER] == encode_cursor([first_ids[-1]])
+
+
+def test_last_page_has_no_cursor(client, db):
+    last_id = db.scalar(select(func.max(Affectation.id)))
+    r = client.get("/affectations", params={"cursor": encode_cursor([last_id - 1])})
+    assert [row["id"] for row in r.json()] == [last_id]
+    assert NEXT_CURSOR_HEADER not in r.headers
+
+
+def test_exact_fit_has_no_cursor(client, db):
+    """Autant de lignes restantes que la limite : pas de page suivante vide."""
+    last_id = db.scalar(select(func.max(Affectation.id)))
+    r = client.get("/affectations", params={"cursor": encode_cursor([last_id - 1]), "limit": 1})
+    assert len(r.json()) == 1
+    assert NEXT_CURSOR_HEADER not in r.headers
+
+
+def test_limit_bounds(client):
+    assert client.get("/affectations", params={"limit": MAX_LIMIT + 1}).status_code == 422
+    assert client.get("/affectations", params={"limit": 0}).status_code == 422
+
+
+def test_invalid_cursor(client):
+    assert client.get("/affectations", params={"cursor": "pas-un-curseur"}).status_code == 400
+    # curseur d'une autre route : nombre de valeurs différent de la clé de tri
+    assert client.get("/affectations", params={"cursor": encode_cursor(["A", "B", 1])}).status_code == 400
@@ -17,11 +17,24 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// Listes paginées (keyset) : suit le header X-Next-Cursor jusqu'à la dernière page
+export async function getAllPages<T>(url: string, params: Record<string, any> = {}): Promise<T[]> {
+  const out: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const r = await api.get(url, { params: cursor ? { ...params, cursor } : params });
+    out.push(...(r.data as T[]));
+    cursor = r.headers["x-next-cursor"] || undefined;
+  } while (cursor);
+  return out;
+}
+
 export function apiErrorMessage(err: unknown): string {
   const e = err as AxiosError<any>;
   const data = e?.response?.data;
   const d = data?.detail;
   if (typeof d === "string") return d;
+  if (d && typeof d === "object" && typeof d.message === "string") return d.message; // 409 / 412
   if (Array.isArray(d)) return d.map((x) => x?.msg ?? JSON.stringify(x)).join(" | ");
   if (typeof data === "string") return data;
   return e.message || "Erreur réseau";
@@ -74,6 +87,7 @@ export type Garde = {
   // NEW: pour le verrou
   validated?: boolean;
   validated_at?: string | null;
+  version?: number; // incrémentée à chaque changement de la garde ou de ses affectations
 };
 
 export type Affectation = {
@@ -86,9 +100,49 @@ export type Affectation = {
   // ✅ Cases OPE (BDD)
   ope_checked?: boolean;            // renvoyé par le backend
   ope_checked_at?: string | null;   // renvoyé par le backend
+  version?: number;                 // verrou optimiste (If-Match)
 };
 
 
+// Changements d'une garde depuis `since_version` (réponse des mutations d'affectation)
+export type GardeDelta = {
+  garde_id: number;
+  version: number;
+  since_version: number;
+  full: boolean; // true : remplacer l'état local (listes complètes)
+  garde?: Garde | null;
+  affectations: Affectation[];
+  indisponibilites: { id: number; garde_id: number; personnel_id: number }[];
+  deleted_affectations: number[];
+  deleted_indisponibilites: number[];
+};
+
+// Verrou optimiste : ETag à renvoyer en If-Match (même format que le backend)
+export function gardeEtag(g?: { id: number; version?: number } | null): string | undefined {
+  return g && g.version !== undefined ? `"garde-${g.id}-${g.version}"` : undefined;
+}
+export function affectationEtag(a?: { id: number; version?: number } | null): string | undefined {
+  return a && a.version !== undefined ? `"affectation-${a.id}-${a.version}"` : undefined;
+}
+
+// Conflit d'écriture (409 : course perdue, 412 : If-Match périmé) avec l'état courant de la garde
+export type WriteConflict = { code: "conflict" | "precondition_failed"; message: string; current: GardeDelta | null };
+
+export function writeConflictOf(err: unknown): WriteConflict | null {
+  const e = err as AxiosError<any>;
+  const status = e?.response?.status;
+  const d = e?.response?.data?.detail;
+  if ((status === 409 || status === 412) && d && typeof d === "object" && "code" in d) return d as WriteConflict;
+  return null;
+}
+
+// Applique un delta à une liste locale (affectations ou indisponibilités d'une garde)
+export function applyDelta<T extends { id: number }>(list: T[] | undefined, rows: T[], deleted: number[], full = false): T[] {
+  if (full) return [...rows];
+  const drop = new Set<number>([...deleted, ...rows.map(r => r.id)]);
+  return [...(list || []).filter(x => !drop.has(x.id)), ...rows];
+}
+
 export type SuggestionMini = { id: number; nom: string; prenom: string; equipe_id?: number|null; };
 
 /* ============================
@@ -145,7 +199,7 @@ export async function removeRoleFromPersonnel(personnel_id: number, role: Role){
    PERSONNELS
 ============================ */
 export async function listPersonnels(equipe_id?: number): Promise<Personnel[]>{
-  const r = await api.get("/personnels", { params: equipe_id ? { equipe_id } : {} }); return r.data;
+  return getAllPages<Personnel>("/personnels", equipe_id ? { equipe_id } : {});
 }
 export async function getPersonnel(id: number): Promise<Personnel>{
   const r = await api.get(`/personnels/${id}`); return r.data;
@@ -303,9 +357,9 @@ export async function generateYear(year: number) {
   return r.data;
 }
 
-// Assigner une équipe à un jour/slot
-export async function assignTeam(payload: { date: string; slot: 'JOUR'|'NUIT'; equipe_id: number }) {
-  const r = await api.put('/gardes/assign_team', payload);
+// Assigner une équipe à un jour/slot (ifMatch : ETag de la garde lue → 412 si modifiée depuis)
+export async function assignTeam(payload: { date: string; slot: 'JOUR'|'NUIT'; equipe_id: number }, ifMatch?: string) {
+  const r = await api.put('/gardes/assign_team', payload, { headers: ifMatch ? { 'If-Match': ifMatch } : {} });
   return r.data; // GardeRead
 }
 
@@ -323,6 +377,30 @@ export async function validateMonth(payload: {year:number; month:number; equipe_
   return r.data;
 }
 
+export type ValidationJob = {
+  id: number;
+  type: string;
+  status: "pending" | "running" | "done" | "failed" | "superseded";
+  annee: number;
+  mois: number;
+  equipe_id: number;
+  mails_total: number;
+  mails_sent: number;
+  mails_failed: number;
+  mails_pending: number;
+  pdf_size?: number | null;
+  error?: string | null;
+  created_at: string;
+  started_at?: string | null;
+  finished_at?: string | null;
+};
+
+// Suivi du job lancé par validateMonth (PDF + mails en tâche de fond)
+export async function getJob(jobId: number) {
+  const r = await api.get(`/jobs/${jobId}`);
+  return r.data as ValidationJob;
+}
+
 // ✅ Dévalider le mois (admin/off uniquement)
 export async function unvalidateMonth(payload: { year: number; month: number; equipe_id?: number }) {
   const params: any = { annee: payload.year, mois: payload.month };
@@ -350,45 +428,157 @@ export async function listMyUpcomingAffectations(limit = 10, fromISO?: string):
   return r.data as MyUpcoming[];
 }
 
+/* ============================
+   AGENDA (abonnement iCalendar)
+============================ */
+export type AgendaLink = { token: string; url: string; webcal_url: string };
+
+export async function getAgendaLink(): Promise<AgendaLink> {
+  const r = await api.get('/agenda/link');
+  return r.data as AgendaLink;
+}
+export async function rotateAgendaLink(): Promise<AgendaLink> {
+  const r = await api.post('/agenda/link/rotate');
+  return r.data as AgendaLink;
+}
+
+/* ============================
+   CHANGEMENTS EN DIRECT (SSE)
+============================ */
+export type ChangeEvent = {
+  type: string; // "affectation.created" | "indisponibilite.deleted" | "garde.updated" | "resync" ...
+  garde_id?: number;
+  garde_version?: number; // version de la garde après ce changement (If-Match de garde)
+  year?: number;
+  month?: number;
+  equipe_ids?: (number | null)[];
+  affectation?: Partial<Affectation> & { id: number };
+  indisponibilite?: { id: number; garde_id?: number; personnel_id?: number };
+  garde?: Partial<Garde> & { id: number };
+};
+
+const CHANGE_TYPES = [
+  "affectation.created", "affectation.updated", "affectation.deleted",
+  "indisponibilite.created", "indisponibilite.updated", "indisponibilite.deleted",
+  "garde.created", "garde.updated", "garde.deleted", "resync",
+];
+
+// Flux des modifications du mois (EventSource ne permet pas d'en-tête : ticket court en paramètre).
+// Renvoie la fonction de fermeture. Coupure : EventSource rebranche seul, ou un nouveau ticket
+// est demandé si le sien a expiré ; à chaque (re)connexion on reçoit "hello" → le client
+// recharge pour rattraper ce qu'il a pu manquer.
+export function openChangeStream(
+  params: { year: number; month: number; equipe_id?: number | '' },
+  onEvent: (ev: ChangeEvent) => void,
+): () => void {
+  const q = new URLSearchParams({ year: String(params.year), month: String(params.month) });
+  if (params.equipe_id !== undefined && params.equipe_id !== '') q.set("equipe_id", String(params.equipe_id));
+  const base = (api.defaults.baseURL || "").replace(/\/$/, "");
+
+  let es: EventSource | null = null;
+  let closed = false;
+  let connected = false;
+  let retry: ReturnType<typeof setTimeout> | undefined;
+
+  // ticket court à chaque (re)branchement : le jeton de connexion ne va jamais dans l'URL
+  async function connect() {
+    if (closed) return;
+    let ticket: string;
+    try {
+      ticket = (await api.post("/changes/ticket")).data.ticket;
+    } catch {
+      retry = setTimeout(connect, 10000);  // hors ligne / jeton échu : nouvel essai plus tard
+      return;
+    }
+    if (closed) return;
+    q.set("ticket", ticket);
+    es = new EventSource(`${base}/changes/stream?${q.toString()}`);
+    es.addEventListener("hello", () => {
+      // reconnexion : des événements ont pu être perdus pendant la coupure
+      if (connected) onEvent({ type: "resync" });
+      connected = true;
+    });
+    for (const t of CHANGE_TYPES) {
+      es.addEventListener(t, (e) => {
+        try { onEvent(JSON.parse((e as MessageEvent).data)); } catch { /* ligne illisible ignorée */ }
+      });
+    }
+    // le ticket a expiré entre-temps : EventSource ne peut pas rebrancher seul avec la même URL
+    const reconnect = (delay: number) => {
+      es?.close();
+      es = null;
+      if (!closed) retry = setTimeout(connect, delay);
+    };
+    es.addEventListener("expired", () => reconnect(0));
+    es.onerror = () => { if (es?.readyState === EventSource.CLOSED) reconnect(3000); };
+  }
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retry);
+    es?.close();
+  };
+}
+
 /* ============================
    AFFECTATIONS
 ============================ */
-export async function listAffectations(garde_id?: number){
-  const r = await api.get("/affectations", { params: garde_id ? { garde_id } : {} });
-  return r.data as Affectation[];
+export type AffectationFilters = {
+  personnel_id?: number;
+  equipe_id?: number;
+  date_from?: string; // YYYY-MM-DD (date de garde)
+  date_to?: string;
+};
+
+export async function listAffectations(garde_id?: number, filters: AffectationFilters = {}){
+  return getAllPages<Affectation>("/affectations", garde_id ? { garde_id, ...filters } : filters);
 }
 
+// since_version : version de la garde connue du client → le delta renvoyé couvre aussi
+// les changements faits par d'autres depuis
 export async function createAffectation(payload: {
   garde_id: number;
   piquet_id: number;
   personnel_id: number;
   statut_service?: "pro" | "volontaire";  // 🆕 optionnel
-}) {
-  const r = await api.post("/affectations", payload);
-  return r.data as Affectation;
+}, since_version?: number) {
+  const r = await api.post("/affectations", payload, { params: { since_version } });
+  return r.data as GardeDelta;
 }
 
-export async function deleteAffectation(id: number){
-  const r = await api.delete(`/affectations/${id}`);
-  return r.data;
+export async function deleteAffectation(id: number, since_version?: number, ifMatch?: string){
+  const r = await api.delete(`/affectations/${id}`, {
+    params: { since_version },
+    headers: ifMatch ? { "If-Match": ifMatch } : {},
+  });
+  return r.data as GardeDelta;
+}
+
+// Resynchronisation d'une garde (0 : état complet)
+export async function getGardeChanges(garde_id: number, since_version: number) {
+  const r = await api.get(`/gardes/${garde_id}/changes`, { params: { since_version } });
+  return r.data as GardeDelta;
 }
 
 // ✅ Cocher / décocher 1 affectation (case agent)
 export async function patchAffectationOpeChecked(
   affectation_id: number,
-  payload: { ope_checked: boolean }
+  payload: { ope_checked: boolean },
+  since_version?: number
 ) {
-  const r = await api.patch(`/affectations/${affectation_id}`, payload);
-  return r.data as Affectation;
+  const r = await api.patch(`/affectations/${affectation_id}`, payload, { params: { since_version } });
+  return r.data as GardeDelta;
 }
 
 // ✅ Cocher / décocher toutes les affectations d'une garde (case "Saisie terminée")
 export async function bulkOpeCheckForGarde(
   garde_id: number,
-  payload: { checked: boolean }
+  payload: { checked: boolean },
+  since_version?: number
 ) {
-  const r = await api.post(`/affectations/garde/${garde_id}/ope-check`, payload);
-  return r.data as { ok: boolean; garde_id: number; count: number; checked: boolean };
+  const r = await api.post(`/affectations/garde/${garde_id}/ope-check`, payload, { params: { since_version } });
+  return r.data as GardeDelta;
 }
 
 /* ============================
@@ -412,8 +602,8 @@ export async function deletePiquetCompetence(piquet_id: number, competence_id: n
 }
 
 // EquipeCalendarPage.tsx
-export async function assignTeamToSlot(payload: { date: string; slot: "JOUR"|"NUIT"; equipe_id: number }) {
-  return assignTeam(payload);
+export async function assignTeamToSlot(payload: { date: string; slot: "JOUR"|"NUIT"; equipe_id: number }, ifMatch?: string) {
+  return assignTeam(payload, ifMatch);
 }
 export async function clearTeamFromSlot(payload: { date: string; slot: "JOUR"|"NUIT" }) {
   return clearTeam(payload);
@@ -454,8 +644,7 @@ export async function listIndisponibilites(garde_id?: number, personnel_id?: num
   const params: Record<string, number> = {}
   if (garde_id !== undefined) params.garde_id = garde_id
   if (personnel_id !== undefined) params.personnel_id = personnel_id
-  const r = await api.get('/indisponibilites', { params });
-  return r.data as Indisponibilite[];
+  return getAllPages<Indisponibilite>('/indisponibilites', params);
 }
 
 export async function createIndisponibilite(garde_id: number, personnel_id: number): Promise<Indisponibilite> {
@@ -463,6 +652,26 @@ export async function createIndisponibilite(garde_id: number, personnel_id: numb
   return r.data as Indisponibilite;
 }
 
+export type IndispoBulkResult = {
+  created: number;
+  skipped: number;
+  locked: number;
+  indisponibilites: Indisponibilite[];
+};
+
+/** Période (+ créneaux / équipe) ou liste de gardes ; gardes déjà déclarées ignorées. */
+export async function createIndisponibilitesBulk(payload: {
+  personnel_id: number;
+  date_from?: string;
+  date_to?: string;
+  slots?: ('JOUR' | 'NUIT')[];
+  equipe_id?: number;
+  garde_ids?: number[];
+}): Promise<IndispoBulkResult> {
+  const r = await api.post('/indisponibilites/bulk', payload);
+  return r.data as IndispoBulkResult;
+}
+
 export async function deleteIndisponibilite(id: number): Promise<void> {
   await api.delete(`/indisponibilites/${id}`);
 }
@@ -489,6 +698,43 @@ export async function triggerGmailFetch(): Promise<{ status: string; detail: str
   return r.data;
 }
 
+/* ============================
+   CANDIDATS (panneau d'ajout : suggestions + dispos AGATT + pros de garde)
+============================ */
+export type Candidate = DispoAgatt & {
+  eligible: boolean;   // affectable sur le piquet (une indisponibilité n'est qu'indicative)
+  reasons: string[];
+};
+
+export type GardeCandidates = {
+  garde_id: number;
+  piquet_id: number;
+  suggestions: Candidate[];
+  dispos_agatt: Candidate[];
+  pros_de_garde: Candidate[];
+  matrix?: CandidateMatrix | null;   // with_matrix : tous les piquets, même contexte serveur
+};
+
+export async function getGardeCandidates(garde_id: number, piquet_id: number, with_matrix = false): Promise<GardeCandidates> {
+  const r = await api.get(`/gardes/${garde_id}/candidates`, { params: { piquet_id, ...(with_matrix ? { with_matrix } : {}) } });
+  return r.data as GardeCandidates;
+}
+
+/** Agents affectables sur chaque piquet d'une garde (changer de piquet sans nouvel appel). */
+export type CandidateMatrix = {
+  garde_id: number;
+  version: number;
+  eligible: Record<number, number[]>;   // piquet → agents actifs affectables
+  team: number[];                       // agents actifs de l'équipe de la garde
+  agatt: Record<string, number[]>;      // DJ / DN / DAJ / DAN / G24 → agents
+  indispos: number[];
+};
+
+export async function getCandidateMatrix(garde_id: number): Promise<CandidateMatrix> {
+  const r = await api.get(`/gardes/${garde_id}/candidate-matrix`);
+  return r.data as CandidateMatrix;
+}
+
 export async function listDisposAgatt(
   date: string,
   slot: 'JOUR' | 'NUIT',
@@ -583,3 +829,20 @@ export async function downloadPdfFeuille(year: number, month: number, equipe_id:
   URL.revokeObjectURL(url);
 }
 
+
+export async function downloadPdfFeuillesZip(year: number, month?: number): Promise<void> {
+  const r = await api.get("/gardes/pdf-feuilles.zip", {
+    params: month ? { annee: year, mois: month } : { annee: year },
+    responseType: "blob",
+  });
+  const url = URL.createObjectURL(new Blob([r.data], { type: "application/zip" }));
+  const a = document.createElement("a");
+  const disposition: string = r.headers["content-disposition"] || "";
+  const match = disposition.match(/filename="?([^"]+)"?/);
+  a.href = url;
+  a.download = match ? match[1] : `feuilles_garde_${year}${month ? `_${month}` : ""}.zip`;
+  document.body.appendChild(a);
+  a.click();
+  document.body.removeChild(a);
+  URL.revokeObjectURL(url);
+}
@@ -6,6 +6,8 @@ import {
   generateMonthAll,
   generateYear,
   listGardes, // ✅ on récupère TOUTES les gardes du mois (avec ou sans équipe)
+  gardeEtag,
+  writeConflictOf,
 } from '../api'
 import './equipe-calendar.css'
 
@@ -17,6 +19,7 @@ type Garde = {
   equipe_id:number | null
   is_holiday:boolean
   is_weekend:boolean
+  version?:number
 }
 
 export default function EquipeCalendarPage() {
@@ -104,7 +107,8 @@ export default function EquipeCalendarPage() {
     if (!equipe_id_str) return
     const equipe_id = Number(equipe_id_str)
     try {
-      const g = await assignTeamToSlot({ date: dateIso, slot, equipe_id })
+      // If-Match : n'écrase pas une équipe posée entre-temps par un autre planificateur
+      const g = await assignTeamToSlot({ date: dateIso, slot, equipe_id }, gardeEtag(gardesByKey[`${dateIso}|${slot}`]))
       // MAJ locale
       setGardesByKey(prev => ({
         ...prev,
@@ -115,10 +119,17 @@ export default function EquipeCalendarPage() {
           equipe_id,
           is_holiday: g?.is_holiday ?? prev[`${dateIso}|${slot}`]?.is_holiday ?? false,
           is_weekend: g?.is_weekend ?? prev[`${dateIso}|${slot}`]?.is_weekend ?? false,
+          version: g?.version,
         }
       }))
     } catch (e:any) {
-      alert(e?.message || 'Affectation équipe impossible')
+      const c = writeConflictOf(e)
+      if (c) {
+        alert(c.message)
+        await loadMonth()
+      } else {
+        alert(e?.message || 'Affectation équipe impossible')
+      }
     }
   }
 
@@ -5,6 +5,8 @@ import {
   listGardes,      // on charge les gardes du mois courant + suivant (sans filtre équipe)
   listEquipes,     // pour afficher l'équipe de chaque garde
   getPiquets,      // pour afficher le code du piquet
+  getAgendaLink, rotateAgendaLink, // abonnement iCalendar
+  type AgendaLink,
   type Equipe as EqType,
 } from "../api";
 
@@ -30,6 +32,7 @@ export default function Home() {
   const [gardes, setGardes] = useState<Garde[]>([]);
   const [equipesMap, setEquipesMap] = useState<Record<number, EquipeMini>>({});
   const [piquetsMap, setPiquetsMap] = useState<Record<number, Piquet>>({});
+  const [agenda, setAgenda] = useState<AgendaLink | null>(null);
 
   useEffect(() => {
     (async () => {
@@ -42,8 +45,9 @@ export default function Home() {
         // 2) Mes affectations (toutes)
         let myAffects: Affectation[] = [];
         try {
-          const all = await listAffectations(); // ton API accepte sans params (sinon adapter en ?personnel_id=me.id)
-          myAffects = (all || []).filter((a: Affectation) => a.personnel_id === me.id);
+          // filtré côté serveur : mes affectations à partir d'aujourd'hui uniquement
+          const fromISO = new Date().toISOString().slice(0, 10);
+          myAffects = await listAffectations(undefined, { personnel_id: me.id, date_from: fromISO });
         } catch (e: any) {
           throw new Error(e?.message || "Impossible de récupérer vos affectations.");
         }
@@ -118,6 +122,27 @@ export default function Home() {
     <div>
       <h2 style={{ marginBottom: 16 }}>🗓️ Mes prochaines gardes</h2>
 
+      {/* Abonnement : les gardes validées apparaissent dans l'agenda du téléphone */}
+      <div style={{ display: "flex", alignItems: "center", gap: 8, flexWrap: "wrap", marginBottom: 16 }}>
+        {agenda ? (
+          <>
+            <a className="chip" href={agenda.webcal_url}>📅 S'abonner dans mon agenda</a>
+            <input readOnly value={agenda.url} onFocus={(e) => e.currentTarget.select()} style={{ flex: 1, minWidth: 200 }} />
+            <button
+              onClick={async () => {
+                if (confirm("Générer un nouveau lien ? L'ancien abonnement cessera de fonctionner.")) {
+                  setAgenda(await rotateAgendaLink());
+                }
+              }}
+            >
+              🔄 Nouveau lien
+            </button>
+          </>
+        ) : (
+          <button onClick={async () => setAgenda(await getAgendaLink())}>📅 Lien d'abonnement agenda</button>
+        )}
+      </div>
+
       {loading ? (
         <div className="home-skel-list">
           {Array.from({ length: 5 }).map((_, i) => (
@@ -1,6 +1,6 @@
 import React, { useEffect, useMemo, useState } from 'react'
 import {
-  listGardes, listIndisponibilites, createIndisponibilite, deleteIndisponibilite,
+  listGardes, listIndisponibilites, createIndisponibilite, createIndisponibilitesBulk, deleteIndisponibilite,
   type Indisponibilite,
 } from '../api'
 import { useAuth } from '../auth/AuthContext'
@@ -28,6 +28,7 @@ export default function MesIndisponibilitesPage() {
   const [gardes, setGardes] = useState<Garde[]>([])
   const [myIndispos, setMyIndispos] = useState<Indisponibilite[]>([])
   const [loading, setLoading] = useState(false)
+  const [bulkSlot, setBulkSlot] = useState<'' | 'JOUR' | 'NUIT'>('')
 
   function formatDate(iso: string) {
     const d = new Date(iso + 'T00:00:00')
@@ -76,6 +77,35 @@ export default function MesIndisponibilitesPage() {
     }
   }
 
+  async function declareMonth() {
+    if (!myId || !myEquipeId) return
+    const label = bulkSlot === 'JOUR' ? 'toutes les gardes de jour' : bulkSlot === 'NUIT' ? 'toutes les gardes de nuit' : 'toutes les gardes'
+    const ok = window.confirm(
+      `Déclarer une indisponibilité sur ${label} du mois ?\n\n` +
+      '⚠️ Cette déclaration est indicative.\n' +
+      'Votre chef d\'équipe se réserve le droit de vous intégrer dans la garde ' +
+      'malgré votre indisponibilité déclarée.'
+    )
+    if (!ok) return
+    const pad = (n: number) => String(n).padStart(2, '0')
+    const lastDay = new Date(year, month, 0).getDate()
+    try {
+      const res = await createIndisponibilitesBulk({
+        personnel_id: myId,
+        date_from: `${year}-${pad(month)}-01`,
+        date_to: `${year}-${pad(month)}-${pad(lastDay)}`,
+        slots: bulkSlot ? [bulkSlot] : undefined,
+        equipe_id: myEquipeId,
+      })
+      setMyIndispos(prev => [...prev, ...res.indisponibilites])
+      if (res.locked > 0) {
+        alert(`${res.created} indisponibilité(s) déclarée(s) — ${res.locked} garde(s) à feuille validée ignorée(s).`)
+      }
+    } catch (e: any) {
+      alert(e?.response?.data?.detail || e?.message || 'Erreur')
+    }
+  }
+
   const gardesSorted = useMemo(() => {
     return [...gardes].sort((a, b) => {
       const ta = new Date(a.date).getTime()
@@ -118,6 +148,15 @@ export default function MesIndisponibilitesPage() {
             <option key={y} value={y}>{y}</option>
           ))}
         </select>
+        <span className="mi-toolbar-spacer" />
+        <select value={bulkSlot} onChange={e => setBulkSlot(e.target.value as '' | 'JOUR' | 'NUIT')}>
+          <option value="">Jour et nuit</option>
+          <option value="JOUR">Jour</option>
+          <option value="NUIT">Nuit</option>
+        </select>
+        <button type="button" onClick={declareMonth} disabled={loading || gardesSorted.length === 0}>
+          🚫 Indisponible tout le mois
+        </button>
       </div>
 
       {loading ? (
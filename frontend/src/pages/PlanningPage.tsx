@@ -1,14 +1,21 @@
-import React, { useEffect, useMemo, useState } from 'react'
+import React, { useEffect, useMemo, useRef, useState } from 'react'
 import {
   listEquipes, listPiquets, listGardes, generateMonth,
   listAffectations, createAffectation, deleteAffectation,
   suggestPersonnels, listPersonnels, validateMonth, unvalidateMonth,
   listIndisponibilites, createIndisponibilite, deleteIndisponibilite,
-  listDisposAgatt,
-  listProDeGarde,
+  getGardeCandidates,
   downloadPdfFeuille,
+  openChangeStream,
+  applyDelta,
+  affectationEtag,
+  apiErrorMessage,
+  writeConflictOf,
+  type ChangeEvent,
+  type GardeDelta,
   type Indisponibilite,
-  type DispoAgatt,
+  type Candidate,
+  type CandidateMatrix,
 } from '../api'
 import { useAuth } from '../auth/AuthContext'
 import './planning.css'
@@ -24,6 +31,7 @@ type Garde = {
   equipe_id: number | null
   validated?: boolean
   validated_at?: string | null
+  version?: number
 }
 
 type Piquet = {
@@ -50,6 +58,7 @@ type Affectation = {
   personnel_id: number
   created_at?: string
   statut_service?: 'pro' | 'volontaire' | null
+  version?: number
 }
 
 type Personnel = {
@@ -84,6 +93,10 @@ export default function PlanningPage() {
   const [equipes, setEquipes] = useState<Equipe[]>([])
   const [piquets, setPiquets] = useState<Piquet[]>([])
   const [gardes, setGardes] = useState<Garde[]>([])
+  const gardesRef = useRef<Garde[]>([])
+  gardesRef.current = gardes
+  // matrices de candidats par garde (valables pour la version de garde reçue)
+  const matrixCache = useRef<Map<number, CandidateMatrix>>(new Map())
   const [affByGarde, setAffByGarde] = useState<Record<number, Affectation[]>>({})
   const [indisByGarde, setIndisByGarde] = useState<Record<number, Indisponibilite[]>>({})
   const [allPersonnels, setAllPersonnels] = useState<Personnel[]>([])
@@ -158,13 +171,13 @@ export default function PlanningPage() {
   // panneau “ajouter”
   const [panel, setPanel] = useState<{ garde: Garde; piquet: Piquet } | null>(null)
   const [search, setSearch] = useState('')
-  const [suggests, setSuggests] = useState<Personnel[]>([])
+  const [suggests, setSuggests] = useState<Candidate[]>([])
   const [loadingSuggests, setLoadingSuggests] = useState(false)
   const [searchResults, setSearchResults] = useState<Personnel[]>([])
   const [loadingSearch, setLoadingSearch] = useState(false)
-  const [disposAgatt, setDisposAgatt] = useState<DispoAgatt[]>([])
+  const [disposAgatt, setDisposAgatt] = useState<Candidate[]>([])
   const [loadingDispos, setLoadingDispos] = useState(false)
-  const [proDeGarde, setProDeGarde] = useState<DispoAgatt[]>([])
+  const [proDeGarde, setProDeGarde] = useState<Candidate[]>([])
   const [loadingPro, setLoadingPro] = useState(false)
 
   // ---- LOAD BASE ----
@@ -178,6 +191,7 @@ export default function PlanningPage() {
   }, [])
 
   async function loadMonth() {
+    matrixCache.current.clear()
     const equipeFilter =
       isChef ? (myEquipeId ?? undefined)
         : (equipeId !== '' ? Number(equipeId) : undefined)
@@ -197,6 +211,70 @@ export default function PlanningPage() {
 
   useEffect(() => { loadMonth() }, [year, month, equipeId, isChef, myEquipeId])
 
+  // ---- CHANGEMENTS EN DIRECT (autres planificateurs) ----
+  // deltas appliqués sur place ; "resync" (ou reconnexion) → rechargement du mois
+  useEffect(() => {
+    const equipeFilter =
+      isChef ? (myEquipeId ?? undefined)
+        : (equipeId !== '' ? Number(equipeId) : undefined)
+
+    function upsert<T extends { id: number }>(list: T[] | undefined, row: Partial<T> & { id: number }): T[] {
+      const cur = list || []
+      const i = cur.findIndex(x => x.id === row.id)
+      if (i < 0) return [...cur, row as T]
+      const copy = [...cur]
+      copy[i] = { ...copy[i], ...row }
+      return copy
+    }
+
+    function apply(ev: ChangeEvent) {
+      const gid = ev.garde_id
+      // une affectation ailleurs peut changer les enchaînements : matrices à recalculer
+      matrixCache.current.clear()
+      if (ev.type === 'resync' || ev.type === 'garde.created' || ev.type === 'garde.deleted') {
+        loadMonth()
+        return
+      }
+      const gv = ev.garde_version
+      if (gv !== undefined && gid !== undefined) {
+        // la garde a changé de version (ici ou via une affectation) : If-Match / since_version à jour
+        setGardes(prev => prev.map(g => (g.id === gid && (g.version ?? 0) < gv ? { ...g, version: gv } : g)))
+      }
+      if (ev.affectation && gid !== undefined) {
+        const row = ev.affectation
+        setAffByGarde(prev => {
+          if (!(gid in prev)) return prev // garde hors de la vue
+          const list = ev.type === 'affectation.deleted'
+            ? prev[gid].filter(a => a.id !== row.id)
+            : upsert(prev[gid], row as any)
+          return { ...prev, [gid]: list }
+        })
+      } else if (ev.indisponibilite && gid !== undefined) {
+        const row = ev.indisponibilite
+        setIndisByGarde(prev => {
+          if (!(gid in prev)) return prev
+          const list = ev.type === 'indisponibilite.deleted'
+            ? prev[gid].filter(i => i.id !== row.id)
+            : upsert(prev[gid], row as any)
+          return { ...prev, [gid]: list }
+        })
+      } else if (ev.garde) {
+        const row = ev.garde as Partial<Garde> & { id: number }
+        const leaves = equipeFilter !== undefined && row.equipe_id !== undefined && row.equipe_id !== equipeFilter
+        if (gardesRef.current.some(g => g.id === row.id)) {
+          setGardes(prev => leaves
+            ? prev.filter(g => g.id !== row.id)
+            : prev.map(g => (g.id === row.id ? { ...g, ...row } : g)))
+        } else if (!leaves) {
+          // garde qui entre dans la vue (équipe assignée) : ses affectations ne sont pas chargées
+          loadMonth()
+        }
+      }
+    }
+
+    return openChangeStream({ year, month, equipe_id: equipeFilter }, apply)
+  }, [year, month, equipeId, isChef, myEquipeId])
+
   useEffect(() => {
     const all = filteredGardes
     const validated = all.length > 0 && all.every(g => (g as any).validated === true)
@@ -220,6 +298,37 @@ export default function PlanningPage() {
     return list.find(a => a.piquet_id === piquetId)
   }
 
+  // mêmes listes que GET /gardes/{id}/candidates, motifs détaillés en moins
+  function candidatesFromMatrix(m: CandidateMatrix, g: Garde, p: Piquet) {
+    const byId = new Map(allPersonnels.map(x => [x.id, x]))
+    const eligible = new Set(m.eligible[p.id] || [])
+    const indispos = new Set(m.indispos)
+    const toCandidate = (id: number): Candidate[] => {
+      const x = byId.get(id)
+      if (!x) return []
+      const ok = eligible.has(id)
+      const reasons = [
+        ...(ok ? [] : ['non affectable sur ce piquet']),
+        ...(indispos.has(id) ? ['indisponibilité déclarée'] : []),
+      ]
+      return [{
+        id, nom: x.nom, prenom: x.prenom, grade: (x as any).grade ?? '',
+        equipe_id: x.equipe_id, statut: x.statut ?? '', eligible: ok, reasons,
+      }]
+    }
+    const byName = (a: Candidate, b: Candidate) =>
+      a.nom.localeCompare(b.nom) || a.prenom.localeCompare(b.prenom) || a.id - b.id
+    const types = g.slot === 'NUIT'
+      ? (p.is_astreinte ? ['DN', 'DAN'] : ['DN'])
+      : (p.is_astreinte ? ['DJ', 'DAJ'] : ['DJ'])
+    const dispoIds = new Set(types.flatMap(t => m.agatt[t] || []))
+    return {
+      suggestions: m.team.filter(id => eligible.has(id)).flatMap(toCandidate),
+      dispos_agatt: [...dispoIds].flatMap(toCandidate).sort(byName),
+      pros_de_garde: (m.agatt['G24'] || []).flatMap(toCandidate),
+    }
+  }
+
   async function openPanel(g: Garde, p: Piquet) {
     if (!canModify) return
     setPanel({ garde: g, piquet: p })
@@ -229,20 +338,27 @@ export default function PlanningPage() {
     setDisposAgatt([])
     setProDeGarde([])
 
-    const isAstreinte = (p as any).is_astreinte === true
+    // autre piquet d'une garde déjà ouverte : listes tirées de la matrice, sans appel
+    const cached = matrixCache.current.get(g.id)
+    if (cached && cached.version === g.version) {
+      const res = candidatesFromMatrix(cached, g, p)
+      setSuggests(res.suggestions)
+      setDisposAgatt(res.dispos_agatt)
+      setProDeGarde(res.pros_de_garde)
+      return
+    }
 
     setLoadingSuggests(true)
     setLoadingDispos(true)
     setLoadingPro(true)
     try {
-      const [sugRes, disposRes, proRes] = await Promise.all([
-        suggestPersonnels(g.id, p.id),
-        listDisposAgatt(g.date, g.slot, isAstreinte, p.id),
-        listProDeGarde(g.date),
-      ])
-      setSuggests(sugRes as any)
-      setDisposAgatt(disposRes)
-      setProDeGarde(proRes)
+      // les trois listes et la matrice de tous les piquets (pour les suivants) en un appel,
+      // calculées sur un seul contexte de garde côté serveur
+      const res = await getGardeCandidates(g.id, p.id, true)
+      if (res.matrix) matrixCache.current.set(g.id, res.matrix)
+      setSuggests(res.suggestions)
+      setDisposAgatt(res.dispos_agatt)
+      setProDeGarde(res.pros_de_garde)
     } finally {
       setLoadingSuggests(false)
       setLoadingDispos(false)
@@ -250,22 +366,45 @@ export default function PlanningPage() {
     }
   }
 
+  // version connue d'une garde (envoyée aux mutations : le delta rattrape aussi les autres)
+  function versionOf(gardeId: number) {
+    return gardesRef.current.find(g => g.id === gardeId)?.version
+  }
+
+  // réponse d'une mutation : affectations / indisponibilités changées depuis notre version
+  function applyGardeDelta(d: GardeDelta) {
+    setAffByGarde(prev => ({
+      ...prev,
+      [d.garde_id]: applyDelta(prev[d.garde_id], d.affectations as any, d.deleted_affectations, d.full),
+    }))
+    setIndisByGarde(prev => ({
+      ...prev,
+      [d.garde_id]: applyDelta(prev[d.garde_id], d.indisponibilites as any, d.deleted_indisponibilites, d.full),
+    }))
+    setGardes(prev => prev.map(g => (g.id === d.garde_id ? { ...g, ...(d.garde || {}), version: d.version } : g)))
+  }
+
+  // conflit d'écriture (autre planificateur) : état courant de la garde appliqué, puis message
+  function onWriteError(e: unknown, fallback: string) {
+    const c = writeConflictOf(e)
+    if (c?.current) applyGardeDelta(c.current)
+    alert(c?.message || apiErrorMessage(e) || fallback)
+  }
+
   // choisit le statut pour un double via 2 boutons
   async function confirmStatutChoice(choice: StatutService) {
     if (!statutChoice) return
     try {
-      await createAffectation({
+      const delta = await createAffectation({
         garde_id: statutChoice.gardeId,
         piquet_id: statutChoice.piquetId,
         personnel_id: statutChoice.perso.id,
         statut_service: choice,
-      } as any)
-
-      const updated = await listAffectations(statutChoice.gardeId)
-      setAffByGarde(prev => ({ ...prev, [statutChoice.gardeId]: updated as any }))
+      } as any, versionOf(statutChoice.gardeId))
+      applyGardeDelta(delta)
       setPanel(null)
     } catch (e: any) {
-      alert(e?.message || 'Affectation impossible')
+      onWriteError(e, 'Affectation impossible')
     } finally {
       setStatutChoice(null)
     }
@@ -297,27 +436,28 @@ export default function PlanningPage() {
         }
       }
 
-      await createAffectation({
+      const delta = await createAffectation({
         garde_id: panel.garde.id,
         piquet_id: panel.piquet.id,
         personnel_id,
         statut_service,
-      } as any)
-
-      const updated = await listAffectations(panel.garde.id)
-      setAffByGarde(prev => ({ ...prev, [panel.garde.id]: updated as any }))
+      } as any, versionOf(panel.garde.id))
+      applyGardeDelta(delta)
       setPanel(null)
     } catch (e: any) {
-      alert(e?.message || 'Affectation impossible')
+      onWriteError(e, 'Affectation impossible')
     }
   }
 
   async function remove(aff: Affectation) {
     if (!canModify) return
     if (!confirm('Supprimer cette affectation ?')) return
-    await deleteAffectation(aff.id)
-    const updated = await listAffectations(aff.garde_id)
-    setAffByGarde(prev => ({ ...prev, [aff.garde_id]: updated as any }))
+    try {
+      // If-Match : ne supprime pas une affectation modifiée entre-temps par un autre
+      applyGardeDelta(await deleteAffectation(aff.id, versionOf(aff.garde_id), affectationEtag(aff)))
+    } catch (e) {
+      onWriteError(e, 'Suppression impossible')
+    }
   }
 
   async function toggleIndispo(gardeId: number, personnelId: number) {
@@ -754,7 +894,8 @@ export default function PlanningPage() {
               ) : (
                 <div className="pl-suggests">
                   {proDeGarde.map(d => (
-                    <button key={d.id} className="pl-suggest pl-suggest-pro" onClick={() => add(d.id)}>
+                    <button key={d.id} className={`pl-suggest pl-suggest-pro ${d.eligible ? '' : 'pl-suggest-ineligible'}`}
+                      title={d.reasons.join('\n') || undefined} onClick={() => add(d.id)}>
                       {formatShortName(d.nom, d.prenom)}
                       {d.equipe_id ? <span className="pl-chip">EQ {d.equipe_id}</span> : null}
                     </button>
@@ -771,8 +912,8 @@ export default function PlanningPage() {
                 <div className="pl-muted">Aucune suggestion</div>
               ) : (
                 <div className="pl-suggests">
-                  {suggests.map((s: any) => (
-                    <button key={s.id} className="pl-suggest" onClick={() => add(s.id)}>
+                  {suggests.map(s => (
+                    <button key={s.id} className="pl-suggest" title={s.reasons.join('\n') || undefined} onClick={() => add(s.id)}>
                       {formatShortName(s.nom, s.prenom)} {s.equipe_id ? <span className="pl-chip">EQ {s.equipe_id}</span> : null}
                     </button>
                   ))}
@@ -789,7 +930,8 @@ export default function PlanningPage() {
               ) : (
                 <div className="pl-suggests">
                   {disposAgatt.map(d => (
-                    <button key={d.id} className="pl-suggest pl-suggest-dispo" onClick={() => add(d.id)}>
+                    <button key={d.id} className={`pl-suggest pl-suggest-dispo ${d.eligible ? '' : 'pl-suggest-ineligible'}`}
+                      title={d.reasons.join('\n') || undefined} onClick={() => add(d.id)}>
                       {formatShortName(d.nom, d.prenom)}
                       {d.equipe_id ? <span className="pl-chip">EQ {d.equipe_id}</span> : null}
                     </button>
@@ -1,6 +1,7 @@
 // src/pages/RoleManagement.tsx
 import { useEffect, useState } from "react";
 import api from "../api/axios";
+import { getAllPages } from "../api";
 import { useAuth } from "../auth/AuthContext";
 
 type U = { id: number; email: string; equipe_id: number | null; roles: string[] };
@@ -11,7 +12,7 @@ export default function RoleManagement() {
   const { user } = useAuth();
 
   useEffect(() => {
-    api.get("/roles/list-users").then((r) => setUsers(r.data));
+    getAllPages<U>("/roles/list-users").then(setUsers);
   }, []);
 
   const toggle = async (u: U, role: string) => {
@@ -19,8 +20,7 @@ export default function RoleManagement() {
     const has = u.roles.includes(role);
     if (has) await api.post("/roles/revoke", { user_id: u.id, role });
     else await api.post("/roles/assign", { user_id: u.id, role });
-    const fresh = await api.get("/roles/list-users");
-    setUsers(fresh.data);
+    setUsers(await getAllPages<U>("/roles/list-users"));
   };
 
   return (
@@ -8,6 +8,7 @@ import {
   listPersonnels,
   patchAffectationOpeChecked, // ✅ nouveau nom (export réel dans api.ts)
   bulkOpeCheckForGarde,
+  applyDelta,
   type Garde,
   type Equipe,
   type Piquet,
@@ -197,11 +198,14 @@ export default function SaisieGardesPage() {
     setPendingGardeIds((p) => ({ ...p, [gardeId]: true }));
 
     try {
-      await bulkOpeCheckForGarde(gardeId, { checked });
-
-      // resync depuis le serveur (source de vérité)
-      const updated = (await listAffectations(gardeId)) as any as AffectationWithOpe[];
-      setAffByGarde((prev) => ({ ...prev, [gardeId]: updated }));
+      // resync depuis le serveur (source de vérité) : seules les lignes changées reviennent
+      const known = gardes.find((g) => g.id === gardeId)?.version;
+      const delta = await bulkOpeCheckForGarde(gardeId, { checked }, known);
+      setAffByGarde((prev) => ({
+        ...prev,
+        [gardeId]: applyDelta(prev[gardeId], delta.affectations as any, delta.deleted_affectations, delta.full),
+      }));
+      setGardes((prev) => prev.map((g) => (g.id === gardeId ? { ...g, version: delta.version } : g)));
     } catch (e) {
       // rollback
       setAllLocal(gardeId, !checked);